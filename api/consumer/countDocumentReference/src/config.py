@@ -1,7 +1,11 @@
-import boto3
+from typing import Optional
+
 from pydantic import BaseModel
 
+from nrlf.core.clients import get_client
 from nrlf.core.model import DocumentPointer
+from nrlf.core.patient_filter import build_patient_filter
+from nrlf.core.pointer_counts import PointerCountRepository
 from nrlf.core.repository import Repository
 
 
@@ -22,6 +26,10 @@ class Config(BaseModel):
     ENVIRONMENT: str
     SPLUNK_INDEX: str
     SOURCE: str
+    COUNT_FROM_POINTER_COUNTS: Optional[bool] = None
+    PATIENT_FILTER_BUCKET: Optional[str] = None
+    PATIENT_FILTER_KEY: Optional[str] = None
+    PATIENT_FILTER_TTL_SECONDS: Optional[float] = None
 
 
 def build_persistent_dependencies(config: Config) -> dict[str, any]:
@@ -34,12 +42,24 @@ def build_persistent_dependencies(config: Config) -> dict[str, any]:
     may not be each execution, depending on how busy the API is.
     These dependencies will be passed through to your `handle` function below.
     """
+    client = get_client("dynamodb")
+    pointer_counts = None
+    if config.COUNT_FROM_POINTER_COUNTS:
+        pointer_counts = PointerCountRepository(
+            client=client, environment_prefix=config.PREFIX
+        )
     return {
         "repository": Repository(
             item_type=DocumentPointer,
-            client=boto3.client("dynamodb"),
+            client=client,
             environment_prefix=config.PREFIX,
         ),
+        "pointer_counts": pointer_counts,
+        "patient_filter": build_patient_filter(
+            bucket=config.PATIENT_FILTER_BUCKET,
+            key=config.PATIENT_FILTER_KEY,
+            ttl_seconds=config.PATIENT_FILTER_TTL_SECONDS,
+        ),
         "environment": config.ENVIRONMENT,
         "splunk_index": config.SPLUNK_INDEX,
         "source": config.SOURCE,
@@ -1,6 +1,10 @@
-import boto3
+from typing import Optional
+
 from pydantic import BaseModel
 
+from nrlf.core.cache import build_cache_backend
+from nrlf.core.clients import get_client
+from nrlf.core.item_cache import build_item_cache
 from nrlf.core.model import DocumentPointer
 from nrlf.core.repository import Repository
 
@@ -22,6 +26,10 @@ class Config(BaseModel):
     ENVIRONMENT: str
     SPLUNK_INDEX: str
     SOURCE: str
+    CACHE_URL: Optional[str] = None
+    ITEM_CACHE_SIZE: Optional[int] = None
+    ITEM_CACHE_TTL_SECONDS: Optional[float] = None
+    ITEM_CACHE_NEGATIVE_TTL_SECONDS: Optional[float] = None
 
 
 def build_persistent_dependencies(config: Config) -> dict[str, any]:
@@ -37,8 +45,16 @@ def build_persistent_dependencies(config: Config) -> dict[str, any]:
     return {
         "repository": Repository(
             item_type=DocumentPointer,
-            client=boto3.client("dynamodb"),
+            client=get_client("dynamodb"),
             environment_prefix=config.PREFIX,
+            trusted_reads=True,
+            item_cache=build_item_cache(
+                backend=build_cache_backend(
+                    url=config.CACHE_URL, max_size=config.ITEM_CACHE_SIZE
+                ),
+                ttl_seconds=config.ITEM_CACHE_TTL_SECONDS,
+                negative_ttl_seconds=config.ITEM_CACHE_NEGATIVE_TTL_SECONDS,
+            ),
         ),
         "environment": config.ENVIRONMENT,
         "splunk_index": config.SPLUNK_INDEX,
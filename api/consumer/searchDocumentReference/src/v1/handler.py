@@ -6,6 +6,7 @@ from lambda_pipeline.types import FrozenDict, LambdaContext, PipelineData
 
 from nrlf.core.common_search_steps import get_paginated_document_references
 from nrlf.core.common_steps import make_common_log_action, parse_headers
+from nrlf.core.event_parsing import fetch_query_string_parameters_from_event
 from nrlf.core.model import APIGatewayProxyEventModel, ConsumerRequestParams
 from nrlf.core.repository import Repository
 from nrlf.core.transform import create_bundle_from_paginated_response
@@ -26,16 +27,20 @@ def search_document_references(
     logger: Logger,
 ) -> PipelineData:
 
-    request_params = ConsumerRequestParams(**event.queryStringParameters or {})
+    query_string_params = fetch_query_string_parameters_from_event(event)
+    request_params = ConsumerRequestParams(**query_string_params)
     repo: Repository = dependencies["repository"]
 
     response = get_paginated_document_references(
         request_params=request_params,
-        query_string_params=event.queryStringParameters,
+        query_string_params=query_string_params,
         repository=repo,
         type_identifier=request_params.type,
         raw_pointer_types=data["pointer_types"],
         nhs_number=request_params.nhs_number,
+        search_cache=dependencies.get("search_cache"),
+        patient_filter=dependencies.get("patient_filter"),
+        by_patient_type_index=dependencies.get("search_by_patient_type_index", False),
     )
     bundle = create_bundle_from_paginated_response(response)
     return PipelineData(bundle)
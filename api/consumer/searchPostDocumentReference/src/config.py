@@ -1,8 +1,13 @@
-import boto3
+from typing import Optional
+
 from pydantic import BaseModel
 
+from nrlf.core.cache import build_cache_backend
+from nrlf.core.clients import get_client
 from nrlf.core.model import DocumentPointer
+from nrlf.core.patient_filter import build_patient_filter
 from nrlf.core.repository import Repository
+from nrlf.core.search_cache import build_search_cache
 
 
 class Config(BaseModel):
@@ -22,6 +27,13 @@ class Config(BaseModel):
     ENVIRONMENT: str
     SPLUNK_INDEX: str
     SOURCE: str
+    CACHE_URL: Optional[str] = None
+    SEARCH_CACHE_SIZE: Optional[int] = None
+    SEARCH_CACHE_TTL_SECONDS: Optional[float] = None
+    PATIENT_FILTER_BUCKET: Optional[str] = None
+    PATIENT_FILTER_KEY: Optional[str] = None
+    PATIENT_FILTER_TTL_SECONDS: Optional[float] = None
+    SEARCH_BY_PATIENT_TYPE_INDEX: Optional[bool] = None
 
 
 def build_persistent_dependencies(config: Config) -> dict[str, any]:
@@ -37,9 +49,22 @@ def build_persistent_dependencies(config: Config) -> dict[str, any]:
     return {
         "repository": Repository(
             item_type=DocumentPointer,
-            client=boto3.client("dynamodb"),
+            client=get_client("dynamodb"),
             environment_prefix=config.PREFIX,
+            trusted_reads=True,
+        ),
+        "search_cache": build_search_cache(
+            backend=build_cache_backend(
+                url=config.CACHE_URL, max_size=config.SEARCH_CACHE_SIZE
+            ),
+            ttl_seconds=config.SEARCH_CACHE_TTL_SECONDS,
+        ),
+        "patient_filter": build_patient_filter(
+            bucket=config.PATIENT_FILTER_BUCKET,
+            key=config.PATIENT_FILTER_KEY,
+            ttl_seconds=config.PATIENT_FILTER_TTL_SECONDS,
         ),
+        "search_by_patient_type_index": bool(config.SEARCH_BY_PATIENT_TYPE_INDEX),
         "environment": config.ENVIRONMENT,
         "splunk_index": config.SPLUNK_INDEX,
         "source": config.SOURCE,
@@ -38,6 +38,9 @@ def search_document_references(
         type_identifier=requestParams.type,
         raw_pointer_types=data["pointer_types"],
         nhs_number=requestParams.nhs_number,
+        search_cache=dependencies.get("search_cache"),
+        patient_filter=dependencies.get("patient_filter"),
+        by_patient_type_index=dependencies.get("search_by_patient_type_index", False),
     )
     bundle = create_bundle_from_paginated_response(response)
     return PipelineData(bundle)
@@ -1,13 +1,12 @@
 import os
 
-import boto3
-
 from nrlf.core.authoriser import Config, build_persistent_dependencies, execute_steps
+from nrlf.core.clients import get_client
 
 config = Config(
     **{env_var: os.environ.get(env_var) for env_var in Config.__fields__.keys()}
 )
-S3_CLIENT = boto3.client("s3")
+S3_CLIENT = get_client("s3")
 dependencies = build_persistent_dependencies(config=config, s3_client=S3_CLIENT)
 
 
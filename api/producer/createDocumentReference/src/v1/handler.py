@@ -1,7 +1,7 @@
 from enum import Enum
 from functools import partial
 from logging import Logger
-from typing import Any
+from typing import Any, Union
 
 from lambda_pipeline.types import FrozenDict, LambdaContext, PipelineData
 from lambda_utils.constants import LogLevel
@@ -25,9 +25,9 @@ from nrlf.core.constants import (
 )
 from nrlf.core.dynamodb_types import DynamoDbStringType
 from nrlf.core.errors import (
-    ItemNotFound,
     ProducerValidationError,
     RequestValidationError,
+    SupersedeConditionError,
     SupersedeValidationError,
 )
 from nrlf.core.event_parsing import fetch_body_from_event
@@ -52,7 +52,6 @@ log_action = make_common_log_action()
 
 class LogReference(Enum):
     CREATE_REQUEST = "Parsing request body"
-    CREATE_SUPERSEDE_CHECK = "Determining whether document reference will supersede"
     CREATE_SUPERSEDING = "Mark the document for superseding"
     CREATE_PERMISSIONS = "Validating producer permissions"
     CREATE_DB = "Saving document pointer to db"
@@ -176,51 +175,22 @@ def validate_producer_permissions(
     return PipelineData(**data)
 
 
-@log_action(log_reference=LogReference.CREATE_SUPERSEDE_CHECK, log_level=LogLevel.DEBUG)
-def validate_ok_to_supersede(
-    data: PipelineData,
-    context: LambdaContext,
-    event: APIGatewayProxyEventModel,
-    dependencies: FrozenDict[str, Any],
-    logger: Logger,
-) -> PipelineData:
-    document_pointer_repository: Repository = dependencies.get(
-        PersistentDependencies.DOCUMENT_POINTER_REPOSITORY
-    )
-    source_document_pointer = data["core_model"]
-    delete_pks = list(
-        map(convert_document_pointer_id_to_pk, data.get("delete_item_ids", []))
-    )
-
-    confirmed_delete_pks = []
-
-    for delete_pk in delete_pks:
-        has_delete_target, target_delete_pk = _validate_ok_to_supersede(
-            document_pointer_repository, source_document_pointer, delete_pk, data
-        )
-
-        if has_delete_target:
-            confirmed_delete_pks.append(target_delete_pk)
-
-    return PipelineData(**data, delete_pks=confirmed_delete_pks)
-
-
 def _validate_ok_to_supersede(
-    document_pointer_repository: Repository,
     source_document_pointer: DocumentPointer,
+    document_to_delete: Union[DocumentPointer, None],
     delete_pk: str,
     data: PipelineData,
 ) -> tuple[bool, str]:
+    """
+    Raises the validation error for a delete target which failed the supersede
+    condition, unless it does not exist and this app may ignore that
+    """
     ignore_delete_error = (
         PERMISSION_SUPERSEDE_IGNORE_DELETE_FAIL in data["nrl_permissions"]
     )
     has_delete_target = True
 
-    try:
-        document_to_delete: DocumentPointer = document_pointer_repository.read_item(
-            delete_pk
-        )
-    except ItemNotFound:
+    if document_to_delete is None:
         if ignore_delete_error:
             has_delete_target = False
             return has_delete_target, delete_pk
@@ -248,6 +218,61 @@ def _validate_ok_to_supersede(
     return has_delete_target, delete_pk
 
 
+def _missing_delete_pks(
+    source_document_pointer: DocumentPointer,
+    error: SupersedeConditionError,
+    data: PipelineData,
+) -> list[str]:
+    """
+    Decodes the delete targets which failed the supersede condition into
+    validation errors, returning the pks of any missing targets which this app
+    may ignore
+    """
+    missing_delete_pks = []
+    for delete_pk, item in error.failed_targets.items():
+        document_to_delete = (
+            None if item is None else DocumentPointer.from_dynamodb(item)
+        )
+        has_delete_target, _ = _validate_ok_to_supersede(
+            source_document_pointer, document_to_delete, delete_pk, data
+        )
+        if has_delete_target:
+            raise error  # The target matches, so it must have changed concurrently
+        missing_delete_pks.append(delete_pk)
+    return missing_delete_pks
+
+
+def _supersede(
+    document_pointer_repository: Repository,
+    core_model: DocumentPointer,
+    delete_pks: list[str],
+    data: PipelineData,
+) -> NrlfCoding:
+    """
+    Supersedes the delete targets with the new document pointer. If the only
+    failures were of missing targets which may be ignored then the
+    transaction is retried (once) without them.
+    """
+    try:
+        document_pointer_repository.supersede(
+            create_item=core_model, delete_pks=delete_pks
+        )
+        return NrlfCoding.RESOURCE_SUPERSEDED
+    except SupersedeConditionError as error:
+        missing_delete_pks = _missing_delete_pks(
+            source_document_pointer=core_model, error=error, data=data
+        )
+
+    confirmed_delete_pks = [pk for pk in delete_pks if pk not in missing_delete_pks]
+    if confirmed_delete_pks:
+        document_pointer_repository.supersede(
+            create_item=core_model, delete_pks=confirmed_delete_pks
+        )
+        return NrlfCoding.RESOURCE_SUPERSEDED
+    document_pointer_repository.create(item=core_model)
+    return NrlfCoding.RESOURCE_CREATED
+
+
 @log_action(log_reference=LogReference.CREATE_DB, log_level=LogLevel.DEBUG)
 def save_core_model_to_db(
     data: PipelineData,
@@ -261,16 +286,20 @@ def save_core_model_to_db(
     document_pointer_repository: Repository = dependencies.get(
         PersistentDependencies.DOCUMENT_POINTER_REPOSITORY
     )
-    delete_pks: list[str] = data.get("delete_pks", [])
+    delete_pks = list(
+        map(convert_document_pointer_id_to_pk, data.get("delete_item_ids", []))
+    )
 
     if PERMISSION_AUDIT_DATES_FROM_PAYLOAD in data["nrl_permissions"]:
         core_model = _override_created_on(data=data, document_pointer=core_model)
 
     if delete_pks:
-        document_pointer_repository.supersede(
-            create_item=core_model, delete_pks=delete_pks
+        coding = _supersede(
+            document_pointer_repository=document_pointer_repository,
+            core_model=core_model,
+            delete_pks=delete_pks,
+            data=data,
         )
-        coding = NrlfCoding.RESOURCE_SUPERSEDED
     else:
         document_pointer_repository.create(item=core_model)
         coding = NrlfCoding.RESOURCE_CREATED
@@ -287,6 +316,5 @@ steps = [
     apply_data_contracts,
     mark_as_supersede,
     validate_producer_permissions,
-    validate_ok_to_supersede,
     save_core_model_to_db,
 ]
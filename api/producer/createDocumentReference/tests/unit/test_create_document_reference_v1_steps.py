@@ -1,13 +1,28 @@
 import json
+from http import HTTPStatus
 from logging import getLogger
 from unittest import mock
 
-from lambda_pipeline.types import PipelineData
+import pytest
+from lambda_pipeline.types import FrozenDict, PipelineData
 from lambda_utils.tests.unit.utils import make_aws_event
 
-from api.producer.createDocumentReference.src.v1.handler import parse_request_body
+from api.producer.createDocumentReference.src.constants import PersistentDependencies
+from api.producer.createDocumentReference.src.v1.handler import (
+    parse_request_body,
+    save_core_model_to_db,
+)
 from nrlf.core.constants import ID_SEPARATOR
 from nrlf.core.model import APIGatewayProxyEventModel, DocumentPointer
+from nrlf.core.repository import Repository
+from nrlf.core.response import operation_outcome_not_ok
+from nrlf.core.tests.data_factory import (
+    generate_test_document_reference,
+    generate_test_document_type,
+    generate_test_subject,
+)
+from nrlf.core.tests.test_document_pointers_repository import mock_dynamodb
+from nrlf.core.transform import create_document_pointer_from_fhir_json
 from nrlf.producer.fhir.r4.tests.test_producer_nrlf_model import read_test_data
 
 
@@ -36,3 +51,79 @@ def test_parse_request_body_to_core_model(mock__make_timestamp):
     )
 
     assert pipeline_data["core_model"].dict() == expected_output.dict()
+
+
+def _document_pointer(provider_doc_id: str, **kwargs) -> DocumentPointer:
+    return create_document_pointer_from_fhir_json(
+        fhir_json=generate_test_document_reference(
+            provider_doc_id=provider_doc_id, **kwargs
+        ),
+        api_version=1,
+    )
+
+
+def _supersede_outcome(
+    repository: Repository, core_model: DocumentPointer, target: DocumentPointer
+) -> tuple[HTTPStatus, str]:
+    try:
+        save_core_model_to_db(
+            PipelineData(
+                core_model=core_model,
+                delete_item_ids=[target.id.__root__],
+                nrl_permissions=[],
+            ),
+            None,
+            None,
+            FrozenDict(
+                {PersistentDependencies.DOCUMENT_POINTER_REPOSITORY: repository}
+            ),
+            getLogger(__name__),
+        )
+    except Exception as exception:
+        status_code, outcome = operation_outcome_not_ok(
+            transaction_id="transaction", exception=exception
+        )
+        return status_code, outcome["issue"][0]["diagnostics"]
+    raise AssertionError("The supersede did not fail")
+
+
+@pytest.mark.parametrize(
+    ["target_kwargs", "expected_message"],
+    [
+        [
+            {"subject": generate_test_subject(value="9278693472")},
+            "Validation failure - relatesTo target document nhs number does not match the request",
+        ],
+        [
+            {"type": generate_test_document_type(code="861421000000109")},
+            "Validation failure - relatesTo target document type does not match the request",
+        ],
+    ],
+)
+def test_supersede_target_mismatch_is_a_validation_error(
+    target_kwargs, expected_message
+):
+    target = _document_pointer("original", **target_kwargs)
+    core_model = _document_pointer("replacement")
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=target)
+
+        outcome = _supersede_outcome(repository, core_model, target)
+
+    assert outcome == (HTTPStatus.BAD_REQUEST, expected_message)
+
+
+def test_supersede_missing_target_of_a_duplicate_is_a_validation_error():
+    target = _document_pointer("original")
+    core_model = _document_pointer("replacement")
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=core_model)
+
+        outcome = _supersede_outcome(repository, core_model, target)
+
+    assert outcome == (
+        HTTPStatus.BAD_REQUEST,
+        "Validation failure - relatesTo target document does not exist",
+    )
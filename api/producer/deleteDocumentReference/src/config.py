@@ -1,6 +1,6 @@
-import boto3
 from pydantic import BaseModel
 
+from nrlf.core.clients import get_client
 from nrlf.core.model import DocumentPointer
 from nrlf.core.repository import Repository
 
@@ -37,7 +37,7 @@ def build_persistent_dependencies(config: Config) -> dict[str, any]:
     return {
         "repository": Repository(
             item_type=DocumentPointer,
-            client=boto3.client("dynamodb"),
+            client=get_client("dynamodb"),
             environment_prefix=config.PREFIX,
         ),
         "environment": config.ENVIRONMENT,
@@ -12,7 +12,7 @@ from nrlf.core.common_steps import (
     read_subject_from_path,
 )
 from nrlf.core.errors import RequestValidationError
-from nrlf.core.model import APIGatewayProxyEventModel
+from nrlf.core.model import APIGatewayProxyEventModel, DocumentPointer
 from nrlf.core.nhsd_codings import NrlfCoding
 from nrlf.core.repository import Repository
 from nrlf.core.response import operation_outcome_ok
@@ -22,8 +22,8 @@ log_action = make_common_log_action()
 
 class LogReference(Enum):
     DELETE001 = "Validating producer permissions"
-    DELETE002 = "Validating item exists for deletion"
     DELETE003 = "Deleting document reference"
+    DELETE004 = "Deleted document pointer"
 
 
 @log_action(log_reference=LogReference.DELETE001)
@@ -44,17 +44,9 @@ def validate_producer_permissions(
     return PipelineData(**data)
 
 
-@log_action(log_reference=LogReference.DELETE002)
-def validate_item_exists(
-    data: PipelineData,
-    context: LambdaContext,
-    event: APIGatewayProxyEventModel,
-    dependencies: FrozenDict[str, Any],
-    logger: Logger,
-) -> PipelineData:
-    repository: Repository = dependencies["repository"]
-    repository.read_item(data["pk"])
-    return PipelineData(**data)
+@log_action(log_reference=LogReference.DELETE004, log_fields=["pk"], log_result=False)
+def _delete_document_pointer(repository: Repository, pk: str) -> DocumentPointer:
+    return repository.delete_returning(pk=pk)
 
 
 @log_action(log_reference=LogReference.DELETE003)
@@ -68,7 +60,7 @@ def delete_document_reference(
     repository: Repository = dependencies["repository"]
     pk = data["pk"]
 
-    repository.hard_delete(pk=pk, sk=pk)
+    _delete_document_pointer(repository=repository, pk=pk, logger=logger)
 
     operation_outcome = operation_outcome_ok(
         transaction_id=logger.transaction_id, coding=NrlfCoding.RESOURCE_REMOVED
@@ -81,6 +73,5 @@ steps = [
     parse_headers,
     parse_path_id,
     validate_producer_permissions,
-    validate_item_exists,
     delete_document_reference,
 ]
@@ -1,6 +1,8 @@
-import boto3
+from typing import Optional
+
 from pydantic import BaseModel
 
+from nrlf.core.clients import get_client
 from nrlf.core.model import DocumentPointer
 from nrlf.core.repository import Repository
 
@@ -22,6 +24,7 @@ class Config(BaseModel):
     ENVIRONMENT: str
     SPLUNK_INDEX: str
     SOURCE: str
+    SEARCH_BY_ORGANISATION_PATIENT_INDEX: Optional[bool] = None
 
 
 def build_persistent_dependencies(config: Config) -> dict[str, any]:
@@ -37,8 +40,12 @@ def build_persistent_dependencies(config: Config) -> dict[str, any]:
     return {
         "repository": Repository(
             item_type=DocumentPointer,
-            client=boto3.client("dynamodb"),
+            client=get_client("dynamodb"),
             environment_prefix=config.PREFIX,
+            trusted_reads=True,
+        ),
+        "search_by_organisation_patient_index": bool(
+            config.SEARCH_BY_ORGANISATION_PATIENT_INDEX
         ),
         "environment": config.ENVIRONMENT,
         "splunk_index": config.SPLUNK_INDEX,
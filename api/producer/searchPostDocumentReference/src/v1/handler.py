@@ -4,24 +4,23 @@ from typing import Any
 
 from lambda_pipeline.types import FrozenDict, LambdaContext, PipelineData
 
+from nrlf.core.common_search_steps import get_paginated_producer_document_references
 from nrlf.core.common_steps import (
     make_common_log_action,
     parse_headers,
     read_subject_from_path,
 )
-from nrlf.core.constants import DbPrefix
 from nrlf.core.errors import assert_no_extra_params
 from nrlf.core.event_parsing import fetch_body_from_event
 from nrlf.core.model import (
     APIGatewayProxyEventModel,
     PaginatedResponse,
     ProducerRequestParams,
-    key,
 )
 from nrlf.core.repository import Repository, type_filter
 from nrlf.core.transform import create_bundle_from_paginated_response
 from nrlf.core.validators import validate_type_system
-from nrlf.producer.fhir.r4.model import NextPageToken, RequestQuerySubject
+from nrlf.producer.fhir.r4.model import RequestQuerySubject
 
 log_action = make_common_log_action()
 
@@ -52,16 +51,16 @@ def search_document_references(
         pointer_types=data["pointer_types"],
     )
 
-    next_page_token: NextPageToken = request_params.next_page_token
-
-    if next_page_token is not None:
-        next_page_token = next_page_token.__root__
-
-    response: PaginatedResponse = repository.query_gsi_2(
-        pk=key(DbPrefix.Organization, *ods_code_parts),
-        type=pointer_types,
+    response: PaginatedResponse = get_paginated_producer_document_references(
+        repository=repository,
+        ods_code_parts=ods_code_parts,
         nhs_number=nhs_number,
-        exclusive_start_key=next_page_token,
+        pointer_types=pointer_types,
+        dates=request_params.date,
+        next_page_token=request_params.next_page_token,
+        by_organisation_patient_index=dependencies.get(
+            "search_by_organisation_patient_index", False
+        ),
     )
 
     bundle = create_bundle_from_paginated_response(response)
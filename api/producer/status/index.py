@@ -1,18 +1,17 @@
 import os
 
-import boto3
-from botocore.config import Config
 from lambda_utils.pipeline import render_response
 from lambda_utils.status_endpoint import execute_steps
 
+from nrlf.core.clients import get_client
+
 _DYNAMODB_TIMEOUT = os.environ.get("DYNAMODB_TIMEOUT")
 _AWS_REGION = os.environ.get("AWS_REGION")
 
 DYNAMODB_CLIENT = None
 if _AWS_REGION and _DYNAMODB_TIMEOUT:
-    DYNAMODB_CLIENT = boto3.client(
-        "dynamodb",
-        config=Config(read_timeout=float(_DYNAMODB_TIMEOUT), region_name=_AWS_REGION),
+    DYNAMODB_CLIENT = get_client(
+        "dynamodb", read_timeout=float(_DYNAMODB_TIMEOUT), region_name=_AWS_REGION
     )
 
 
@@ -1,7 +1,9 @@
-import boto3
+from typing import Optional
+
 from pydantic import BaseModel
 
 from api.producer.updateDocumentReference.src.constants import PersistentDependencies
+from nrlf.core.clients import get_client
 from nrlf.core.json_schema import DataContractCache
 from nrlf.core.model import Contract, DocumentPointer
 from nrlf.core.repository import Repository
@@ -24,6 +26,8 @@ class Config(BaseModel):
     ENVIRONMENT: str
     SPLUNK_INDEX: str
     SOURCE: str
+    DOCUMENT_COMPRESSION: Optional[str] = None
+    DOCUMENT_POINTER_COMPACT_LAYOUT: Optional[bool] = None
 
 
 def build_persistent_dependencies(config: Config) -> dict[str, any]:
@@ -36,10 +40,14 @@ def build_persistent_dependencies(config: Config) -> dict[str, any]:
     may not be each execution, depending on how busy the API is.
     These dependencies will be passed through to your `handle` function below.
     """
-    dynamo_client = boto3.client("dynamodb")
+    dynamo_client = get_client("dynamodb")
     return {
         PersistentDependencies.DOCUMENT_POINTER_REPOSITORY: Repository(
-            DocumentPointer, dynamo_client, environment_prefix=config.PREFIX
+            DocumentPointer,
+            dynamo_client,
+            environment_prefix=config.PREFIX,
+            compression=config.DOCUMENT_COMPRESSION,
+            compact_layout=bool(config.DOCUMENT_POINTER_COMPACT_LAYOUT),
         ),
         "contract_repository": Repository(
             Contract, dynamo_client, environment_prefix=config.PREFIX
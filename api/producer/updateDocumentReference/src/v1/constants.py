@@ -1,15 +1 @@
 API_VERSION = 1
-IMMUTABLE_FIELDS = set(
-    (
-        "masterIdentifier",
-        "id",
-        "identifier",
-        "status",
-        "type",
-        "subject",
-        "date",
-        "custodian",
-        "relatesTo",
-        "author",
-    )
-)
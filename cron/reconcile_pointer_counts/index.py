@@ -0,0 +1,62 @@
+"""
+Rebuilds the materialised pointer counts (see nrlf.core.pointer_counts) from
+a parallel scan of the DocumentPointer table, on a schedule, and reports the
+drift which it corrected. Counts which are being written during the scan are
+left for the next run.
+"""
+import os
+
+from aws_lambda_powertools.metrics import Metrics, MetricUnit
+from lambda_utils.constants import MetricsConstants
+
+from cron.reconcile_pointer_counts.model import Environment
+from nrlf.core.clients import get_client
+from nrlf.core.pointer_counts import (
+    CountDrift,
+    PointerCountRepository,
+    reconcile_counts,
+)
+
+SERVICE = "reconcile_pointer_counts"
+REPOSITORY = PointerCountRepository(
+    client=get_client("dynamodb"), environment_prefix=os.environ.get("PREFIX", "")
+)
+
+
+def emit_metrics(drift: CountDrift, environment: str):
+    """Prints the drift in CloudWatch Embedded Metric Format"""
+    emf = Metrics(namespace=MetricsConstants.NAMESPACE, service=SERVICE)
+    emf.add_dimension(name="environment", value=environment)
+    emf.add_metric(
+        name="PointerCountDrifted", unit=MetricUnit.Count, value=drift.drifted
+    )
+    emf.add_metric(
+        name="PointerCountAbsoluteDrift",
+        unit=MetricUnit.Count,
+        value=drift.absolute_drift,
+    )
+    emf.add_metric(
+        name="PointerCountSkipped", unit=MetricUnit.Count, value=drift.skipped
+    )
+    emf.flush_metrics()
+
+
+def handler(
+    event=None,
+    context=None,
+    repository: PointerCountRepository = None,
+    environment: Environment = None,
+) -> dict:
+    if repository is None:
+        repository = REPOSITORY
+
+    if environment is None:
+        environment = Environment.construct()
+
+    repository.start_request()
+    drift = reconcile_counts(
+        repository=repository, total_segments=environment.SCAN_TOTAL_SEGMENTS
+    )
+    emit_metrics(drift=drift, environment=environment.ENVIRONMENT)
+    print("Pointer count drift", drift._asdict())  # noqa
+    return drift._asdict()
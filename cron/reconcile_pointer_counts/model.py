@@ -0,0 +1,15 @@
+import os
+
+from pydantic import BaseModel
+
+from nrlf.core.repository import SCAN_TOTAL_SEGMENTS
+
+
+class Environment(BaseModel):
+    ENVIRONMENT: str
+    PREFIX: str = ""
+    SCAN_TOTAL_SEGMENTS: int = SCAN_TOTAL_SEGMENTS
+
+    @classmethod
+    def construct(cls) -> "Environment":
+        return cls(**os.environ)
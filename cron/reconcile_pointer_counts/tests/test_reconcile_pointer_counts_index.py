@@ -0,0 +1,35 @@
+from cron.reconcile_pointer_counts.index import handler
+from cron.reconcile_pointer_counts.model import Environment
+from nrlf.core.pointer_counts import PointerCountRepository, patient_count_key
+from nrlf.core.tests.test_pointer_counts import (  # noqa: F401
+    NHS_NUMBER,
+    _create_pointers,
+    client,
+)
+from nrlf.core.validators import json_loads
+
+
+def test_handler_reports_drift(client, capsys):
+    _create_pointers(client, (NHS_NUMBER, "1"), (NHS_NUMBER, "2"))
+    repository = PointerCountRepository(client=client)
+    repository.add({patient_count_key(NHS_NUMBER): 5}, batch_id="batch")
+
+    drift = handler(
+        repository=repository,
+        environment=Environment(ENVIRONMENT="test", SCAN_TOTAL_SEGMENTS=1),
+    )
+
+    assert drift == {
+        "pointers": 2,
+        "counts": 1,
+        "drifted": 3,
+        "absolute_drift": 5,
+        "corrected": 3,
+        "skipped": 0,
+    }
+    emf = json_loads(capsys.readouterr().out.splitlines()[0])
+    assert emf["PointerCountDrifted"] == [3]
+    assert emf["PointerCountAbsoluteDrift"] == [5]
+    assert repository.read_counts([patient_count_key(NHS_NUMBER)]) == {
+        patient_count_key(NHS_NUMBER): 2
+    }
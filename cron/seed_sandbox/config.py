@@ -1,7 +1,7 @@
-import boto3
 from pydantic import BaseModel
 
 from cron.seed_sandbox.repository import SandboxRepository
+from nrlf.core.clients import get_client
 
 
 class Config(BaseModel):
@@ -13,7 +13,7 @@ class Config(BaseModel):
 
 
 def build_persistent_dependencies(config: Config) -> dict[str, any]:
-    dynamodb_client = boto3.client("dynamodb")
+    dynamodb_client = get_client("dynamodb")
     return {
         "repository_factory": SandboxRepository.factory(
             client=dynamodb_client, environment_prefix=config.PREFIX
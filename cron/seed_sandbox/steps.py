@@ -8,10 +8,10 @@ from lambda_pipeline.types import FrozenDict, LambdaContext, PipelineData
 from lambda_utils.logging import MinimalEventModelForLogging, log_action
 from pydantic import BaseModel
 
+from cron.seed_sandbox.repository import SandboxRepository
 from cron.seed_sandbox.validators import validate_items
 from nrlf.core.dynamodb_types import to_dynamodb_dict
 from nrlf.core.model import DocumentPointer
-from nrlf.core.repository import Repository
 from nrlf.core.validators import json_load
 
 SANDBOX = "sandbox"
@@ -49,9 +49,8 @@ def _seed_step_factory(
         dependencies: FrozenDict[str, Any],
         logger: Logger,
     ) -> PipelineData:
-        repository: Repository = dependencies["repository_factory"](item_type)
-        for valid_item in valid_items:
-            repository.create(valid_item)
+        repository: SandboxRepository = dependencies["repository_factory"](item_type)
+        repository.create_all(valid_items)
         return PipelineData(message="ok")
 
     if log:
@@ -73,7 +73,9 @@ def test__seed_step_factory(data_in_table_before_operation, temp_directory):
         _repository.create_all(initial_model_data)
 
     # Confirm that the database setup is as we expect
-    initial_existing_items = list(map(DummyModel.parse_obj, _repository._scan()))
+    initial_existing_items = list(
+        map(DummyModel.parse_obj, _repository.parallel_scan(total_segments=1))
+    )
     assert initial_existing_items == initial_model_data
 
     # Create json files to read from
@@ -98,7 +100,9 @@ def test__seed_step_factory(data_in_table_before_operation, temp_directory):
 
     # Check result
     assert dict(result) == {"message": "ok"}
-    created_items = list(map(DummyModel.parse_obj, _repository._scan()))
+    created_items = list(
+        map(DummyModel.parse_obj, _repository.parallel_scan(total_segments=1))
+    )
     expected_items = list(map(DummyModel.parse_obj, new_raw_data))
     assert created_items == expected_items
 
@@ -18,10 +18,14 @@ DOCUMENT_POINTER_TABLE_DEFINITION = {
         {"AttributeName": "sk_1", "AttributeType": "S"},
         {"AttributeName": "pk_2", "AttributeType": "S"},
         {"AttributeName": "sk_2", "AttributeType": "S"},
+        {"AttributeName": "pk_3", "AttributeType": "S"},
+        {"AttributeName": "sk_3", "AttributeType": "S"},
+        {"AttributeName": "pk_4", "AttributeType": "S"},
+        {"AttributeName": "sk_4", "AttributeType": "S"},
     ],
     "KeySchema": [
         {"AttributeName": "pk", "KeyType": "HASH"},
-        {"AttributeName": "sk", "KeyType": "HASH"},
+        {"AttributeName": "sk", "KeyType": "RANGE"},
     ],
     "GlobalSecondaryIndexes": [
         {
@@ -52,6 +56,34 @@ DOCUMENT_POINTER_TABLE_DEFINITION = {
                 "WriteCapacityUnits": 123,
             },
         },
+        {
+            "IndexName": "idx_gsi_3",
+            "KeySchema": [
+                {"AttributeName": "pk_3", "KeyType": "HASH"},
+                {"AttributeName": "sk_3", "KeyType": "RANGE"},
+            ],
+            "Projection": {
+                "ProjectionType": "ALL",
+            },
+            "ProvisionedThroughput": {
+                "ReadCapacityUnits": 123,
+                "WriteCapacityUnits": 123,
+            },
+        },
+        {
+            "IndexName": "idx_gsi_4",
+            "KeySchema": [
+                {"AttributeName": "pk_4", "KeyType": "HASH"},
+                {"AttributeName": "sk_4", "KeyType": "RANGE"},
+            ],
+            "Projection": {
+                "ProjectionType": "ALL",
+            },
+            "ProvisionedThroughput": {
+                "ReadCapacityUnits": 123,
+                "WriteCapacityUnits": 123,
+            },
+        },
     ],
     "BillingMode": "PAY_PER_REQUEST",
 }
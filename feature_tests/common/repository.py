@@ -1,48 +1,20 @@
-from typing import Generator
-
 from pydantic import BaseModel
 
+from nrlf.core.bulk_writer import BulkWriter
+from nrlf.core.codec import encode_item
 from nrlf.core.errors import ItemNotFound
 from nrlf.core.repository import Repository
 
-CHUNK_SIZE = 25
-
-
-def _chunk_list(list_a, chunk_size=CHUNK_SIZE):
-    for i in range(0, len(list_a), chunk_size):
-        yield list_a[i : i + chunk_size]
-
 
 class FeatureTestRepository(Repository):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.delete_all()
 
-    def _scan(self) -> Generator[dict, None, None]:
-        items = []
-        start_key_kwargs = {}
-        while True:
-            response = self.dynamodb.scan(TableName=self.table_name, **start_key_kwargs)
-            yield from response["Items"]
-            try:
-                start_key_kwargs = {"ExclusiveStartKey": response["LastEvaluatedKey"]}
-            except KeyError:
-                break
-
-        return items
-
     def delete_all(self):
-        transact_items = [
-            {
-                "Delete": {
-                    "TableName": self.table_name,
-                    "Key": {"pk": item["pk"], "sk": item["sk"]},
-                }
-            }
-            for item in self._scan()
-        ]
-        for chunk in _chunk_list(transact_items):
-            self.dynamodb.transact_write_items(TransactItems=chunk)
+        bulk_writer = BulkWriter(client=self.dynamodb, table_name=self.table_name)
+        keys = self.parallel_scan(projection=["pk", "sk"])
+        bulk_writer.delete(map(encode_item, keys))
 
     def exists(self, pk) -> tuple[BaseModel, bool, str]:
         item = None
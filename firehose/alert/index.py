@@ -1,7 +1,6 @@
 import os
 from pathlib import Path
 
-import boto3
 from lambda_utils.logging import Logger, prepare_default_event_for_logging
 from pydantic import BaseModel, Json
 
@@ -12,6 +11,7 @@ from firehose.alert.steps import (
     read_body,
     send_notification,
 )
+from nrlf.core.clients import get_client
 
 
 class Config(BaseModel):
@@ -24,7 +24,7 @@ class Config(BaseModel):
 CONFIG = Config(
     **{env_var: os.environ.get(env_var) for env_var in Config.__fields__.keys()}
 )
-S3_CLIENT = boto3.client("s3")
+S3_CLIENT = get_client("s3")
 
 
 def handler(event: dict, context=None):
@@ -1,13 +1,13 @@
 import os
 from pathlib import Path
 
-import boto3
 from aws_lambda_powertools.utilities.parser.models.kinesis_firehose import (
     KinesisFirehoseModel,
 )
 from lambda_utils.logging import Logger, prepare_default_event_for_logging
 from pydantic import BaseModel
 
+from nrlf.core.clients import get_client
 from nrlf.core.firehose.handler import firehose_handler
 
 
@@ -27,7 +27,7 @@ class Config(BaseModel):
 CONFIG = Config(
     **{env_var: os.environ.get(env_var) for env_var in Config.__fields__.keys()}
 )
-BOTO3_FIREHOSE_CLIENT = boto3.client("firehose")
+BOTO3_FIREHOSE_CLIENT = get_client("firehose")
 
 
 def handler(event, context):
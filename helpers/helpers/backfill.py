@@ -0,0 +1,353 @@
+"""
+Adds any index keys which are missing from (or out of date on) existing items,
+for example after a new Global Secondary Index has been added to a model,
+re-encodes the document of existing items with (or without) compression, or
+migrates existing items to the compact layout.
+
+Usage:
+
+    python helpers/helpers/backfill.py keys <environment> <workspace> [--dry_run]
+    python helpers/helpers/backfill.py documents <environment> <workspace> [--compression=zlib] [--dry_run]
+    python helpers/helpers/backfill.py compact <environment> <workspace> [--checkpoint_file=<path>] [--dry_run]
+
+The compact migration can be interrupted and then resumed by passing the same
+checkpoint file again.
+"""
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Iterator, Union
+
+from botocore.exceptions import ClientError
+from fire import Fire
+
+from helpers.aws_session import new_session_from_env
+from nrlf.core.codec import encode
+from nrlf.core.compression import (
+    ZLIB,
+    compress_attributes,
+    decompress_attribute,
+    item_size,
+)
+from nrlf.core.model import (
+    DOCUMENT_POINTER_LAYOUT_VERSION,
+    LAYOUT_VERSION,
+    DocumentPointer,
+    DynamoDbModel,
+    redundant_document_pointer_attributes,
+)
+from nrlf.core.repository import SCAN_TOTAL_SEGMENTS, Repository
+from nrlf.core.types import DynamoDbClient
+from nrlf.core.validators import json_loads
+
+INDEX_KEY_ATTRIBUTE = re.compile(r"^(pk|sk)_\d+$")
+PRIMARY_KEY_CONDITION = "attribute_exists(pk) AND attribute_exists(sk)"
+COMPACT_LAYOUT_PROJECTION = [
+    "pk",
+    "sk",
+    "id",
+    "producer_id",
+    "custodian",
+    "custodian_suffix",
+    "updated_on",
+    "schemas",
+    LAYOUT_VERSION,
+]
+
+
+def _scan(
+    client: DynamoDbClient, table_name: str, segment: int, total_segments: int
+) -> Iterator[dict]:
+    scan_kwargs = {
+        "TableName": table_name,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+    }
+    while True:
+        response = client.scan(**scan_kwargs)
+        yield from response["Items"]
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _stale_index_keys(item: dict, item_type: type[DynamoDbModel]) -> dict:
+    expected_keys = {
+        attribute: value
+        for (attribute, value) in item_type.from_dynamodb(item).dict().items()
+        if INDEX_KEY_ATTRIBUTE.match(attribute)
+    }
+    return {
+        attribute: value
+        for (attribute, value) in expected_keys.items()
+        if item.get(attribute) != value
+    }
+
+
+def _update_index_keys(
+    client: DynamoDbClient, table_name: str, item: dict, index_keys: dict
+):
+    client.update_item(
+        TableName=table_name,
+        Key={"pk": item["pk"], "sk": item["sk"]},
+        UpdateExpression="SET "
+        + ", ".join(f"#{attribute} = :{attribute}" for attribute in index_keys),
+        ConditionExpression=PRIMARY_KEY_CONDITION,
+        ExpressionAttributeNames={
+            f"#{attribute}": attribute for attribute in index_keys
+        },
+        ExpressionAttributeValues={
+            f":{attribute}": value for (attribute, value) in index_keys.items()
+        },
+    )
+
+
+def backfill_index_keys(
+    client: DynamoDbClient,
+    table_name: str,
+    item_type: type[DynamoDbModel] = DocumentPointer,
+    segment: int = 0,
+    total_segments: int = 1,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Scans (a segment of) the table, setting the index keys of every item to
+    those of its model. Items which can't be parsed are left untouched.
+    """
+    counts = {"scanned": 0, "updated": 0, "skipped": 0}
+    for item in _scan(
+        client=client,
+        table_name=table_name,
+        segment=segment,
+        total_segments=total_segments,
+    ):
+        counts["scanned"] += 1
+        try:
+            index_keys = _stale_index_keys(item=item, item_type=item_type)
+        except (ValueError, TypeError, KeyError):
+            counts["skipped"] += 1
+            continue
+        if not index_keys:
+            continue
+        if not dry_run:
+            _update_index_keys(
+                client=client, table_name=table_name, item=item, index_keys=index_keys
+            )
+        counts["updated"] += 1
+    return counts
+
+
+def _update_document(
+    client: DynamoDbClient, table_name: str, item: dict, document: dict
+):
+    """Conditional on the document being unchanged since it was scanned"""
+    client.update_item(
+        TableName=table_name,
+        Key={"pk": item["pk"], "sk": item["sk"]},
+        UpdateExpression="SET #document = :document",
+        ConditionExpression=f"{PRIMARY_KEY_CONDITION} AND #document = :scanned",
+        ExpressionAttributeNames={"#document": "document"},
+        ExpressionAttributeValues={":document": document, ":scanned": item["document"]},
+    )
+
+
+def encode_documents(
+    client: DynamoDbClient,
+    table_name: str,
+    compression: Union[str, None] = ZLIB,
+    segment: int = 0,
+    total_segments: int = 1,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Scans (a segment of) the table, re-encoding the document of every item
+    with the given compression (or without compression if None). Items which
+    can't be decoded, or which change while being re-encoded, are skipped.
+    Also counts the total size of the items before and after, in bytes.
+    """
+    counts = {"scanned": 0, "updated": 0, "skipped": 0, "bytes": 0, "new_bytes": 0}
+    for item in _scan(
+        client=client,
+        table_name=table_name,
+        segment=segment,
+        total_segments=total_segments,
+    ):
+        counts["scanned"] += 1
+        try:
+            raw_document = {"S": decompress_attribute(item["document"])}
+        except (ValueError, KeyError, zlib.error):
+            counts["skipped"] += 1
+            continue
+        document = compress_attributes(
+            {"document": raw_document}, compression=compression
+        )["document"]
+        counts["bytes"] += item_size(item)
+        counts["new_bytes"] += item_size({**item, "document": document})
+        if document == item["document"]:
+            continue
+        if not dry_run:
+            try:
+                _update_document(
+                    client=client, table_name=table_name, item=item, document=document
+                )
+            except ClientError as error:
+                if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                counts["skipped"] += 1
+                continue
+        counts["updated"] += 1
+    return counts
+
+
+def _unchanged_condition(name: str, value: any) -> tuple[str, dict]:
+    """A condition that a redundant attribute still has its scanned value"""
+    if value is None:
+        return f"attribute_type(#{name}, :{name})", {f":{name}": {"S": "NULL"}}
+    if value == []:
+        return f"size(#{name}) = :{name}", {f":{name}": {"N": "0"}}
+    return f"#{name} = :{name}", {f":{name}": encode(value)}
+
+
+def _compact_item(client: DynamoDbClient, table_name: str, item: dict):
+    """Conditional on the removed attributes being unchanged since scanned"""
+    redundant = redundant_document_pointer_attributes(
+        {name: value for (name, value) in item.items() if name not in ("pk", "sk")}
+    )
+    conditions = [PRIMARY_KEY_CONDITION]
+    values = {f":{LAYOUT_VERSION}": {"N": str(DOCUMENT_POINTER_LAYOUT_VERSION)}}
+    for name in redundant:
+        condition, value = _unchanged_condition(name=name, value=item[name])
+        conditions.append(condition)
+        values.update(value)
+    update_expression = f"SET #{LAYOUT_VERSION} = :{LAYOUT_VERSION}"
+    if redundant:
+        update_expression += " REMOVE " + ", ".join(f"#{name}" for name in redundant)
+    client.update_item(
+        TableName=table_name,
+        Key={"pk": encode(item["pk"]), "sk": encode(item["sk"])},
+        UpdateExpression=update_expression,
+        ConditionExpression=" AND ".join(conditions),
+        ExpressionAttributeNames={
+            f"#{name}": name for name in (LAYOUT_VERSION, *redundant)
+        },
+        ExpressionAttributeValues=values,
+    )
+
+
+def compact_document_pointers(
+    client: DynamoDbClient,
+    environment_prefix: str = "",
+    total_segments: int = SCAN_TOTAL_SEGMENTS,
+    checkpoints: dict = None,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Scans the table in parallel, migrating every document pointer to the
+    compact layout by removing the attributes which are rebuilt on read.
+    Each removal is conditional on the attribute being unchanged since it was
+    scanned, otherwise the item is skipped. Pass 'checkpoints' to be able to
+    resume the migration (see 'Repository.parallel_scan').
+    """
+    repository = Repository(
+        item_type=DocumentPointer,
+        client=client,
+        environment_prefix=environment_prefix,
+    )
+    counts = {"scanned": 0, "updated": 0, "skipped": 0}
+    for item in repository.parallel_scan(
+        total_segments=total_segments,
+        projection=COMPACT_LAYOUT_PROJECTION,
+        checkpoints=checkpoints,
+    ):
+        counts["scanned"] += 1
+        if LAYOUT_VERSION in item:
+            continue
+        if not dry_run:
+            try:
+                _compact_item(
+                    client=client, table_name=repository.table_name, item=item
+                )
+            except (ClientError, KeyError) as error:
+                if isinstance(error, ClientError) and (
+                    error.response["Error"]["Code"] != "ConditionalCheckFailedException"
+                ):
+                    raise
+                counts["skipped"] += 1
+                continue
+        counts["updated"] += 1
+    return counts
+
+
+class CLI:
+    def keys(
+        self,
+        environment: str,
+        workspace: str,
+        segment: int = 0,
+        total_segments: int = 1,
+        dry_run: bool = False,
+    ):
+        session = new_session_from_env(env=environment)
+        counts = backfill_index_keys(
+            client=session.client("dynamodb"),
+            table_name=f"nhsd-nrlf--{workspace}--{DocumentPointer.kebab()}",
+            segment=segment,
+            total_segments=total_segments,
+            dry_run=dry_run,
+        )
+        print(counts)  # noqa: T201
+
+    def documents(
+        self,
+        environment: str,
+        workspace: str,
+        compression: Union[str, None] = ZLIB,
+        segment: int = 0,
+        total_segments: int = 1,
+        dry_run: bool = False,
+    ):
+        session = new_session_from_env(env=environment)
+        counts = encode_documents(
+            client=session.client("dynamodb"),
+            table_name=f"nhsd-nrlf--{workspace}--{DocumentPointer.kebab()}",
+            compression=compression,
+            segment=segment,
+            total_segments=total_segments,
+            dry_run=dry_run,
+        )
+        print(counts)  # noqa: T201
+
+    def compact(
+        self,
+        environment: str,
+        workspace: str,
+        total_segments: int = SCAN_TOTAL_SEGMENTS,
+        checkpoint_file: str = None,
+        dry_run: bool = False,
+    ):
+        session = new_session_from_env(env=environment)
+        checkpoints = {}
+        if checkpoint_file and Path(checkpoint_file).exists():
+            checkpoints = {
+                int(segment): checkpoint
+                for (segment, checkpoint) in json_loads(
+                    Path(checkpoint_file).read_text()
+                ).items()
+            }
+        try:
+            counts = compact_document_pointers(
+                client=session.client("dynamodb"),
+                environment_prefix=f"nhsd-nrlf--{workspace}--",
+                total_segments=total_segments,
+                checkpoints=checkpoints,
+                dry_run=dry_run,
+            )
+        finally:
+            if checkpoint_file:
+                Path(checkpoint_file).write_text(json.dumps(checkpoints))
+        print(counts)  # noqa: T201
+
+
+if __name__ == "__main__":
+    Fire(CLI())
@@ -0,0 +1,251 @@
+import boto3
+import moto
+import pytest
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from helpers.backfill import (
+    backfill_index_keys,
+    compact_document_pointers,
+    encode_documents,
+)
+from nrlf.core.compression import ZLIB
+from nrlf.core.model import LAYOUT_VERSION, DocumentPointer
+from nrlf.core.repository import SCAN_COMPLETE, Repository
+from nrlf.core.tests.data_factory import generate_test_document_reference
+from nrlf.core.transform import create_document_pointer_from_fhir_json
+
+TABLE_NAME = DocumentPointer.kebab()
+
+
+@pytest.fixture
+def client():
+    with moto.mock_dynamodb():
+        client = boto3.client("dynamodb")
+        client.create_table(TableName=TABLE_NAME, **DOCUMENT_POINTER_TABLE_DEFINITION)
+        yield client
+
+
+def _put_items_without_new_index_keys(client, n_items: int) -> list[DocumentPointer]:
+    document_pointers = []
+    for ix in range(n_items):
+        document_pointer = create_document_pointer_from_fhir_json(
+            fhir_json=generate_test_document_reference(provider_doc_id=f"doc-{ix}"),
+            api_version=1,
+        )
+        item = document_pointer.dict()
+        for attribute in ("pk_3", "sk_3", "pk_4", "sk_4"):
+            item.pop(attribute)
+        client.put_item(TableName=TABLE_NAME, Item=item)
+        document_pointers.append(document_pointer)
+    return document_pointers
+
+
+def _query_gsi_3(client, document_pointer: DocumentPointer) -> list:
+    repository = Repository(item_type=DocumentPointer, client=client)
+    return repository.query_gsi_3(pk=document_pointer.pk_3.__root__).items
+
+
+def _query_gsi_4(client, document_pointer: DocumentPointer) -> list:
+    repository = Repository(item_type=DocumentPointer, client=client)
+    return repository.query_gsi_4(pk=document_pointer.pk_4.__root__).items
+
+
+def test_backfill_index_keys(client):
+    (document_pointer, *_) = _put_items_without_new_index_keys(client=client, n_items=3)
+    assert _query_gsi_3(client=client, document_pointer=document_pointer) == []
+
+    counts = backfill_index_keys(client=client, table_name=TABLE_NAME)
+
+    assert counts == {"scanned": 3, "updated": 3, "skipped": 0}
+    assert len(_query_gsi_3(client=client, document_pointer=document_pointer)) == 3
+    assert len(_query_gsi_4(client=client, document_pointer=document_pointer)) == 3
+
+
+def test_backfill_index_keys_is_idempotent(client):
+    _put_items_without_new_index_keys(client=client, n_items=2)
+    backfill_index_keys(client=client, table_name=TABLE_NAME)
+
+    counts = backfill_index_keys(client=client, table_name=TABLE_NAME)
+
+    assert counts == {"scanned": 2, "updated": 0, "skipped": 0}
+
+
+def test_backfill_index_keys_dry_run(client):
+    (document_pointer,) = _put_items_without_new_index_keys(client=client, n_items=1)
+
+    counts = backfill_index_keys(client=client, table_name=TABLE_NAME, dry_run=True)
+
+    assert counts == {"scanned": 1, "updated": 1, "skipped": 0}
+    assert _query_gsi_3(client=client, document_pointer=document_pointer) == []
+
+
+def test_backfill_index_keys_skips_corrupt_items(client):
+    _put_items_without_new_index_keys(client=client, n_items=1)
+    client.put_item(
+        TableName=TABLE_NAME, Item={"pk": {"S": "D#corrupt"}, "sk": {"S": "D#corrupt"}}
+    )
+
+    counts = backfill_index_keys(client=client, table_name=TABLE_NAME)
+
+    assert counts == {"scanned": 2, "updated": 1, "skipped": 1}
+
+
+@pytest.mark.parametrize("total_segments", [1, 2, 4])
+def test_backfill_index_keys_in_segments(client, total_segments):
+    _put_items_without_new_index_keys(client=client, n_items=10)
+
+    n_updated = sum(
+        backfill_index_keys(
+            client=client,
+            table_name=TABLE_NAME,
+            segment=segment,
+            total_segments=total_segments,
+        )["updated"]
+        for segment in range(total_segments)
+    )
+
+    assert n_updated == 10
+
+
+def _put_items(client, n_items: int) -> list[DocumentPointer]:
+    repository = Repository(item_type=DocumentPointer, client=client)
+    document_pointers = []
+    for ix in range(n_items):
+        document_pointer = create_document_pointer_from_fhir_json(
+            fhir_json=generate_test_document_reference(provider_doc_id=f"doc-{ix}"),
+            api_version=1,
+        )
+        repository.create(item=document_pointer)
+        document_pointers.append(document_pointer)
+    return document_pointers
+
+
+def _document_attributes(client) -> list[dict]:
+    return [item["document"] for item in client.scan(TableName=TABLE_NAME)["Items"]]
+
+
+def test_encode_documents(client):
+    (document_pointer, *_) = _put_items(client=client, n_items=3)
+
+    counts = encode_documents(client=client, table_name=TABLE_NAME, compression=ZLIB)
+
+    assert counts["scanned"] == counts["updated"] == 3
+    assert counts["new_bytes"] < counts["bytes"]
+    assert all(set(document) == {"B"} for document in _document_attributes(client))
+    repository = Repository(item_type=DocumentPointer, client=client)
+    assert repository.read_item(pk=document_pointer.pk.__root__) == document_pointer
+
+
+def test_encode_documents_is_idempotent(client):
+    _put_items(client=client, n_items=2)
+    encode_documents(client=client, table_name=TABLE_NAME, compression=ZLIB)
+
+    counts = encode_documents(client=client, table_name=TABLE_NAME, compression=ZLIB)
+
+    assert counts["updated"] == 0
+    assert counts["new_bytes"] == counts["bytes"]
+
+
+def test_encode_documents_without_compression(client):
+    _put_items(client=client, n_items=2)
+    documents = _document_attributes(client)
+    encode_documents(client=client, table_name=TABLE_NAME, compression=ZLIB)
+
+    counts = encode_documents(client=client, table_name=TABLE_NAME, compression=None)
+
+    assert counts["updated"] == 2
+    assert _document_attributes(client) == documents
+
+
+def test_encode_documents_dry_run(client):
+    _put_items(client=client, n_items=1)
+    documents = _document_attributes(client)
+
+    counts = encode_documents(
+        client=client, table_name=TABLE_NAME, compression=ZLIB, dry_run=True
+    )
+
+    assert counts["updated"] == 1
+    assert _document_attributes(client) == documents
+
+
+def test_encode_documents_skips_corrupt_items(client):
+    _put_items(client=client, n_items=1)
+    client.put_item(
+        TableName=TABLE_NAME,
+        Item={
+            "pk": {"S": "D#corrupt"},
+            "sk": {"S": "D#corrupt"},
+            "document": {"B": b"\xffcorrupt"},
+        },
+    )
+
+    counts = encode_documents(client=client, table_name=TABLE_NAME, compression=ZLIB)
+
+    assert (counts["scanned"], counts["updated"], counts["skipped"]) == (2, 1, 1)
+
+
+# moto doesn't segment scans, so these scan in a single segment
+
+
+def _scan_items(client) -> list[dict]:
+    return client.scan(TableName=TABLE_NAME)["Items"]
+
+
+def test_compact_document_pointers(client):
+    (document_pointer, *_) = _put_items(client=client, n_items=3)
+
+    counts = compact_document_pointers(client=client, total_segments=1)
+
+    assert counts == {"scanned": 3, "updated": 3, "skipped": 0}
+    for item in _scan_items(client):
+        assert item[LAYOUT_VERSION] == {"N": "2"}
+        assert not {"custodian", "custodian_suffix", "updated_on"} & set(item)
+    repository = Repository(item_type=DocumentPointer, client=client)
+    assert repository.read_item(pk=document_pointer.pk.__root__) == document_pointer
+
+
+def test_compact_document_pointers_is_idempotent(client):
+    _put_items(client=client, n_items=2)
+    compact_document_pointers(client=client, total_segments=1)
+    items = _scan_items(client)
+
+    counts = compact_document_pointers(client=client, total_segments=1)
+
+    assert counts == {"scanned": 2, "updated": 0, "skipped": 0}
+    assert _scan_items(client) == items
+
+
+def test_compact_document_pointers_dry_run(client):
+    _put_items(client=client, n_items=1)
+    items = _scan_items(client)
+
+    counts = compact_document_pointers(client=client, total_segments=1, dry_run=True)
+
+    assert counts["updated"] == 1
+    assert _scan_items(client) == items
+
+
+def test_compact_document_pointers_skips_corrupt_items(client):
+    _put_items(client=client, n_items=1)
+    client.put_item(
+        TableName=TABLE_NAME,
+        Item={"pk": {"S": "D#corrupt"}, "sk": {"S": "D#corrupt"}},
+    )
+
+    counts = compact_document_pointers(client=client, total_segments=1)
+
+    assert counts == {"scanned": 2, "updated": 1, "skipped": 1}
+
+
+def test_compact_document_pointers_resumes_from_checkpoints(client):
+    _put_items(client=client, n_items=2)
+    checkpoints = {}
+    compact_document_pointers(client=client, total_segments=1, checkpoints=checkpoints)
+    assert set(checkpoints.values()) == {SCAN_COMPLETE}
+
+    counts = compact_document_pointers(
+        client=client, total_segments=1, checkpoints=checkpoints
+    )
+
+    assert counts == {"scanned": 0, "updated": 0, "skipped": 0}
@@ -14,6 +14,12 @@ class LoggingConstants:
     REDACTED = "REDACTED"
 
 
+class MetricsConstants:
+    NAMESPACE = "NRLF"
+    DYNAMODB = "dynamodb"
+    CACHE_BACKEND = "cache_backend"
+
+
 class LogLevel:
     INFO = INFO
     ERROR = ERROR
@@ -55,6 +55,7 @@ class LogTemplate(LogTemplateBase):
     data: LogData
     error: Union[Exception, str, None]
     call_stack: str = None
+    metrics: Optional[dict] = None
     timestamp: str = Field(default_factory=make_timestamp)
     sensitive: bool = True
 
@@ -1,12 +1,15 @@
 import json
+from collections import Counter, defaultdict
 from enum import Enum
 from http import HTTPStatus
 from pathlib import Path
 from types import FunctionType
+from typing import Union
 
+from aws_lambda_powertools.metrics import Metrics, MetricUnit
 from lambda_pipeline.pipeline import make_pipeline
 from lambda_pipeline.types import LambdaContext, PipelineData
-from lambda_utils.constants import LogLevel
+from lambda_utils.constants import LogLevel, MetricsConstants
 from lambda_utils.logging import (
     Logger,
     MinimalEventModelForLogging,
@@ -21,8 +24,14 @@ from lambda_utils.versioning import (
 )
 from pydantic import ValidationError
 
+from nrlf.core.clients import pop_construction_seconds
+from nrlf.core.item_cache import ItemCache
+from nrlf.core.metrics import DynamoDbMetrics
 from nrlf.core.model import APIGatewayProxyEventModel
+from nrlf.core.patient_filter import PatientFilter
+from nrlf.core.repository import Repository
 from nrlf.core.response import operation_outcome_not_ok
+from nrlf.core.search_cache import SearchCache
 from nrlf.core.transform import strip_empty_json_paths
 
 
@@ -71,6 +80,107 @@ def _setup_logger(
     )
 
 
+def _repositories(dependencies: dict) -> list[Repository]:
+    return [
+        dependency
+        for dependency in dependencies.values()
+        if isinstance(dependency, Repository)
+    ]
+
+
+def _dynamodb_metrics(dependencies: dict) -> list[DynamoDbMetrics]:
+    """The metrics of each Repository in the dependencies"""
+    return [repository.metrics for repository in _repositories(dependencies)]
+
+
+def _caches(
+    dependencies: dict,
+) -> list[Union[ItemCache, SearchCache, PatientFilter]]:
+    """
+    The item caches of the Repositories, and any other caches (including the
+    patient filter), in dependencies
+    """
+    caches = [
+        repository.item_cache
+        for repository in _repositories(dependencies)
+        if repository.item_cache is not None
+    ]
+    return caches + [
+        dependency
+        for dependency in dependencies.values()
+        if isinstance(dependency, (ItemCache, SearchCache, PatientFilter))
+    ]
+
+
+def _cache_statistics(dependencies: dict) -> dict[str, dict[str, int]]:
+    """The counters of each kind of cache, and of their backends"""
+    statistics = defaultdict(Counter)
+    backends = {}
+    for cache in _caches(dependencies):
+        statistics[cache.name].update(cache.statistics.dict())
+        if getattr(cache, "backend", None) is not None:
+            backends[id(cache.backend)] = cache.backend
+    for backend in backends.values():
+        backend_statistics = statistics[MetricsConstants.CACHE_BACKEND]
+        backend_statistics.update(backend.statistics.dict())
+        if backend.size() is not None:
+            backend_statistics["size"] += backend.size()
+    return {name: dict(counters) for name, counters in statistics.items()}
+
+
+def _metrics_scope(*args, dependencies: dict, **kwargs) -> dict[str, dict]:
+    """Adds the DynamoDb metrics and cache counters of the request to its log"""
+    metrics = DynamoDbMetrics.merge(_dynamodb_metrics(dependencies))
+    return {
+        "metrics": {
+            MetricsConstants.DYNAMODB: metrics.dict(),
+            **_cache_statistics(dependencies),
+        }
+    }
+
+
+def _emit_dynamodb_metrics(metrics: DynamoDbMetrics, index_path: str, environment: str):
+    """Prints the metrics in CloudWatch Embedded Metric Format"""
+    if not metrics.total_calls:
+        return
+    emf = Metrics(
+        namespace=MetricsConstants.NAMESPACE, service=Path(index_path).parent.name
+    )
+    emf.add_dimension(name="environment", value=environment)
+    for name, unit, value in (
+        ("DynamoDbCalls", MetricUnit.Count, metrics.total_calls),
+        ("DynamoDbPages", MetricUnit.Count, metrics.pages),
+        ("DynamoDbScannedCount", MetricUnit.Count, metrics.scanned_count),
+        ("DynamoDbCount", MetricUnit.Count, metrics.count),
+        ("ConsumedReadCapacityUnits", MetricUnit.Count, metrics.read_capacity_units),
+        ("ConsumedWriteCapacityUnits", MetricUnit.Count, metrics.write_capacity_units),
+        ("DynamoDbRetries", MetricUnit.Count, metrics.retries),
+        ("DynamoDbThrottles", MetricUnit.Count, metrics.throttles),
+        ("DynamoDbDuration", MetricUnit.Milliseconds, metrics.milliseconds),
+    ):
+        emf.add_metric(name=name, unit=unit, value=value)
+    emf.flush_metrics()
+
+
+def _emit_client_construction_metrics(index_path: str, environment: str):
+    """
+    Prints the time taken to construct each client (i.e. during the cold
+    start) in CloudWatch Embedded Metric Format, once per container
+    """
+    for service_name, seconds in pop_construction_seconds().items():
+        emf = Metrics(
+            namespace=MetricsConstants.NAMESPACE, service=Path(index_path).parent.name
+        )
+        emf.add_dimension(name="environment", value=environment)
+        emf.add_dimension(name="client", value=service_name)
+        emf.add_metric(
+            name="ClientConstructionDuration",
+            unit=MetricUnit.Milliseconds,
+            value=seconds * 1000,
+        )
+        emf.flush_metrics()
+
+
 @log_action(
     log_reference=LogReference.VERSION_CHECK,
     log_level=LogLevel.DEBUG,
@@ -88,6 +198,7 @@ def _get_steps_for_version_header(index_path: str, event: dict) -> list[Function
     log_reference=LogReference.OPERATION,
     log_level=LogLevel.INFO,
     log_fields=["steps", "event"],
+    scope_fn=_metrics_scope,
 )
 def _execute_steps(
     steps: list[FunctionType],
@@ -145,7 +256,13 @@ def execute_steps(
         return status_code, response
     steps = response
 
-    return _function_handler(
+    for repository in _repositories(dependencies):
+        repository.start_request()  # Repositories persist between requests
+    for cache in _caches(dependencies):
+        cache.reset_statistics()
+    dynamodb_metrics = _dynamodb_metrics(dependencies)
+
+    status_code, response = _function_handler(
         _execute_steps,
         status_code_ok=http_status_ok,
         transaction_id=transaction_id,
@@ -156,6 +273,15 @@ def execute_steps(
             "initial_pipeline_data": initial_pipeline_data,
         },
     )
+    _emit_dynamodb_metrics(
+        metrics=DynamoDbMetrics.merge(dynamodb_metrics),
+        index_path=index_path,
+        environment=dependencies["environment"],
+    )
+    _emit_client_construction_metrics(
+        index_path=index_path, environment=dependencies["environment"]
+    )
+    return status_code, response
 
 
 def render_response(status_code: HTTPStatus, result: dict) -> dict:
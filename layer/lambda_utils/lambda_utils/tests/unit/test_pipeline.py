@@ -1,7 +1,24 @@
+from unittest import mock
+
 import pytest
-from lambda_utils.pipeline import _get_steps
+from lambda_utils.pipeline import (
+    _dynamodb_metrics,
+    _emit_client_construction_metrics,
+    _emit_dynamodb_metrics,
+    _get_steps,
+    _metrics_scope,
+)
 from lambda_utils.versioning import VersionException
 
+from nrlf.core.cache import InProcessCacheBackend
+from nrlf.core.item_cache import ItemCache
+from nrlf.core.metrics import DynamoDbMetrics
+from nrlf.core.model import DocumentPointer
+from nrlf.core.patient_filter import PatientFilter
+from nrlf.core.repository import Repository
+from nrlf.core.search_cache import SearchCache
+from nrlf.core.validators import json_loads
+
 
 @pytest.mark.parametrize(
     "requested_version,handler_version,expected_steps",
@@ -24,3 +41,83 @@ def test_get_steps(requested_version: str, handler_version: dict):
     with pytest.raises(VersionException) as e:
         _get_steps(requested_version, handler_version)
     assert str(e.value) == "Version not supported"
+
+
+def _dependencies() -> dict:
+    repository = Repository(item_type=DocumentPointer, client=None)
+    repository.metrics.record(
+        operation="query",
+        response={
+            "Count": 1,
+            "ScannedCount": 1,
+            "ConsumedCapacity": {"TableName": "foo", "CapacityUnits": 0.5},
+        },
+        seconds=0.1,
+    )
+    return {"repository": repository, "environment": "dev"}
+
+
+def test_dynamodb_metrics():
+    dependencies = _dependencies()
+    assert _dynamodb_metrics(dependencies) == [dependencies["repository"].metrics]
+
+
+def test_metrics_scope():
+    scope = _metrics_scope("steps", dependencies=_dependencies(), logger=None)
+    assert scope["metrics"]["dynamodb"]["calls"] == {"query": 1}
+    assert scope["metrics"]["dynamodb"]["read_capacity_units"] == 0.5
+
+
+def test_emit_dynamodb_metrics(capsys):
+    (metrics,) = _dynamodb_metrics(_dependencies())
+
+    _emit_dynamodb_metrics(
+        metrics=metrics, index_path="api/foo/bar/index.py", environment="dev"
+    )
+
+    emf = json_loads(capsys.readouterr().out)
+    assert (emf["service"], emf["environment"]) == ("bar", "dev")
+    assert emf["DynamoDbCalls"] == [1.0]
+    assert emf["ConsumedReadCapacityUnits"] == [0.5]
+
+
+def test_emit_dynamodb_metrics_without_calls(capsys):
+    _emit_dynamodb_metrics(
+        metrics=DynamoDbMetrics(), index_path="api/foo/bar/index.py", environment="dev"
+    )
+    assert capsys.readouterr().out == ""
+
+
+def test_emit_client_construction_metrics(capsys):
+    with mock.patch(
+        "lambda_utils.pipeline.pop_construction_seconds",
+        return_value={"dynamodb": 0.25},
+    ):
+        _emit_client_construction_metrics(
+            index_path="api/foo/bar/index.py", environment="dev"
+        )
+
+    emf = json_loads(capsys.readouterr().out)
+    assert (emf["service"], emf["client"]) == ("bar", "dynamodb")
+    assert emf["ClientConstructionDuration"] == [250.0]
+
+
+def test_metrics_scope_with_caches():
+    dependencies = _dependencies()
+    backend = InProcessCacheBackend(max_size=10)
+    dependencies["repository"].item_cache = ItemCache(backend=backend)
+    dependencies["search_cache"] = SearchCache(backend=backend)
+    dependencies["patient_filter"] = PatientFilter(s3_client=None, bucket="bucket")
+    dependencies["patient_filter"].statistics.negative_hits += 1
+    dependencies["repository"].item_cache.put("foo", None)
+    dependencies["repository"].item_cache.get("foo")
+
+    scope = _metrics_scope("steps", dependencies=dependencies, logger=None)
+
+    assert scope["metrics"]["item_cache"]["negative_hits"] == 1
+    assert scope["metrics"]["search_cache"]["misses"] == 0
+    assert scope["metrics"]["patient_filter"]["negative_hits"] == 1
+    assert scope["metrics"]["cache_backend"]["size"] == 1
+    assert _metrics_scope("steps", dependencies=_dependencies(), logger=None)[
+        "metrics"
+    ].keys() == {"dynamodb"}
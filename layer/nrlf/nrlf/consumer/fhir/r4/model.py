@@ -398,6 +398,13 @@ class RequestQueryType(BaseModel):
     __root__: Annotated[str, Field(example="http://snomed.info/sct|736253002")]
 
 
+class RequestQueryDate(BaseModel):
+    __root__: Annotated[
+        str,
+        Field(example="ge2023-01-01", regex="^(eq|ge|le)?\\d{4}(-\\d{2}(-\\d{2})?)?$"),
+    ]
+
+
 class NextPageToken(BaseModel):
     __root__: str
 
@@ -476,6 +483,7 @@ class RequestParams(BaseModel):
         Optional[RequestQueryCustodian], Field(alias="custodian:identifier")
     ] = None
     type: Optional[RequestQueryType] = None
+    date: Optional[List[RequestQueryDate]] = None
     next_page_token: Annotated[
         Optional[NextPageToken], Field(alias="next-page-token")
     ] = None
@@ -485,6 +493,7 @@ class CountRequestParams(BaseModel):
     subject_identifier: Annotated[
         RequestQuerySubject, Field(alias="subject:identifier")
     ]
+    date: Optional[List[RequestQueryDate]] = None
 
 
 class OperationOutcomeIssue(BaseModel):
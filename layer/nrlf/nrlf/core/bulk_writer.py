@@ -0,0 +1,86 @@
+"""
+Writes (or deletes) large numbers of items with BatchWriteItem, which is
+called once per chunk of BATCH_WRITE_ITEM_LIMIT items from a pool of worker
+threads. Unlike 'Repository.upsert_many' the writes are not transactional,
+so this is intended for seeding and clearing down tables rather than for
+serving requests.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple
+
+from nrlf.core.errors import BulkWriteError
+from nrlf.core.model import DynamoDbModel
+from nrlf.core.repository import _backoff
+from nrlf.core.types import DynamoDbClient
+
+BATCH_WRITE_ITEM_LIMIT = 25  # Maximum number of requests in a single BatchWriteItem
+BULK_WRITE_MAX_WORKERS = 10
+BULK_WRITE_MAX_ATTEMPTS = 8
+
+
+class BulkWriteReport(NamedTuple):
+    n_items: int
+    seconds: float
+
+    @property
+    def items_per_second(self) -> float:
+        return self.n_items / self.seconds if self.seconds else float(self.n_items)
+
+
+def _chunks(items: Iterable, chunk_size: int) -> Iterator[list]:
+    items = iter(items)
+    while chunk := list(islice(items, chunk_size)):
+        yield chunk
+
+
+class BulkWriter:
+    def __init__(
+        self,
+        client: DynamoDbClient,
+        table_name: str,
+        max_workers: int = BULK_WRITE_MAX_WORKERS,
+    ):
+        self.client = client
+        self.table_name = table_name
+        self.max_workers = max_workers
+
+    def put(self, items: Iterable[DynamoDbModel]) -> BulkWriteReport:
+        """Puts every item, overwriting any existing item with the same key"""
+        return self._write(
+            requests=({"PutRequest": {"Item": item.stored_dict()}} for item in items)
+        )
+
+    def delete(self, keys: Iterable[dict]) -> BulkWriteReport:
+        """Deletes the item with each (DynamoDb formatted) key, if it exists"""
+        return self._write(requests=({"DeleteRequest": {"Key": key}} for key in keys))
+
+    def _write(self, requests: Iterable[dict]) -> BulkWriteReport:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            n_items = sum(
+                executor.map(
+                    self._write_chunk, _chunks(requests, BATCH_WRITE_ITEM_LIMIT)
+                )
+            )
+        return BulkWriteReport(n_items=n_items, seconds=time.perf_counter() - start)
+
+    def _write_chunk(self, chunk: list[dict]) -> int:
+        """
+        Writes a chunk of requests, retrying any unprocessed requests (e.g.
+        due to throttling) with backoff
+        """
+        request_items = {self.table_name: chunk}
+        for attempt in range(BULK_WRITE_MAX_ATTEMPTS):
+            response = self.client.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems")
+            if not request_items:
+                return len(chunk)
+            if attempt < BULK_WRITE_MAX_ATTEMPTS - 1:
+                _backoff(attempt)
+        n_unprocessed = len(request_items[self.table_name])
+        raise BulkWriteError(
+            f"{n_unprocessed} items were still unprocessed "
+            f"after {BULK_WRITE_MAX_ATTEMPTS} attempts"
+        )
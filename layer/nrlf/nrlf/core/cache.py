@@ -0,0 +1,259 @@
+"""
+Backends for the caches of reads (see nrlf.core.item_cache and
+nrlf.core.search_cache), which either live in the container
+(InProcessCacheBackend) or are shared by every container through a
+Redis-protocol server (RedisCacheBackend).
+
+A cache is an optimisation, so a backend never raises: a failed read is a
+miss and a failed write is dropped, and both are counted as errors.
+
+The Redis backend needs the 'redis' package, which is installed in the
+third_party layer (see pyproject.toml) rather than in this one.
+"""
+import base64
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, NamedTuple, Union
+
+from nrlf.core.validators import json_loads
+
+try:
+    import redis
+except ModuleNotFoundError:
+    redis = None
+
+REDIS_SOCKET_TIMEOUT_SECONDS = 0.1
+BYTES_MARKER = "__b64__"
+
+
+class _Counters:
+    FIELDS: tuple[str, ...] = ()
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def dict(self) -> dict[str, int]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class CacheStatistics(_Counters):
+    """Counters of a cache's reads, which are reset for each request"""
+
+    FIELDS = ("hits", "negative_hits", "misses")
+
+
+class CacheBackendStatistics(_Counters):
+    """Counters of a backend's housekeeping, which are reset for each request"""
+
+    FIELDS = ("evictions", "expirations", "errors")
+
+
+class CacheBackend(ABC):
+    """
+    Values (of any type which can be serialised as JSON, besides bytes) by
+    key, each of which expires after the TTL that it was set with
+    """
+
+    def __init__(self):
+        self.statistics = CacheBackendStatistics()
+
+    @abstractmethod
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """The values of those keys which are cached"""
+
+    @abstractmethod
+    def set_many(self, values: dict[str, Any], ttl_seconds: float):
+        pass
+
+    @abstractmethod
+    def set_if_absent(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Sets the value unless the key is cached, returning whether it was set"""
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        pass
+
+    def size(self) -> Union[int, None]:
+        """The number of keys cached, if it is known without a round trip"""
+        return None
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+
+
+class InProcessCacheBackend(CacheBackend):
+    """LRU cache of up to 'max_size' values, which lives as long as the container"""
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.max_size = max_size
+        self.clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def _get(self, key: str, now: float) -> Union[_Entry, None]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            del self._entries[key]
+            self.statistics.expirations += 1
+            return None
+        return entry
+
+    def _set(self, key: str, value: Any, expires_at: float):
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.max_size:
+            self._entries.popitem(last=False)
+            self.statistics.evictions += 1
+        self._entries[key] = _Entry(value=value, expires_at=expires_at)
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        values = {}
+        with self._lock:
+            now = self.clock()
+            for key in keys:
+                entry = self._get(key, now=now)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    values[key] = entry.value
+        return values
+
+    def set_many(self, values: dict[str, Any], ttl_seconds: float):
+        with self._lock:
+            expires_at = self.clock() + ttl_seconds
+            for key, value in values.items():
+                self._set(key, value, expires_at=expires_at)
+
+    def set_if_absent(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        with self._lock:
+            now = self.clock()
+            if self._get(key, now=now) is not None:
+                return False
+            self._set(key, value, expires_at=now + ttl_seconds)
+            return True
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+def _default(value: Any) -> dict:
+    if isinstance(value, bytes):
+        return {BYTES_MARKER: base64.b64encode(value).decode()}
+    raise TypeError(f"Cannot cache values of type '{type(value).__name__}'")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(map(_decode, value))
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1 and BYTES_MARKER in value:
+        return base64.b64decode(value[BYTES_MARKER])
+    return {key: _decode(item) for key, item in value.items()}
+
+
+def dumps(value: Any) -> bytes:
+    """Serialises a value as JSON, including any bytes (e.g. 'B' attributes)"""
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def loads(value: bytes) -> Any:
+    return _decode(json_loads(value))
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Values serialised as JSON on a Redis-protocol server, through a client
+    with the interface of 'redis.Redis'. The server evicts values itself.
+    """
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    @classmethod
+    def from_url(
+        cls, url: str, socket_timeout: float = REDIS_SOCKET_TIMEOUT_SECONDS
+    ) -> "RedisCacheBackend":
+        if redis is None:
+            raise ValueError("The 'redis' package is required to cache in Redis")
+        return cls(
+            client=redis.Redis.from_url(
+                url,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout,
+            )
+        )
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        if not keys:
+            return {}
+        try:
+            values = self.client.mget(keys)
+        except Exception:
+            self.statistics.errors += 1
+            return {}
+        decoded = {}
+        for key, value in zip(keys, values):
+            if not value:
+                continue
+            try:
+                decoded[key] = loads(value)
+            except Exception:  # i.e. a corrupt value is a miss
+                self.statistics.errors += 1
+        return decoded
+
+    def set_many(self, values: dict[str, Any], ttl_seconds: float):
+        try:
+            for key, value in values.items():
+                self.client.set(key, dumps(value), px=int(ttl_seconds * 1000))
+        except Exception:
+            self.statistics.errors += 1
+
+    def set_if_absent(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        try:
+            return bool(
+                self.client.set(key, dumps(value), px=int(ttl_seconds * 1000), nx=True)
+            )
+        except Exception:
+            self.statistics.errors += 1
+            return False
+
+    def delete(self, *keys: str):
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except Exception:
+            self.statistics.errors += 1
+
+
+def build_cache_backend(
+    url: Union[str, None] = None, max_size: Union[int, None] = None
+) -> Union[CacheBackend, None]:
+    """
+    Builds the backend from (optional) Lambda config: Redis if there is a
+    url, otherwise in process if there is a size, otherwise no cache
+    """
+    if url:
+        return RedisCacheBackend.from_url(url)
+    if max_size:
+        return InProcessCacheBackend(max_size=max_size)
+    return None
@@ -0,0 +1,125 @@
+"""
+Construction of the boto3 clients used by every Lambda. Each client is built
+once per container, from boto3's default Session (so that credentials and a
+region set up through boto3 are respected), with its connection pool, TCP
+keep-alive, timeouts and retries tuned by the (optional) Environment Variables
+in ClientConfig, and is then reused by every request that the container
+handles.
+
+Constructing clients is a noticeable part of a cold start, so the time taken
+to construct each is recorded until it is collected (and emitted) by
+'pop_construction_seconds'.
+"""
+import os
+import time
+from threading import Lock
+from typing import Any
+
+import boto3
+from botocore.config import Config as BotocoreConfig
+from pydantic import BaseModel
+
+from nrlf.core.throttling import DYNAMODB_CLIENT_CONFIG
+
+SERVICE_CONFIGS = {"dynamodb": DYNAMODB_CLIENT_CONFIG}
+
+_LOCK = Lock()
+_CLIENTS: dict[tuple, Any] = {}
+_CONSTRUCTION_SECONDS: dict[str, float] = {}
+
+
+class ClientConfig(BaseModel):
+    """
+    The Environment Variables which tune every client, all of which are
+    optional. DynamoDb clients don't retry, regardless of CLIENT_MAX_ATTEMPTS,
+    since the Repository retries its own calls (see nrlf.core.throttling).
+    """
+
+    CLIENT_MAX_POOL_CONNECTIONS: int = 10
+    CLIENT_TCP_KEEPALIVE: bool = True
+    CLIENT_CONNECT_TIMEOUT: float = 1.0
+    CLIENT_READ_TIMEOUT: float = 5.0
+    CLIENT_RETRY_MODE: str = "standard"
+    CLIENT_MAX_ATTEMPTS: int = 3
+
+    @classmethod
+    def from_environment(cls) -> "ClientConfig":
+        return cls(
+            **{
+                env_var: os.environ[env_var]
+                for env_var in cls.__fields__.keys()
+                if env_var in os.environ
+            }
+        )
+
+    def botocore_config(self) -> BotocoreConfig:
+        return BotocoreConfig(
+            max_pool_connections=self.CLIENT_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=self.CLIENT_TCP_KEEPALIVE,
+            connect_timeout=self.CLIENT_CONNECT_TIMEOUT,
+            read_timeout=self.CLIENT_READ_TIMEOUT,
+            retries={
+                "mode": self.CLIENT_RETRY_MODE,
+                "total_max_attempts": self.CLIENT_MAX_ATTEMPTS,
+            },
+        )
+
+
+def get_session() -> boto3.Session:
+    """boto3's default Session, which is set up on first use"""
+    with _LOCK:
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        return boto3.DEFAULT_SESSION
+
+
+def client_config(service_name: str, **overrides) -> BotocoreConfig:
+    """
+    The config of a client of 'service_name': that of the environment, then
+    that of the service, then any overrides (e.g. 'read_timeout')
+    """
+    config = ClientConfig.from_environment().botocore_config()
+    if service_name in SERVICE_CONFIGS:
+        config = config.merge(SERVICE_CONFIGS[service_name])
+    return config.merge(BotocoreConfig(**overrides))
+
+
+def get_client(service_name: str, **overrides):
+    """
+    The container's client of 'service_name', which is constructed on first
+    use. Clients with different overrides, or of a different default Session
+    (i.e. if it has been set up again), are distinct.
+    """
+    session = get_session()
+    key = (session, service_name, tuple(sorted(overrides.items())))
+    if key in _CLIENTS:
+        return _CLIENTS[key]
+
+    with _LOCK:
+        if key not in _CLIENTS:
+            start = time.perf_counter()
+            _CLIENTS[key] = session.client(
+                service_name, config=client_config(service_name, **overrides)
+            )
+            _CONSTRUCTION_SECONDS[service_name] = _CONSTRUCTION_SECONDS.get(
+                service_name, 0
+            ) + (time.perf_counter() - start)
+        return _CLIENTS[key]
+
+
+def reset():
+    """
+    Forgets every client and boto3's default Session, so that the next
+    clients pick up credentials and a region set up since (e.g. by mocks)
+    """
+    with _LOCK:
+        boto3.DEFAULT_SESSION = None
+        _CLIENTS.clear()
+
+
+def pop_construction_seconds() -> dict[str, float]:
+    """The time taken to construct each client since this was last called"""
+    with _LOCK:
+        construction_seconds = dict(_CONSTRUCTION_SECONDS)
+        _CONSTRUCTION_SECONDS.clear()
+    return construction_seconds
@@ -0,0 +1,163 @@
+"""
+Converts between raw python values and the DynamoDB attribute value format,
+e.g. "foo" <-> {"S": "foo"} and 123 <-> {"N": "123"}.
+
+Encoding dispatches on the exact type of each value and decoding dispatches
+on the type descriptor of each node, so that the common cases cost a single
+dict lookup per node and never raise.
+"""
+import re
+from typing import Any, Callable, Iterable
+
+NoneType = type(None)
+NUMBER_RE = re.compile(r"^-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+
+
+def _encode_string(value: str) -> dict:
+    return {"S": value}
+
+
+def _encode_binary(value: bytes) -> dict:
+    return {"B": value}
+
+
+def _encode_number(value) -> dict:
+    return {"N": str(value)}
+
+
+def _encode_bool(value: bool) -> dict:
+    return {"BOOL": value}
+
+
+def _encode_null(_) -> dict:
+    return {"NULL": True}
+
+
+def _encode_map(value: dict) -> dict:
+    return {"M": {k: encode(v) for (k, v) in value.items()}}
+
+
+def _encode_list(value: list) -> dict:
+    return {"L": [encode(v) for v in value]}
+
+
+ENCODERS: dict[type, Callable[[Any], dict]] = {
+    str: _encode_string,
+    bytes: _encode_binary,
+    int: _encode_number,
+    float: _encode_number,
+    bool: _encode_bool,
+    NoneType: _encode_null,
+    dict: _encode_map,
+    list: _encode_list,
+    tuple: _encode_list,
+}
+
+
+def _encoder_for_subclass(_type: type) -> Callable[[Any], dict]:
+    """
+    Resolves (and remembers) the encoder for subclasses of the supported
+    types, e.g. a 'str' Enum is encoded as a string.
+    """
+    for base in _type.__mro__[1:]:
+        encoder = ENCODERS.get(base)
+        if encoder is not None:
+            ENCODERS[_type] = encoder
+            return encoder
+    raise TypeError(f"Cannot encode value of type '{_type.__name__}' for DynamoDb")
+
+
+def encode(value: Any) -> dict:
+    """
+    Encodes a raw value into a DynamoDb attribute value
+
+    e.g. 123 -> {"N": "123"}
+    """
+    _type = type(value)
+    encoder = ENCODERS.get(_type) or _encoder_for_subclass(_type)
+    return encoder(value)
+
+
+def _decode_number(value):
+    if type(value) is not str:
+        return value
+    if value.lstrip("-").isdigit():
+        return int(value)
+    return float(value)
+
+
+def _decode_map(value: dict) -> dict:
+    return {k: decode(v) for (k, v) in value.items()}
+
+
+def _decode_list(value: list) -> list:
+    return [decode(v) for v in value]
+
+
+def _decode_string_set(value: list) -> set:
+    return set(value)
+
+
+def _decode_number_set(value: list) -> set:
+    return set(map(_decode_number, value))
+
+
+DECODERS: dict[str, Callable[[Any], Any]] = {
+    "S": str,
+    "B": bytes,
+    "N": _decode_number,
+    "BOOL": bool,
+    "NULL": lambda _: None,
+    "M": _decode_map,
+    "L": _decode_list,
+    "SS": _decode_string_set,
+    "NS": _decode_number_set,
+}
+
+
+def decode(node: dict) -> Any:
+    """
+    Decodes a DynamoDb attribute value into a raw value
+
+    e.g. {"N": "123"} -> 123
+    """
+    ((type_descriptor, value),) = node.items()
+    return DECODERS[type_descriptor](value)
+
+
+def is_encoded(obj: Any) -> bool:
+    """Whether 'obj' is a well-formed DynamoDb attribute value"""
+    if type(obj) is not dict or len(obj) != 1:
+        return False
+    ((type_descriptor, value),) = obj.items()
+    if type_descriptor == "S":
+        return type(value) is str
+    if type_descriptor == "B":
+        return type(value) is bytes
+    if type_descriptor == "N":
+        return type(value) in (int, float) or (
+            type(value) is str and NUMBER_RE.match(value) is not None
+        )
+    if type_descriptor == "M":
+        return type(value) is dict and all(map(is_encoded, value.values()))
+    if type_descriptor == "L":
+        return type(value) is list and all(map(is_encoded, value))
+    return type_descriptor in DECODERS
+
+
+def encode_item(item: dict) -> dict:
+    """Encodes each attribute of a raw item"""
+    return {k: encode(v) for (k, v) in item.items()}
+
+
+def decode_item(item: dict) -> dict:
+    """Decodes each attribute of a DynamoDb item"""
+    return {k: decode(v) for (k, v) in item.items()}
+
+
+def encode_items(items: Iterable[dict]) -> list[dict]:
+    return list(map(encode_item, items))
+
+
+def decode_items(items: Iterable[dict]) -> list[dict]:
+    return list(map(decode_item, items))
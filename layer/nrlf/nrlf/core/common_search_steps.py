@@ -5,6 +5,7 @@ from lambda_pipeline.types import PipelineData
 
 from nrlf.consumer.fhir.r4.model import (
     NextPageToken,
+    RequestQueryDate,
     RequestQuerySubject,
     RequestQueryType,
 )
@@ -17,12 +18,16 @@ from nrlf.core.model import (
     PaginatedResponse,
     key,
 )
+from nrlf.core.patient_filter import PatientFilter
+from nrlf.core.pointer_counts import PointerCountRepository
 from nrlf.core.repository import (
     PAGE_ITEM_LIMIT,
     Repository,
+    created_on_filter,
     custodian_filter,
     type_filter,
 )
+from nrlf.core.search_cache import SearchCache
 from nrlf.core.validators import validate_type_system
 
 log_action = make_common_log_action()
@@ -30,20 +35,21 @@ log_action = make_common_log_action()
 
 class LogReference(Enum):
     COMMONSEARCH001 = "Searching for document references"
+    COMMONSEARCH002 = "Counting document references"
+    COMMONSEARCH003 = "Searching for producer document references"
 
 
-@log_action(log_reference=LogReference.COMMONSEARCH001)
-def get_paginated_document_references(
+def _document_references_by_subject_query(
     request_params: Union[ConsumerRequestParams, CountRequestParams],
     query_string_params: Dict[str, str],
-    repository: Repository,
     type_identifier: RequestQueryType,
     raw_pointer_types: list[str],
     nhs_number: RequestQuerySubject,
-    page_limit: int = PAGE_ITEM_LIMIT,
-    page_token: NextPageToken = None,
-) -> PipelineData:
-
+) -> dict:
+    """
+    Validates the request and builds the key and filter arguments for
+    searching (or counting) document references by subject
+    """
     assert_no_extra_params(
         request_params=request_params, provided_params=query_string_params
     )
@@ -55,26 +61,157 @@ def get_paginated_document_references(
     )
 
     custodian = None
-
-    next_page_token: NextPageToken = page_token
-
     if isinstance(request_params, ConsumerRequestParams):
         custodian = custodian_filter(
             custodian_identifier=request_params.custodian_identifier
         )
+
+    return dict(
+        pk=key(DbPrefix.Patient, nhs_number),
+        sk=created_on_filter(dates=request_params.date),
+        type=pointer_types,
+        producer_id=custodian,
+    )
+
+
+@log_action(log_reference=LogReference.COMMONSEARCH001)
+def get_paginated_document_references(
+    request_params: Union[ConsumerRequestParams, CountRequestParams],
+    query_string_params: Dict[str, str],
+    repository: Repository,
+    type_identifier: RequestQueryType,
+    raw_pointer_types: list[str],
+    nhs_number: RequestQuerySubject,
+    page_limit: int = PAGE_ITEM_LIMIT,
+    page_token: NextPageToken = None,
+    search_cache: SearchCache = None,
+    patient_filter: PatientFilter = None,
+    by_patient_type_index: bool = False,
+) -> PipelineData:
+    """
+    A patient who the patient filter (if there is one) says has no pointers
+    has no results. The first page of a search without a date range is read
+    through the search cache, if there is one. Pointers are read from the
+    patient+type index (idx_gsi_3) only if 'by_patient_type_index', since it
+    is complete only once existing pointers have been backfilled.
+    """
+
+    query = _document_references_by_subject_query(
+        request_params=request_params,
+        query_string_params=query_string_params,
+        type_identifier=type_identifier,
+        raw_pointer_types=raw_pointer_types,
+        nhs_number=nhs_number,
+    )
+    if patient_filter is not None and not patient_filter.might_have_pointers(
+        nhs_number
+    ):
+        return PaginatedResponse(items=[])
+
+    next_page_token: NextPageToken = page_token
+
+    if isinstance(request_params, ConsumerRequestParams):
         if page_token is None:
             next_page_token: NextPageToken = request_params.next_page_token
         if next_page_token is not None:
             next_page_token = next_page_token.__root__
 
-    pk = key(DbPrefix.Patient, nhs_number)
+    # Query each pointer type separately on the patient+type index, so that only
+    # matching pointers are read rather than every pointer for the patient
+    pointer_types = dict.fromkeys(query["type"])  # dedupe, preserving order
+
+    def _read() -> PaginatedResponse:
+        if not by_patient_type_index:
+            return repository.query_gsi_1(
+                **query, exclusive_start_key=next_page_token, limit=page_limit
+            )
+        return repository.query_gsi_3_many(
+            pks=[
+                key(DbPrefix.PatientType, nhs_number, pointer_type)
+                for pointer_type in pointer_types
+            ],
+            sk=query["sk"],
+            producer_id=query["producer_id"],
+            exclusive_start_key=next_page_token,
+            limit=page_limit,
+        )
+
+    if search_cache is None or next_page_token is not None or query["sk"] is not None:
+        return _read()
+    return search_cache.read_through(
+        nhs_number=nhs_number,
+        pointer_types=list(pointer_types),
+        custodian=query["producer_id"],
+        limit=page_limit,
+        item_type=repository.item_type,
+        read=_read,
+    )
+
 
-    response: PaginatedResponse = repository.query_gsi_1(
-        pk=pk,
+@log_action(log_reference=LogReference.COMMONSEARCH003)
+def get_paginated_producer_document_references(
+    repository: Repository,
+    ods_code_parts: tuple[str],
+    nhs_number: Union[RequestQuerySubject, None],
+    pointer_types: list[str],
+    next_page_token: Union[NextPageToken, None],
+    dates: Union[list[RequestQueryDate], None] = None,
+    by_organisation_patient_index: bool = False,
+) -> PaginatedResponse:
+    """
+    If 'by_organisation_patient_index' then a producer's pointers for a given
+    subject are read directly from the organisation+patient index
+    (idx_gsi_4), so that the cost of the search does not depend on how many
+    pointers the organisation has in total. The index is complete only once
+    existing pointers have been backfilled, so until then they are read from
+    the organisation index (idx_gsi_2) and filtered on the subject.
+    """
+    if next_page_token is not None:
+        next_page_token = next_page_token.__root__
+
+    if nhs_number is None or not by_organisation_patient_index:
+        return repository.query_gsi_2(
+            pk=key(DbPrefix.Organization, *ods_code_parts),
+            sk=created_on_filter(dates=dates),
+            type=pointer_types,
+            nhs_number=nhs_number,
+            exclusive_start_key=next_page_token,
+        )
+    return repository.query_gsi_4(
+        pk=key(DbPrefix.OrganizationPatient, nhs_number, *ods_code_parts),
+        sk=created_on_filter(dates=dates),
         type=pointer_types,
-        producer_id=custodian,
         exclusive_start_key=next_page_token,
-        limit=page_limit,
     )
 
-    return response
+
+@log_action(log_reference=LogReference.COMMONSEARCH002)
+def count_document_references(
+    request_params: Union[ConsumerRequestParams, CountRequestParams],
+    query_string_params: Dict[str, str],
+    repository: Repository,
+    raw_pointer_types: list[str],
+    nhs_number: RequestQuerySubject,
+    pointer_counts: PointerCountRepository = None,
+    patient_filter: PatientFilter = None,
+) -> int:
+    """
+    A patient who the patient filter (if there is one) says has no pointers
+    counts zero. Counts without a date range are read from the materialised
+    pointer counts, if there are any, rather than by querying the pointers.
+    Either way, unlike a search, corrupt pointers are counted.
+    """
+    query = _document_references_by_subject_query(
+        request_params=request_params,
+        query_string_params=query_string_params,
+        type_identifier=None,
+        raw_pointer_types=raw_pointer_types,
+        nhs_number=nhs_number,
+    )
+    if patient_filter is not None and not patient_filter.might_have_pointers(
+        nhs_number
+    ):
+        return 0
+    if pointer_counts is not None and query["sk"] is None:
+        return pointer_counts.count(nhs_number=nhs_number, pointer_types=query["type"])
+    return repository.count_gsi_1(**query)
@@ -0,0 +1,128 @@
+"""
+Compressed storage of large string attributes, i.e. the FHIR JSON 'document'
+of each DocumentPointer. A compressed attribute is stored as a binary ('B')
+attribute whose first byte marks the format that it was compressed with, so
+that it can be decompressed however the reader is configured.
+
+zlib is always available, zstd only if the 'zstandard' package is installed.
+"""
+import zlib
+from math import ceil
+from typing import Callable, NamedTuple, Union
+
+try:
+    import zstandard
+except ModuleNotFoundError:
+    zstandard = None
+
+ZLIB = "zlib"
+ZSTD = "zstd"
+COMPRESSIBLE_ATTRIBUTES = frozenset(("document",))
+READ_CAPACITY_UNIT_BYTES = 4096
+WRITE_CAPACITY_UNIT_BYTES = 1024
+
+
+class Compressor(NamedTuple):
+    marker: bytes
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+COMPRESSORS = {
+    ZLIB: Compressor(
+        marker=b"\x01", compress=zlib.compress, decompress=zlib.decompress
+    ),
+}
+if zstandard is not None:
+    COMPRESSORS[ZSTD] = Compressor(
+        marker=b"\x02",
+        compress=lambda value: zstandard.ZstdCompressor().compress(value),
+        decompress=lambda value: zstandard.ZstdDecompressor().decompress(value),
+    )
+COMPRESSORS_BY_MARKER = {
+    compressor.marker: compressor for compressor in COMPRESSORS.values()
+}
+
+
+def get_compressor(compression: str) -> Compressor:
+    try:
+        return COMPRESSORS[compression]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported compression '{compression}', "
+            f"expected one of {sorted(COMPRESSORS)}"
+        ) from None
+
+
+def compress(value: str, compression: str) -> bytes:
+    compressor = get_compressor(compression)
+    return compressor.marker + compressor.compress(value.encode())
+
+
+def decompress(value: bytes) -> str:
+    marker, compressed = value[:1], value[1:]
+    try:
+        compressor = COMPRESSORS_BY_MARKER[marker]
+    except KeyError:
+        raise ValueError(f"Unsupported compression marker {marker!r}") from None
+    return compressor.decompress(compressed).decode()
+
+
+def compress_attributes(item: dict, compression: Union[str, None]) -> dict:
+    """
+    Compresses the string attributes of a (DynamoDb formatted) item which are
+    in COMPRESSIBLE_ATTRIBUTES. No compression leaves the item as it is.
+    """
+    if compression is None:
+        return item
+    return {
+        name: (
+            {"B": compress(value["S"], compression=compression)}
+            if name in COMPRESSIBLE_ATTRIBUTES and "S" in value
+            else value
+        )
+        for (name, value) in item.items()
+    }
+
+
+def decompress_attribute(value: dict) -> str:
+    """The string value of a (DynamoDb formatted) attribute, compressed or not"""
+    if "B" in value:
+        return decompress(value["B"])
+    return value["S"]
+
+
+def _attribute_size(value: dict) -> int:
+    ((type_descriptor, _value),) = value.items()
+    if type_descriptor == "S":
+        return len(_value.encode())
+    if type_descriptor == "B":
+        return len(_value)
+    if type_descriptor == "N":
+        return len(str(_value).lstrip("-").replace(".", "")) // 2 + 1
+    if type_descriptor == "M":
+        return 3 + sum(1 + item_size({k: v}) for (k, v) in _value.items())
+    if type_descriptor == "L":
+        return 3 + sum(1 + _attribute_size(v) for v in _value)
+    if type_descriptor in ("SS", "NS"):
+        return sum(_attribute_size({type_descriptor[0]: v}) for v in _value)
+    return 1  # BOOL and NULL
+
+
+def item_size(item: dict) -> int:
+    """
+    The (approximate) size in bytes of a DynamoDb formatted item, as counted
+    by DynamoDb when it charges capacity units
+    """
+    return sum(
+        len(name.encode()) + _attribute_size(value) for (name, value) in item.items()
+    )
+
+
+def read_capacity_units(size: int) -> int:
+    """For a strongly consistent read of 'size' bytes"""
+    return ceil(size / READ_CAPACITY_UNIT_BYTES)
+
+
+def write_capacity_units(size: int) -> int:
+    return ceil(size / WRITE_CAPACITY_UNIT_BYTES)
@@ -9,10 +9,15 @@ class Source(Enum):
 class DbPrefix(str, Enum):
     DocumentPointer = "D"
     Patient = "P"
+    PatientType = "PT"
     Organization = "O"
+    OrganizationPatient = "OP"
     CreatedOn = "CO"
     Contract = "C"
     Version = "V"
+    PatientCount = "PC"
+    PatientTypeCount = "PTC"
+    CountBatch = "CB"
 
     def __str__(self):
         return self.value
@@ -21,6 +26,20 @@ class DbPrefix(str, Enum):
 VALID_SOURCES = frozenset(item.value for item in Source.__members__.values())
 EMPTY_VALUES = ("", None, [], {})
 REQUIRED_CREATE_FIELDS = ["custodian", "id", "type", "status", "subject"]
+IMMUTABLE_FIELDS = set(
+    (
+        "masterIdentifier",
+        "id",
+        "identifier",
+        "status",
+        "type",
+        "subject",
+        "date",
+        "custodian",
+        "relatesTo",
+        "author",
+    )
+)
 JSON_TYPES = {dict, list}
 NHS_NUMBER_INDEX = "idx_nhs_number_by_id"
 ID_SEPARATOR = "-"
@@ -1,24 +1,16 @@
-from ast import literal_eval
 from typing import TypeVar, Union
 
 from pydantic import BaseModel, Field, StrictInt, StrictStr
 
+from nrlf.core.codec import NoneType, decode, encode, is_encoded
+from nrlf.core.compression import decompress
+
 PythonType = TypeVar("PythonType")
-NoneType = type(None)
-DYNAMODB_TYPE_LOOKUP = {
-    str: "S",
-    int: "N",
-    float: "N",
-    dict: "M",
-    list: "L",
-    bool: "BOOL",
-    NoneType: "NULL",
-}
 
 
 class DynamoDbType(BaseModel):
     def dict(self, *args, **kwargs):
-        return convert_value_to_dynamo_format(self.__root__)
+        return encode(self.__root__)
 
     @property
     def value(self):
@@ -32,6 +24,26 @@ class DynamoDbStringType(DynamoDbType):
     __root__: StrictStr
 
 
+class DynamoDbCompressedStringType(DynamoDbStringType):
+    """
+    A string which was stored compressed, and which is only decompressed
+    when its value is first needed
+    """
+
+    @classmethod
+    def from_compressed(cls, value: bytes) -> "DynamoDbCompressedStringType":
+        instance = cls.__new__(cls)
+        object.__setattr__(instance, "__dict__", {"compressed": value})
+        object.__setattr__(instance, "__fields_set__", {"__root__"})
+        return instance
+
+    def __getattr__(self, name: str):
+        if name != "__root__":
+            raise AttributeError(name)
+        value = self.__dict__["__root__"] = decompress(self.__dict__["compressed"])
+        return value
+
+
 class DynamoDbIntType(DynamoDbType):
     __root__: StrictInt
 
@@ -49,44 +61,17 @@ class DynamoDbDictType(DynamoDbType):
 
 
 def convert_value_to_dynamo_format(obj):
-    _type = type(obj)
-
-    if _type is dict:
-        return {"M": {k: convert_value_to_dynamo_format(v) for k, v in obj.items()}}
-    elif _type is list:
-        return {"L": [convert_value_to_dynamo_format(item) for item in obj]}
-    elif _type is bool:
-        return {"BOOL": obj}
-    elif _type is NoneType:
-        return {"NULL": True}
-
-    dynamodb_type = DYNAMODB_TYPE_LOOKUP.get(_type)
-    return {dynamodb_type: str(obj)}
+    return encode(obj)
 
 
 def convert_dynamo_value_to_raw_value(obj: Union[DynamoDbType, dict]):
-    _type = type(obj)
-    if _type in (list, dict):
-        ((dynamo_type, value),) = obj.items()
-    else:
-        ((dynamo_type, value),) = obj.dict().items()
-
-    if dynamo_type in (DYNAMODB_TYPE_LOOKUP[dict], dict):
-        return {k: convert_dynamo_value_to_raw_value(v) for k, v in value.items()}
-    elif dynamo_type in (DYNAMODB_TYPE_LOOKUP[list], list):
-        return [convert_dynamo_value_to_raw_value(item) for item in value]
-    elif dynamo_type in (DYNAMODB_TYPE_LOOKUP[NoneType], NoneType):
-        return None
-
-    return literal_eval(value) if dynamo_type == "N" else value
+    if isinstance(obj, DynamoDbType):
+        obj = obj.dict()
+    return decode(obj)
 
 
 def is_dynamodb_dict(obj: any) -> bool:
-    try:
-        convert_dynamo_value_to_raw_value(obj)
-    except:
-        return False
-    return True
+    return isinstance(obj, DynamoDbType) or is_encoded(obj)
 
 
 DYNAMODB_NULL = DynamoDbNullType()
@@ -38,10 +38,30 @@ class DuplicateError(Exception):
     pass
 
 
+class ConflictError(Exception):
+    pass
+
+
 class SupersedeError(Exception):
     pass
 
 
+class SupersedeConditionError(SupersedeError):
+    """
+    The condition on at least one delete target of a supersede failed.
+    'failed_targets' maps the pk of each failed target to the existing item
+    (in DynamoDb format) or None if the target does not exist.
+    """
+
+    def __init__(self, failed_targets: dict[str, Union[dict, None]]):
+        super().__init__("Condition check failed - Supersede target mismatch")
+        self.failed_targets = failed_targets
+
+
+class BulkWriteError(Exception):
+    pass
+
+
 class DocumentReferenceValidationError(Exception):
     pass
 
@@ -116,7 +136,9 @@ NRLF_TO_SPINE_4XX_ERROR = {
     ValidationError: SpineCoding.VALIDATION_ERROR,
     UnknownParameterError: SpineCoding.VALIDATION_ERROR,
     DuplicateError: SpineCoding.INVALID_VALUE,
+    ConflictError: SpineCoding.INVALID_VALUE,
     SupersedeError: SpineCoding.INVALID_RESOURCE_ID,
+    SupersedeConditionError: SpineCoding.INVALID_RESOURCE_ID,
     DocumentReferenceValidationError: SpineCoding.SERVICE_ERROR,
     RequestValidationError: SpineCoding.VALIDATION_ERROR,
     InconsistentUpdateId: SpineCoding.VALIDATION_ERROR,
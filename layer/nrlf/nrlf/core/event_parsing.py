@@ -5,6 +5,8 @@ from nrlf.core.errors import RequestValidationError
 from nrlf.core.model import APIGatewayProxyEventModel
 from nrlf.core.validators import json_loads
 
+MULTI_VALUE_QUERY_PARAMETERS = ("date",)
+
 
 def fetch_body_from_event(event: APIGatewayProxyEventModel) -> dict:
     raw_body = event.body
@@ -18,3 +20,17 @@ def fetch_body_from_event(event: APIGatewayProxyEventModel) -> dict:
         raise RequestValidationError("Body is not expected json type")
 
     return loaded_json
+
+
+def fetch_query_string_parameters_from_event(event: APIGatewayProxyEventModel) -> dict:
+    """
+    API Gateway only keeps the last value of a repeated query string parameter
+    in 'queryStringParameters', so parameters which may be repeated (e.g.
+    'date=ge2023-01-01&date=le2023-01-31') are read as lists of every value
+    """
+    query_string_parameters = dict(event.queryStringParameters or {})
+    multi_value_parameters = event.multiValueQueryStringParameters or {}
+    for name in MULTI_VALUE_QUERY_PARAMETERS:
+        if name in multi_value_parameters:
+            query_string_parameters[name] = multi_value_parameters[name]
+    return query_string_parameters
@@ -0,0 +1,93 @@
+"""
+A read-through cache of raw DynamoDb items by key, for Lambdas which read the
+same items repeatedly (e.g. a pointer being polled). The cache is kept by a
+CacheBackend (see nrlf.core.cache), so it is either bounded and per container
+or shared by every container.
+
+Cached items are served for up to 'ttl_seconds' after they were read, and
+items which could not be found for up to 'negative_ttl_seconds' (which should
+be shorter, so that a newly created item is soon found), which bounds how
+stale a read can be. Writes made through the same Repository invalidate the
+item immediately, as does the DynamoDb stream for writes made elsewhere.
+"""
+import time
+from typing import Callable, Union
+
+from nrlf.core.cache import CacheBackend, CacheStatistics, InProcessCacheBackend
+
+ITEM_CACHE_TTL_SECONDS = 5.0
+ITEM_CACHE_NEGATIVE_TTL_SECONDS = 1.0
+ITEM_KEY_PREFIX = "item#"
+
+NOT_CACHED = object()  # Distinct from a cached miss, which is None
+
+
+class ItemCache:
+    """
+    Raw items by key in 'backend', which is by default an in-process cache of
+    up to 'max_size' items. An item which could not be found is cached as None.
+    """
+
+    name = "item_cache"
+
+    def __init__(
+        self,
+        backend: CacheBackend = None,
+        max_size: int = None,
+        ttl_seconds: float = ITEM_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = ITEM_CACHE_NEGATIVE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if backend is None:
+            backend = InProcessCacheBackend(max_size=max_size, clock=clock)
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.statistics = CacheStatistics()
+
+    def reset_statistics(self):
+        self.statistics.reset()
+        self.backend.statistics.reset()
+
+    def get(self, key: str) -> Union[dict, None, object]:
+        """The cached item (or None for a cached miss), otherwise NOT_CACHED"""
+        cache_key = ITEM_KEY_PREFIX + key
+        values = self.backend.get_many([cache_key])
+        if cache_key not in values:
+            self.statistics.misses += 1
+            return NOT_CACHED
+        item = values[cache_key]
+        if item is None:
+            self.statistics.negative_hits += 1
+        else:
+            self.statistics.hits += 1
+        return item
+
+    def put(self, key: str, item: Union[dict, None]):
+        ttl_seconds = self.negative_ttl_seconds if item is None else self.ttl_seconds
+        self.backend.set_many({ITEM_KEY_PREFIX + key: item}, ttl_seconds=ttl_seconds)
+
+    def invalidate(self, *keys: str):
+        self.backend.delete(*(ITEM_KEY_PREFIX + key for key in keys))
+
+
+def build_item_cache(
+    backend: Union[CacheBackend, None],
+    ttl_seconds: Union[float, None] = None,
+    negative_ttl_seconds: Union[float, None] = None,
+) -> Union[ItemCache, None]:
+    """
+    Builds the cache from (optional) Lambda config, which is disabled unless
+    it has a backend (see nrlf.core.cache.build_cache_backend)
+    """
+    if backend is None:
+        return None
+    return ItemCache(
+        backend=backend,
+        ttl_seconds=ITEM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds,
+        negative_ttl_seconds=(
+            ITEM_CACHE_NEGATIVE_TTL_SECONDS
+            if negative_ttl_seconds is None
+            else negative_ttl_seconds
+        ),
+    )
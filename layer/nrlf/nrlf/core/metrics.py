@@ -0,0 +1,182 @@
+"""
+Instrumentation of the DynamoDb calls made by a Repository. Every call asks
+DynamoDb to return the capacity that it consumed (by table and by index), and
+the totals for the request are collected in DynamoDbMetrics: calls (by
+operation), pages, items scanned and returned, capacity units consumed,
+retries and throttles (see 'nrlf.core.throttling') and the time spent waiting
+on botocore.
+"""
+from collections import Counter, defaultdict
+from threading import Lock
+from timeit import default_timer as timer
+from typing import Iterable, Iterator
+
+from nrlf.core.types import DynamoDbClient
+
+RETURN_CONSUMED_CAPACITY = "INDEXES"
+READ_OPERATIONS = frozenset(
+    ("get_item", "query", "scan", "batch_get_item", "transact_get_items")
+)
+WRITE_OPERATIONS = frozenset(
+    (
+        "put_item",
+        "update_item",
+        "delete_item",
+        "batch_write_item",
+        "transact_write_items",
+    )
+)
+PAGINATED_OPERATIONS = frozenset(("query", "scan"))
+INDEX_SEPARATOR = "/"
+TO_MILLISECONDS = 1000
+
+
+def _capacity_units_by_index(consumed_capacity: dict) -> Iterator[tuple[str, float]]:
+    """
+    The capacity units consumed by the table and each of its indexes, keyed by
+    '<table_name>' or '<table_name>/<index_name>'
+    """
+    table_name = consumed_capacity["TableName"]
+    if "Table" in consumed_capacity:
+        yield table_name, consumed_capacity["Table"].get("CapacityUnits", 0)
+    for indexes in ("GlobalSecondaryIndexes", "LocalSecondaryIndexes"):
+        for index_name, index in consumed_capacity.get(indexes, {}).items():
+            yield f"{table_name}{INDEX_SEPARATOR}{index_name}", index.get(
+                "CapacityUnits", 0
+            )
+
+
+class DynamoDbMetrics:
+    """
+    Totals of the DynamoDb calls made (by one or more Repositories) while
+    handling a request. Recording is thread safe, since queries and scans
+    can be fanned out over worker threads.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = Counter()
+            self.pages = 0
+            self.scanned_count = 0
+            self.count = 0
+            self.read_capacity_units = 0.0
+            self.write_capacity_units = 0.0
+            self.read_capacity_units_by_index = defaultdict(float)
+            self.write_capacity_units_by_index = defaultdict(float)
+            self.seconds = 0.0
+            self.retries = 0
+            self.throttles = 0
+
+    def record(self, operation: str, response: dict, seconds: float):
+        consumed_capacity = response.get("ConsumedCapacity", [])
+        if isinstance(consumed_capacity, dict):
+            consumed_capacity = [consumed_capacity]
+        is_read = operation in READ_OPERATIONS
+        capacity_units = sum(
+            _consumed.get("CapacityUnits", 0) for _consumed in consumed_capacity
+        )
+        capacity_units_by_index = (
+            self.read_capacity_units_by_index
+            if is_read
+            else self.write_capacity_units_by_index
+        )
+        with self._lock:
+            self.calls[operation] += 1
+            self.seconds += seconds
+            if operation in PAGINATED_OPERATIONS:
+                self.pages += 1
+                self.scanned_count += response.get("ScannedCount", 0)
+                self.count += response.get("Count", 0)
+            if is_read:
+                self.read_capacity_units += capacity_units
+            else:
+                self.write_capacity_units += capacity_units
+            for _consumed in consumed_capacity:
+                for name, units in _capacity_units_by_index(_consumed):
+                    capacity_units_by_index[name] += units
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_throttle(self):
+        with self._lock:
+            self.throttles += 1
+
+    @classmethod
+    def merge(cls, metrics: Iterable["DynamoDbMetrics"]) -> "DynamoDbMetrics":
+        merged = cls()
+        for _metrics in metrics:
+            with _metrics._lock:
+                merged.calls.update(_metrics.calls)
+                merged.pages += _metrics.pages
+                merged.scanned_count += _metrics.scanned_count
+                merged.count += _metrics.count
+                merged.read_capacity_units += _metrics.read_capacity_units
+                merged.write_capacity_units += _metrics.write_capacity_units
+                merged.seconds += _metrics.seconds
+                merged.retries += _metrics.retries
+                merged.throttles += _metrics.throttles
+                for name, units in _metrics.read_capacity_units_by_index.items():
+                    merged.read_capacity_units_by_index[name] += units
+                for name, units in _metrics.write_capacity_units_by_index.items():
+                    merged.write_capacity_units_by_index[name] += units
+        return merged
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    @property
+    def milliseconds(self) -> int:
+        return int(self.seconds * TO_MILLISECONDS)
+
+    def dict(self) -> dict:
+        return {
+            "calls": dict(self.calls),
+            "pages": self.pages,
+            "scanned_count": self.scanned_count,
+            "count": self.count,
+            "read_capacity_units": self.read_capacity_units,
+            "write_capacity_units": self.write_capacity_units,
+            "read_capacity_units_by_index": dict(self.read_capacity_units_by_index),
+            "write_capacity_units_by_index": dict(self.write_capacity_units_by_index),
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "duration_ms": self.milliseconds,
+        }
+
+
+class InstrumentedDynamoDbClient:
+    """
+    Wraps a DynamoDb client so that every call which supports it returns the
+    capacity that it consumed, and is recorded in 'metrics'. All other
+    attributes are those of the wrapped client.
+    """
+
+    def __init__(self, client: DynamoDbClient, metrics: DynamoDbMetrics):
+        self.client = client
+        self.metrics = metrics
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+        if name not in READ_OPERATIONS | WRITE_OPERATIONS:
+            return method
+
+        def _instrumented(**kwargs) -> dict:
+            kwargs.setdefault("ReturnConsumedCapacity", RETURN_CONSUMED_CAPACITY)
+            start_seconds = timer()
+            response = {}
+            try:
+                response = method(**kwargs)
+            finally:
+                self.metrics.record(
+                    operation=name, response=response, seconds=timer() - start_seconds
+                )
+            return response
+
+        return _instrumented
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import Optional, Type, Union
 
 from aws_lambda_powertools.utilities.parser.models import (
@@ -11,11 +12,15 @@ from pydantic import BaseModel, Field, Json, PrivateAttr, root_validator, valida
 
 import nrlf.consumer.fhir.r4.model as consumer_model
 import nrlf.producer.fhir.r4.model as producer_model
+from nrlf.core.codec import decode, decode_item
+from nrlf.core.compression import decompress
 from nrlf.core.dynamodb_types import (
     DYNAMODB_NULL,
+    DynamoDbCompressedStringType,
     DynamoDbDictType,
     DynamoDbIntType,
     DynamoDbListType,
+    DynamoDbNullType,
     DynamoDbStringType,
     DynamoDbType,
     convert_dynamo_value_to_raw_value,
@@ -26,6 +31,8 @@ from nrlf.core.validators import (
     _get_tuple_components,
     create_document_type_tuple,
     generate_producer_id,
+    immutable_fields_digest,
+    json_loads,
     split_custodian_id,
     validate_nhs_number,
     validate_producer_id,
@@ -61,6 +68,45 @@ def assert_model_has_only_dynamodb_types(model: Type[BaseModel]):
         )
 
 
+@lru_cache(maxsize=None)
+def _assert_model_has_only_dynamodb_types_once(model: Type[BaseModel]):
+    """Field types are fixed per class, so only need to be checked once"""
+    assert_model_has_only_dynamodb_types(model=model)
+
+
+def _construct(model: Type[BaseModel], values: dict) -> BaseModel:
+    """
+    A leaner equivalent of 'model.construct(**values)', for when 'values'
+    already contains every field of the model
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__fields_set__", set(values))
+    return instance
+
+
+def _decode_dynamodb_fields(
+    model: Type[BaseModel], item: dict, exclude: frozenset[str] = frozenset()
+) -> dict:
+    """
+    Decodes a dynamodb item straight into the DynamoDbType of each model
+    field, without any validation. Fields in 'exclude' are not decoded.
+    """
+    values = {}
+    for field_name, field in model.__fields__.items():
+        if field_name in exclude:
+            continue
+        if field_name not in item:
+            if field.required:
+                raise ValueError(f"Field '{field_name}' is missing from the item")
+            values[field_name] = field.get_default()
+            continue
+        value = decode(item[field_name])
+        field_type = DynamoDbNullType if value is None else field.type_
+        values[field_name] = _construct(field_type, {"__root__": value})
+    return values
+
+
 class DynamoDbModel(BaseModel):
     _from_dynamo: bool = Field(
         default=False,
@@ -70,7 +116,17 @@ class DynamoDbModel(BaseModel):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        assert_model_has_only_dynamodb_types(model=self.__class__)
+        _assert_model_has_only_dynamodb_types_once(model=self.__class__)
+
+    @classmethod
+    def from_dynamodb(cls, item: dict):
+        """
+        Trusted constructor for items read from dynamodb, which have already
+        been validated when they were written. The item is decoded straight
+        into the model, skipping all validators.
+        """
+        _assert_model_has_only_dynamodb_types_once(model=cls)
+        return _construct(cls, _decode_dynamodb_fields(model=cls, item=item))
 
     @root_validator(pre=True)
     def transform_input_values_if_dynamo_values(cls, values: dict) -> dict:
@@ -82,6 +138,20 @@ class DynamoDbModel(BaseModel):
             }
         return values
 
+    def stored_dict(self) -> dict:
+        """
+        The item as it is written, with any attributes which are only needed
+        in storage, which is the same as 'dict' by default
+        """
+        return self.dict()
+
+    def compact_dict(self) -> dict:
+        """
+        The item as it is written in its compact layout, which is the same as
+        'stored_dict' by default
+        """
+        return self.stored_dict()
+
     @classmethod
     def kebab(cls) -> str:
         return to_kebab_case(cls.__name__)
@@ -101,7 +171,8 @@ def key(*args) -> str:
 
 
 def dynamodb_key(*args) -> DynamoDbStringType:
-    return DynamoDbStringType(__root__=key(*args))
+    """'key' always returns a string, so there is nothing to validate"""
+    return _construct(DynamoDbStringType, {"__root__": key(*args)})
 
 
 def convert_document_pointer_id_to_pk(id: str) -> str:
@@ -114,6 +185,35 @@ def split_pointer_type(pointer_type: str) -> tuple[str, str]:
     return pointer_type.split(TYPE_SEPARATOR)
 
 
+DOCUMENT_POINTER_DERIVED_FIELDS = frozenset(("producer_id", "document_id"))
+DOCUMENT_POINTER_CUSTODIAN_FIELDS = frozenset(("custodian", "custodian_suffix"))
+DOCUMENT_POINTER_LAYOUT_VERSION = 2
+LAYOUT_VERSION = "layout_version"
+
+
+def redundant_document_pointer_attributes(item: dict) -> list[str]:
+    """
+    The attributes of a (decoded) DocumentPointer item which are rebuilt on
+    read, and so are dropped by the compact layout: NULL attributes, empty
+    schemas, and the custodian (and suffix) if they can be derived from the
+    producer_id
+    """
+    redundant = [
+        name
+        for (name, value) in item.items()
+        if value is None or (name == "schemas" and value == [])
+    ]
+    producer_parts = split_custodian_id(item["producer_id"])
+    custodian_parts = (item.get("custodian"), item.get("custodian_suffix"))
+    if "custodian" in item and custodian_parts == producer_parts:
+        redundant += [
+            name
+            for name in sorted(DOCUMENT_POINTER_CUSTODIAN_FIELDS)
+            if name in item and name not in redundant
+        ]
+    return redundant
+
+
 class DocumentPointer(DynamoDbModel):
     id: DynamoDbStringType
     nhs_number: DynamoDbStringType
@@ -134,17 +234,81 @@ class DocumentPointer(DynamoDbModel):
         super().__init__(**data)
         self._document = _document
 
+    @classmethod
+    def from_dynamodb(cls, item: dict) -> "DocumentPointer":
+        """
+        Reads items in either layout: attributes which the compact layout
+        drops are rebuilt here
+        """
+        _assert_model_has_only_dynamodb_types_once(model=cls)
+        is_compact = "custodian" not in item
+        exclude = DOCUMENT_POINTER_DERIVED_FIELDS
+        if is_compact:
+            exclude = exclude | DOCUMENT_POINTER_CUSTODIAN_FIELDS
+        values = _decode_dynamodb_fields(model=cls, item=item, exclude=exclude)
+        producer_id, document_id = generate_producer_id(
+            id=values["id"].__root__, producer_id=None
+        )
+        values["producer_id"] = _construct(
+            DynamoDbStringType, {"__root__": producer_id}
+        )
+        values["document_id"] = _construct(
+            DynamoDbStringType, {"__root__": document_id}
+        )
+        if is_compact:
+            custodian, custodian_suffix = split_custodian_id(producer_id)
+            values["custodian"] = _construct(
+                DynamoDbStringType, {"__root__": custodian}
+            )
+            values["custodian_suffix"] = (
+                DYNAMODB_NULL
+                if custodian_suffix is None
+                else _construct(DynamoDbStringType, {"__root__": custodian_suffix})
+            )
+        if "B" in item["document"]:
+            values["document"] = DynamoDbCompressedStringType.from_compressed(
+                item["document"]["B"]
+            )
+        document_pointer = _construct(cls, {k: values[k] for k in cls.__fields__})
+        document_pointer._document = None
+        return document_pointer
+
     def dict(self, **kwargs):
+        # sk and sk_2..4 are the same as pk and sk_1, so only build each key once
+        pk = self.pk.__root__
+        sk_1 = self.sk_1.__root__
         return {
-            "pk": self.pk.dict(),
-            "sk": self.sk.dict(),
+            "pk": {"S": pk},
+            "sk": {"S": pk},
             "pk_1": self.pk_1.dict(),
-            "sk_1": self.sk_1.dict(),
+            "sk_1": {"S": sk_1},
             "pk_2": self.pk_2.dict(),
-            "sk_2": self.sk_2.dict(),
+            "sk_2": {"S": sk_1},
+            "pk_3": self.pk_3.dict(),
+            "sk_3": {"S": sk_1},
+            "pk_4": self.pk_4.dict(),
+            "sk_4": {"S": sk_1},
             **super().dict(**kwargs),
         }
 
+    def stored_dict(self) -> dict:
+        """
+        Only the stored item has the immutable_digest, so that it is not
+        computed for items which are just being read
+        """
+        return {**self.dict(), "immutable_digest": self.immutable_digest.dict()}
+
+    def compact_dict(self) -> dict:
+        """
+        The item in the compact (versioned) layout, without the attributes
+        which are rebuilt on read
+        """
+        item = self.stored_dict()
+        for name in redundant_document_pointer_attributes(decode_item(item)):
+            del item[name]
+        item[LAYOUT_VERSION] = {"N": str(DOCUMENT_POINTER_LAYOUT_VERSION)}
+        return item
+
     @property
     def pk(self) -> DynamoDbStringType:
         return dynamodb_key(
@@ -176,6 +340,37 @@ class DocumentPointer(DynamoDbModel):
     def sk_2(self) -> DynamoDbStringType:
         return self.sk_1
 
+    @property
+    def pk_3(self) -> DynamoDbStringType:
+        return dynamodb_key(DbPrefix.PatientType, self.nhs_number, self.type)
+
+    @property
+    def sk_3(self) -> DynamoDbStringType:
+        return self.sk_1
+
+    @property
+    def pk_4(self) -> DynamoDbStringType:
+        return dynamodb_key(
+            DbPrefix.OrganizationPatient, self.nhs_number, *self.custodian_parts
+        )
+
+    @property
+    def sk_4(self) -> DynamoDbStringType:
+        return self.sk_1
+
+    @property
+    def immutable_digest(self) -> DynamoDbStringType:
+        """
+        Stored with each item so that updates can be conditional on the
+        immutable fields being unchanged, without reading the item first
+        """
+        document = self._document
+        if document is None:
+            document = json_loads(self.document.__root__)
+        return _construct(
+            DynamoDbStringType, {"__root__": immutable_fields_digest(document)}
+        )
+
     @property
     def custodian_parts(self) -> tuple[str]:
         return tuple(
@@ -186,6 +381,22 @@ class DocumentPointer(DynamoDbModel):
     def public_alias(cls) -> str:
         return "DocumentReference"
 
+    @root_validator(pre=True)
+    def decompress_document(cls, values: dict) -> dict:
+        document = values.get("document")
+        if type(document) is bytes:
+            values["document"] = decompress(document)
+        return values
+
+    @root_validator(pre=True)
+    def derive_custodian(cls, values: dict) -> dict:
+        """Items in the compact layout don't store the custodian"""
+        if values.get("_from_dynamo") and values.get("custodian") is None:
+            values["custodian"], _ = generate_producer_id(
+                id=values.get("id"), producer_id=None
+            )
+        return values
+
     @root_validator(pre=True)
     def extract_custodian_suffix(cls, values: dict) -> dict:
         custodian: str = values.get("custodian")
@@ -313,6 +524,36 @@ class APIGatewayProxyEventModel(_APIGatewayProxyEventModel):
     requestContext: APIGatewayEventRequestContext
 
 
+class PointerCount(DynamoDbModel):
+    """
+    The number of pointers of a patient (or of a patient and pointer type),
+    which is stored alongside the pointers
+    """
+
+    pk: DynamoDbStringType
+    sk: DynamoDbStringType
+    count: DynamoDbIntType
+
+    @classmethod
+    def kebab(cls) -> str:
+        return "document-pointer"
+
+
+class CountBatch(DynamoDbModel):
+    """
+    A marker that a batch of changes has been added to the pointer counts,
+    which expires (by the table's TTL) once the batch can't be retried
+    """
+
+    pk: DynamoDbStringType
+    sk: DynamoDbStringType
+    expires_at: DynamoDbIntType
+
+    @classmethod
+    def kebab(cls) -> str:
+        return "document-pointer"
+
+
 class Contract(DynamoDbModel):
     pk: DynamoDbStringType
     sk: DynamoDbStringType
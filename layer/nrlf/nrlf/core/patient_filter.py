@@ -0,0 +1,308 @@
+"""
+A Bloom filter of the NHS number of every patient with at least one pointer,
+so that a search (or count) for a patient without any pointers - which is
+most of them - is answered without querying DynamoDb.
+
+The filter can wrongly say that a patient might have pointers (with
+probability of about its 'error_rate', which is then just a query) but never
+that a patient who is in it doesn't. It is rebuilt from a scan of the table and
+kept up to date from the stream (see stream/patient_filter), and published to
+S3, from where each Lambda reloads it (if it has changed) every 'ttl_seconds'.
+A patient's first pointer can therefore be missed by searches for up to the
+stream's lag plus the TTL. If the filter can't be loaded then every patient
+might have pointers, i.e. searches query as usual.
+"""
+import hashlib
+import math
+import struct
+import time
+from typing import Callable, Iterable, Iterator, Union
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from nrlf.core.cache import CacheStatistics
+from nrlf.core.clients import get_client
+from nrlf.core.pointer_counts import POINTER_KEY_PREFIX
+from nrlf.core.repository import SCAN_TOTAL_SEGMENTS, Repository
+from nrlf.core.types import S3Client
+
+PATIENT_FILTER_KEY = "patient-filter"
+PATIENT_FILTER_TTL_SECONDS = 60.0
+PATIENT_FILTER_ERROR_RATE = 0.01
+PATIENT_FILTER_MAX_BYTES = 32 * 1024 * 1024
+PATIENT_FILTER_MIN_CAPACITY = 100_000
+CAPACITY_HEADROOM = 1.25  # For the patients added by the stream until the next build
+
+# magic, format version, number of hashes, number of bits, patients, built at
+HEADER = struct.Struct(">4sBBQQd")
+MAGIC = b"NRLP"
+FORMAT_VERSION = 1
+NOT_MODIFIED = ("304", "NotModified")
+
+
+class PatientFilterError(Exception):
+    pass
+
+
+class BloomFilter:
+    """
+    A Bloom filter of 'n_bits' bits, which are set at 'n_hashes' positions for
+    each NHS number (by double hashing a BLAKE2b digest of it). The bits may
+    be a (read-only) memoryview of a published filter, so that loading it
+    doesn't copy or parse it.
+    """
+
+    def __init__(
+        self,
+        n_bits: int,
+        n_hashes: int,
+        bits: Union[bytearray, memoryview] = None,
+        patients: int = 0,
+        built_at: float = 0.0,
+    ):
+        n_bytes = -(-n_bits // 8)
+        if bits is None:
+            bits = bytearray(n_bytes)
+        if len(bits) != n_bytes:
+            raise PatientFilterError(f"Expected {n_bytes} bytes, got {len(bits)}")
+        self.n_bits = n_bits
+        self.n_hashes = n_hashes
+        self.bits = bits
+        self.patients = patients
+        self.built_at = built_at
+
+    @classmethod
+    def for_capacity(
+        cls,
+        capacity: int,
+        error_rate: float = PATIENT_FILTER_ERROR_RATE,
+        max_bytes: int = PATIENT_FILTER_MAX_BYTES,
+        built_at: float = 0.0,
+    ) -> "BloomFilter":
+        """
+        The smallest filter which holds 'capacity' patients at 'error_rate',
+        unless that is larger than 'max_bytes' (in which case the error rate
+        is higher, see 'error_rate')
+        """
+        capacity = max(capacity, 1)
+        n_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        n_bits = max(8, min(n_bits, max_bytes * 8))
+        n_hashes = max(1, round(n_bits / capacity * math.log(2)))
+        return cls(n_bits=n_bits, n_hashes=n_hashes, built_at=built_at)
+
+    def _positions(self, nhs_number: str) -> Iterator[int]:
+        digest = hashlib.blake2b(nhs_number.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.n_bits for i in range(self.n_hashes))
+
+    def add(self, nhs_number: str) -> bool:
+        """Adds the patient, returning whether they weren't already in it"""
+        added = False
+        for position in self._positions(nhs_number):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        self.patients += added
+        return added
+
+    def __contains__(self, nhs_number: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(nhs_number)
+        )
+
+    def error_rate(self) -> float:
+        """The expected false positive rate, given the patients in it"""
+        return (
+            1 - math.exp(-self.n_hashes * self.patients / self.n_bits)
+        ) ** self.n_hashes
+
+    def to_bytes(self) -> bytes:
+        header = HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            self.n_hashes,
+            self.n_bits,
+            self.patients,
+            self.built_at,
+        )
+        return header + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, bytearray]) -> "BloomFilter":
+        """The filter of 'data', which is writable if 'data' is a bytearray"""
+        try:
+            magic, version, n_hashes, n_bits, patients, built_at = HEADER.unpack_from(
+                data
+            )
+        except struct.error as error:
+            raise PatientFilterError(f"Malformed patient filter: {error}") from error
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise PatientFilterError(
+                f"Unknown patient filter format {magic!r} version {version}"
+            )
+        return cls(
+            n_bits=n_bits,
+            n_hashes=n_hashes,
+            bits=memoryview(data)[HEADER.size :],
+            patients=patients,
+            built_at=built_at,
+        )
+
+
+def build_bloom_filter(
+    repository: Repository,
+    error_rate: float = PATIENT_FILTER_ERROR_RATE,
+    max_bytes: int = PATIENT_FILTER_MAX_BYTES,
+    total_segments: int = SCAN_TOTAL_SEGMENTS,
+    clock: Callable[[], float] = time.time,
+) -> BloomFilter:
+    """
+    Builds the filter from a parallel scan of the table's pointers, sized by
+    the table's (approximate) item count, which is at least the number of
+    patients, so that the patients aren't held in memory to be counted. A
+    new table's filter is sized for PATIENT_FILTER_MIN_CAPACITY patients.
+    """
+    description = repository.dynamodb.describe_table(TableName=repository.table_name)
+    capacity = math.ceil(description["Table"]["ItemCount"] * CAPACITY_HEADROOM)
+    bloom_filter = BloomFilter.for_capacity(
+        capacity=max(capacity, PATIENT_FILTER_MIN_CAPACITY),
+        error_rate=error_rate,
+        max_bytes=max_bytes,
+        built_at=clock(),
+    )
+    for item in repository.parallel_scan(
+        total_segments=total_segments, projection=["pk", "nhs_number"]
+    ):
+        if item["pk"].startswith(POINTER_KEY_PREFIX):
+            bloom_filter.add(item["nhs_number"])
+    return bloom_filter
+
+
+class PatientFilter:
+    """
+    The filter published at 'key' in 'bucket', which is reloaded (if it has
+    changed) once it is 'ttl_seconds' old. Its statistics count the patients
+    who definitely have no pointers as negative hits, those who might as
+    hits, and those who were looked up without a filter as misses.
+    """
+
+    name = "patient_filter"
+
+    def __init__(
+        self,
+        s3_client: S3Client,
+        bucket: str,
+        key: str = PATIENT_FILTER_KEY,
+        ttl_seconds: float = PATIENT_FILTER_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        writable: bool = False,
+    ):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.writable = writable
+        self.bloom_filter: Union[BloomFilter, None] = None
+        self.etag: Union[str, None] = None
+        self.loaded_at: Union[float, None] = None
+        self.statistics = CacheStatistics()
+
+    def reset_statistics(self):
+        self.statistics.reset()
+
+    def refresh(self):
+        """
+        Reloads the filter if it has changed since it was loaded. If it can't
+        be loaded (including when S3 times out or can't be reached) then there
+        is no filter until the next refresh.
+        """
+        self.loaded_at = self.clock()
+        kwargs = {} if self.etag is None else {"IfNoneMatch": self.etag}
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket, Key=self.key, **kwargs
+            )
+            body = response["Body"].read()
+            self.bloom_filter = BloomFilter.from_bytes(
+                bytearray(body) if self.writable else body
+            )
+            self.etag = response["ETag"]
+        except ClientError as error:
+            if error.response["Error"]["Code"] in NOT_MODIFIED:
+                return
+            self._unload()
+        except (BotoCoreError, PatientFilterError):
+            self._unload()
+
+    def _unload(self):
+        self.bloom_filter = None
+        self.etag = None
+
+    def _expired(self) -> bool:
+        return self.loaded_at is None or (
+            self.clock() - self.loaded_at >= self.ttl_seconds
+        )
+
+    def might_have_pointers(self, nhs_number: str) -> bool:
+        if self._expired():
+            self.refresh()
+        if self.bloom_filter is None:
+            self.statistics.misses += 1
+            return True
+        if nhs_number in self.bloom_filter:
+            self.statistics.hits += 1
+            return True
+        self.statistics.negative_hits += 1
+        return False
+
+    def add(self, nhs_numbers: Iterable[str]) -> int:
+        """
+        Adds the patients to the latest filter and publishes it, if any were
+        added. Returns how many were added, which is none if there is no
+        filter yet (i.e. until it is first built).
+        """
+        self.refresh()
+        if self.bloom_filter is None:
+            return 0
+        added = sum(map(self.bloom_filter.add, set(nhs_numbers)))
+        if added:
+            try:
+                self.publish(self.bloom_filter)
+            except Exception:
+                self._unload()  # So that it is reloaded, rather than republished
+                raise
+        return added
+
+    def publish(self, bloom_filter: BloomFilter):
+        response = self.s3_client.put_object(
+            Bucket=self.bucket, Key=self.key, Body=bloom_filter.to_bytes()
+        )
+        self.bloom_filter = bloom_filter
+        self.etag = response["ETag"]
+        self.loaded_at = self.clock()
+
+
+def build_patient_filter(
+    bucket: Union[str, None],
+    key: Union[str, None] = None,
+    ttl_seconds: Union[float, None] = None,
+    s3_client: S3Client = None,
+) -> Union[PatientFilter, None]:
+    """
+    Builds the filter from (optional) Lambda config, which is disabled unless
+    it has a bucket, and loads it (i.e. at cold start)
+    """
+    if not bucket:
+        return None
+    patient_filter = PatientFilter(
+        s3_client=get_client("s3") if s3_client is None else s3_client,
+        bucket=bucket,
+        key=key or PATIENT_FILTER_KEY,
+        ttl_seconds=PATIENT_FILTER_TTL_SECONDS if ttl_seconds is None else ttl_seconds,
+    )
+    patient_filter.refresh()
+    return patient_filter
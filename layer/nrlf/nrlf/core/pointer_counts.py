@@ -0,0 +1,217 @@
+"""
+Materialised counts of the pointers of each patient, and of each patient and
+pointer type, which are stored as PointerCount items alongside the pointers
+so that counting a patient's pointers takes one BatchGetItem (per
+BATCH_GET_ITEM_LIMIT pointer types) however many pointers they have.
+
+The counts are kept up to date from the DynamoDb stream, which delivers each
+change at least once: each batch is added once (see 'add'), but they can still
+drift (e.g. if a batch is split). 'reconcile_counts' rebuilds every count from
+a scan of the pointers, and reports the drift that it corrected.
+"""
+import time
+from collections import Counter
+from typing import Callable, Iterable, Mapping, NamedTuple, Union
+
+from botocore.exceptions import ClientError
+
+from nrlf.core.constants import DbPrefix
+from nrlf.core.model import CountBatch, PointerCount, key
+from nrlf.core.repository import (
+    MAX_TRANSACT_ITEMS,
+    SCAN_TOTAL_SEGMENTS,
+    Repository,
+    _keys,
+    handle_dynamodb_errors,
+)
+from nrlf.core.types import DynamoDbClient
+
+COUNT_KEY_PREFIXES = (
+    f"{DbPrefix.PatientCount}#",
+    f"{DbPrefix.PatientTypeCount}#",
+)
+POINTER_KEY_PREFIX = f"{DbPrefix.DocumentPointer}#"
+COUNT_PROJECTION = ["pk", "count"]
+POINTER_PROJECTION = ["pk", "nhs_number", "type"]
+COUNTS_PER_TRANSACTION = MAX_TRANSACT_ITEMS - 1  # i.e. and the batch's marker
+COUNT_BATCH_TTL_SECONDS = 2 * 24 * 60 * 60  # i.e. longer than the stream's retention
+
+
+def patient_count_key(nhs_number: str) -> str:
+    return key(DbPrefix.PatientCount, nhs_number)
+
+
+def patient_type_count_key(nhs_number: str, pointer_type: str) -> str:
+    return key(DbPrefix.PatientTypeCount, nhs_number, pointer_type)
+
+
+def count_keys(nhs_number: str, pointer_type: str) -> tuple[str, str]:
+    """The key of every count which includes a pointer"""
+    return (
+        patient_count_key(nhs_number),
+        patient_type_count_key(nhs_number, pointer_type),
+    )
+
+
+def is_count_key(pk: str) -> bool:
+    return pk.startswith(COUNT_KEY_PREFIXES)
+
+
+def _already_added(error: ClientError) -> bool:
+    """Whether the transaction was cancelled by its batch's marker (the first item)"""
+    reasons = error.response.get("CancellationReasons", [])
+    return bool(reasons) and reasons[0].get("Code") == "ConditionalCheckFailed"
+
+
+class CountDrift(NamedTuple):
+    pointers: int
+    counts: int
+    drifted: int
+    absolute_drift: int
+    corrected: int
+    skipped: int  # i.e. counts which changed during the reconciliation
+
+
+class PointerCountRepository(Repository[PointerCount]):
+    def __init__(self, client: DynamoDbClient, **kwargs):
+        super().__init__(item_type=PointerCount, client=client, **kwargs)
+
+    def read_counts(self, pks: Iterable[str]) -> dict[str, int]:
+        """The count of each key, which is zero if it has never been counted"""
+        pks = list(pks)
+        found, _ = self.read_items(pks)
+        return {pk: found[pk].count.__root__ if pk in found else 0 for pk in pks}
+
+    def count(self, nhs_number: str, pointer_types: Iterable[str]) -> int:
+        """The number of pointers of the patient with any of the pointer types"""
+        pks = [
+            patient_type_count_key(nhs_number, pointer_type)
+            for pointer_type in dict.fromkeys(pointer_types)
+        ]
+        return sum(self.read_counts(pks).values())
+
+    @handle_dynamodb_errors()
+    def add(
+        self,
+        deltas: Mapping[str, int],
+        batch_id: str,
+        clock: Callable[[], float] = time.time,
+    ) -> int:
+        """
+        Adds each delta to its count (atomically), creating it if need be,
+        once per 'batch_id'. The deltas are added in transactions of up to
+        COUNTS_PER_TRANSACTION counts, each with a marker of the batch, so
+        that a transaction which is retried after it was applied (e.g. after
+        a timeout, or when the stream retries the batch) adds nothing.
+        Returns the number of counts updated.
+        """
+        updates = sorted((pk, delta) for pk, delta in deltas.items() if delta)
+        expires_at = int(clock()) + COUNT_BATCH_TTL_SECONDS
+        updated = 0
+        for chunk, start in enumerate(range(0, len(updates), COUNTS_PER_TRANSACTION)):
+            marker_pk = key(DbPrefix.CountBatch, batch_id, chunk)
+            marker = CountBatch(pk=marker_pk, sk=marker_pk, expires_at=expires_at)
+            transact_items = [
+                {
+                    "Put": {
+                        "TableName": self.table_name,
+                        "Item": marker.dict(),
+                        "ConditionExpression": "attribute_not_exists(pk)",
+                    }
+                }
+            ] + [
+                {
+                    "Update": {
+                        "TableName": self.table_name,
+                        "Key": _keys(pk, pk),
+                        "UpdateExpression": "ADD #count :delta",
+                        "ExpressionAttributeNames": {"#count": "count"},
+                        "ExpressionAttributeValues": {":delta": {"N": str(delta)}},
+                    }
+                }
+                for pk, delta in updates[start : start + COUNTS_PER_TRANSACTION]
+            ]
+            try:
+                self.dynamodb.transact_write_items(TransactItems=transact_items)
+            except ClientError as error:
+                if not _already_added(error):
+                    raise
+                continue
+            updated += len(transact_items) - 1
+        return updated
+
+    @handle_dynamodb_errors()
+    def set_count(self, pk: str, count: int, observed: Union[int, None]) -> bool:
+        """
+        Sets the count (deleting it if it is zero) as long as it is still as
+        'observed' (None if it did not exist). Returns whether it was set.
+        """
+        if observed is None:
+            condition = {"ConditionExpression": "attribute_not_exists(pk)"}
+        else:
+            condition = {
+                "ConditionExpression": "#count = :observed",
+                "ExpressionAttributeNames": {"#count": "count"},
+                "ExpressionAttributeValues": {":observed": {"N": str(observed)}},
+            }
+        try:
+            if count:
+                item = PointerCount(pk=pk, sk=pk, count=count)
+                self.dynamodb.put_item(
+                    TableName=self.table_name, Item=item.dict(), **condition
+                )
+            elif observed is not None:
+                self.dynamodb.delete_item(
+                    TableName=self.table_name, Key=_keys(pk, pk), **condition
+                )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+
+def reconcile_counts(
+    repository: PointerCountRepository, total_segments: int = SCAN_TOTAL_SEGMENTS
+) -> CountDrift:
+    """
+    Rebuilds every count from a parallel scan of the table's pointers. The
+    counts are scanned first, so that a count which changes after they were
+    scanned (i.e. a pointer was written meanwhile, which the pointer scan
+    may or may not have seen) is skipped rather than overwritten, and so is
+    left for the next reconciliation.
+    """
+    observed = {
+        item["pk"]: item["count"]
+        for item in repository.parallel_scan(
+            total_segments=total_segments, projection=COUNT_PROJECTION
+        )
+        if is_count_key(item["pk"])
+    }
+    n_pointers, expected = 0, Counter()
+    for item in repository.parallel_scan(
+        total_segments=total_segments, projection=POINTER_PROJECTION
+    ):
+        if item["pk"].startswith(POINTER_KEY_PREFIX):
+            n_pointers += 1
+            expected.update(count_keys(item["nhs_number"], item["type"]))
+
+    drifted = {
+        pk: expected[pk]
+        for pk in sorted(expected.keys() | observed.keys())
+        if expected[pk] != observed.get(pk, 0)
+    }
+    corrected = sum(
+        repository.set_count(pk, count=count, observed=observed.get(pk))
+        for pk, count in drifted.items()
+    )
+    return CountDrift(
+        pointers=n_pointers,
+        counts=len(observed),
+        drifted=len(drifted),
+        absolute_drift=sum(
+            abs(count - observed.get(pk, 0)) for pk, count in drifted.items()
+        ),
+        corrected=corrected,
+        skipped=len(drifted) - corrected,
+    )
@@ -0,0 +1,77 @@
+"""
+Observed selectivity of the filters of each shape of query, i.e. the fraction
+of the items that DynamoDb reads which match the FilterExpression. This is used
+to choose the 'Limit' of each round trip: DynamoDb applies 'Limit' before
+filtering, so asking for exactly the number of items outstanding leads to many
+small round trips when most items are filtered out.
+
+The statistics live as long as the container, and so are shared by every
+request which it handles.
+"""
+from math import ceil
+from threading import Lock
+from typing import NamedTuple, Union
+
+ADAPTIVE_LIMIT_MAX = 500  # The most items read in a single round trip
+SELECTIVITY_DECAY = 0.9  # Weight of earlier observations vs the latest
+SELECTIVITY_PRIOR = 1  # Unobserved shapes are assumed to filter nothing out
+MAX_QUERY_SHAPES = 256
+
+
+class QueryShape(NamedTuple):
+    index_name: Union[str, None]
+    filters: tuple[str, ...]
+
+    @classmethod
+    def from_query_kwargs(cls, query_kwargs: dict) -> "QueryShape":
+        filters = ()
+        if "FilterExpression" in query_kwargs:
+            filters = tuple(sorted(query_kwargs["ExpressionAttributeNames"].values()))
+        return cls(index_name=query_kwargs.get("IndexName"), filters=filters)
+
+
+class QueryStatistics:
+    """
+    Decayed totals of the items read ('scanned') and matched by each shape of
+    query. The number of shapes is bounded, the oldest shape being forgotten
+    to make room for a new one.
+    """
+
+    def __init__(self, max_shapes: int = MAX_QUERY_SHAPES):
+        self.max_shapes = max_shapes
+        self._lock = Lock()
+        self._totals: dict[QueryShape, tuple[float, float]] = {}
+
+    def record(self, shape: QueryShape, scanned_count: int, count: int):
+        if not shape.filters:
+            return
+        with self._lock:
+            scanned, matched = self._totals.pop(shape, (0.0, 0.0))
+            if len(self._totals) >= self.max_shapes:
+                del self._totals[next(iter(self._totals))]
+            self._totals[shape] = (
+                scanned * SELECTIVITY_DECAY + scanned_count,
+                matched * SELECTIVITY_DECAY + count,
+            )
+
+    def selectivity(self, shape: QueryShape) -> float:
+        with self._lock:
+            scanned, matched = self._totals.get(shape, (0.0, 0.0))
+        return (matched + SELECTIVITY_PRIOR) / (scanned + SELECTIVITY_PRIOR)
+
+    def limit(self, shape: QueryShape, n_items: int) -> int:
+        """
+        The number of items to read in order to match 'n_items', bounded by
+        ADAPTIVE_LIMIT_MAX (unless 'n_items' is itself larger)
+        """
+        if not shape.filters:
+            return n_items
+        limit = ceil(n_items / self.selectivity(shape))
+        return max(n_items, min(limit, ADAPTIVE_LIMIT_MAX))
+
+    def clear(self):
+        with self._lock:
+            self._totals.clear()
+
+
+QUERY_STATISTICS = QueryStatistics()
@@ -1,6 +1,17 @@
+import heapq
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from enum import Enum
 from functools import reduce, wraps
-from typing import Generic, Iterator, TypeVar, Union
+from itertools import islice
+from operator import itemgetter
+from queue import Full, Queue
+from threading import Event
+from typing import Callable, Generic, Iterator, NamedTuple, TypeVar, Union
 
 from botocore.exceptions import ClientError
 from lambda_utils.logging import log_action
@@ -8,19 +19,39 @@ from pydantic import BaseModel
 from pydantic.error_wrappers import ValidationError
 
 from nrlf.consumer.fhir.r4.model import RequestQueryCustodian
+from nrlf.core.codec import decode_item, encode
+from nrlf.core.compression import (
+    compress_attributes,
+    decompress_attribute,
+    get_compressor,
+)
+from nrlf.core.constants import DbPrefix
 from nrlf.core.errors import (
+    ConflictError,
     DuplicateError,
     DynamoDbError,
     ItemNotFound,
+    NextPageTokenValidationError,
+    RequestValidationError,
+    SupersedeConditionError,
     SupersedeError,
     TooManyItemsError,
 )
-from nrlf.core.model import DynamoDbModel, PaginatedResponse
+from nrlf.core.item_cache import NOT_CACHED, ItemCache
+from nrlf.core.metrics import DynamoDbMetrics, InstrumentedDynamoDbClient
+from nrlf.core.model import DynamoDbModel, PaginatedResponse, key
+from nrlf.core.query_statistics import QUERY_STATISTICS, QueryShape, QueryStatistics
+from nrlf.core.throttling import (
+    RetryingDynamoDbClient,
+    RetryPolicy,
+    ThrottlingController,
+)
 from nrlf.core.transform import (
     transform_evaluation_key_to_next_page_token,
     transform_next_page_token_to_start_key,
 )
 from nrlf.core.types import DynamoDbClient, DynamoDbResponse
+from nrlf.core.validators import json_loads, validate_immutable_fields
 from nrlf.producer.fhir.r4.model import RequestQueryType
 
 from .decorators import deprecated
@@ -29,7 +60,27 @@ PydanticModel = TypeVar("PydanticModel", bound=BaseModel)
 
 MAX_TRANSACT_ITEMS = 100
 PAGE_ITEM_LIMIT = 20
-COUNT_ITEM_LIMIT = 100  # Larger paging size for _count endpoint for performance
+BATCH_GET_ITEM_LIMIT = 100  # Maximum number of keys in a single BatchGetItem
+BATCH_MAX_ATTEMPTS = 5
+BATCH_BACKOFF_SECONDS = 0.05
+FAN_OUT_MAX_WORKERS = 10  # Maximum number of partitions to query concurrently
+SCAN_TOTAL_SEGMENTS = 4
+SCAN_QUEUE_PAGES_PER_SEGMENT = 2  # Pages (of up to 1MB) buffered per scan segment
+SCAN_QUEUE_TIMEOUT_SECONDS = 0.1
+SCAN_COMPLETE = "complete"
+CURSORS = "cursors"
+DATE_PARAMETER = re.compile(r"^(eq|ge|le)?(.+)$")
+UPPER_BOUND_SUFFIX = "\uffff"  # Sorts after any other character of a key
+CONDITIONAL_UPDATE_ATTRIBUTES = ("producer_id", "immutable_digest")
+CONDITIONAL_UPDATE_EXPRESSION = (
+    "attribute_exists(pk) AND #producer_id = :producer_id "
+    "AND #immutable_digest = :immutable_digest"
+)
+SUPERSEDE_CONDITION_ATTRIBUTES = ("nhs_number", "type")
+SUPERSEDE_CONDITION_EXPRESSION = (
+    "attribute_exists(pk) AND attribute_exists(sk) "
+    "AND #nhs_number = :nhs_number AND #type = :type"
+)
 ATTRIBUTE_EXISTS_PK = "attribute_exists(pk)"
 ATTRIBUTE_NOT_EXISTS_PK = "attribute_not_exists(pk)"
 CONDITION_CHECK_CODES = [
@@ -42,6 +93,9 @@ CONDITION_CHECK_CODES = [
 class LogReference(Enum):
     REPOSITORY001 = "Checking if record is valid"
     REPOSITORY002 = "Querying document"
+    REPOSITORY003 = "Counting documents"
+    REPOSITORY004 = "Querying documents across partitions"
+    REPOSITORY005 = "Choosing the number of items to read"
 
 
 class CorruptItem(Exception):
@@ -84,10 +138,22 @@ def _handle_dynamodb_errors(
     return wrapper
 
 
+def _from_dynamodb(
+    item_type: type[DynamoDbModel], item: dict, trusted: bool = False
+) -> DynamoDbModel:
+    """
+    Hydrates a model from a dynamodb item. Trusted items (i.e. items which
+    were validated when they were written) skip model validation entirely.
+    """
+    if trusted:
+        return item_type.from_dynamodb(item)
+    return item_type(**item)
+
+
 @log_action(log_reference=LogReference.REPOSITORY001, log_fields=["item"])
-def _is_record_valid(item_type: type[DynamoDbModel], item: dict):
+def _is_record_valid(item_type: type[DynamoDbModel], item: dict, trusted=False):
     try:
-        return item_type(**item)
+        return _from_dynamodb(item_type=item_type, item=item, trusted=trusted)
     except (ValueError, ValidationError):
         raise CorruptItem(
             f"Cannot parse '{item_type.__name__}' - this item may be corrupt. "
@@ -95,6 +161,26 @@ def _is_record_valid(item_type: type[DynamoDbModel], item: dict):
         )
 
 
+@log_action(log_reference=LogReference.REPOSITORY005, log_fields=["shape", "n_items"])
+def _query_limit(
+    query_statistics: QueryStatistics, shape: QueryShape, n_items: int
+) -> int:
+    return query_statistics.limit(shape=shape, n_items=n_items)
+
+
+def _chunks(items: list, chunk_size: int) -> Iterator[list]:
+    for i in range(0, len(items), chunk_size):
+        yield items[i : i + chunk_size]
+
+
+def _backoff(attempt: int, base_seconds: float = BATCH_BACKOFF_SECONDS):
+    """
+    Sleeps for a random ('full jitter') duration which grows exponentially
+    with the number of attempts made so far
+    """
+    time.sleep(random.uniform(0, base_seconds * 2**attempt))
+
+
 def _keys(pk, sk, pk_name="pk", sk_name="sk"):
     keys = {pk_name: {"S": f"{pk}"}}
     if sk is not None:
@@ -102,87 +188,138 @@ def _keys(pk, sk, pk_name="pk", sk_name="sk"):
     return keys
 
 
-NoneType = type(None)
-DYNAMODB_ENCODE_LOOKUP = {
-    bool: "B",
-    str: "S",
-    int: "N",
-    float: "N",
-    dict: "M",
-    list: "L",
-    NoneType: "NULL",
-}
+def _index_keys(pk_name: str, sk_name: Union[str, None]) -> list[str]:
+    index_keys = list(set(("pk", "sk", pk_name)))  # dedupe if pk == pk_name
+    if sk_name is not None:
+        index_keys.append(sk_name)
+    return index_keys
 
 
-def _encode(v: any) -> dict:
-    """
-    encodes a value into dynamodb object
+def _evaluation_key(item: DynamoDbModel, index_keys: list[str]) -> dict:
+    return {idx: getattr(item, idx).dict() for idx in index_keys}
 
-    e.g. 123 -> { "N": 123 }
-    """
-    k = DYNAMODB_ENCODE_LOOKUP[type(v)]
-    if k == "NULL":
-        return {"NULL": True}
-    if k == "M":
-        return {"M": {kk: _encode(vv) for (kk, vv) in v.items()}}
-    return {k: v}
 
-
-def _decode_dict(node: dict[str, any]) -> dict[str, any]:
+def _cursors_from_start_key(
+    start_key: dict, pks: list[str]
+) -> dict[str, Union[dict, None]]:
     """
-    recursively decodes a dynamodb map
+    Unpacks the per-partition cursors of a next page token. Partitions which
+    are not in the token were exhausted on an earlier page.
     """
-    return {k: _decode(v) for (k, v) in node["M"].items()}
+    cursors = start_key.get(CURSORS) if type(start_key) is dict else None
+    if type(cursors) is not dict:
+        raise NextPageTokenValidationError("Unable to decode the next page token")
+    return {pk: cursors[pk] for pk in pks if pk in cursors}
+
+
+def _page_kwargs(query_kwargs: dict, exclusive_start_key: Union[dict, None]) -> dict:
+    page_kwargs = {k: v for (k, v) in query_kwargs.items() if k != "ExclusiveStartKey"}
+    if exclusive_start_key is not None:
+        page_kwargs["ExclusiveStartKey"] = exclusive_start_key
+    return page_kwargs
 
 
-def _decode_list(node) -> list[any]:
+def _pages(
+    query: Callable[..., DynamoDbResponse],
+    query_kwargs: dict,
+    exclusive_start_key: Union[dict, None],
+) -> Iterator[DynamoDbResponse]:
     """
-    recursively decodes a dynamodb list
+    Iterates over every page of a dynamodb query, one round trip at a time
     """
-    return [_decode(v) for v in node["L"]]
+    while True:
+        response = query(**_page_kwargs(query_kwargs, exclusive_start_key))
+        yield response
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if exclusive_start_key is None:
+            break
 
 
-def _decode_number(node) -> Union[int, float]:
+class SortKeyCondition(NamedTuple):
     """
-    Tries to maintain integer precision by guessing
+    A condition on the sort key of a query other than equality, i.e. one of
+    'BETWEEN', 'begins_with', '>=' or '<='
     """
-    f = float(node["N"])
-    i = int(f)
-    return i if i == f else f
 
+    operator: str
+    values: tuple[str, ...]
 
-DYNAMODB_DECODE_LOOKUP = {
-    "NULL": lambda _: None,
-    "B": lambda node: bool(node["B"]),
-    "S": lambda node: str(node["S"]),
-    "N": _decode_number,
-    "M": _decode_dict,
-    "L": _decode_list,
-}
+    @classmethod
+    def between(cls, lower: str, upper: str) -> "SortKeyCondition":
+        return cls(operator="BETWEEN", values=(lower, upper))
 
+    @classmethod
+    def begins_with(cls, prefix: str) -> "SortKeyCondition":
+        return cls(operator="begins_with", values=(prefix,))
 
-def _decode(node: dict) -> any:
-    """
-    decodes a dynamodb object into a value
+    @classmethod
+    def greater_than_or_equal(cls, lower: str) -> "SortKeyCondition":
+        return cls(operator=">=", values=(lower,))
+
+    @classmethod
+    def less_than_or_equal(cls, upper: str) -> "SortKeyCondition":
+        return cls(operator="<=", values=(upper,))
+
+    def expression(self, key: str) -> str:
+        if self.operator == "BETWEEN":
+            return f"{key} BETWEEN :{key}_1 AND :{key}_2"
+        if self.operator == "begins_with":
+            return f"begins_with({key}, :{key})"
+        return f"{key} {self.operator} :{key}"
+
+    def attribute_values(self, key: str) -> dict:
+        if self.operator == "BETWEEN":
+            return {f":{key}_{ix+1}": encode(v) for (ix, v) in enumerate(self.values)}
+        (value,) = self.values
+        return {f":{key}": encode(value)}
 
-    e.g. {"N":123} -> 123
+
+def created_on_filter(dates: Union[list, None]) -> Union[SortKeyCondition, None]:
+    """
+    Translates FHIR 'date' search parameters (e.g. 'ge2023-01-01' and
+    'le2023-01-31') into a condition on the created-on sort key of a query.
+    Dates match at their own precision, so 'le2023-01' includes all of January
+    and 'eq2023' (or just '2023') matches any date in 2023.
     """
-    key = "".join(node.keys()).upper()
-    fn = DYNAMODB_DECODE_LOOKUP[key]
-    if fn:
-        return fn(node)
-    raise Exception(f"Unhandled DynamoDb type: {key}")
+    if not dates:
+        return None
+
+    lower_bounds, upper_bounds = [], []
+    for date in dates:
+        comparator, value = DATE_PARAMETER.match(date.__root__).groups()
+        if comparator in (None, "eq", "ge"):
+            lower_bounds.append(key(DbPrefix.CreatedOn, value))
+        if comparator in (None, "eq", "le"):
+            upper_bounds.append(key(DbPrefix.CreatedOn, value) + UPPER_BOUND_SUFFIX)
+
+    lower = max(lower_bounds, default=None)
+    upper = min(upper_bounds, default=None)
+    if upper is None:
+        return SortKeyCondition.greater_than_or_equal(lower)
+    if lower is None:
+        return SortKeyCondition.less_than_or_equal(upper)
+    if lower > upper:
+        raise RequestValidationError("The date parameters do not overlap")
+    if upper == lower + UPPER_BOUND_SUFFIX:
+        return SortKeyCondition.begins_with(lower)
+    return SortKeyCondition.between(lower, upper)
 
 
 def _key_condition_expression(d: dict) -> str:
     """
     Used to generate the 'KeyConditionExpression' parameter in dynamodb queries.
     It delivers a simpler interface by reducing the number of operators to
-    'AND', '=' and 'in' as those are the only ones we use.
+    'AND' and '=', besides any SortKeyCondition on the sort key.
 
     { "foo": 123, "bar": "green" } -> "foo = :foo" AND bar = :bar"
     """
-    return " AND ".join([f"{k} = :{k}" for (k, v) in d.items() if f"{v}" != "None"])
+
+    def _item(key: str, value: any) -> str:
+        if type(value) is SortKeyCondition:
+            return value.expression(key)
+        return f"{key} = :{key}"
+
+    return " AND ".join([_item(k, v) for (k, v) in d.items() if f"{v}" != "None"])
 
 
 def _filter_expression(d: dict) -> str:
@@ -222,9 +359,11 @@ def _expression_attribute_values(d: dict) -> dict:
     """
 
     def _item(key: str, value: any) -> str:
+        if type(value) is SortKeyCondition:
+            return value.attribute_values(key)
         if type(value) == list:
-            return {f":{key}_{ix+1}": _encode(value[ix]) for ix in range(len(value))}
-        return {f":{key}": _encode(value)}
+            return {f":{key}_{ix+1}": encode(value[ix]) for ix in range(len(value))}
+        return {f":{key}": encode(value)}
 
     return reduce(
         lambda a, b: ({**a, **b}),
@@ -233,6 +372,47 @@ def _expression_attribute_values(d: dict) -> dict:
     )
 
 
+def _scan_kwargs(
+    table_name: str, projection: Union[list[str], None], filter: dict
+) -> dict:
+    scan_kwargs = {"TableName": table_name}
+    expression_attribute_names = {}
+    filter = _strip_none(filter)
+    if filter:
+        scan_kwargs["FilterExpression"] = _filter_expression(filter)
+        scan_kwargs["ExpressionAttributeValues"] = _expression_attribute_values(filter)
+        expression_attribute_names.update(_expression_attribute_names(filter))
+    if projection:
+        scan_kwargs["ProjectionExpression"] = ", ".join(f"#{k}" for k in projection)
+        expression_attribute_names.update(_expression_attribute_names(projection))
+    if expression_attribute_names:
+        scan_kwargs["ExpressionAttributeNames"] = expression_attribute_names
+    return scan_kwargs
+
+
+def _put_unless_stopped(queue: Queue, value: any, stop: Event) -> bool:
+    """Blocks until there is room in the queue, unless the consumer has stopped"""
+    while not stop.is_set():
+        try:
+            queue.put(value, timeout=SCAN_QUEUE_TIMEOUT_SECONDS)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _matches_filter(item: dict, filter: dict) -> bool:
+    """
+    Evaluates the equivalent of the FilterExpression of 'filter' (see
+    _filter_expression) against a raw item
+    """
+    for name, value in (filter or {}).items():
+        values = value if type(value) == list else [value]
+        if item.get(name) not in map(encode, values):
+            return False
+    return True
+
+
 def _key_and_filter_clause(key_conditions: dict, filter: dict = None):
     filter = _strip_none(filter)
     if not filter:
@@ -268,20 +448,81 @@ class Repository(Generic[PydanticModel]):
         item_type: type[PydanticModel],
         client: DynamoDbClient,
         environment_prefix: str = "",
+        trusted_reads: bool = False,
+        compression: Union[str, None] = None,
+        compact_layout: bool = False,
+        metrics: DynamoDbMetrics = None,
+        query_statistics: QueryStatistics = None,
+        retry_policy: RetryPolicy = None,
+        throttling_controller: ThrottlingController = None,
+        item_cache: ItemCache = None,
+        prefetch_pages: bool = True,
     ):
-        self.dynamodb = client
+        if compression is not None:
+            get_compressor(compression)  # Fail fast if it is not supported
+        self.metrics = DynamoDbMetrics() if metrics is None else metrics
+        self.dynamodb = RetryingDynamoDbClient(
+            client=InstrumentedDynamoDbClient(client=client, metrics=self.metrics),
+            metrics=self.metrics,
+            policy=retry_policy,
+            controller=throttling_controller,
+        )
         self.item_type: PydanticModel = item_type
         self.table_name = environment_prefix + item_type.kebab()
+        self.trusted_reads = trusted_reads
+        self.compression = compression
+        self.compact_layout = compact_layout
+        self.query_statistics = (
+            QUERY_STATISTICS if query_statistics is None else query_statistics
+        )
+        self.item_cache = item_cache
+        self.prefetch_pages = prefetch_pages
+        # Shared by every read (and so threads persist between requests), but
+        # sized so that each partition of a fan-out can prefetch concurrently
+        self._prefetcher = ThreadPoolExecutor(max_workers=FAN_OUT_MAX_WORKERS)
+
+    def start_request(self):
+        """
+        Resets the metrics and starts the retry latency budget, since the
+        Repository persists between requests
+        """
+        self.metrics.reset()
+        self.dynamodb.start_request()
+        if self.item_cache is not None:
+            self.item_cache.reset_statistics()
+
+    @contextmanager
+    def _invalidating(self, *pks: str):
+        """
+        Drops the records which are being written from the item cache once
+        the write has been made, so that a read made before the write can't
+        cache them again. They are dropped even if the write failed, since it
+        may still have been applied.
+        """
+        try:
+            yield
+        finally:
+            if self.item_cache is not None:
+                self.item_cache.invalidate(*map(str, pks))
+
+    def _item(self, item: PydanticModel) -> dict:
+        """
+        The item to write, in the compact layout (if enabled) and with any
+        compressible attributes compressed
+        """
+        _item = item.compact_dict() if self.compact_layout else item.stored_dict()
+        return compress_attributes(_item, compression=self.compression)
 
     @handle_dynamodb_errors(
         conditional_check_error_message="Duplicate item", error_type=DuplicateError
     )
     def create(self, item: PydanticModel) -> DynamoDbResponse:
-        return self.dynamodb.put_item(
-            TableName=self.table_name,
-            Item=item.dict(),
-            ConditionExpression="attribute_not_exists(pk) AND attribute_not_exists(sk)",
-        )
+        with self._invalidating(item.pk):
+            return self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item=self._item(item),
+                ConditionExpression="attribute_not_exists(pk) AND attribute_not_exists(sk)",
+            )
 
     @deprecated("Use `get` instead.")
     @handle_dynamodb_errors()
@@ -295,7 +536,9 @@ class Repository(Generic[PydanticModel]):
             (item,) = response["Items"]
         except (KeyError, ValueError):
             raise ItemNotFound("Item could not be found") from None
-        return self.item_type(**item)
+        return _from_dynamodb(
+            item_type=self.item_type, item=item, trusted=self.trusted_reads
+        )
 
     @handle_dynamodb_errors()
     def read_item(
@@ -305,8 +548,17 @@ class Repository(Generic[PydanticModel]):
         **filter,
     ) -> PydanticModel:
         """
-        Returns a single record from the database
+        Returns a single record from the database, or from the item cache (if
+        any) for records whose sk is their pk
         """
+        if self.item_cache is not None and sk in (None, pk):
+            item = self._read_cached_item(pk)
+            if item is None or not _matches_filter(item, _strip_none(filter)):
+                raise ItemNotFound("Item could not be found")
+            return _from_dynamodb(
+                item_type=self.item_type, item=item, trusted=self.trusted_reads
+            )
+
         key_conditions = {"pk": pk, "sk": sk or pk}
         clause = _key_and_filter_clause(key_conditions=key_conditions, filter=filter)
         response = self.dynamodb.query(TableName=self.table_name, **clause)
@@ -314,7 +566,58 @@ class Repository(Generic[PydanticModel]):
             (item,) = response["Items"]
         except (KeyError, ValueError):
             raise ItemNotFound("Item could not be found") from None
-        return self.item_type(**item)
+        return _from_dynamodb(
+            item_type=self.item_type, item=item, trusted=self.trusted_reads
+        )
+
+    def _read_cached_item(self, pk: str) -> Union[dict, None]:
+        """
+        The raw item from the item cache, otherwise read (unfiltered, so that
+        it can serve any filter) and cached. Returns None if there is no item.
+        """
+        item = self.item_cache.get(pk)
+        if item is NOT_CACHED:
+            clause = _key_and_filter_clause(key_conditions={"pk": pk, "sk": pk})
+            response = self.dynamodb.query(TableName=self.table_name, **clause)
+            item = next(iter(response.get("Items", [])), None)
+            self.item_cache.put(pk, item)
+        return item
+
+    @handle_dynamodb_errors()
+    def read_items(self, pks: list[str]) -> tuple[dict[str, PydanticModel], list[str]]:
+        """
+        Returns many records from the database using BatchGetItem, which is
+        called once per chunk of BATCH_GET_ITEM_LIMIT keys. Any unprocessed keys
+        are retried with backoff. Returns the found records (indexed by pk) and
+        the pks which could not be found, separately.
+        """
+        pks = list(dict.fromkeys(map(str, pks)))  # dedupe, preserving order
+        raw_items = {}
+        for chunk in _chunks(pks, BATCH_GET_ITEM_LIMIT):
+            request_items = {self.table_name: {"Keys": [_keys(pk, pk) for pk in chunk]}}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response["Responses"].get(self.table_name, []):
+                    raw_items[item["pk"]["S"]] = item
+                request_items = response.get("UnprocessedKeys")
+                if not request_items:
+                    break
+                if attempt == BATCH_MAX_ATTEMPTS - 1:
+                    raise Exception(
+                        "There was an error with the database: "
+                        f"keys were still unprocessed after {BATCH_MAX_ATTEMPTS} attempts"
+                    )
+                _backoff(attempt)
+
+        found = {
+            pk: _from_dynamodb(
+                item_type=self.item_type, item=raw_items[pk], trusted=self.trusted_reads
+            )
+            for pk in pks
+            if pk in raw_items
+        }
+        missing = [pk for pk in pks if pk not in raw_items]
+        return found, missing
 
     @handle_dynamodb_errors()
     @log_action(
@@ -340,12 +643,9 @@ class Repository(Generic[PydanticModel]):
         if sk is not None:
             key_conditions[sk_name] = sk
 
-        index_keys = list(set(("pk", "sk", pk_name)))  # dedupe if pk == pk_name
-        if sk_name is not None:
-            index_keys.append(sk_name)
-
+        index_keys = _index_keys(pk_name=pk_name, sk_name=sk_name)
         clause = _key_and_filter_clause(key_conditions=key_conditions, filter=filter)
-        query_kwargs = {"TableName": self.table_name, "Limit": limit, **clause}
+        query_kwargs = {"TableName": self.table_name, **clause}
         if index_name is not None:
             query_kwargs["IndexName"] = index_name
 
@@ -354,62 +654,233 @@ class Repository(Generic[PydanticModel]):
                 exclusive_start_key
             )
 
-        items, last_evaluated_key = [], None
-        for item in self._scroll(
-            query_kwargs=query_kwargs,
-            exclusive_start_key=exclusive_start_key,
-            logger=logger,
-        ):
-            if item is not None:  # means we haven't reached the final result yet
-                if len(items) == PAGE_ITEM_LIMIT:
-                    # never evaluated on the final page
-                    last_item = items[-1]
-                    last_evaluated_key = {
-                        idx: getattr(last_item, idx).dict() for idx in index_keys
-                    }
-                    break
-                items.append(item)
+        # Read one item beyond the page to find out whether there is a next page
+        items = list(
+            self._read_exactly(
+                query_kwargs=query_kwargs,
+                exclusive_start_key=exclusive_start_key,
+                n_items=limit + 1,
+                logger=logger,
+            )
+        )
 
-        if last_evaluated_key is not None:
+        last_evaluated_key = None
+        if len(items) > limit:
+            # Resume the next page immediately after the last item on this page
+            items.pop()
             last_evaluated_key = transform_evaluation_key_to_next_page_token(
-                last_evaluated_key
+                _evaluation_key(item=items[-1], index_keys=index_keys)
             )
 
         return PaginatedResponse(last_evaluated_key=last_evaluated_key, items=items)
 
-    def _scroll(
+    @handle_dynamodb_errors()
+    @log_action(
+        log_reference=LogReference.REPOSITORY004,
+        log_fields=["pks", "sk_name", "index_name", "pk_name", "sk"],
+    )
+    def _query_many(
         self,
-        query_kwargs: dict,
-        exclusive_start_key: str,
+        index_name,
+        pk_name: str,
+        pks: list[str],
+        sk_name: str,
+        sk: Union[str, SortKeyCondition] = None,
+        limit: int = PAGE_ITEM_LIMIT,
+        exclusive_start_key: str = None,
         logger=None,
-    ) -> Iterator[Union[DynamoDbModel, None]]:
-        query_kwargs.pop("ExclusiveStartKey", None)
+        **filter,
+    ) -> PaginatedResponse:
+        """
+        Do not call this method directly, instead use `query_gsi_#_many` instead.
+
+        Queries each partition key concurrently and merges the results in sort
+        key order, so that a page is the same as it would have been had every
+        partition been a single partition. Each partition is read from the
+        item after the last of its items to have been returned, so the next
+        page token holds one cursor per partition with items outstanding.
+        """
+        index_keys = _index_keys(pk_name=pk_name, sk_name=sk_name)
+        cursors = dict.fromkeys(pks)  # i.e. read every partition from the start
         if exclusive_start_key is not None:
-            query_kwargs["ExclusiveStartKey"] = exclusive_start_key
-        results = self.dynamodb.query(**query_kwargs)
+            cursors = _cursors_from_start_key(
+                start_key=transform_next_page_token_to_start_key(exclusive_start_key),
+                pks=pks,
+            )
+        if not cursors:
+            return PaginatedResponse(items=[])
+
+        def _read_partition(pk: str) -> list[DynamoDbModel]:
+            key_conditions = {pk_name: pk}
+            if sk is not None:
+                key_conditions[sk_name] = sk
+            clause = _key_and_filter_clause(
+                key_conditions=key_conditions, filter=filter
+            )
+            query_kwargs = {"TableName": self.table_name, "IndexName": index_name}
+            return list(
+                self._read_exactly(
+                    query_kwargs={**query_kwargs, **clause},
+                    exclusive_start_key=cursors[pk],
+                    n_items=limit + 1,
+                    logger=logger,
+                )
+            )
 
-        # Yield all valid items
-        items: list[dict] = results["Items"]
-        for item in items:
-            try:
-                _item = _is_record_valid(
-                    item_type=self.item_type, item=item, logger=logger
+        n_workers = min(len(cursors), FAN_OUT_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            partitions = dict(zip(cursors, executor.map(_read_partition, cursors)))
+
+        merged = heapq.merge(
+            *(
+                [(getattr(item, sk_name).__root__, pk, item) for item in items]
+                for pk, items in partitions.items()
+            ),
+            key=itemgetter(0),
+        )
+        page = list(islice(merged, limit + 1))
+
+        last_evaluated_key = None
+        if len(page) > limit:
+            page.pop()
+            last_item_per_partition = {pk: item for (_, pk, item) in page}
+            n_items_per_partition = Counter(pk for (_, pk, _) in page)
+            next_cursors = {}
+            for pk, items in partitions.items():
+                n_unread = len(items) - n_items_per_partition[pk]
+                if n_unread == 0 and len(items) <= limit:
+                    continue  # this partition has no more items
+                last_item = last_item_per_partition.get(pk)
+                next_cursors[pk] = (
+                    cursors[pk]
+                    if last_item is None
+                    else _evaluation_key(item=last_item, index_keys=index_keys)
                 )
-            except CorruptItem:
-                continue
-            yield _item
-
-        # Keep scrolling while there is still a LastEvaluatedKey
-        last_evaluated_key = results.get("LastEvaluatedKey")
-        if last_evaluated_key is not None:
-            yield from self._scroll(
-                query_kwargs=query_kwargs,
-                exclusive_start_key=last_evaluated_key,
+            last_evaluated_key = transform_evaluation_key_to_next_page_token(
+                {CURSORS: next_cursors}
+            )
+
+        return PaginatedResponse(
+            last_evaluated_key=last_evaluated_key,
+            items=[item for (_, _, item) in page],
+        )
+
+    def _read_exactly(
+        self,
+        query_kwargs: dict,
+        exclusive_start_key: Union[dict, None],
+        n_items: int,
+        logger=None,
+    ) -> Iterator[DynamoDbModel]:
+        """
+        Yields up to `n_items` valid items. Each round trip asks dynamodb for
+        the number of items that are still outstanding, scaled up by the
+        observed selectivity of any filters (see 'QueryStatistics'), so that
+        not much more is read than is needed.
+
+        If a page can't hold every outstanding item (i.e. the next page will be
+        read however many of its items are valid) then the next page is read
+        on a background thread while this one is validated, unless
+        'prefetch_pages' is disabled. Only pages that would be read anyway are
+        prefetched, so this doesn't read any more than otherwise.
+        """
+        shape = QueryShape.from_query_kwargs(query_kwargs)
+
+        def _read_page(n_outstanding: int, start_key: Union[dict, None]) -> dict:
+            limit = _query_limit(
+                self.query_statistics,
+                shape=shape,
+                n_items=n_outstanding,
                 logger=logger,
             )
-        # Our own internal definition of there being no more results
-        else:
-            yield None
+            response = self.dynamodb.query(
+                **_page_kwargs({**query_kwargs, "Limit": limit}, start_key)
+            )
+            self.query_statistics.record(
+                shape=shape,
+                scanned_count=response.get("ScannedCount", len(response["Items"])),
+                count=len(response["Items"]),
+            )
+            return response
+
+        n_yielded = 0
+        next_page = None
+        try:
+            while n_yielded < n_items:
+                if next_page is None:
+                    response = _read_page(n_items - n_yielded, exclusive_start_key)
+                else:
+                    response, next_page = next_page.result(), None
+
+                exclusive_start_key = response.get("LastEvaluatedKey")
+                n_outstanding = n_items - n_yielded - len(response["Items"])
+                if (
+                    self.prefetch_pages
+                    and exclusive_start_key is not None
+                    and n_outstanding > 0
+                ):
+                    next_page = self._prefetcher.submit(
+                        _read_page, n_outstanding, exclusive_start_key
+                    )
+
+                for item in response["Items"]:
+                    try:
+                        _item = _is_record_valid(
+                            item_type=self.item_type,
+                            item=item,
+                            trusted=self.trusted_reads,
+                            logger=logger,
+                        )
+                    except CorruptItem:
+                        continue
+                    n_yielded += 1
+                    yield _item
+                    if n_yielded == n_items:
+                        return  # the page resumes from the last item, not from here
+
+                if exclusive_start_key is None:
+                    break
+        finally:
+            if next_page is not None and not next_page.cancel():
+                wait([next_page])  # i.e. don't leave it running after the read
+
+    @handle_dynamodb_errors()
+    @log_action(
+        log_reference=LogReference.REPOSITORY003,
+        log_fields=["pk", "sk_name", "index_name", "pk_name", "sk"],
+    )
+    def _count(
+        self,
+        index_name,
+        pk_name: str,
+        pk: str,
+        sk_name: str = None,
+        sk: str = None,
+        **filter,
+    ) -> int:
+        """
+        Do not call this method directly, instead use `count` or `count_gsi_#` instead.
+
+        Counts are calculated by dynamodb (with Select=COUNT) and so no items
+        are returned or decoded, but note that this means that corrupt items
+        are also counted, even though searches skip them: a count can therefore
+        exceed the number of items that the same search returns.
+        """
+        key_conditions = {pk_name: pk}
+        if sk is not None:
+            key_conditions[sk_name] = sk
+
+        clause = _key_and_filter_clause(key_conditions=key_conditions, filter=filter)
+        query_kwargs = {"TableName": self.table_name, "Select": "COUNT", **clause}
+        if index_name is not None:
+            query_kwargs["IndexName"] = index_name
+
+        pages = _pages(
+            query=self.dynamodb.query,
+            query_kwargs=query_kwargs,
+            exclusive_start_key=None,
+        )
+        return sum(page["Count"] for page in pages)
 
     def query(
         self,
@@ -458,6 +929,18 @@ class Repository(Generic[PydanticModel]):
         """
         return self._query("idx_gsi_3", "pk_3", pk, "sk_3", sk, **filter)
 
+    def query_gsi_3_many(
+        self,
+        pks: list[str],
+        sk=None,
+        **filter,
+    ) -> PaginatedResponse:
+        """
+        Query records for several partition keys of the Global Secondary
+        Index 'idx_gsi_3', as though they were a single partition
+        """
+        return self._query_many("idx_gsi_3", "pk_3", pks, "sk_3", sk, **filter)
+
     def query_gsi_4(
         self,
         pk,
@@ -480,17 +963,207 @@ class Repository(Generic[PydanticModel]):
         """
         return self._query("idx_gsi_5", "pk_5", pk, "sk_5", sk, **filter)
 
+    def count(
+        self,
+        pk,
+        sk=None,
+        **filter,
+    ) -> int:
+        """
+        Count records using the main partition key
+        """
+        sk_name = None if sk is None else "sk"
+        return self._count(
+            index_name=None, pk_name="pk", pk=pk, sk_name=sk_name, sk=sk, **filter
+        )
+
+    def count_gsi_1(
+        self,
+        pk,
+        sk=None,
+        **filter,
+    ) -> int:
+        """
+        Count records using the Global Secondary Index 'idx_gsi_1'
+        """
+        return self._count("idx_gsi_1", "pk_1", pk, "sk_1", sk, **filter)
+
+    def count_gsi_2(
+        self,
+        pk,
+        sk=None,
+        **filter,
+    ) -> int:
+        """
+        Count records using the Global Secondary Index 'idx_gsi_2'
+        """
+        return self._count("idx_gsi_2", "pk_2", pk, "sk_2", sk, **filter)
+
+    def parallel_scan(
+        self,
+        total_segments: int = SCAN_TOTAL_SEGMENTS,
+        projection: list[str] = None,
+        checkpoints: dict[int, Union[dict, str]] = None,
+        page_size: int = None,
+        **filter,
+    ) -> Iterator[Union[PydanticModel, dict]]:
+        """
+        Scans the whole table, with one worker thread per segment. Pages are
+        passed back through a bounded queue, so that memory stays flat however
+        large the table is. Yields models, or decoded dicts of only the
+        projected attributes if a projection is given. Corrupt items are
+        skipped. Each page holds up to 'page_size' items (or 1MB).
+
+        If 'checkpoints' is provided then it is updated (by segment) with the
+        key to resume from once each page has been yielded, or SCAN_COMPLETE
+        once the segment is finished. Passing it back in resumes the scan.
+        """
+        checkpoints = {} if checkpoints is None else checkpoints
+        start_keys = {
+            segment: checkpoints.get(segment)
+            for segment in range(total_segments)
+            if checkpoints.get(segment) != SCAN_COMPLETE
+        }
+        if not start_keys:
+            return
+
+        scan_kwargs = _scan_kwargs(
+            table_name=self.table_name, projection=projection, filter=filter
+        )
+        if page_size is not None:
+            scan_kwargs["Limit"] = page_size
+        queue = Queue(maxsize=len(start_keys) * SCAN_QUEUE_PAGES_PER_SEGMENT)
+        stop = Event()
+
+        def _scan_segment(segment: int):
+            exclusive_start_key = start_keys[segment]
+            try:
+                while True:
+                    response = self.dynamodb.scan(
+                        **_page_kwargs(
+                            {
+                                **scan_kwargs,
+                                "Segment": segment,
+                                "TotalSegments": total_segments,
+                            },
+                            exclusive_start_key,
+                        )
+                    )
+                    exclusive_start_key = response.get("LastEvaluatedKey")
+                    page = (segment, response["Items"], exclusive_start_key)
+                    if not _put_unless_stopped(queue=queue, value=page, stop=stop):
+                        return
+                    if exclusive_start_key is None:
+                        return
+            except Exception as error:
+                _put_unless_stopped(
+                    queue=queue, value=(segment, error, None), stop=stop
+                )
+
+        n_running = len(start_keys)
+        with ThreadPoolExecutor(max_workers=n_running) as executor:
+            try:
+                for segment in start_keys:
+                    executor.submit(_scan_segment, segment)
+
+                while n_running:
+                    segment, items, last_evaluated_key = queue.get()
+                    if isinstance(items, Exception):
+                        raise items
+                    for item in items:
+                        if projection:
+                            yield decode_item(item)
+                            continue
+                        try:
+                            _item = _is_record_valid(
+                                item_type=self.item_type,
+                                item=item,
+                                trusted=self.trusted_reads,
+                            )
+                        except CorruptItem:
+                            continue
+                        yield _item
+                    if last_evaluated_key is None:
+                        n_running -= 1
+                    checkpoints[segment] = last_evaluated_key or SCAN_COMPLETE
+            finally:
+                stop.set()
+
     @handle_dynamodb_errors(conditional_check_error_message="Permission denied")
     def update(self, item: PydanticModel) -> DynamoDbResponse:
         """
         Update a single Record
         """
-        args = {
-            "TableName": self.table_name,
-            "Item": item.dict(),
-            "ConditionExpression": "attribute_exists(pk) AND attribute_exists(sk)",
-        }
-        return self.dynamodb.put_item(**args)
+        with self._invalidating(item.pk):
+            args = {
+                "TableName": self.table_name,
+                "Item": self._item(item),
+                "ConditionExpression": "attribute_exists(pk) AND attribute_exists(sk)",
+            }
+            return self.dynamodb.put_item(**args)
+
+    @handle_dynamodb_errors(conditional_check_error_message="Permission denied")
+    def conditional_update(self, item: PydanticModel) -> DynamoDbResponse:
+        """
+        Update a single Record in one round trip, on condition that it exists,
+        belongs to the same producer and that its immutable fields are
+        unchanged (by comparing the digest stored on the item). If the
+        condition fails then the existing item is returned by dynamodb, and is
+        used to raise a precise error or, for items without an up-to-date
+        digest, to compare the immutable fields in full.
+        """
+        with self._invalidating(item.pk):
+            try:
+                return self.dynamodb.put_item(
+                    TableName=self.table_name,
+                    Item=self._item(item),
+                    ConditionExpression=CONDITIONAL_UPDATE_EXPRESSION,
+                    ExpressionAttributeNames=_expression_attribute_names(
+                        CONDITIONAL_UPDATE_ATTRIBUTES
+                    ),
+                    ExpressionAttributeValues=_expression_attribute_values(
+                        {
+                            attribute: getattr(item, attribute).__root__
+                            for attribute in CONDITIONAL_UPDATE_ATTRIBUTES
+                        }
+                    ),
+                    ReturnValuesOnConditionCheckFailure="ALL_OLD",
+                )
+            except ClientError as error:
+                existing_item = error.response.get("Item")
+                if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                if existing_item is None:
+                    raise ItemNotFound("Item could not be found") from None
+                if existing_item.get("producer_id") != item.producer_id.dict():
+                    raise
+
+            validate_immutable_fields(
+                a=json_loads(decompress_attribute(existing_item["document"])),
+                b=json_loads(item.document.__root__),
+            )
+            # The immutable fields are unchanged, so the existing item's digest was
+            # either missing or out of date: update as long as it is still as read,
+            # otherwise it was changed (or deleted) concurrently
+            existing_digest = existing_item.get("immutable_digest")
+            condition, values = "attribute_not_exists(#immutable_digest)", {}
+            if existing_digest is not None:
+                condition = "#immutable_digest = :immutable_digest"
+                values = {":immutable_digest": existing_digest}
+            try:
+                return self.dynamodb.put_item(
+                    TableName=self.table_name,
+                    Item=self._item(item),
+                    ConditionExpression=f"attribute_exists(pk) AND {condition}",
+                    ExpressionAttributeNames={"#immutable_digest": "immutable_digest"},
+                    **({"ExpressionAttributeValues": values} if values else {}),
+                )
+            except ClientError as error:
+                if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                raise ConflictError(
+                    "Condition check failed - Item was modified concurrently"
+                ) from None
 
     @handle_dynamodb_errors(
         conditional_check_error_message="Supersede ID mismatch",
@@ -500,58 +1173,128 @@ class Repository(Generic[PydanticModel]):
         self, create_item: PydanticModel, delete_pks: list[str]
     ) -> DynamoDbResponse:
         """
-        Creates a new Record and delete existing records in a single transaction
+        Creates a new Record and delete existing records in a single transaction.
+        Each existing record must share the SUPERSEDE_CONDITION_ATTRIBUTES of
+        the new Record, otherwise SupersedeConditionError is raised with the
+        existing record (if any) of every delete which failed.
         """
+        condition_values = _expression_attribute_values(
+            {
+                attribute: getattr(create_item, attribute).__root__
+                for attribute in SUPERSEDE_CONDITION_ATTRIBUTES
+            }
+        )
 
         def _delete(id):
             return {
                 "Delete": {
                     "TableName": self.table_name,
-                    "ConditionExpression": "attribute_exists(pk) AND attribute_exists(sk)",
+                    "ConditionExpression": SUPERSEDE_CONDITION_EXPRESSION,
+                    "ExpressionAttributeNames": _expression_attribute_names(
+                        SUPERSEDE_CONDITION_ATTRIBUTES
+                    ),
+                    "ExpressionAttributeValues": condition_values,
                     "Key": _keys(id, id),
+                    "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
                 }
             }
 
         if len(delete_pks) >= MAX_TRANSACT_ITEMS:
             raise TooManyItemsError("Too many items to process in one transaction")
-        transact_items = [_delete(id) for id in delete_pks] + [
-            self._put_statement(item=create_item)
-        ]
-        try:
-            return self.dynamodb.transact_write_items(TransactItems=transact_items)
-        except ClientError as error:
-            if "CancellationReasons" in error.response:
-                reasons = error.response["CancellationReasons"]
-                for ix, reason in enumerate(reasons):
-                    if (
-                        reason["Code"] == "ConditionalCheckFailed"
-                        and "Put" in transact_items[ix]
-                    ):
+        with self._invalidating(create_item.pk, *delete_pks):
+            transact_items = [_delete(id) for id in delete_pks] + [
+                self._put_statement(item=create_item)
+            ]
+            try:
+                return self.dynamodb.transact_write_items(TransactItems=transact_items)
+            except ClientError as error:
+                if "CancellationReasons" in error.response:
+                    reasons = error.response["CancellationReasons"]
+                    failed_targets, duplicate = {}, False
+                    for ix, reason in enumerate(reasons):
+                        if reason["Code"] != "ConditionalCheckFailed":
+                            continue
+                        if "Put" in transact_items[ix]:
+                            duplicate = True
+                            continue
+                        failed_targets[delete_pks[ix]] = reason.get("Item")
+                    # Target failures are reported first, as they were when the
+                    # targets were validated before the transaction
+                    if failed_targets:
+                        raise SupersedeConditionError(
+                            failed_targets=self._read_failed_targets(failed_targets)
+                        )
+                    if duplicate:
                         raise DuplicateError("Condition check failed - Duplicate item")
-            raise error
+                raise error
+
+    def _read_failed_targets(
+        self, failed_targets: dict[str, Union[dict, None]]
+    ) -> dict[str, Union[dict, None]]:
+        """
+        Reads each failed target which the cancellation reason didn't return
+        (which DynamoDb doesn't guarantee), so that it is None only if the
+        target does not exist
+        """
+        return {
+            pk: (
+                item
+                if item is not None
+                else self.dynamodb.get_item(
+                    TableName=self.table_name, Key=_keys(pk, pk), ConsistentRead=True
+                ).get("Item")
+            )
+            for pk, item in failed_targets.items()
+        }
 
     @handle_dynamodb_errors(conditional_check_error_message="Forbidden")
     def hard_delete(self, pk, sk=None) -> DynamoDbResponse:
-        keys = _keys(
-            pk, sk or pk
-        )  # if no SK then the table uses same value of SK as PK.
-        args = {
-            "TableName": self.table_name,
-            "Key": keys,
-            "ConditionExpression": "attribute_exists(pk) AND attribute_exists(sk)",
-        }
-        self.dynamodb.delete_item(**args)
+        with self._invalidating(pk):
+            keys = _keys(
+                pk, sk or pk
+            )  # if no SK then the table uses same value of SK as PK.
+            args = {
+                "TableName": self.table_name,
+                "Key": keys,
+                "ConditionExpression": "attribute_exists(pk) AND attribute_exists(sk)",
+            }
+            self.dynamodb.delete_item(**args)
+
+    @handle_dynamodb_errors()
+    def delete_returning(self, pk, sk=None) -> PydanticModel:
+        """
+        Deletes a single Record in one round trip, returning the Record which
+        was deleted. Raises ItemNotFound if there was nothing to delete.
+        """
+        with self._invalidating(pk):
+            try:
+                response = self.dynamodb.delete_item(
+                    TableName=self.table_name,
+                    Key=_keys(pk, sk or pk),
+                    ConditionExpression="attribute_exists(pk) AND attribute_exists(sk)",
+                    ReturnValues="ALL_OLD",
+                )
+            except ClientError as error:
+                if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                raise ItemNotFound("Item could not be found") from None
+            return _from_dynamodb(
+                item_type=self.item_type,
+                item=response["Attributes"],
+                trusted=self.trusted_reads,
+            )
 
     @handle_dynamodb_errors(
         conditional_check_error_message="Duplicate item", error_type=DuplicateError
     )
     def upsert_many(self, items: list[PydanticModel]) -> DynamoDbResponse:
         """Creates many new Records in a single transaction"""
+        with self._invalidating(*(item.pk for item in items)):
 
-        transact_items = list(
-            map(lambda item: self._put_statement(item, force_create=True), items)
-        )
-        return self.dynamodb.transact_write_items(TransactItems=transact_items)
+            transact_items = list(
+                map(lambda item: self._put_statement(item, force_create=True), items)
+            )
+            return self.dynamodb.transact_write_items(TransactItems=transact_items)
 
     def _put_statement(
         self, item: PydanticModel, force_create=False
@@ -566,7 +1309,7 @@ class Repository(Generic[PydanticModel]):
         return {
             "Put": {
                 "TableName": self.table_name,
-                "Item": item.dict(),
+                "Item": self._item(item),
                 **condition_kwargs,
             }
         }
@@ -0,0 +1,133 @@
+"""
+A read-through cache of the first page of each consumer search, keyed by the
+patient, the pointer types and the custodian being searched for, so that
+repeated searches for the same (hot) patient don't each query DynamoDb.
+
+Every page of a patient is keyed by the patient's current version, a random
+token which is replaced whenever any of their pointers change (see
+'invalidate'), so that all of their pages are invalidated at once without
+knowing which pages are cached. A version which has been lost (e.g. evicted)
+is replaced too, so losing it can only cause misses. Pages are otherwise
+served for up to 'ttl_seconds', which bounds how stale a search can be.
+"""
+import hashlib
+import json
+import time
+from typing import Callable, Union
+from uuid import uuid4
+
+from nrlf.core.cache import CacheBackend, CacheStatistics, InProcessCacheBackend
+from nrlf.core.model import DynamoDbModel, PaginatedResponse
+
+SEARCH_CACHE_TTL_SECONDS = 5.0
+SEARCH_VERSION_TTL_SECONDS = 24 * 60 * 60  # Outlives every page by far
+SEARCH_PAGE_KEY_PREFIX = "search#"
+SEARCH_VERSION_KEY_PREFIX = "search-version#"
+
+
+def _version_key(nhs_number: str) -> str:
+    return f"{SEARCH_VERSION_KEY_PREFIX}{nhs_number}"
+
+
+def _page_key(
+    nhs_number: str,
+    version: str,
+    pointer_types: list[str],
+    custodian: Union[str, None],
+    limit: int,
+) -> str:
+    search = json.dumps([sorted(set(pointer_types)), custodian, limit])
+    digest = hashlib.sha256(search.encode()).hexdigest()[:32]
+    return f"{SEARCH_PAGE_KEY_PREFIX}{nhs_number}#{version}#{digest}"
+
+
+class SearchCache:
+    """
+    First pages of searches in 'backend', which is by default an in-process
+    cache of up to 'max_size' pages (and versions)
+    """
+
+    name = "search_cache"
+
+    def __init__(
+        self,
+        backend: CacheBackend = None,
+        max_size: int = None,
+        ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if backend is None:
+            backend = InProcessCacheBackend(max_size=max_size, clock=clock)
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.statistics = CacheStatistics()
+
+    def reset_statistics(self):
+        self.statistics.reset()
+        self.backend.statistics.reset()
+
+    def _version(self, nhs_number: str) -> str:
+        key = _version_key(nhs_number)
+        version = self.backend.get_many([key]).get(key)
+        if version is not None:
+            return version
+        version = uuid4().hex
+        if self.backend.set_if_absent(key, version, SEARCH_VERSION_TTL_SECONDS):
+            return version
+        return self.backend.get_many([key]).get(key, version)  # Set concurrently
+
+    def read_through(
+        self,
+        nhs_number: str,
+        pointer_types: list[str],
+        custodian: Union[str, None],
+        limit: int,
+        item_type: type[DynamoDbModel],
+        read: Callable[[], PaginatedResponse],
+    ) -> PaginatedResponse:
+        """The cached page of the search, otherwise the page from 'read'"""
+        key = _page_key(
+            nhs_number=nhs_number,
+            version=self._version(nhs_number),
+            pointer_types=pointer_types,
+            custodian=custodian,
+            limit=limit,
+        )
+        page = self.backend.get_many([key]).get(key)
+        if page is not None:
+            self.statistics.hits += 1
+            return PaginatedResponse(
+                items=list(map(item_type.from_dynamodb, page["items"])),
+                last_evaluated_key=page["last_evaluated_key"],
+            )
+
+        self.statistics.misses += 1
+        response = read()
+        page = {
+            "items": [item.dict() for item in response.items],
+            "last_evaluated_key": response.last_evaluated_key,
+        }
+        self.backend.set_many({key: page}, ttl_seconds=self.ttl_seconds)
+        return response
+
+    def invalidate(self, *nhs_numbers: str):
+        """Invalidates every cached page of each of the patients"""
+        self.backend.set_many(
+            {_version_key(nhs_number): uuid4().hex for nhs_number in nhs_numbers},
+            ttl_seconds=SEARCH_VERSION_TTL_SECONDS,
+        )
+
+
+def build_search_cache(
+    backend: Union[CacheBackend, None], ttl_seconds: Union[float, None] = None
+) -> Union[SearchCache, None]:
+    """
+    Builds the cache from (optional) Lambda config, which is disabled unless
+    it has a backend (see nrlf.core.cache.build_cache_backend)
+    """
+    if backend is None:
+        return None
+    return SearchCache(
+        backend=backend,
+        ttl_seconds=SEARCH_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds,
+    )
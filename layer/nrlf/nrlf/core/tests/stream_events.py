@@ -0,0 +1,29 @@
+"""
+Recorded DocumentPointer table stream events, which are shared by the tests
+of every Lambda that consumes the stream
+"""
+from pathlib import Path
+
+from nrlf.core.validators import json_load
+
+PATH_TO_TEST_DATA = Path(__file__).parent / "data"
+
+POINTER_TYPE = "http://snomed.info/sct|736253002"
+CREATED_NHS_NUMBER = "9278693472"
+UPDATED_NHS_NUMBER = "3137554160"
+DELETED_NHS_NUMBER = "4409815415"
+POINTERS = {
+    "D#RP7EV#created": CREATED_NHS_NUMBER,
+    "D#RP7EV#updated": UPDATED_NHS_NUMBER,
+    "D#RP7EV#deleted": DELETED_NHS_NUMBER,
+}
+LAST_CHANGE_AT = 1700000002
+
+
+def dynamodb_stream_events() -> dict:
+    """
+    An INSERT, MODIFY and REMOVE of a pointer, and the INSERT of an item
+    which isn't a pointer
+    """
+    with open(PATH_TO_TEST_DATA / "dynamodb_stream_events.json") as file:
+        return json_load(file)
@@ -0,0 +1,104 @@
+from typing import Callable
+
+from botocore.exceptions import ClientError
+
+from nrlf.core.types import DynamoDbClient
+
+
+class FakeClock:
+    """A clock which only moves when it is slept on, so that tests are instant"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def throttling_error(
+    operation_name: str, code: str = "ProvisionedThroughputExceededException"
+) -> ClientError:
+    return ClientError(
+        error_response={"Error": {"Code": code, "Message": "Throughput exceeded"}},
+        operation_name=operation_name,
+    )
+
+
+class ThrottlingStubClient:
+    """
+    Wraps a (e.g. moto) DynamoDb client, throttling each call for which
+    'is_throttled(operation_name)' is True instead of making it. Every call
+    (throttled or not) takes 'call_seconds' of the clock's time.
+    """
+
+    def __init__(
+        self,
+        client: DynamoDbClient,
+        clock: FakeClock,
+        is_throttled: Callable[[str], bool],
+        call_seconds: float = 0.005,
+    ):
+        self.client = client
+        self.clock = clock
+        self.is_throttled = is_throttled
+        self.call_seconds = call_seconds
+        self.calls = 0
+        self.throttles = 0
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+
+        def _stub(**kwargs):
+            self.calls += 1
+            self.clock.now += self.call_seconds
+            if self.is_throttled(name):
+                self.throttles += 1
+                raise throttling_error(operation_name=name)
+            return method(**kwargs)
+
+        return _stub
+
+
+def throttle_storm(clock: FakeClock, start: float, end: float) -> Callable:
+    """Throttles every call made between 'start' and 'end' seconds"""
+    return lambda _: start <= clock.now < end
+
+
+class RedisStandIn:
+    """
+    Stands in for a 'redis.Redis' client (and its server) for the commands
+    which are used to cache, storing bytes with millisecond expiry
+    """
+
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.values: dict[str, tuple[bytes, float]] = {}
+        self.commands: list[str] = []
+
+    def _get(self, key: str):
+        value, expires_at = self.values.get(key, (None, None))
+        if value is not None and expires_at <= self.clock.now:
+            del self.values[key]
+            return None
+        return value
+
+    def mget(self, keys: list[str]) -> list:
+        self.commands.append("MGET")
+        return [self._get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, px: int = None, nx: bool = False):
+        self.commands.append("SET")
+        if nx and self._get(key) is not None:
+            return None
+        expires_at = float("inf") if px is None else self.clock.now + px / 1000
+        self.values[key] = (bytes(value), expires_at)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        self.commands.append("DEL")
+        return sum(self.values.pop(key, None) is not None for key in keys)
@@ -0,0 +1,117 @@
+from unittest import mock
+
+import boto3
+import moto
+import pytest
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from nrlf.core.bulk_writer import (
+    BATCH_WRITE_ITEM_LIMIT,
+    BULK_WRITE_MAX_ATTEMPTS,
+    BulkWriter,
+    BulkWriteReport,
+)
+from nrlf.core.errors import BulkWriteError
+from nrlf.core.model import DocumentPointer
+from nrlf.core.tests.data_factory import generate_test_document_reference
+from nrlf.core.transform import create_document_pointer_from_fhir_json
+
+TABLE_NAME = DocumentPointer.kebab()
+
+
+@pytest.fixture
+def client():
+    with moto.mock_dynamodb():
+        client = boto3.client("dynamodb")
+        client.create_table(TableName=TABLE_NAME, **DOCUMENT_POINTER_TABLE_DEFINITION)
+        yield client
+
+
+def _document_pointers(n_items: int) -> list[DocumentPointer]:
+    return [
+        create_document_pointer_from_fhir_json(
+            fhir_json=generate_test_document_reference(provider_doc_id=f"doc-{ix}"),
+            api_version=1,
+        )
+        for ix in range(n_items)
+    ]
+
+
+def _count_items(client) -> int:
+    return client.scan(TableName=TABLE_NAME, Select="COUNT")["Count"]
+
+
+def test_bulk_writer_put_and_delete(client):
+    n_items = BATCH_WRITE_ITEM_LIMIT * 10 + 3
+    document_pointers = _document_pointers(n_items=n_items)
+    bulk_writer = BulkWriter(client=client, table_name=TABLE_NAME)
+
+    put_report = bulk_writer.put(iter(document_pointers))
+    assert put_report.n_items == n_items
+    assert _count_items(client) == n_items
+
+    delete_report = bulk_writer.delete(
+        {"pk": item["pk"], "sk": item["sk"]}
+        for item in client.scan(TableName=TABLE_NAME)["Items"]
+    )
+    assert delete_report.n_items == n_items
+    assert _count_items(client) == 0
+
+
+def test_bulk_writer_chunks_requests(client):
+    n_items = BATCH_WRITE_ITEM_LIMIT * 2 + 1
+    bulk_writer = BulkWriter(client=client, table_name=TABLE_NAME)
+
+    with mock.patch.object(
+        client, "batch_write_item", wraps=client.batch_write_item
+    ) as mocked_batch_write_item:
+        bulk_writer.put(_document_pointers(n_items=n_items))
+
+    chunk_sizes = sorted(
+        len(call.kwargs["RequestItems"][TABLE_NAME])
+        for call in mocked_batch_write_item.call_args_list
+    )
+    assert chunk_sizes == [1, BATCH_WRITE_ITEM_LIMIT, BATCH_WRITE_ITEM_LIMIT]
+
+
+@mock.patch("nrlf.core.bulk_writer._backoff")
+def test_bulk_writer_retries_unprocessed_items(mocked_backoff):
+    (request, *_) = requests = [{"DeleteRequest": {"Key": {"pk": {"S": "foo"}}}}] * 3
+    client = mock.Mock()
+    client.batch_write_item.side_effect = [
+        {"UnprocessedItems": {TABLE_NAME: [request]}},
+        {"UnprocessedItems": {}},
+    ]
+    bulk_writer = BulkWriter(client=client, table_name=TABLE_NAME)
+
+    n_items = bulk_writer._write_chunk(requests)
+
+    assert n_items == len(requests)
+    (_, retry) = client.batch_write_item.call_args_list
+    assert retry.kwargs == {"RequestItems": {TABLE_NAME: [request]}}
+    mocked_backoff.assert_called_once_with(0)
+
+
+@mock.patch("nrlf.core.bulk_writer._backoff")
+def test_bulk_writer_gives_up_on_unprocessed_items(mocked_backoff):
+    request = {"DeleteRequest": {"Key": {"pk": {"S": "foo"}}}}
+    client = mock.Mock()
+    client.batch_write_item.return_value = {"UnprocessedItems": {TABLE_NAME: [request]}}
+    bulk_writer = BulkWriter(client=client, table_name=TABLE_NAME)
+
+    with pytest.raises(BulkWriteError):
+        bulk_writer._write_chunk([request])
+
+    assert client.batch_write_item.call_count == BULK_WRITE_MAX_ATTEMPTS
+    assert mocked_backoff.call_count == BULK_WRITE_MAX_ATTEMPTS - 1
+
+
+@pytest.mark.parametrize(
+    ["report", "expected"],
+    [
+        [BulkWriteReport(n_items=100, seconds=2), 50],
+        [BulkWriteReport(n_items=0, seconds=0), 0],
+    ],
+)
+def test_bulk_write_report_items_per_second(report: BulkWriteReport, expected: float):
+    assert report.items_per_second == expected
@@ -0,0 +1,145 @@
+from unittest import mock
+
+import pytest
+
+from nrlf.core import cache
+from nrlf.core.cache import (
+    CacheBackend,
+    InProcessCacheBackend,
+    RedisCacheBackend,
+    build_cache_backend,
+    dumps,
+    loads,
+)
+from nrlf.core.tests.stub_client import FakeClock, RedisStandIn
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture(params=["in_process", "redis"])
+def backend(request, clock: FakeClock):
+    if request.param == "in_process":
+        return InProcessCacheBackend(max_size=10, clock=clock.time)
+    return RedisCacheBackend(client=RedisStandIn(clock=clock))
+
+
+def test_get_and_set_many(backend):
+    backend.set_many({"foo": {"bar": [1, None]}, "baz": None}, ttl_seconds=1)
+
+    assert backend.get_many(["foo", "baz", "missing"]) == {
+        "foo": {"bar": [1, None]},
+        "baz": None,
+    }
+    assert backend.get_many([]) == {}
+
+
+def test_values_expire(backend, clock: FakeClock):
+    backend.set_many({"foo": 1}, ttl_seconds=1)
+    backend.set_many({"bar": 2}, ttl_seconds=2)
+
+    clock.sleep(1)
+
+    assert backend.get_many(["foo", "bar"]) == {"bar": 2}
+
+
+def test_set_if_absent(backend, clock: FakeClock):
+    assert backend.set_if_absent("foo", "a", ttl_seconds=1) is True
+    assert backend.set_if_absent("foo", "b", ttl_seconds=1) is False
+    assert backend.get_many(["foo"]) == {"foo": "a"}
+
+    clock.sleep(1)
+    assert backend.set_if_absent("foo", "c", ttl_seconds=1) is True
+    assert backend.get_many(["foo"]) == {"foo": "c"}
+
+
+def test_delete(backend):
+    backend.set_many({"foo": 1, "bar": 2}, ttl_seconds=1)
+
+    backend.delete("foo", "missing")
+    backend.delete()
+
+    assert backend.get_many(["foo", "bar"]) == {"bar": 2}
+
+
+def test_in_process_backend_evicts_least_recently_used(clock: FakeClock):
+    backend = InProcessCacheBackend(max_size=2, clock=clock.time)
+    backend.set_many({"foo": 1, "bar": 2}, ttl_seconds=1)
+    backend.get_many(["foo"])
+
+    backend.set_many({"baz": 3}, ttl_seconds=1)
+    clock.sleep(1)
+    backend.get_many(["foo"])
+
+    assert backend.size() == 1
+    assert backend.statistics.dict() == {"evictions": 1, "expirations": 1, "errors": 0}
+
+    backend.clear()
+    assert backend.size() == 0
+
+
+def test_redis_backend_serialises_bytes(clock: FakeClock):
+    client = RedisStandIn(clock=clock)
+    backend = RedisCacheBackend(client=client)
+    item = {"document": {"B": b"\x01compressed"}, "id": {"S": "foo"}}
+
+    backend.set_many({"item#foo": item}, ttl_seconds=0.5)
+
+    (value, expires_at) = client.values["item#foo"]
+    assert loads(value) == item
+    assert expires_at == 0.5
+    assert backend.get_many(["item#foo"]) == {"item#foo": item}
+    assert backend.size() is None
+
+
+def test_dumps_rejects_other_types():
+    assert loads(dumps([b"", "", None])) == [b"", "", None]
+    with pytest.raises(TypeError):
+        dumps({"foo": object()})
+
+
+def test_redis_backend_counts_errors_as_misses():
+    client = mock.Mock()
+    for command in (client.mget, client.set, client.delete):
+        command.side_effect = ConnectionError("foo")
+    backend = RedisCacheBackend(client=client)
+
+    assert backend.get_many(["foo"]) == {}
+    backend.set_many({"foo": 1}, ttl_seconds=1)
+    assert backend.set_if_absent("foo", 1, ttl_seconds=1) is False
+    backend.delete("foo")
+
+    assert backend.statistics.errors == 4
+
+
+def test_redis_backend_counts_corrupt_values_as_misses(clock: FakeClock):
+    client = RedisStandIn(clock=clock)
+    backend = RedisCacheBackend(client=client)
+    backend.set_many({"foo": 1, "bar": 2}, ttl_seconds=1)
+    client.set("foo", b"{not json")
+
+    assert backend.get_many(["foo", "bar"]) == {"bar": 2}
+    assert backend.statistics.errors == 1
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_build_cache_backend():
+    assert build_cache_backend() is None
+    assert isinstance(build_cache_backend(max_size=10), InProcessCacheBackend)
+
+
+def test_build_redis_cache_backend():
+    with mock.patch.object(cache, "redis") as redis:
+        backend = build_cache_backend(url="redis://localhost:6379", max_size=10)
+
+    assert isinstance(backend, RedisCacheBackend)
+    assert backend.client is redis.Redis.from_url.return_value
+
+    with mock.patch.object(cache, "redis", None), pytest.raises(ValueError):
+        build_cache_backend(url="redis://localhost:6379")
@@ -0,0 +1,90 @@
+import os
+from unittest import mock
+
+import boto3
+import moto
+import pytest
+
+from nrlf.core import clients
+from nrlf.core.clients import (
+    ClientConfig,
+    client_config,
+    get_client,
+    pop_construction_seconds,
+    reset,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    reset()
+    pop_construction_seconds()
+    yield
+    reset()
+
+
+def test_client_config_defaults():
+    config = client_config("s3")
+    assert config.max_pool_connections == ClientConfig().CLIENT_MAX_POOL_CONNECTIONS
+    assert config.tcp_keepalive is True
+    assert config.retries == {"mode": "standard", "total_max_attempts": 3}
+
+
+@mock.patch.dict(
+    os.environ,
+    {
+        "CLIENT_MAX_POOL_CONNECTIONS": "50",
+        "CLIENT_CONNECT_TIMEOUT": "0.5",
+        "CLIENT_READ_TIMEOUT": "3",
+        "CLIENT_RETRY_MODE": "adaptive",
+        "CLIENT_MAX_ATTEMPTS": "5",
+    },
+)
+def test_client_config_from_environment():
+    config = client_config("s3")
+    assert (config.max_pool_connections, config.connect_timeout) == (50, 0.5)
+    assert config.read_timeout == 3
+    assert config.retries == {"mode": "adaptive", "total_max_attempts": 5}
+
+
+def test_dynamodb_clients_do_not_retry():
+    config = client_config("dynamodb", read_timeout=30)
+    assert config.retries["total_max_attempts"] == 1
+    assert config.read_timeout == 30
+    assert config.tcp_keepalive is True
+
+
+@moto.mock_s3
+def test_get_client_is_constructed_once():
+    client = get_client("s3")
+
+    assert get_client("s3") is client
+    assert get_client("s3", read_timeout=30) is not client
+    assert client.meta.config.max_pool_connections == 10
+    assert clients.get_session() is clients.get_session()
+
+    construction_seconds = pop_construction_seconds()
+    assert list(construction_seconds) == ["s3"]
+    assert construction_seconds["s3"] > 0
+    assert pop_construction_seconds() == {}
+
+
+@moto.mock_s3
+def test_get_client_uses_the_default_session():
+    client = get_client("s3")
+    boto3.setup_default_session(region_name="eu-west-1")
+
+    assert clients.get_session() is boto3.DEFAULT_SESSION
+    assert get_client("s3") is not client
+    assert get_client("s3").meta.region_name == "eu-west-1"
+
+
+@moto.mock_s3
+def test_reset():
+    client = get_client("s3")
+    session = clients.get_session()
+
+    reset()
+
+    assert clients.get_session() is not session
+    assert get_client("s3") is not client
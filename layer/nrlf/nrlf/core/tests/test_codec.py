@@ -0,0 +1,213 @@
+from ast import literal_eval
+from enum import Enum
+from timeit import timeit
+
+import pytest
+from hypothesis import given
+from hypothesis.strategies import (
+    booleans,
+    dictionaries,
+    floats,
+    integers,
+    lists,
+    none,
+    recursive,
+    text,
+)
+
+from nrlf.core.codec import (
+    decode,
+    decode_item,
+    decode_items,
+    encode,
+    encode_item,
+    encode_items,
+    is_encoded,
+)
+from nrlf.core.transform import create_document_pointer_from_fhir_json
+from nrlf.producer.fhir.r4.tests.test_producer_nrlf_model import read_test_data
+
+API_VERSION = 1
+
+raw_values = recursive(
+    none()
+    | booleans()
+    | integers()
+    | floats(allow_nan=False, allow_infinity=False)
+    | text(),
+    lambda children: lists(children) | dictionaries(text(), children),
+    max_leaves=20,
+)
+
+
+class _StrEnum(str, Enum):
+    FOO = "foo"
+
+
+@pytest.mark.parametrize(
+    ["input", "expected"],
+    [
+        [1, {"N": "1"}],
+        [1.5, {"N": "1.5"}],
+        ["1", {"S": "1"}],
+        [b"1", {"B": b"1"}],
+        [True, {"BOOL": True}],
+        [None, {"NULL": True}],
+        [{}, {"M": {}}],
+        [[], {"L": []}],
+        [("a", 1), {"L": [{"S": "a"}, {"N": "1"}]}],
+        [{"foo": {"bar": 1}}, {"M": {"foo": {"M": {"bar": {"N": "1"}}}}}],
+        [_StrEnum.FOO, {"S": _StrEnum.FOO}],
+    ],
+)
+def test_encode(input: any, expected: dict):
+    actual = encode(input)
+    assert actual == expected
+
+
+def test_encode_unsupported_type():
+    with pytest.raises(TypeError, match="Cannot encode value of type 'object'"):
+        encode(object())
+
+
+@pytest.mark.parametrize(
+    ["input", "expected"],
+    [
+        [{"NULL": True}, None],
+        [{"BOOL": False}, False],
+        [{"BOOL": True}, True],
+        [{"S": "Something"}, "Something"],
+        [{"B": b"Something"}, b"Something"],
+        [{"N": 1.9}, 1.9],
+        [{"N": 3}, 3],
+        [{"N": "42"}, 42],
+        [{"N": "-42"}, -42],
+        [{"N": "2.3"}, 2.3],
+        [{"N": "1.0"}, 1.0],
+        [{"N": "1e3"}, 1000.0],
+        [{"M": {}}, {}],
+        [{"M": {"foo": {"S": "a"}, "bar": {"N": "999"}}}, {"foo": "a", "bar": 999}],
+        [{"M": {"foo": {"M": {"bar": {"N": "666"}}}}}, {"foo": {"bar": 666}}],
+        [{"L": []}, []],
+        [{"L": [{"N": "123"}, {"S": "a"}]}, [123, "a"]],
+        [{"SS": ["a", "b"]}, {"a", "b"}],
+        [{"NS": ["1", "2.5"]}, {1, 2.5}],
+    ],
+)
+def test_decode(input: dict, expected: any):
+    actual = decode(input)
+    assert actual == expected
+    assert type(actual) is type(expected)
+
+
+@pytest.mark.parametrize(
+    ["input", "expected"],
+    [
+        [{"S": "foo"}, True],
+        [{"N": "1"}, True],
+        [{"N": "-1.5e10"}, True],
+        [{"N": 1}, True],
+        [{"B": b"foo"}, True],
+        [{"B": "foo"}, False],
+        [{"NULL": True}, True],
+        [{"M": {"foo": {"L": [{"S": "bar"}]}}}, True],
+        [{"N": "abc"}, False],
+        [{"S": 1}, False],
+        [{"M": {"foo": "bar"}}, False],
+        [{"L": ["bar"]}, False],
+        [{"foo": "bar"}, False],
+        [{"S": "foo", "N": "1"}, False],
+        [{}, False],
+        ["foo", False],
+        [["foo"], False],
+        [None, False],
+    ],
+)
+def test_is_encoded(input: any, expected: bool):
+    assert is_encoded(input) is expected
+
+
+@given(value=raw_values)
+def test_decode_encode_round_trip(value):
+    encoded = encode(value)
+    assert is_encoded(encoded)
+    assert decode(encoded) == value
+
+
+@given(items=lists(dictionaries(text(), raw_values)))
+def test_decode_items_encode_items_round_trip(items):
+    encoded_items = encode_items(items)
+    assert encoded_items == [encode_item(item) for item in items]
+    assert decode_items(encoded_items) == items
+
+
+@given(item=dictionaries(text(), raw_values))
+def test_decode_item_encode_item_round_trip(item):
+    assert decode_item(encode_item(item)) == item
+
+
+def _legacy_encode(obj):
+    """The converter which this module replaced, kept here for benchmarking"""
+    _type = type(obj)
+    if _type is dict:
+        return {"M": {k: _legacy_encode(v) for k, v in obj.items()}}
+    elif _type is list:
+        return {"L": [_legacy_encode(item) for item in obj]}
+    elif _type is bool:
+        return {"BOOL": obj}
+    elif _type is type(None):
+        return {"NULL": True}
+    return {{str: "S", int: "N", float: "N"}[_type]: str(obj)}
+
+
+def _legacy_decode(obj):
+    """The converter which this module replaced, kept here for benchmarking"""
+    ((dynamo_type, value),) = obj.items()
+    if dynamo_type == "M":
+        return {k: _legacy_decode(v) for k, v in value.items()}
+    elif dynamo_type == "L":
+        return [_legacy_decode(item) for item in value]
+    elif dynamo_type == "NULL":
+        return None
+    return literal_eval(value) if dynamo_type == "N" else value
+
+
+@pytest.fixture
+def document_pointer_items():
+    item = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf"), api_version=API_VERSION
+    ).dict()
+    return [item] * 500
+
+
+@pytest.mark.slow
+def test_decode_items_is_faster_than_legacy_decoder(document_pointer_items):
+    assert decode_items(document_pointer_items) == [
+        {k: _legacy_decode(v) for k, v in item.items()}
+        for item in document_pointer_items
+    ]
+
+    legacy_seconds = timeit(
+        lambda: [
+            {k: _legacy_decode(v) for k, v in item.items()}
+            for item in document_pointer_items
+        ],
+        number=20,
+    )
+    codec_seconds = timeit(lambda: decode_items(document_pointer_items), number=20)
+
+    assert codec_seconds < legacy_seconds
+
+
+@pytest.mark.slow
+def test_encode_items_is_no_slower_than_legacy_encoder(document_pointer_items):
+    raw_items = decode_items(document_pointer_items)
+    assert encode_items(raw_items) == document_pointer_items
+
+    legacy_seconds = timeit(
+        lambda: [{k: _legacy_encode(v) for k, v in item.items()} for item in raw_items],
+        number=20,
+    )
+    codec_seconds = timeit(lambda: encode_items(raw_items), number=20)
+
+    assert codec_seconds < legacy_seconds * 1.2
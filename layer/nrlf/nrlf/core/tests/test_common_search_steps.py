@@ -0,0 +1,167 @@
+from unittest import mock
+
+import pytest
+
+from nrlf.core.common_search_steps import (
+    count_document_references,
+    get_paginated_document_references,
+    get_paginated_producer_document_references,
+)
+from nrlf.core.model import ConsumerRequestParams, CountRequestParams, DocumentPointer
+from nrlf.core.patient_filter import BloomFilter, PatientFilter
+from nrlf.core.pointer_counts import PointerCountRepository, patient_type_count_key
+from nrlf.core.repository import Repository
+from nrlf.core.tests.data_factory import NRL_ODS_SUCCESS
+from nrlf.core.tests.test_patient_filter import BUCKET, s3_client  # noqa: F401
+from nrlf.core.tests.test_pointer_counts import (  # noqa: F401
+    NHS_NUMBER,
+    OTHER_NHS_NUMBER,
+    SNOMED,
+    _create_pointers,
+    client,
+)
+
+POINTER_TYPES = [f"{SNOMED}|1", f"{SNOMED}|2", f"{SNOMED}|3"]
+QUERY_STRING_PARAMS = {
+    "subject:identifier": f"https://fhir.nhs.uk/Id/nhs-number|{NHS_NUMBER}"
+}
+
+
+def _patient_filter(s3_client, *nhs_numbers: str) -> PatientFilter:
+    bloom_filter = BloomFilter.for_capacity(capacity=100)
+    for nhs_number in nhs_numbers:
+        bloom_filter.add(nhs_number)
+    patient_filter = PatientFilter(s3_client=s3_client, bucket=BUCKET)
+    patient_filter.publish(bloom_filter)
+    return patient_filter
+
+
+@pytest.mark.parametrize(
+    ["date", "expected_count"],
+    [[None, 99], [["ge2000-01-01"], 3]],  # i.e. counted from the pointers
+)
+def test_count_document_references_from_pointer_counts(client, date, expected_count):
+    _create_pointers(client, (NHS_NUMBER, "1"), (NHS_NUMBER, "2"), (NHS_NUMBER, "3"))
+    pointer_counts = PointerCountRepository(client=client)
+    pointer_counts.add(
+        {patient_type_count_key(NHS_NUMBER, f"{SNOMED}|1"): 99}, batch_id="batch"
+    )
+    query_string_params = {
+        "subject:identifier": f"https://fhir.nhs.uk/Id/nhs-number|{NHS_NUMBER}"
+    }
+    if date is not None:
+        query_string_params["date"] = date
+
+    count = count_document_references(
+        request_params=CountRequestParams(**query_string_params),
+        query_string_params=query_string_params,
+        repository=Repository(item_type=DocumentPointer, client=client),
+        raw_pointer_types=[f"{SNOMED}|1", f"{SNOMED}|2", f"{SNOMED}|3"],
+        nhs_number=NHS_NUMBER,
+        pointer_counts=pointer_counts,
+    )
+
+    assert count == expected_count
+
+
+@pytest.mark.parametrize(
+    ["nhs_numbers", "expected_count", "expected_calls"],
+    [[[NHS_NUMBER], 3, {"query": 1}], [[], 0, {}]],
+)
+def test_count_document_references_with_patient_filter(
+    client, s3_client, nhs_numbers, expected_count, expected_calls
+):
+    _create_pointers(client, (NHS_NUMBER, "1"), (NHS_NUMBER, "2"), (NHS_NUMBER, "3"))
+    repository = Repository(item_type=DocumentPointer, client=client)
+    repository.start_request()
+
+    count = count_document_references(
+        request_params=CountRequestParams(**QUERY_STRING_PARAMS),
+        query_string_params=QUERY_STRING_PARAMS,
+        repository=repository,
+        raw_pointer_types=POINTER_TYPES,
+        nhs_number=NHS_NUMBER,
+        patient_filter=_patient_filter(s3_client, *nhs_numbers),
+    )
+
+    assert count == expected_count
+    assert repository.metrics.calls == expected_calls
+
+
+@pytest.mark.parametrize(
+    ["nhs_numbers", "expected_items"], [[[NHS_NUMBER], 3], [[], 0]]
+)
+def test_get_paginated_document_references_with_patient_filter(
+    client, s3_client, nhs_numbers, expected_items
+):
+    _create_pointers(client, (NHS_NUMBER, "1"), (NHS_NUMBER, "2"), (NHS_NUMBER, "3"))
+    repository = Repository(item_type=DocumentPointer, client=client)
+    repository.start_request()
+
+    response = get_paginated_document_references(
+        request_params=ConsumerRequestParams(**QUERY_STRING_PARAMS),
+        query_string_params=QUERY_STRING_PARAMS,
+        repository=repository,
+        type_identifier=None,
+        raw_pointer_types=POINTER_TYPES,
+        nhs_number=NHS_NUMBER,
+        patient_filter=_patient_filter(s3_client, *nhs_numbers),
+    )
+
+    assert len(response.items) == expected_items
+    assert bool(repository.metrics.calls) is bool(expected_items)
+
+
+@pytest.mark.parametrize(
+    ["by_patient_type_index", "expected_calls"],
+    [[False, {"query": 1}], [True, {"query": 3}]],  # i.e. one query per type
+)
+def test_get_paginated_document_references_by_patient_type_index(
+    client, by_patient_type_index, expected_calls
+):
+    _create_pointers(client, (NHS_NUMBER, "1"), (NHS_NUMBER, "2"), (NHS_NUMBER, "3"))
+    repository = Repository(item_type=DocumentPointer, client=client)
+    repository.start_request()
+
+    response = get_paginated_document_references(
+        request_params=ConsumerRequestParams(**QUERY_STRING_PARAMS),
+        query_string_params=QUERY_STRING_PARAMS,
+        repository=repository,
+        type_identifier=None,
+        raw_pointer_types=POINTER_TYPES,
+        nhs_number=NHS_NUMBER,
+        by_patient_type_index=by_patient_type_index,
+    )
+
+    assert sorted(item.type.__root__ for item in response.items) == POINTER_TYPES
+    assert repository.metrics.calls == expected_calls
+
+
+@pytest.mark.parametrize(
+    ["by_organisation_patient_index", "expected_index"],
+    [[False, "idx_gsi_2"], [True, "idx_gsi_4"]],
+)
+def test_get_paginated_producer_document_references_by_subject(
+    client, by_organisation_patient_index, expected_index
+):
+    _create_pointers(client, (NHS_NUMBER, "1"), (OTHER_NHS_NUMBER, "2"))
+    repository = Repository(item_type=DocumentPointer, client=client)
+    index_names = []
+    query = client.query
+
+    def _query(**kwargs):
+        index_names.append(kwargs["IndexName"])
+        return query(**kwargs)
+
+    with mock.patch.object(client, "query", side_effect=_query):
+        response = get_paginated_producer_document_references(
+            repository=repository,
+            ods_code_parts=(NRL_ODS_SUCCESS,),
+            nhs_number=NHS_NUMBER,
+            pointer_types=POINTER_TYPES,
+            next_page_token=None,
+            by_organisation_patient_index=by_organisation_patient_index,
+        )
+
+    assert [item.nhs_number.__root__ for item in response.items] == [NHS_NUMBER]
+    assert index_names == [expected_index]
@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import pytest
+
+from nrlf.core.compression import (
+    COMPRESSORS,
+    ZLIB,
+    compress,
+    compress_attributes,
+    decompress,
+    decompress_attribute,
+    item_size,
+    read_capacity_units,
+    write_capacity_units,
+)
+from nrlf.core.dynamodb_types import to_dynamodb_dict
+from nrlf.core.model import DocumentPointer
+from nrlf.core.validators import json_load
+
+PATH_TO_SEED_DATA = (
+    Path(__file__).parent.parent.parent.parent.parent.parent
+    / "cron"
+    / "seed_sandbox"
+    / "data"
+    / "document-pointer.json"
+)
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_compress_decompress_round_trip(compression):
+    value = '{"foo": "bar £€"}' * 10
+
+    compressed = compress(value, compression=compression)
+
+    assert compressed[:1] == COMPRESSORS[compression].marker
+    assert len(compressed) < len(value)
+    assert decompress(compressed) == value
+
+
+def test_compress_unsupported_compression():
+    with pytest.raises(ValueError, match="Unsupported compression 'foo'"):
+        compress("bar", compression="foo")
+
+
+def test_decompress_unsupported_marker():
+    with pytest.raises(ValueError, match="Unsupported compression marker"):
+        decompress(b"\xffbar")
+
+
+def test_compress_attributes():
+    item = {"pk": {"S": "foo"}, "document": {"S": "bar"}, "version": {"N": "1"}}
+
+    compressed_item = compress_attributes(item, compression=ZLIB)
+
+    assert compressed_item["pk"] == item["pk"]
+    assert compressed_item["version"] == item["version"]
+    assert decompress(compressed_item["document"]["B"]) == "bar"
+    assert decompress_attribute(compressed_item["document"]) == "bar"
+    assert decompress_attribute(item["document"]) == "bar"
+    assert compress_attributes(item, compression=None) is item
+
+
+@pytest.mark.parametrize(
+    ["item", "expected"],
+    [
+        [{"foo": {"S": "bar"}}, 6],
+        [{"foo": {"S": "£"}}, 5],
+        [{"foo": {"B": b"\x01\x02"}}, 5],
+        [{"foo": {"N": "12345"}}, 6],
+        [{"foo": {"NULL": True}}, 4],
+        [{"foo": {"L": [{"S": "a"}, {"S": "b"}]}}, 10],
+        [{"foo": {"M": {"a": {"S": "b"}}}}, 9],
+    ],
+)
+def test_item_size(item, expected):
+    assert item_size(item) == expected
+
+
+@pytest.mark.parametrize(
+    ["size", "expected_rcu", "expected_wcu"],
+    [[1, 1, 1], [1024, 1, 1], [1025, 1, 2], [4097, 2, 5]],
+)
+def test_capacity_units(size, expected_rcu, expected_wcu):
+    assert read_capacity_units(size) == expected_rcu
+    assert write_capacity_units(size) == expected_wcu
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_compression_reduces_size_and_capacity_units_of_seed_data(compression):
+    with open(PATH_TO_SEED_DATA) as f:
+        raw_items = json_load(f)
+    items = [
+        DocumentPointer.parse_obj(
+            {k: to_dynamodb_dict(v) for k, v in raw_item.items()}
+        ).dict()
+        for raw_item in raw_items
+    ]
+    compressed_items = [
+        compress_attributes(item, compression=compression) for item in items
+    ]
+
+    size = sum(map(item_size, items))
+    compressed_size = sum(map(item_size, compressed_items))
+    # A query reading every item is charged for their total size
+    assert read_capacity_units(compressed_size) < read_capacity_units(size)
+    assert compressed_size < size * 0.7
+    assert sum(
+        write_capacity_units(item_size(item)) for item in compressed_items
+    ) < sum(write_capacity_units(item_size(item)) for item in items)
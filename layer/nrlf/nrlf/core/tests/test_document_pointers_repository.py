@@ -1,8 +1,11 @@
+import threading
 import time
 from contextlib import contextmanager
-from itertools import chain
+from itertools import chain, islice
 from math import ceil
 from typing import Generator
+from unittest import mock
+from zlib import crc32
 
 import boto3
 import moto
@@ -13,30 +16,44 @@ from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
 from feature_tests.common.repository import FeatureTestRepository
 from helpers.aws_session import new_aws_session
 from helpers.terraform import get_terraform_json
+from nrlf.core.compression import ZLIB, item_size
 from nrlf.core.constants import ODS_SYSTEM, DbPrefix
+from nrlf.core.dynamodb_types import DynamoDbStringType
 from nrlf.core.errors import (
+    ConflictError,
     DuplicateError,
     DynamoDbError,
+    ImmutableFieldViolationError,
     ItemNotFound,
+    NextPageTokenValidationError,
+    SupersedeConditionError,
     TooManyItemsError,
 )
-from nrlf.core.model import DocumentPointer, key
+from nrlf.core.item_cache import ItemCache
+from nrlf.core.model import LAYOUT_VERSION, ConsumerRequestParams, DocumentPointer, key
+from nrlf.core.query_statistics import QueryShape, QueryStatistics
 from nrlf.core.repository import (
+    BATCH_GET_ITEM_LIMIT,
+    BATCH_MAX_ATTEMPTS,
     MAX_TRANSACT_ITEMS,
     PAGE_ITEM_LIMIT,
+    SCAN_COMPLETE,
     Repository,
     _keys,
+    created_on_filter,
     handle_dynamodb_errors,
 )
 from nrlf.core.tests.data_factory import (
     generate_test_attachment,
     generate_test_content,
     generate_test_document_reference,
+    generate_test_document_type,
     generate_test_subject,
 )
 from nrlf.core.transform import (
     create_document_pointer_from_fhir_json as _create_document_pointer_from_fhir_json,
 )
+from nrlf.core.transform import transform_evaluation_key_to_next_page_token
 from nrlf.core.transform import (
     update_document_pointer_from_fhir_json as _update_document_pointer_from_fhir_json,
 )
@@ -141,6 +158,177 @@ def test_read_document_pointer_throws_error_when_items_key_missing():
         repository.read_item(key(DbPrefix.DocumentPointer, "BAD_KEY"))
 
 
+def test_read_items_returns_found_and_missing_separately():
+    missing_pks = [key(DbPrefix.DocumentPointer, "foo", "missing")]
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items(
+            doc_ids=["1", "2", "3"],
+            repository=repository,
+            subject=SUBJECT,
+            custodian="foo",
+        )
+        found, missing = repository.read_items(
+            [item.pk for item in items] + missing_pks + [items[0].pk]
+        )
+
+    assert found == {item.pk.__root__: item for item in items}
+    assert missing == missing_pks
+
+
+def test_read_items_chunks_requests():
+    n_items = BATCH_GET_ITEM_LIMIT + 2
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items(
+            doc_ids=list(map(str, range(n_items))),
+            repository=repository,
+            subject=SUBJECT,
+            custodian="foo",
+        )
+        with mock.patch.object(
+            client, "batch_get_item", wraps=client.batch_get_item
+        ) as mocked_batch_get_item:
+            found, missing = repository.read_items([item.pk for item in items])
+
+    assert mocked_batch_get_item.call_count == 2
+    assert len(found) == n_items
+    assert missing == []
+
+
+@mock.patch("nrlf.core.repository._backoff")
+def test_read_items_retries_unprocessed_keys(mocked_backoff):
+    item = create_document_pointer_from_fhir_json(
+        fhir_json=generate_test_document_reference()
+    )
+    table_name = DocumentPointer.kebab()
+    unprocessed_keys = {table_name: {"Keys": [_keys(item.pk, item.pk)]}}
+    client = mock.Mock()
+    client.batch_get_item.side_effect = [
+        {"Responses": {}, "UnprocessedKeys": unprocessed_keys},
+        {"Responses": {table_name: [item.dict()]}, "UnprocessedKeys": {}},
+    ]
+
+    repository = Repository(item_type=DocumentPointer, client=client)
+    found, missing = repository.read_items([item.pk])
+
+    assert found == {item.pk.__root__: item}
+    assert missing == []
+    assert client.batch_get_item.call_args_list[1].kwargs == {
+        "RequestItems": unprocessed_keys,
+        "ReturnConsumedCapacity": "INDEXES",
+    }
+    mocked_backoff.assert_called_once_with(0)
+
+
+@mock.patch("nrlf.core.repository._backoff")
+def test_read_items_gives_up_on_unprocessed_keys(mocked_backoff):
+    table_name = DocumentPointer.kebab()
+    unprocessed_keys = {table_name: {"Keys": [_keys("D#foo#1", "D#foo#1")]}}
+    client = mock.Mock()
+    client.batch_get_item.return_value = {
+        "Responses": {},
+        "UnprocessedKeys": unprocessed_keys,
+    }
+
+    repository = Repository(item_type=DocumentPointer, client=client)
+    with pytest.raises(Exception, match="unprocessed after"):
+        repository.read_items(["D#foo#1"])
+
+    assert client.batch_get_item.call_count == BATCH_MAX_ATTEMPTS
+
+
+def test_read_item_through_item_cache():
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf")
+    )
+    pk = core_model.pk.__root__
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer, client=client, item_cache=ItemCache(max_size=10)
+        )
+        repository.create(item=core_model)
+
+        assert repository.read_item(pk) == core_model
+        assert repository.read_item(pk, type=[core_model.type.__root__]) == core_model
+        with pytest.raises(ItemNotFound):
+            repository.read_item(pk, type=["http://snomed.info/sct|foo"])
+
+    assert repository.metrics.calls["query"] == 1
+    assert repository.item_cache.statistics.hits == 2
+    assert repository.item_cache.statistics.misses == 1
+
+
+def test_read_item_caches_missing_items():
+    pk = key(DbPrefix.DocumentPointer, "foo", "missing")
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer, client=client, item_cache=ItemCache(max_size=10)
+        )
+        for _ in range(2):
+            with pytest.raises(ItemNotFound):
+                repository.read_item(pk)
+
+    assert repository.metrics.calls["query"] == 1
+    assert repository.item_cache.statistics.negative_hits == 1
+
+
+def test_writes_invalidate_the_item_cache():
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf")
+    )
+    pk = core_model.pk.__root__
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer, client=client, item_cache=ItemCache(max_size=10)
+        )
+        with pytest.raises(ItemNotFound):
+            repository.read_item(pk)
+        repository.create(item=core_model)
+        assert repository.read_item(pk) == core_model
+
+        repository.hard_delete(pk)
+        with pytest.raises(ItemNotFound):
+            repository.read_item(pk)
+
+    assert repository.metrics.calls["query"] == 3
+    assert repository.item_cache.statistics.hits == 0
+
+
+def test_writes_invalidate_the_item_cache_after_writing():
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf")
+    )
+    pk = core_model.pk.__root__
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer, client=client, item_cache=ItemCache(max_size=10)
+        )
+        put_item = client.put_item
+
+        def _put_item(**kwargs):
+            with pytest.raises(ItemNotFound):
+                repository.read_item(pk)  # i.e. cached while it is being written
+            return put_item(**kwargs)
+
+        with mock.patch.object(client, "put_item", side_effect=_put_item):
+            repository.create(item=core_model)
+        assert repository.read_item(pk) == core_model
+
+
+def test_start_request_resets_item_cache_statistics():
+    repository = Repository(
+        item_type=DocumentPointer, client=None, item_cache=ItemCache(max_size=10)
+    )
+    repository.item_cache.put("foo", None)
+    repository.item_cache.get("foo")
+
+    repository.start_request()
+
+    assert repository.item_cache.statistics.negative_hits == 0
+    assert repository.item_cache.backend.size() == 1
+
+
 # ------------------------------------------------------------------------------
 # Update
 # ------------------------------------------------------------------------------
@@ -178,6 +366,215 @@ def test_update_document_pointer_doesnt_update_if_item_doesnt_exist():
         repository.update(item=model_1)
 
 
+def _url_update(status: str = None) -> tuple[DocumentPointer, DocumentPointer]:
+    old_url = "https://example.org/original_doc.pdf"
+    new_url = "https://example.org/different_doc.pdf"
+    doc_1 = generate_test_document_reference(
+        content=generate_test_content(attachment=generate_test_attachment(url=old_url))
+    )
+    doc_2 = generate_test_document_reference(
+        content=generate_test_content(attachment=generate_test_attachment(url=new_url))
+    )
+    if status is not None:
+        doc_2["status"] = status
+    model_1 = create_document_pointer_from_fhir_json(fhir_json=doc_1)
+    model_2 = update_document_pointer_from_fhir_json(fhir_json=doc_2)
+    return model_1, model_2
+
+
+def test_conditional_update_in_a_single_request():
+    model_1, model_2 = _url_update()
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=model_1)
+        with mock.patch.object(
+            client, "put_item", wraps=client.put_item
+        ) as mocked_put_item, mock.patch.object(
+            client, "query", wraps=client.query
+        ) as mocked_query:
+            repository.conditional_update(item=model_2)
+        item = repository.read_item(model_1.pk.__root__)
+
+    assert item.document == model_2.document
+    assert mocked_put_item.call_count == 1
+    mocked_query.assert_not_called()
+
+
+def test_conditional_update_rejects_changed_immutable_fields():
+    model_1, model_2 = _url_update(status="entered-in-error")
+    with pytest.raises(
+        ImmutableFieldViolationError,
+        match="Forbidden to update immutable field 'status'",
+    ), mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=model_1)
+        repository.conditional_update(item=model_2)
+
+
+def test_conditional_update_item_not_found():
+    _, model_2 = _url_update()
+    with pytest.raises(ItemNotFound), mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.conditional_update(item=model_2)
+
+
+@pytest.mark.parametrize("existing_digest", [None, "out-of-date"])
+def test_conditional_update_without_an_up_to_date_digest(existing_digest):
+    model_1, model_2 = _url_update()
+    existing_item = model_1.dict()  # i.e. without a digest
+    if existing_digest is not None:
+        existing_item["immutable_digest"] = {"S": existing_digest}
+
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        client.put_item(TableName=repository.table_name, Item=existing_item)
+        repository.conditional_update(item=model_2)
+        (item,) = client.scan(TableName=repository.table_name)["Items"]
+
+    assert item["document"] == model_2.document.dict()
+    assert item["immutable_digest"] == model_1.immutable_digest.dict()
+
+
+def test_conditional_update_without_a_digest_modified_concurrently():
+    model_1, model_2 = _url_update()
+    with pytest.raises(
+        ConflictError, match="Item was modified concurrently"
+    ), mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        client.put_item(TableName=repository.table_name, Item=model_1.dict())
+        put_item = client.put_item
+
+        def _put_item(**kwargs):
+            if "ReturnValuesOnConditionCheckFailure" not in kwargs:
+                # i.e. another update, between the two puts of this one
+                put_item(TableName=repository.table_name, Item=model_1.stored_dict())
+            return put_item(**kwargs)
+
+        with mock.patch.object(client, "put_item", side_effect=_put_item):
+            repository.conditional_update(item=model_2)
+
+
+# ------------------------------------------------------------------------------
+# Compression
+# ------------------------------------------------------------------------------
+
+
+def test_repository_unsupported_compression():
+    with pytest.raises(ValueError, match="Unsupported compression 'foo'"):
+        Repository(item_type=DocumentPointer, client=None, compression="foo")
+
+
+@pytest.mark.parametrize("trusted_reads", (True, False))
+def test_create_and_read_compressed_document(trusted_reads):
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf")
+    )
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer,
+            client=client,
+            trusted_reads=trusted_reads,
+            compression=ZLIB,
+        )
+        repository.create(item=core_model)
+        (item,) = client.scan(TableName=repository.table_name)["Items"]
+        result = repository.read_item(pk=core_model.pk.__root__)
+
+    assert set(item["document"]) == {"B"}
+    assert item_size(item) < item_size(core_model.stored_dict())
+    assert result == core_model
+
+
+def _remove_immutable_digest(client, repository: Repository, model: DocumentPointer):
+    """So that conditional updates have to compare the documents themselves"""
+    client.update_item(
+        TableName=repository.table_name,
+        Key=_keys(model.pk, model.sk),
+        UpdateExpression="REMOVE immutable_digest",
+    )
+
+
+def test_conditional_update_of_compressed_document():
+    model_1, model_2 = _url_update()
+    model_3 = update_document_pointer_from_fhir_json(
+        fhir_json=json_loads(model_1.document.__root__)
+    )
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        compressed_repository = Repository(
+            item_type=DocumentPointer, client=client, compression=ZLIB
+        )
+        repository.create(item=model_1)
+        _remove_immutable_digest(client, repository=repository, model=model_1)
+        compressed_repository.conditional_update(item=model_2)
+        _remove_immutable_digest(client, repository=repository, model=model_1)
+        repository.conditional_update(item=model_3)
+        item = repository.read_item(model_1.pk.__root__)
+
+    assert item.document == model_1.document
+
+
+# ------------------------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------------------------
+
+
+def test_repository_records_metrics():
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf")
+    )
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=core_model)
+        repository.read_item(pk=core_model.pk.__root__)
+
+    assert repository.metrics.calls == {"put_item": 1, "query": 1}
+    assert (repository.metrics.pages, repository.metrics.count) == (1, 1)
+    assert repository.metrics.read_capacity_units > 0
+    assert repository.metrics.write_capacity_units > 0
+
+
+# ------------------------------------------------------------------------------
+# Compact layout
+# ------------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("trusted_reads", (True, False))
+def test_create_and_read_compact_document_pointer(trusted_reads):
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf")
+    )
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer,
+            client=client,
+            trusted_reads=trusted_reads,
+            compact_layout=True,
+        )
+        repository.create(item=core_model)
+        (item,) = client.scan(TableName=repository.table_name)["Items"]
+        result = repository.read_item(pk=core_model.pk.__root__)
+
+    assert item[LAYOUT_VERSION] == {"N": "2"}
+    assert not {"custodian", "custodian_suffix", "updated_on"} & set(item)
+    assert item_size(item) < item_size(core_model.stored_dict())
+    assert result == core_model
+
+
+def test_conditional_update_of_compact_document_pointer():
+    model_1, model_2 = _url_update()
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        compact_repository = Repository(
+            item_type=DocumentPointer, client=client, compact_layout=True
+        )
+        repository.create(item=model_1)
+        compact_repository.conditional_update(item=model_2)
+        item = repository.read_item(model_1.pk.__root__)
+
+    assert item == model_2
+
+
 # ------------------------------------------------------------------------------
 # Supersede
 # ------------------------------------------------------------------------------
@@ -252,6 +649,120 @@ def test_supersede_too_many_items(max_transact_items):
         )
 
 
+def _supersede_models(**target_kwargs) -> tuple[DocumentPointer, DocumentPointer]:
+    doc_1 = generate_test_document_reference(
+        provider_doc_id="original", **target_kwargs
+    )
+    doc_2 = generate_test_document_reference(provider_doc_id="replacement")
+    return (
+        create_document_pointer_from_fhir_json(fhir_json=doc_1),
+        create_document_pointer_from_fhir_json(fhir_json=doc_2),
+    )
+
+
+@pytest.mark.parametrize(
+    "target_kwargs",
+    (
+        {"subject": generate_test_subject(value="9278693472")},
+        {"type": generate_test_document_type(code="861421000000109")},
+    ),
+)
+def test_supersede_target_mismatch_raises_supersede_condition_error(target_kwargs):
+    model_1, model_2 = _supersede_models(**target_kwargs)
+
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=model_1)
+        with pytest.raises(SupersedeConditionError) as error:
+            repository.supersede(create_item=model_2, delete_pks=[model_1.pk.__root__])
+
+        assert list(error.value.failed_targets) == [model_1.pk.__root__]
+        assert repository.read_item(model_1.pk.__root__) == model_1
+        with pytest.raises(ItemNotFound):
+            repository.read_item(model_2.pk.__root__)
+
+
+def test_supersede_missing_target_raises_supersede_condition_error():
+    model_1, model_2 = _supersede_models()
+
+    with pytest.raises(SupersedeConditionError) as error, mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.supersede(create_item=model_2, delete_pks=[model_1.pk.__root__])
+
+    assert error.value.failed_targets == {model_1.pk.__root__: None}
+
+
+def test_supersede_condition_error_returns_existing_items():
+    model_1, model_2 = _supersede_models()
+    existing_item = model_1.dict()
+    client = mock.Mock()
+    client.transact_write_items.side_effect = ClientError(
+        error_response={
+            "Error": {"Code": "TransactionCanceledException"},
+            "CancellationReasons": [
+                {"Code": "ConditionalCheckFailed", "Item": existing_item},
+                {"Code": "ConditionalCheckFailed"},
+                {"Code": "None"},
+                {"Code": "None"},
+            ],
+        },
+        operation_name="TransactWriteItems",
+    )
+    client.get_item.return_value = {}
+    repository = Repository(item_type=DocumentPointer, client=client)
+
+    with pytest.raises(SupersedeConditionError) as error:
+        repository.supersede(create_item=model_2, delete_pks=["a", "b", "c"])
+
+    assert error.value.failed_targets == {"a": existing_item, "b": None}
+    (get_item,) = client.get_item.call_args_list
+    assert get_item.kwargs["Key"] == _keys("b", "b")
+    assert get_item.kwargs["ConsistentRead"] is True
+    (delete, *_) = client.transact_write_items.call_args.kwargs["TransactItems"]
+    assert delete["Delete"]["ExpressionAttributeValues"] == {
+        ":nhs_number": model_2.nhs_number.dict(),
+        ":type": model_2.type.dict(),
+    }
+
+
+def test_supersede_condition_error_reads_targets_without_a_reason_item():
+    model_1, model_2 = _supersede_models(
+        subject=generate_test_subject(value="9278693472")
+    )
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=model_1)
+        transact_write_items = client.transact_write_items
+
+        def _without_reason_items(**kwargs):
+            try:
+                return transact_write_items(**kwargs)
+            except ClientError as error:
+                for reason in error.response.get("CancellationReasons", []):
+                    reason.pop("Item", None)
+                raise
+
+        with mock.patch.object(
+            client, "transact_write_items", side_effect=_without_reason_items
+        ), pytest.raises(SupersedeConditionError) as error:
+            repository.supersede(create_item=model_2, delete_pks=[model_1.pk.__root__])
+
+    assert DocumentPointer.from_dynamodb(
+        error.value.failed_targets[model_1.pk.__root__]
+    ) == DocumentPointer.from_dynamodb(model_1.stored_dict())
+
+
+def test_supersede_reports_failed_targets_before_a_duplicate():
+    model_1, model_2 = _supersede_models()
+
+    with pytest.raises(SupersedeConditionError) as error, mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=model_2)
+        repository.supersede(create_item=model_2, delete_pks=[model_1.pk.__root__])
+
+    assert error.value.failed_targets == {model_1.pk.__root__: None}
+
+
 def test_keys():
     actual = _keys("abc", "def", "pk_1", "sk_1")
     expected = {"pk_1": {"S": "abc"}, "sk_1": {"S": "def"}}
@@ -279,6 +790,32 @@ def test_wont_hard_delete_if_item_doesnt_exist():
         repository.hard_delete(key(DbPrefix.DocumentPointer, "NO"))
 
 
+def test_delete_returning():
+    doc = generate_test_document_reference()
+    model = create_document_pointer_from_fhir_json(fhir_json=doc)
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.create(item=model)
+        with mock.patch.object(
+            client, "delete_item", wraps=client.delete_item
+        ) as mocked_delete_item, mock.patch.object(client, "query") as mocked_query:
+            deleted_item = repository.delete_returning(model.pk.__root__)
+
+        assert deleted_item == model
+        mocked_delete_item.assert_called_once()
+        mocked_query.assert_not_called()
+        with pytest.raises(ItemNotFound):
+            repository.read_item(model.pk.__root__)
+
+
+def test_delete_returning_if_item_doesnt_exist():
+    with pytest.raises(
+        ItemNotFound, match="Item could not be found"
+    ), mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        repository.delete_returning(key(DbPrefix.DocumentPointer, "NO"))
+
+
 @pytest.mark.parametrize(
     ["exception_param", "expected_exception"],
     (
@@ -337,13 +874,45 @@ def test_search_returns_correct_values():
         docs_gsi_2_response = repository.query_gsi_2(
             model_1.pk_2.__root__
         )  # ODS Code / Custodian
+        docs_gsi_4_response = repository.query_gsi_4(
+            model_1.pk_4.__root__
+        )  # NHS Number / ODS Code
 
     assert len(docs_gsi_1_response.items) == 1, "Partitioned by subject"
     assert len(docs_gsi_2_response.items) == 2, "Partitioned by provider"
+    assert docs_gsi_4_response.items == [model_1], "Partitioned by subject/provider"
+
+
+def test_query_gsi_4_only_reads_the_subjects_pointers():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items(
+            doc_ids=["1", "2"], repository=repository, subject=SUBJECT, custodian="foo"
+        )
+        for subject in ("3137554160", "4409815415"):
+            _create_items(
+                doc_ids=[f"{subject}-{ix}" for ix in range(5)],
+                repository=repository,
+                subject=subject,
+                custodian="foo",
+            )
+
+        with mock.patch.object(client, "query", wraps=client.query) as mocked_query:
+            response = repository.query_gsi_4(
+                key(DbPrefix.OrganizationPatient, SUBJECT, "foo")
+            )
+        (call,) = mocked_query.call_args_list
+
+    assert response.items == items
+    assert "FilterExpression" not in call.kwargs
 
 
 def _create_items(
-    doc_ids: list[str], repository: Repository, subject: str, custodian: str
+    doc_ids: list[str],
+    repository: Repository,
+    subject: str,
+    custodian: str,
+    document_type: dict = None,
 ) -> list[DocumentPointer]:
     items: list[DocumentPointer] = []
     for doc_id in doc_ids:
@@ -351,6 +920,7 @@ def _create_items(
             provider_doc_id=doc_id,
             subject=generate_test_subject(subject),
             custodian={"identifier": {"value": custodian, "system": ODS_SYSTEM}},
+            type=document_type,
         )
         item = create_document_pointer_from_fhir_json(fhir_json=doc)
         repository.create(item=item)
@@ -475,3 +1045,656 @@ def test_scroll_gsi_1(bar_batch_sizes, foo_batch_sizes, dynamodb_client):
     assert n_unique_items == len(retrieved_items) == total_expected_docs
     assert _document_pointer_collection_are_same(a=retrieved_items, b=foo_docs)
     assert last_evaluated_key is None
+
+
+@pytest.mark.parametrize("trusted_reads", [True, False])
+def test_search_skips_corrupt_items(trusted_reads):
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer, client=client, trusted_reads=trusted_reads
+        )
+        (item, corrupt_item) = _create_items(
+            doc_ids=["1", "2"], repository=repository, subject=SUBJECT, custodian="foo"
+        )
+        corrupt_item = corrupt_item.dict()
+        corrupt_item.pop("document")
+        client.put_item(TableName=repository.table_name, Item=corrupt_item)
+
+        response = repository.query_gsi_1(pk=f"P#{SUBJECT}")
+
+    assert response.items == [item]
+
+
+# ------------------------------------------------------------------------------
+# Query many
+# ------------------------------------------------------------------------------
+
+DOCUMENT_TYPE_CODES = ("736253002", "861421000000109", "1363501000000100")
+
+
+def _create_items_of_each_type(
+    repository: Repository, n_items_per_type: int, custodians=("foo",)
+) -> dict[str, list[DocumentPointer]]:
+    items_by_type = {}
+    for ix in range(n_items_per_type):
+        for code in DOCUMENT_TYPE_CODES:
+            for custodian in custodians:
+                (item,) = _create_items(
+                    doc_ids=[f"{code}-{ix}"],
+                    repository=repository,
+                    subject=SUBJECT,
+                    custodian=custodian,
+                    document_type=generate_test_document_type(code=code),
+                )
+                items_by_type.setdefault(item.type.__root__, []).append(item)
+    return items_by_type
+
+
+def _read_all_merged_pages(repository: Repository, pks: list[str], **kwargs):
+    pages, last_evaluated_key = [], None
+    while True:
+        response = repository.query_gsi_3_many(
+            pks=pks, exclusive_start_key=last_evaluated_key, **kwargs
+        )
+        pages.append(response.items)
+        last_evaluated_key = response.last_evaluated_key
+        if last_evaluated_key is None:
+            return pages
+
+
+@pytest.mark.parametrize(
+    ["limit", "expected_page_sizes"],
+    [[PAGE_ITEM_LIMIT, [PAGE_ITEM_LIMIT, 1]], [4, [4] * 5 + [1]], [7, [7, 7, 7]]],
+)
+def test_query_gsi_3_many_merges_partitions_in_sort_key_order(
+    limit, expected_page_sizes
+):
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items_by_type = _create_items_of_each_type(
+            repository=repository, n_items_per_type=7
+        )
+        pks = [key(DbPrefix.PatientType, SUBJECT, _type) for _type in items_by_type]
+
+        pages = _read_all_merged_pages(repository=repository, pks=pks, limit=limit)
+        (all_items_by_subject,), _ = _read_all_pages(repository, limit=100)
+
+    assert list(map(len, pages)) == expected_page_sizes
+    assert list(chain.from_iterable(pages)) == all_items_by_subject
+
+
+def test_query_gsi_3_many_only_reads_the_requested_partitions():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items_by_type = _create_items_of_each_type(
+            repository=repository, n_items_per_type=3
+        )
+        (first_type, *_, last_type) = items_by_type
+        pks = [
+            key(DbPrefix.PatientType, SUBJECT, _type)
+            for _type in (first_type, last_type)
+        ]
+
+        with mock.patch.object(client, "query", wraps=client.query) as mocked_query:
+            pages = _read_all_merged_pages(repository=repository, pks=pks, limit=2)
+
+    assert _document_pointer_collection_are_same(
+        a=list(chain.from_iterable(pages)),
+        b=items_by_type[first_type] + items_by_type[last_type],
+    )
+    queried_pks = {
+        call.kwargs["ExpressionAttributeValues"][":pk_3"]["S"]
+        for call in mocked_query.call_args_list
+    }
+    assert queried_pks == set(pks)
+
+
+def test_query_gsi_3_many_with_filter():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items_by_type = _create_items_of_each_type(
+            repository=repository, n_items_per_type=4, custodians=("foo", "bar")
+        )
+        pks = [key(DbPrefix.PatientType, SUBJECT, _type) for _type in items_by_type]
+        pages = _read_all_merged_pages(
+            repository=repository, pks=pks, limit=5, producer_id="bar"
+        )
+
+    assert list(map(len, pages)) == [5, 5, 2]
+    assert _document_pointer_collection_are_same(
+        a=list(chain.from_iterable(pages)),
+        b=[
+            item
+            for items in items_by_type.values()
+            for item in items
+            if item.producer_id.__root__ == "bar"
+        ],
+    )
+
+
+def test_query_gsi_3_many_without_partitions():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        response = repository.query_gsi_3_many(pks=[])
+
+    assert response.items == []
+    assert response.last_evaluated_key is None
+
+
+@pytest.mark.parametrize(
+    "start_key", [{"pk": {"S": "D#foo#123"}}, {"cursors": ["foo"]}, ["foo"]]
+)
+def test_query_gsi_3_many_rejects_other_page_tokens(start_key):
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        with pytest.raises(NextPageTokenValidationError):
+            repository.query_gsi_3_many(
+                pks=["PT#foo#bar"],
+                exclusive_start_key=transform_evaluation_key_to_next_page_token(
+                    start_key
+                ),
+            )
+
+
+# ------------------------------------------------------------------------------
+# Count
+# ------------------------------------------------------------------------------
+
+
+def test_count_gsi_1_counts_all_pages_with_filters():
+    n_foo_items, n_bar_items = PAGE_ITEM_LIMIT + 5, 3
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        foo_docs, bar_docs = _create_items_in_alternate_batches(
+            a_batch_sizes=[n_foo_items],
+            b_batch_sizes=[n_bar_items],
+            repository=repository,
+            a_custodian="foo",
+            b_custodian="bar",
+        )
+        (pointer_type,) = set(doc.type.__root__ for doc in foo_docs + bar_docs)
+
+        total_count = repository.count_gsi_1(pk=f"P#{SUBJECT}")
+        foo_count = repository.count_gsi_1(pk=f"P#{SUBJECT}", producer_id="foo")
+        type_count = repository.count_gsi_1(pk=f"P#{SUBJECT}", type=[pointer_type])
+        other_type_count = repository.count_gsi_1(pk=f"P#{SUBJECT}", type=["other"])
+        other_subject_count = repository.count_gsi_1(pk="P#3137554160")
+        org_count = repository.count_gsi_2(pk="O#bar")
+
+    assert total_count == n_foo_items + n_bar_items
+    assert foo_count == n_foo_items
+    assert type_count == n_foo_items + n_bar_items
+    assert other_type_count == 0
+    assert other_subject_count == 0
+    assert org_count == n_bar_items
+
+
+def test_count_does_not_read_items():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        (item,) = _create_items(
+            doc_ids=["1"], repository=repository, subject=SUBJECT, custodian="foo"
+        )
+        with mock.patch.object(
+            client, "query", wraps=client.query
+        ) as mocked_query, mock.patch(
+            "nrlf.core.repository._is_record_valid"
+        ) as mocked_is_record_valid:
+            count = repository.count(pk=item.pk.__root__)
+
+    assert count == 1
+    (call,) = mocked_query.call_args_list
+    assert call.kwargs["Select"] == "COUNT"
+    mocked_is_record_valid.assert_not_called()
+
+
+def test_count_includes_corrupt_items_which_search_skips():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        (item, corrupt_item) = _create_items(
+            doc_ids=["1", "2"], repository=repository, subject=SUBJECT, custodian="foo"
+        )
+        corrupt_item = corrupt_item.dict()
+        corrupt_item.pop("document")
+        client.put_item(TableName=repository.table_name, Item=corrupt_item)
+
+        count = repository.count_gsi_1(pk=f"P#{SUBJECT}")
+        response = repository.query_gsi_1(pk=f"P#{SUBJECT}")
+
+    assert count == 2
+    assert response.items == [item]
+
+
+# ------------------------------------------------------------------------------
+# Paging
+# ------------------------------------------------------------------------------
+
+
+def _read_all_pages(repository: Repository, **kwargs) -> tuple[list, list]:
+    pages, last_evaluated_keys, last_evaluated_key = [], [], None
+    while True:
+        response = repository.query_gsi_1(
+            pk=f"P#{SUBJECT}", exclusive_start_key=last_evaluated_key, **kwargs
+        )
+        pages.append(response.items)
+        last_evaluated_key = response.last_evaluated_key
+        if last_evaluated_key is None:
+            break
+        last_evaluated_keys.append(last_evaluated_key)
+    return pages, last_evaluated_keys
+
+
+@pytest.mark.parametrize(
+    ["limit", "n_items", "expected_page_sizes"],
+    [
+        [PAGE_ITEM_LIMIT, 2 * PAGE_ITEM_LIMIT + 3, [PAGE_ITEM_LIMIT] * 2 + [3]],
+        [PAGE_ITEM_LIMIT, 2 * PAGE_ITEM_LIMIT, [PAGE_ITEM_LIMIT] * 2],
+        [5, 12, [5, 5, 2]],
+        [1, 3, [1, 1, 1]],
+        [5, 0, [0]],
+    ],
+)
+def test_query_gsi_1_pages_have_the_requested_size(limit, n_items, expected_page_sizes):
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items(
+            doc_ids=list(map(str, range(n_items))),
+            repository=repository,
+            subject=SUBJECT,
+            custodian="foo",
+        )
+        pages, last_evaluated_keys = _read_all_pages(repository, limit=limit)
+
+    assert list(map(len, pages)) == expected_page_sizes
+    assert len(last_evaluated_keys) == len(pages) - 1
+    assert _document_pointer_collection_are_same(
+        a=list(chain.from_iterable(pages)), b=items
+    )
+
+
+def test_query_gsi_1_only_reads_one_item_beyond_each_page():
+    n_items = 2 * PAGE_ITEM_LIMIT + 3
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        _create_items(
+            doc_ids=list(map(str, range(n_items))),
+            repository=repository,
+            subject=SUBJECT,
+            custodian="foo",
+        )
+
+        with mock.patch.object(client, "query", wraps=client.query) as mocked_query:
+            _read_all_pages(repository)
+
+    limits = [call.kwargs["Limit"] for call in mocked_query.call_args_list]
+    assert limits == [PAGE_ITEM_LIMIT + 1, PAGE_ITEM_LIMIT + 1, PAGE_ITEM_LIMIT + 1]
+
+
+def test_query_gsi_1_tops_up_pages_after_filtering():
+    n_foo_items, n_bar_items = PAGE_ITEM_LIMIT + 5, 3
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        foo_docs, _ = _create_items_in_alternate_batches(
+            a_batch_sizes=[2, n_foo_items - 2],
+            b_batch_sizes=[n_bar_items],
+            repository=repository,
+            a_custodian="foo",
+            b_custodian="bar",
+        )
+        pages, _ = _read_all_pages(repository, producer_id="foo")
+
+    assert list(map(len, pages)) == [PAGE_ITEM_LIMIT, 5]
+    assert _document_pointer_collection_are_same(
+        a=list(chain.from_iterable(pages)), b=foo_docs
+    )
+
+
+@pytest.mark.parametrize("prefetch_pages", [True, False])
+def test_query_gsi_1_prefetches_pages_which_are_needed(prefetch_pages):
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer,
+            client=client,
+            query_statistics=QueryStatistics(),
+            prefetch_pages=prefetch_pages,
+        )
+        foo_docs, _ = _create_items_in_alternate_batches(
+            a_batch_sizes=[1, 1, 1],
+            b_batch_sizes=[PAGE_ITEM_LIMIT] * 3,
+            repository=repository,
+            a_custodian="foo",
+            b_custodian="bar",
+        )
+        threads = []
+
+        def _query(**kwargs):
+            threads.append(threading.current_thread())
+            return query(**kwargs)
+
+        query = client.query
+        with mock.patch.object(client, "query", side_effect=_query):
+            pages, _ = _read_all_pages(repository, producer_id="foo")
+
+    assert pages == [foo_docs]
+    assert len(threads) == 2  # i.e. no page is read which wouldn't have been
+    assert (threads[1] is not threading.main_thread()) is prefetch_pages
+
+
+def test_query_gsi_1_reuses_the_prefetcher():
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer,
+            client=client,
+            query_statistics=QueryStatistics(),
+        )
+        foo_docs, _ = _create_items_in_alternate_batches(
+            a_batch_sizes=[1, 1, 1],
+            b_batch_sizes=[PAGE_ITEM_LIMIT] * 3,
+            repository=repository,
+            a_custodian="foo",
+            b_custodian="bar",
+        )
+        with mock.patch(
+            "nrlf.core.repository.ThreadPoolExecutor"
+        ) as mocked_executor, mock.patch.object(
+            repository, "_prefetcher", wraps=repository._prefetcher
+        ) as prefetcher:
+            for _ in range(2):
+                repository.query_statistics = QueryStatistics()  # i.e. prefetch again
+                pages, _ = _read_all_pages(repository, producer_id="foo")
+                assert pages == [foo_docs]
+
+    mocked_executor.assert_not_called()
+    assert prefetcher.submit.call_count == 2
+
+
+def test_query_gsi_1_adapts_limit_to_filter_selectivity():
+    query_statistics = QueryStatistics()
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer,
+            client=client,
+            query_statistics=query_statistics,
+        )
+        foo_docs, _ = _create_items_in_alternate_batches(
+            a_batch_sizes=[1, 1, 1],
+            b_batch_sizes=[PAGE_ITEM_LIMIT] * 3,
+            repository=repository,
+            a_custodian="foo",
+            b_custodian="bar",
+        )
+        with mock.patch.object(client, "query", wraps=client.query) as mocked_query:
+            first_pages, _ = _read_all_pages(repository, producer_id="foo")
+            n_first_round_trips = mocked_query.call_count
+            mocked_query.reset_mock()
+            second_pages, _ = _read_all_pages(repository, producer_id="foo")
+
+    assert first_pages == second_pages == [foo_docs]
+    assert n_first_round_trips > 1
+    assert mocked_query.call_count == 1
+    (shape,) = query_statistics._totals
+    assert shape == QueryShape(index_name="idx_gsi_1", filters=("producer_id",))
+    assert query_statistics.selectivity(shape) < 0.1
+
+
+def test_query_gsi_1_truncates_pages_read_beyond_the_limit():
+    query_statistics = QueryStatistics()
+    with mock_dynamodb() as client:
+        repository = Repository(
+            item_type=DocumentPointer,
+            client=client,
+            query_statistics=query_statistics,
+        )
+        foo_docs = _create_items(
+            doc_ids=list(map(str, range(2 * PAGE_ITEM_LIMIT + 3))),
+            repository=repository,
+            subject=SUBJECT,
+            custodian="foo",
+        )
+        shape = QueryShape(index_name="idx_gsi_1", filters=("producer_id",))
+        query_statistics.record(shape=shape, scanned_count=100, count=1)
+        pages, _ = _read_all_pages(repository, producer_id="foo")
+
+    assert list(map(len, pages)) == [PAGE_ITEM_LIMIT, PAGE_ITEM_LIMIT, 3]
+    assert _document_pointer_collection_are_same(
+        a=list(chain.from_iterable(pages)), b=foo_docs
+    )
+
+
+# ------------------------------------------------------------------------------
+# Date ranges
+# ------------------------------------------------------------------------------
+
+CREATED_ONS = [
+    "2022-12-31T23:59:59.999Z",
+    "2023-01-15T00:00:00.000Z",
+    "2023-01-31T12:00:00.000Z",
+    "2023-02-28T23:59:59.999Z",
+    "2023-03-01T00:00:00.000Z",
+]
+
+
+def _create_items_created_on(
+    repository: Repository, created_ons: list[str], custodian="foo"
+) -> dict[str, DocumentPointer]:
+    items = {}
+    for ix, created_on in enumerate(created_ons):
+        doc = generate_test_document_reference(
+            provider_doc_id=f"doc-{ix}",
+            subject=generate_test_subject(SUBJECT),
+            custodian={"identifier": {"value": custodian, "system": ODS_SYSTEM}},
+        )
+        item = create_document_pointer_from_fhir_json(fhir_json=doc)
+        item.created_on = DynamoDbStringType(__root__=created_on)
+        repository.create(item=item)
+        items[created_on] = item
+    return items
+
+
+def _record(query, responses: list, kwargs: dict) -> dict:
+    response = query(**kwargs)
+    responses.append(response)
+    return response
+
+
+def _created_on_filter(*dates: str):
+    request_params = ConsumerRequestParams(
+        **{"subject:identifier": f"https://fhir.nhs.uk/Id/nhs-number|{SUBJECT}"},
+        date=list(dates),
+    )
+    return created_on_filter(dates=request_params.date)
+
+
+@pytest.mark.parametrize(
+    ["dates", "expected_created_ons"],
+    [
+        [("2023-01",), CREATED_ONS[1:3]],
+        [("ge2023-01-15", "le2023-02"), CREATED_ONS[1:4]],
+        [("ge2023-02",), CREATED_ONS[3:]],
+        [("le2022",), CREATED_ONS[:1]],
+        [("2021",), []],
+    ],
+)
+def test_query_gsi_3_many_only_reads_items_in_date_range(
+    dates: tuple[str], expected_created_ons: list[str]
+):
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items_created_on(repository=repository, created_ons=CREATED_ONS)
+        (pk_3,) = set(item.pk_3.__root__ for item in items.values())
+
+        responses = []
+        query = client.query
+        with mock.patch.object(
+            client,
+            "query",
+            side_effect=lambda **kwargs: _record(query, responses, kwargs),
+        ):
+            pages = _read_all_merged_pages(
+                repository=repository, pks=[pk_3], sk=_created_on_filter(*dates)
+            )
+
+    assert list(chain.from_iterable(pages)) == [
+        items[created_on] for created_on in expected_created_ons
+    ]
+    n_items_read = sum(response["Count"] for response in responses)
+    assert n_items_read == len(expected_created_ons)
+
+
+def test_query_gsi_4_and_count_gsi_1_with_date_range():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items_created_on(repository=repository, created_ons=CREATED_ONS)
+        (item, *_) = items.values()
+        sk = _created_on_filter("ge2023-01-15", "le2023-02")
+
+        response = repository.query_gsi_4(pk=item.pk_4.__root__, sk=sk)
+        count = repository.count_gsi_1(pk=item.pk_1.__root__, sk=sk)
+
+    assert response.items == [items[created_on] for created_on in CREATED_ONS[1:4]]
+    assert count == 3
+
+
+# ------------------------------------------------------------------------------
+# Parallel scan
+# ------------------------------------------------------------------------------
+
+
+@contextmanager
+def _segmented_scan(client: DynamoDbClient):
+    """
+    moto ignores 'Segment' and 'TotalSegments', so emulate DynamoDb by only
+    returning the items of each page which hash to the requested segment
+    """
+    scan = client.scan
+
+    def _scan(Segment: int, TotalSegments: int, **kwargs):
+        response = scan(**kwargs)
+        response["Items"] = [
+            item
+            for item in response["Items"]
+            if crc32(item["pk"]["S"].encode()) % TotalSegments == Segment
+        ]
+        return response
+
+    with mock.patch.object(client, "scan", side_effect=_scan):
+        yield
+
+
+@pytest.mark.parametrize("total_segments", [1, 3, 8])
+@pytest.mark.parametrize("page_size", [None, 2])
+def test_parallel_scan_yields_every_item_once(total_segments, page_size):
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items(
+            doc_ids=list(map(str, range(15))),
+            repository=repository,
+            subject=SUBJECT,
+            custodian="foo",
+        )
+        with _segmented_scan(client):
+            scanned_items = list(
+                repository.parallel_scan(
+                    total_segments=total_segments, page_size=page_size
+                )
+            )
+
+    assert len(scanned_items) == len(items)
+    assert _document_pointer_collection_are_same(a=scanned_items, b=items)
+
+
+def test_parallel_scan_with_projection_and_filter():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        foo_items = _create_items(
+            doc_ids=["1", "2"], repository=repository, subject=SUBJECT, custodian="foo"
+        )
+        _create_items(
+            doc_ids=["3"], repository=repository, subject=SUBJECT, custodian="bar"
+        )
+        with _segmented_scan(client):
+            scanned_items = list(
+                repository.parallel_scan(projection=["pk", "type"], producer_id="foo")
+            )
+
+    assert sorted(scanned_items, key=lambda item: item["pk"]) == [
+        {"pk": item.pk.__root__, "type": item.type.__root__} for item in foo_items
+    ]
+
+
+def test_parallel_scan_skips_corrupt_items():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        (item, corrupt_item) = _create_items(
+            doc_ids=["1", "2"], repository=repository, subject=SUBJECT, custodian="foo"
+        )
+        corrupt_item = corrupt_item.dict()
+        corrupt_item.pop("document")
+        client.put_item(TableName=repository.table_name, Item=corrupt_item)
+
+        with _segmented_scan(client):
+            scanned_items = list(repository.parallel_scan())
+
+    assert scanned_items == [item]
+
+
+def test_parallel_scan_resumes_from_checkpoints():
+    total_segments, page_size = 3, 2
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        items = _create_items(
+            doc_ids=list(map(str, range(20))),
+            repository=repository,
+            subject=SUBJECT,
+            custodian="foo",
+        )
+
+        checkpoints = {}
+        with _segmented_scan(client):
+            scan = repository.parallel_scan(
+                total_segments=total_segments,
+                page_size=page_size,
+                checkpoints=checkpoints,
+            )
+            first_items = list(islice(scan, 7))
+            scan.close()
+            assert SCAN_COMPLETE not in checkpoints.values()
+
+            resumed_items = list(
+                repository.parallel_scan(
+                    total_segments=total_segments,
+                    page_size=page_size,
+                    checkpoints=checkpoints,
+                )
+            )
+            remaining_items = list(
+                repository.parallel_scan(
+                    total_segments=total_segments,
+                    page_size=page_size,
+                    checkpoints=checkpoints,
+                )
+            )
+
+    assert checkpoints == dict.fromkeys(range(total_segments), SCAN_COMPLETE)
+    assert remaining_items == []
+    assert _document_pointer_collection_are_same(
+        a=list(
+            {item.pk.__root__: item for item in first_items + resumed_items}.values()
+        ),
+        b=items,
+    )
+    # Only pages which were not fully consumed are read again
+    n_repeated_items = len(first_items) + len(resumed_items) - len(items)
+    assert n_repeated_items < total_segments * page_size
+
+
+def test_parallel_scan_raises_errors_from_segments():
+    with mock_dynamodb() as client:
+        repository = Repository(item_type=DocumentPointer, client=client)
+        _create_items(
+            doc_ids=["1"], repository=repository, subject=SUBJECT, custodian="foo"
+        )
+        with mock.patch.object(
+            client, "scan", side_effect=ClientError({"Error": {}}, "Scan")
+        ), pytest.raises(ClientError):
+            list(repository.parallel_scan())
@@ -0,0 +1,74 @@
+import pytest
+
+from nrlf.core.cache import RedisCacheBackend
+from nrlf.core.item_cache import (
+    ITEM_CACHE_NEGATIVE_TTL_SECONDS,
+    ITEM_CACHE_TTL_SECONDS,
+    NOT_CACHED,
+    ItemCache,
+    build_item_cache,
+)
+from nrlf.core.tests.stub_client import FakeClock, RedisStandIn
+
+ITEM = {"pk": {"S": "D#foo"}}
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def test_item_cache_hits_and_misses(clock: FakeClock):
+    cache = ItemCache(max_size=2, clock=clock.time)
+
+    assert cache.get("foo") is NOT_CACHED
+    cache.put("foo", ITEM)
+    cache.put("bar", None)
+
+    assert cache.get("foo") == ITEM
+    assert cache.get("bar") is None
+    assert cache.statistics.dict() == {"hits": 1, "negative_hits": 1, "misses": 1}
+
+    cache.reset_statistics()
+    assert cache.statistics.dict() == {"hits": 0, "negative_hits": 0, "misses": 0}
+
+
+def test_item_cache_expires_misses_sooner(clock: FakeClock):
+    cache = ItemCache(
+        max_size=2, ttl_seconds=5, negative_ttl_seconds=1, clock=clock.time
+    )
+    cache.put("foo", ITEM)
+    cache.put("bar", None)
+
+    clock.sleep(1)
+    assert cache.get("bar") is NOT_CACHED
+    assert cache.get("foo") == ITEM
+
+    clock.sleep(4)
+    assert cache.get("foo") is NOT_CACHED
+    assert cache.backend.statistics.expirations == 2
+    assert cache.backend.size() == 0
+
+
+def test_item_cache_invalidate(clock: FakeClock):
+    cache = ItemCache(backend=RedisCacheBackend(client=RedisStandIn(clock=clock)))
+    for key in ("foo", "bar"):
+        cache.put(key, ITEM)
+
+    cache.invalidate("foo", "missing")
+
+    assert cache.get("foo") is NOT_CACHED
+    assert cache.get("bar") == ITEM
+    assert set(cache.backend.client.values) == {"item#bar"}
+
+
+def test_build_item_cache_disabled():
+    assert build_item_cache(backend=None, ttl_seconds=10) is None
+
+
+def test_build_item_cache(clock: FakeClock):
+    backend = RedisCacheBackend(client=RedisStandIn(clock=clock))
+    cache = build_item_cache(backend=backend, negative_ttl_seconds=0.5)
+    assert (cache.backend, cache.ttl_seconds) == (backend, ITEM_CACHE_TTL_SECONDS)
+    assert cache.negative_ttl_seconds == 0.5
+    assert ITEM_CACHE_NEGATIVE_TTL_SECONDS < ITEM_CACHE_TTL_SECONDS
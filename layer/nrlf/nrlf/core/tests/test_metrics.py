@@ -0,0 +1,138 @@
+from unittest import mock
+
+import boto3
+import moto
+import pytest
+from botocore.exceptions import ClientError
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from nrlf.core.metrics import DynamoDbMetrics, InstrumentedDynamoDbClient
+from nrlf.core.model import DocumentPointer
+
+TABLE_NAME = DocumentPointer.kebab()
+ITEM = {
+    "pk": {"S": "D#foo"},
+    "sk": {"S": "D#foo"},
+    "pk_1": {"S": "P#bar"},
+    "sk_1": {"S": "CO#baz"},
+}
+
+
+@pytest.fixture
+def client():
+    with moto.mock_dynamodb():
+        client = boto3.client("dynamodb")
+        client.create_table(TableName=TABLE_NAME, **DOCUMENT_POINTER_TABLE_DEFINITION)
+        yield client
+
+
+def test_instrumented_client_records_calls(client):
+    metrics = DynamoDbMetrics()
+    instrumented_client = InstrumentedDynamoDbClient(client=client, metrics=metrics)
+
+    instrumented_client.put_item(TableName=TABLE_NAME, Item=ITEM)
+    instrumented_client.query(
+        TableName=TABLE_NAME,
+        IndexName="idx_gsi_1",
+        KeyConditionExpression="pk_1 = :pk_1",
+        ExpressionAttributeValues={":pk_1": ITEM["pk_1"]},
+    )
+    instrumented_client.scan(TableName=TABLE_NAME, Limit=1)
+
+    assert metrics.calls == {"put_item": 1, "query": 1, "scan": 1}
+    assert metrics.total_calls == 3
+    assert (metrics.pages, metrics.scanned_count, metrics.count) == (2, 2, 2)
+    assert metrics.read_capacity_units > 0
+    assert metrics.write_capacity_units > 0
+    assert f"{TABLE_NAME}/idx_gsi_1" in metrics.read_capacity_units_by_index
+    assert metrics.seconds > 0
+
+
+def test_instrumented_client_requests_consumed_capacity():
+    client = mock.Mock()
+    client.get_item.return_value = {}
+    instrumented_client = InstrumentedDynamoDbClient(
+        client=client, metrics=DynamoDbMetrics()
+    )
+
+    instrumented_client.get_item(TableName=TABLE_NAME, Key={})
+
+    client.get_item.assert_called_once_with(
+        TableName=TABLE_NAME, Key={}, ReturnConsumedCapacity="INDEXES"
+    )
+    assert instrumented_client.describe_table is client.describe_table
+
+
+def test_instrumented_client_records_failed_calls(client):
+    metrics = DynamoDbMetrics()
+    instrumented_client = InstrumentedDynamoDbClient(client=client, metrics=metrics)
+
+    with pytest.raises(ClientError):
+        instrumented_client.delete_item(
+            TableName=TABLE_NAME,
+            Key={"pk": ITEM["pk"], "sk": ITEM["sk"]},
+            ConditionExpression="attribute_exists(pk)",
+        )
+
+    assert metrics.calls == {"delete_item": 1}
+
+
+def test_record_consumed_capacity_by_index():
+    metrics = DynamoDbMetrics()
+
+    metrics.record(
+        operation="transact_write_items",
+        response={
+            "ConsumedCapacity": [
+                {
+                    "TableName": "foo",
+                    "CapacityUnits": 3.0,
+                    "Table": {"CapacityUnits": 2.0},
+                    "GlobalSecondaryIndexes": {"bar": {"CapacityUnits": 1.0}},
+                },
+                {"TableName": "baz", "CapacityUnits": 1.0},
+            ]
+        },
+        seconds=0.5,
+    )
+
+    assert metrics.dict() == {
+        "calls": {"transact_write_items": 1},
+        "pages": 0,
+        "scanned_count": 0,
+        "count": 0,
+        "read_capacity_units": 0.0,
+        "write_capacity_units": 4.0,
+        "read_capacity_units_by_index": {},
+        "write_capacity_units_by_index": {"foo": 2.0, "foo/bar": 1.0},
+        "retries": 0,
+        "throttles": 0,
+        "duration_ms": 500,
+    }
+
+
+def test_merge_and_reset():
+    metrics_1, metrics_2 = DynamoDbMetrics(), DynamoDbMetrics()
+    metrics_1.record(
+        operation="query",
+        response={
+            "Count": 1,
+            "ScannedCount": 2,
+            "ConsumedCapacity": {"TableName": "foo", "CapacityUnits": 0.5},
+        },
+        seconds=0.1,
+    )
+    metrics_2.record(operation="put_item", response={}, seconds=0.2)
+    metrics_2.record_retry()
+    metrics_2.record_throttle()
+
+    merged = DynamoDbMetrics.merge([metrics_1, metrics_2])
+
+    assert merged.calls == {"query": 1, "put_item": 1}
+    assert (merged.pages, merged.scanned_count, merged.count) == (1, 2, 1)
+    assert merged.read_capacity_units == 0.5
+    assert merged.milliseconds == 300
+    assert (merged.retries, merged.throttles) == (1, 1)
+
+    metrics_1.reset()
+    assert metrics_1.dict() == DynamoDbMetrics().dict()
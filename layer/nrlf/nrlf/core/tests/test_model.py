@@ -1,24 +1,31 @@
 import json
+from timeit import timeit
 from unittest import mock
 
 import pytest
 
+from nrlf.core.compression import ZLIB, compress_attributes, decompress
 from nrlf.core.constants import ID_SEPARATOR, DbPrefix
+from nrlf.core.dynamodb_types import DynamoDbStringType
 from nrlf.core.errors import RequestValidationError
 from nrlf.core.model import (
+    LAYOUT_VERSION,
     ConsumerRequestParams,
     DocumentPointer,
+    DynamoDbModel,
     PaginatedResponse,
     ProducerRequestParams,
     assert_model_has_only_dynamodb_types,
     create_document_type_tuple,
     key,
+    redundant_document_pointer_attributes,
 )
 from nrlf.core.transform import (
     create_bundle_from_paginated_response,
     create_document_pointer_from_fhir_json,
     update_document_pointer_from_fhir_json,
 )
+from nrlf.core.validators import immutable_fields_digest, json_loads
 from nrlf.producer.fhir.r4.model import CodeableConcept, Coding
 from nrlf.producer.fhir.r4.tests.test_producer_nrlf_model import read_test_data
 
@@ -61,6 +68,13 @@ def test_calculated_fields(
     )
     assert f"{model.pk_2}" == key(DbPrefix.Organization, ods_code)
     assert f"{model.sk_2}" == f"{model.sk_2}"
+    assert f"{model.pk_3}" == key(DbPrefix.PatientType, nhs_number, model.type)
+    assert f"{model.sk_3}" == f"{model.sk_1}"
+    assert f"{model.pk_4}" == key(DbPrefix.OrganizationPatient, nhs_number, ods_code)
+    assert f"{model.sk_4}" == f"{model.sk_1}"
+    assert f"{model.immutable_digest}" == immutable_fields_digest(
+        json_loads(f"{model.document}")
+    )
 
 
 @pytest.mark.parametrize(
@@ -103,13 +117,23 @@ def test_create_document_pointer_from_fhir_json(mock__make_timestamp):
     custodian = "Y05868"
     nhs_number = "9278693472"
 
-    assert core_model.dict() == {
+    assert "immutable_digest" not in core_model.dict()
+    assert core_model.stored_dict() == {
         "pk": {"S": key(DbPrefix.DocumentPointer, provider_id, doc_id)},
         "sk": {"S": key(DbPrefix.DocumentPointer, provider_id, doc_id)},
         "pk_1": {"S": key(DbPrefix.Patient, nhs_number)},
         "sk_1": {"S": key(DbPrefix.CreatedOn, TIMESTAMP, provider_id, doc_id)},
         "pk_2": {"S": key(DbPrefix.Organization, provider_id)},
         "sk_2": {"S": key(DbPrefix.CreatedOn, TIMESTAMP, provider_id, doc_id)},
+        "pk_3": {
+            "S": key(
+                DbPrefix.PatientType, nhs_number, "http://snomed.info/sct|736253002"
+            )
+        },
+        "sk_3": {"S": key(DbPrefix.CreatedOn, TIMESTAMP, provider_id, doc_id)},
+        "pk_4": {"S": key(DbPrefix.OrganizationPatient, nhs_number, provider_id)},
+        "sk_4": {"S": key(DbPrefix.CreatedOn, TIMESTAMP, provider_id, doc_id)},
+        "immutable_digest": {"S": immutable_fields_digest(fhir_json)},
         "id": {"S": id},
         "nhs_number": {"S": nhs_number},
         "producer_id": {"S": provider_id},
@@ -204,6 +228,157 @@ def test_reconstruct_document_pointer_from_db():
     assert actual == expected
 
 
+@pytest.mark.parametrize(
+    ["provider_id", "updated_on", "schemas"],
+    [
+        ["Y05868", None, []],
+        ["RY26A.ABC", TIMESTAMP, ["foo:1", "bar:2"]],
+    ],
+)
+def test_from_dynamodb_matches_validated_document_pointer(
+    provider_id, updated_on, schemas
+):
+    fhir_json = generate_test_document_reference(
+        provider_id=provider_id, custodian=generate_test_custodian(provider_id)
+    )
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=fhir_json, api_version=API_VERSION, updated_on=updated_on
+    )
+    core_model.schemas.__root__.extend(schemas)
+    item = core_model.dict()
+
+    trusted_model = DocumentPointer.from_dynamodb(item)
+    validated_model = DocumentPointer(**item)
+
+    assert trusted_model == validated_model
+    assert trusted_model.json() == validated_model.json()
+    assert trusted_model.dict() == item
+    assert trusted_model.document_id == validated_model.document_id
+    assert trusted_model._document is None
+
+
+def test_from_dynamodb_decompresses_document_lazily():
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf"), api_version=API_VERSION
+    )
+    item = compress_attributes(core_model.dict(), compression=ZLIB)
+
+    trusted_model = DocumentPointer.from_dynamodb(item)
+    with mock.patch("nrlf.core.dynamodb_types.decompress", wraps=decompress) as mocked:
+        assert "__root__" not in trusted_model.document.__dict__
+        assert trusted_model == core_model
+        assert trusted_model.document.__root__ == core_model.document.__root__
+
+    mocked.assert_called_once()
+    assert trusted_model.dict() == core_model.dict()
+    assert DocumentPointer(**item) == core_model
+
+
+@pytest.mark.parametrize(
+    ["provider_id", "custodian_id", "updated_on", "schemas", "expected_missing"],
+    [
+        [
+            "Y05868",
+            "Y05868",
+            None,
+            [],
+            {"custodian", "custodian_suffix", "updated_on", "schemas"},
+        ],
+        [
+            "RY26A.ABC",
+            "RY26A.ABC",
+            TIMESTAMP,
+            ["foo:1"],
+            {"custodian", "custodian_suffix"},
+        ],
+        ["Y05868", "RY26A", TIMESTAMP, [], {"custodian_suffix", "schemas"}],
+    ],
+)
+def test_compact_dict_round_trip(
+    provider_id, custodian_id, updated_on, schemas, expected_missing
+):
+    fhir_json = generate_test_document_reference(
+        provider_id=provider_id, custodian=generate_test_custodian(custodian_id)
+    )
+    core_model = create_document_pointer_from_fhir_json(
+        fhir_json=fhir_json, api_version=API_VERSION, updated_on=updated_on
+    )
+    core_model.schemas.__root__.extend(schemas)
+
+    item = core_model.compact_dict()
+
+    assert set(core_model.dict()) - set(item) == expected_missing
+    assert item[LAYOUT_VERSION] == {"N": "2"}
+    assert DocumentPointer.from_dynamodb(item) == core_model
+    assert DocumentPointer.from_dynamodb(item).dict() == core_model.dict()
+    assert DocumentPointer(**item) == core_model
+
+
+@pytest.mark.parametrize(
+    ["item", "expected"],
+    [
+        [
+            {"producer_id": "Y05868", "custodian": "Y05868", "updated_on": None},
+            ["updated_on", "custodian"],
+        ],
+        [
+            {
+                "producer_id": "RY26A.ABC",
+                "custodian": "RY26A",
+                "custodian_suffix": "ABC",
+                "schemas": [],
+            },
+            ["schemas", "custodian", "custodian_suffix"],
+        ],
+        [
+            {"producer_id": "Y05868", "custodian": "RY26A", "schemas": ["foo:1"]},
+            [],
+        ],
+    ],
+)
+def test_redundant_document_pointer_attributes(item, expected):
+    assert redundant_document_pointer_attributes(item) == expected
+
+
+def test_from_dynamodb_requires_all_required_fields():
+    item = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf"), api_version=API_VERSION
+    ).dict()
+    item.pop("nhs_number")
+
+    with pytest.raises(ValueError, match="Field 'nhs_number' is missing"):
+        DocumentPointer.from_dynamodb(item)
+
+
+def test_dynamodb_types_are_checked_once_per_class():
+    class FooModel(DynamoDbModel):
+        foo: DynamoDbStringType
+
+    with mock.patch(
+        "nrlf.core.model.assert_model_has_only_dynamodb_types"
+    ) as mocked_assert:
+        FooModel(foo={"S": "bar"})
+        FooModel(foo={"S": "baz"})
+        FooModel.from_dynamodb({"foo": {"S": "spam"}})
+
+    mocked_assert.assert_called_once_with(model=FooModel)
+
+
+@pytest.mark.slow
+def test_from_dynamodb_is_much_faster_than_validating():
+    item = create_document_pointer_from_fhir_json(
+        fhir_json=read_test_data("nrlf"), api_version=API_VERSION
+    ).dict()
+    n_items = 2000
+
+    validated_seconds = timeit(lambda: DocumentPointer(**item), number=n_items)
+    trusted_seconds = timeit(
+        lambda: DocumentPointer.from_dynamodb(item), number=n_items
+    )
+
+    assert validated_seconds / trusted_seconds > 5
+
+
 def test_create_bundle_from_paginated_response_returns_populated_bundle_of_2():
     fhir_json = read_test_data("nrlf")
 
@@ -0,0 +1,226 @@
+from unittest import mock
+
+import boto3
+import moto
+import pytest
+from botocore.exceptions import ReadTimeoutError
+
+from nrlf.core.model import DocumentPointer
+from nrlf.core.patient_filter import (
+    HEADER,
+    BloomFilter,
+    PatientFilter,
+    PatientFilterError,
+    build_bloom_filter,
+    build_patient_filter,
+)
+from nrlf.core.pointer_counts import PointerCountRepository, patient_count_key
+from nrlf.core.repository import Repository
+from nrlf.core.tests.test_pointer_counts import (  # noqa: F401
+    NHS_NUMBER,
+    OTHER_NHS_NUMBER,
+    _create_pointers,
+    client,
+)
+
+BUCKET = "patient-filter"
+NHS_NUMBERS = [str(9000000000 + ix) for ix in range(1000)]
+OTHER_NHS_NUMBERS = [str(8000000000 + ix) for ix in range(10000)]
+
+
+@pytest.fixture
+def s3_client():
+    with moto.mock_s3():
+        s3_client = boto3.client("s3", region_name="eu-west-2")
+        s3_client.create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        yield s3_client
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _bloom_filter(*nhs_numbers: str) -> BloomFilter:
+    bloom_filter = BloomFilter.for_capacity(capacity=len(NHS_NUMBERS))
+    for nhs_number in nhs_numbers:
+        bloom_filter.add(nhs_number)
+    return bloom_filter
+
+
+def test_bloom_filter_contains_what_was_added():
+    bloom_filter = BloomFilter.for_capacity(capacity=len(NHS_NUMBERS))
+
+    assert [bloom_filter.add(nhs_number) for nhs_number in NHS_NUMBERS[:2]] == [
+        True,
+        True,
+    ]
+    assert bloom_filter.add(NHS_NUMBERS[0]) is False
+    assert bloom_filter.patients == 2
+    assert NHS_NUMBERS[0] in bloom_filter
+    assert NHS_NUMBERS[1] in bloom_filter
+    assert NHS_NUMBERS[2] not in bloom_filter
+
+
+def test_bloom_filter_error_rate():
+    bloom_filter = _bloom_filter(*NHS_NUMBERS)
+
+    false_positives = sum(
+        nhs_number in bloom_filter for nhs_number in OTHER_NHS_NUMBERS
+    )
+
+    assert (bloom_filter.n_bits, bloom_filter.n_hashes) == (9586, 7)
+    assert all(nhs_number in bloom_filter for nhs_number in NHS_NUMBERS)
+    assert bloom_filter.error_rate() == pytest.approx(0.01, rel=0.05)
+    assert false_positives / len(OTHER_NHS_NUMBERS) < 0.02
+
+
+def test_bloom_filter_max_bytes_trades_error_rate():
+    bloom_filter = BloomFilter.for_capacity(capacity=len(NHS_NUMBERS), max_bytes=600)
+    for nhs_number in NHS_NUMBERS:
+        bloom_filter.add(nhs_number)
+
+    assert len(bloom_filter.bits) == 600
+    assert bloom_filter.n_hashes == 3
+    assert bloom_filter.error_rate() > 0.05
+
+
+def test_bloom_filter_round_trip():
+    data = _bloom_filter(*NHS_NUMBERS[:10]).to_bytes()
+
+    bloom_filter = BloomFilter.from_bytes(data)
+
+    assert all(nhs_number in bloom_filter for nhs_number in NHS_NUMBERS[:10])
+    assert bloom_filter.patients == 10
+    with pytest.raises(TypeError):
+        bloom_filter.add(NHS_NUMBERS[10])  # i.e. it is a view of the bytes
+
+    writable = BloomFilter.from_bytes(bytearray(data))
+    assert writable.add(NHS_NUMBERS[10]) is True
+    assert NHS_NUMBERS[10] in writable
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"XXXX" + _bloom_filter().to_bytes()[4:],
+        _bloom_filter().to_bytes()[: HEADER.size + 1],
+    ],
+)
+def test_bloom_filter_from_bytes_malformed(data):
+    with pytest.raises(PatientFilterError):
+        BloomFilter.from_bytes(data)
+
+
+def test_build_bloom_filter(client):
+    _create_pointers(client, (NHS_NUMBER, "1"), (NHS_NUMBER, "2"))
+    PointerCountRepository(client=client).add(
+        {patient_count_key(OTHER_NHS_NUMBER): 1}, batch_id="batch"
+    )
+
+    bloom_filter = build_bloom_filter(
+        repository=Repository(item_type=DocumentPointer, client=client),
+        total_segments=1,
+        clock=lambda: 1700000000,
+    )
+
+    assert NHS_NUMBER in bloom_filter
+    assert OTHER_NHS_NUMBER not in bloom_filter
+    assert bloom_filter.patients == 1
+    assert bloom_filter.built_at == 1700000000
+
+
+def test_patient_filter_without_a_filter_might_have_pointers(s3_client):
+    patient_filter = PatientFilter(s3_client=s3_client, bucket=BUCKET)
+
+    assert patient_filter.might_have_pointers(NHS_NUMBERS[0]) is True
+    assert patient_filter.bloom_filter is None
+    assert patient_filter.statistics.dict() == {
+        "hits": 0,
+        "negative_hits": 0,
+        "misses": 1,
+    }
+
+
+def test_patient_filter_refreshes_after_ttl(s3_client):
+    clock = Clock()
+    publisher = PatientFilter(s3_client=s3_client, bucket=BUCKET)
+    publisher.publish(_bloom_filter(NHS_NUMBERS[0]))
+    patient_filter = PatientFilter(
+        s3_client=s3_client, bucket=BUCKET, ttl_seconds=60, clock=clock
+    )
+
+    assert patient_filter.might_have_pointers(NHS_NUMBERS[0]) is True
+    assert patient_filter.might_have_pointers(NHS_NUMBERS[1]) is False
+
+    publisher.publish(_bloom_filter(NHS_NUMBERS[0], NHS_NUMBERS[1]))
+    clock.now = 59
+    assert patient_filter.might_have_pointers(NHS_NUMBERS[1]) is False
+    clock.now = 60
+    assert patient_filter.might_have_pointers(NHS_NUMBERS[1]) is True
+
+    assert patient_filter.statistics.dict() == {
+        "hits": 2,
+        "negative_hits": 2,
+        "misses": 0,
+    }
+
+
+def test_patient_filter_refresh_not_modified(s3_client):
+    PatientFilter(s3_client=s3_client, bucket=BUCKET).publish(
+        _bloom_filter(NHS_NUMBERS[0])
+    )
+    patient_filter = PatientFilter(s3_client=s3_client, bucket=BUCKET)
+    patient_filter.refresh()
+    bloom_filter = patient_filter.bloom_filter
+
+    patient_filter.refresh()
+
+    assert patient_filter.bloom_filter is bloom_filter
+
+
+def test_patient_filter_refresh_timeout_unloads(s3_client):
+    PatientFilter(s3_client=s3_client, bucket=BUCKET).publish(
+        _bloom_filter(NHS_NUMBERS[0])
+    )
+    patient_filter = PatientFilter(s3_client=s3_client, bucket=BUCKET)
+    patient_filter.refresh()
+    assert patient_filter.bloom_filter is not None
+
+    with mock.patch.object(
+        s3_client,
+        "get_object",
+        side_effect=ReadTimeoutError(endpoint_url="https://s3"),
+    ):
+        patient_filter.refresh()
+        assert patient_filter.bloom_filter is None
+        assert patient_filter.might_have_pointers(NHS_NUMBERS[1]) is True
+
+    assert patient_filter.statistics.misses == 1  # i.e. searches query as usual
+
+
+def test_patient_filter_add(s3_client):
+    writer = PatientFilter(s3_client=s3_client, bucket=BUCKET, writable=True)
+    assert writer.add([NHS_NUMBERS[0]]) == 0  # i.e. until it is built
+
+    writer.publish(_bloom_filter(NHS_NUMBERS[0]))
+    etag = writer.etag
+    assert writer.add([NHS_NUMBERS[0]]) == 0
+    assert writer.etag == etag  # i.e. not republished
+    assert writer.add([NHS_NUMBERS[0], NHS_NUMBERS[1], NHS_NUMBERS[1]]) == 1
+
+    patient_filter = build_patient_filter(bucket=BUCKET, s3_client=s3_client)
+    assert patient_filter.might_have_pointers(NHS_NUMBERS[1]) is True
+    assert patient_filter.bloom_filter.patients == 2
+
+
+def test_build_patient_filter_disabled():
+    assert build_patient_filter(bucket=None) is None
+    assert build_patient_filter(bucket="") is None
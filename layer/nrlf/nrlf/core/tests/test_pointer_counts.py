@@ -0,0 +1,266 @@
+from unittest import mock
+
+import boto3
+import moto
+import pytest
+from botocore.exceptions import ReadTimeoutError
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from nrlf.core.errors import DynamoDbError
+from nrlf.core.model import DocumentPointer
+from nrlf.core.pointer_counts import (
+    COUNTS_PER_TRANSACTION,
+    CountDrift,
+    PointerCountRepository,
+    patient_count_key,
+    patient_type_count_key,
+    reconcile_counts,
+)
+from nrlf.core.repository import Repository
+from nrlf.core.tests.data_factory import (
+    generate_test_document_reference,
+    generate_test_document_type,
+    generate_test_subject,
+)
+from nrlf.core.transform import create_document_pointer_from_fhir_json
+
+TABLE_NAME = DocumentPointer.kebab()
+NHS_NUMBER = "9278693472"
+OTHER_NHS_NUMBER = "3137554160"
+SNOMED = "http://snomed.info/sct"
+
+
+@pytest.fixture
+def client():
+    with moto.mock_dynamodb():
+        client = boto3.client("dynamodb")
+        client.create_table(TableName=TABLE_NAME, **DOCUMENT_POINTER_TABLE_DEFINITION)
+        yield client
+
+
+def _create_pointers(client, *pointers: tuple[str, str]):
+    repository = Repository(item_type=DocumentPointer, client=client)
+    for ix, (nhs_number, code) in enumerate(pointers):
+        repository.create(
+            item=create_document_pointer_from_fhir_json(
+                fhir_json=generate_test_document_reference(
+                    provider_doc_id=f"doc-{ix}",
+                    subject=generate_test_subject(value=nhs_number),
+                    type=generate_test_document_type(code=code),
+                ),
+                api_version=1,
+            )
+        )
+
+
+def test_add_and_read_counts(client):
+    repository = PointerCountRepository(client=client)
+    pk = patient_count_key(NHS_NUMBER)
+
+    assert repository.add({pk: 2, patient_count_key(OTHER_NHS_NUMBER): 0}, "a") == 1
+    assert repository.add({pk: -1}, batch_id="b") == 1
+
+    assert repository.read_counts([pk, patient_count_key(OTHER_NHS_NUMBER)]) == {
+        pk: 1,
+        patient_count_key(OTHER_NHS_NUMBER): 0,
+    }
+
+
+def test_count_sums_over_pointer_types(client):
+    repository = PointerCountRepository(client=client)
+    repository.add(
+        {
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|1"): 2,
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|2"): 3,
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|3"): 5,
+        },
+        batch_id="batch",
+    )
+
+    repository.start_request()
+
+    count = repository.count(
+        NHS_NUMBER, pointer_types=[f"{SNOMED}|1", f"{SNOMED}|2", f"{SNOMED}|1"]
+    )
+
+    assert count == 5
+    assert repository.metrics.calls == {"batch_get_item": 1}
+
+
+def test_add_a_retried_batch_adds_nothing(client):
+    repository = PointerCountRepository(client=client)
+    pk = patient_count_key(NHS_NUMBER)
+
+    assert repository.add({pk: 2}, batch_id="batch") == 1
+    assert repository.add({pk: 2}, batch_id="batch") == 0
+    assert repository.add({pk: 2}, batch_id="other-batch") == 1
+
+    assert repository.read_counts([pk]) == {pk: 4}
+
+
+def test_add_retried_after_a_timeout_adds_once(client):
+    repository = PointerCountRepository(client=client)
+    pk = patient_count_key(NHS_NUMBER)
+    transact_write_items = client.transact_write_items
+
+    def _applied_but_timed_out(**kwargs):
+        transact_write_items(**kwargs)
+        raise ReadTimeoutError(endpoint_url="https://dynamodb")
+
+    calls = []
+
+    def _side_effect(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            return _applied_but_timed_out(**kwargs)
+        return transact_write_items(**kwargs)
+
+    with mock.patch.object(client, "transact_write_items", side_effect=_side_effect):
+        assert repository.add({pk: 2}, batch_id="batch") == 0
+
+    assert len(calls) == 2  # i.e. retried
+    assert repository.read_counts([pk]) == {pk: 2}
+
+
+def test_add_resumes_a_partially_added_batch(client):
+    repository = PointerCountRepository(client=client)
+    deltas = {
+        patient_count_key(str(9000000000 + ix)): 1
+        for ix in range(COUNTS_PER_TRANSACTION + 1)
+    }
+    transact_write_items = client.transact_write_items
+    calls = []
+
+    def _fail_the_second_transaction(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 2:
+            raise DynamoDbError("Failed")
+        return transact_write_items(**kwargs)
+
+    with mock.patch.object(
+        client, "transact_write_items", side_effect=_fail_the_second_transaction
+    ):
+        with pytest.raises(DynamoDbError):
+            repository.add(deltas, batch_id="batch")
+
+    assert repository.add(deltas, batch_id="batch") == 1  # i.e. the second chunk
+    assert set(repository.read_counts(deltas).values()) == {1}
+
+
+@pytest.mark.parametrize(
+    ["stored", "observed", "count", "expected_set", "expected_count"],
+    [
+        [None, None, 3, True, 3],
+        [1, 1, 3, True, 3],
+        [1, 1, 0, True, 0],
+        [2, 1, 3, False, 2],  # i.e. changed since it was observed
+        [1, None, 3, False, 1],
+    ],
+)
+def test_set_count(client, stored, observed, count, expected_set, expected_count):
+    repository = PointerCountRepository(client=client)
+    pk = patient_count_key(NHS_NUMBER)
+    if stored is not None:
+        repository.add({pk: stored}, batch_id="batch")
+
+    assert repository.set_count(pk, count=count, observed=observed) is expected_set
+    assert repository.read_counts([pk]) == {pk: expected_count}
+
+
+def test_reconcile_counts(client):
+    _create_pointers(
+        client,
+        (NHS_NUMBER, "1"),
+        (NHS_NUMBER, "1"),
+        (NHS_NUMBER, "2"),
+        (OTHER_NHS_NUMBER, "1"),
+    )
+    repository = PointerCountRepository(client=client)
+    repository.add(
+        {
+            patient_count_key(NHS_NUMBER): 3,  # correct
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|1"): 4,  # too many
+            patient_count_key("4409815415"): 1,  # no pointers
+        },
+        batch_id="batch",
+    )
+
+    drift = reconcile_counts(repository=repository, total_segments=1)
+
+    assert drift == CountDrift(
+        pointers=4,
+        counts=3,
+        drifted=5,
+        absolute_drift=2 + 1 + 1 + 1 + 1,
+        corrected=5,
+        skipped=0,
+    )
+    assert repository.read_counts(
+        [
+            patient_count_key(NHS_NUMBER),
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|1"),
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|2"),
+            patient_count_key(OTHER_NHS_NUMBER),
+            patient_count_key("4409815415"),
+        ]
+    ) == {
+        patient_count_key(NHS_NUMBER): 3,
+        patient_type_count_key(NHS_NUMBER, f"{SNOMED}|1"): 2,
+        patient_type_count_key(NHS_NUMBER, f"{SNOMED}|2"): 1,
+        patient_count_key(OTHER_NHS_NUMBER): 1,
+        patient_count_key("4409815415"): 0,
+    }
+    assert reconcile_counts(repository=repository, total_segments=1).drifted == 0
+
+
+def test_reconcile_counts_skips_a_count_which_changed_after_it_was_scanned(client):
+    _create_pointers(client, (NHS_NUMBER, "1"))
+    repository = PointerCountRepository(client=client)
+    repository.add(
+        {
+            patient_count_key(NHS_NUMBER): 1,
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|1"): 1,
+        },
+        batch_id="first",
+    )
+    parallel_scan = repository.parallel_scan
+    scans = []
+
+    def _write_a_pointer_between_the_scans(**kwargs):
+        scans.append(kwargs["projection"])
+        if len(scans) == 2:  # i.e. after the counts were scanned
+            Repository(item_type=DocumentPointer, client=client).create(
+                item=create_document_pointer_from_fhir_json(
+                    fhir_json=generate_test_document_reference(
+                        provider_doc_id="doc-new",
+                        subject=generate_test_subject(value=NHS_NUMBER),
+                        type=generate_test_document_type(code="2"),
+                    ),
+                    api_version=1,
+                )
+            )
+            repository.add(
+                {
+                    patient_count_key(NHS_NUMBER): 1,
+                    patient_type_count_key(NHS_NUMBER, f"{SNOMED}|2"): 1,
+                },
+                batch_id="second",
+            )
+        return parallel_scan(**kwargs)
+
+    with mock.patch.object(
+        repository, "parallel_scan", side_effect=_write_a_pointer_between_the_scans
+    ):
+        drift = reconcile_counts(repository=repository, total_segments=1)
+
+    assert drift.drifted == 2
+    assert drift.skipped == 2  # i.e. rather than counting the pointer twice
+    assert repository.read_counts(
+        [
+            patient_count_key(NHS_NUMBER),
+            patient_type_count_key(NHS_NUMBER, f"{SNOMED}|2"),
+        ]
+    ) == {
+        patient_count_key(NHS_NUMBER): 2,
+        patient_type_count_key(NHS_NUMBER, f"{SNOMED}|2"): 1,
+    }
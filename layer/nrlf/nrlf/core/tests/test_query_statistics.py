@@ -0,0 +1,78 @@
+import pytest
+
+from nrlf.core.query_statistics import ADAPTIVE_LIMIT_MAX, QueryShape, QueryStatistics
+
+SHAPE = QueryShape(index_name="idx_gsi_1", filters=("producer_id",))
+UNFILTERED_SHAPE = QueryShape(index_name="idx_gsi_1", filters=())
+
+
+@pytest.mark.parametrize(
+    ["query_kwargs", "expected"],
+    [
+        [{"TableName": "foo", "KeyConditionExpression": "pk = :pk"}, (None, ())],
+        [
+            {
+                "IndexName": "idx_gsi_1",
+                "FilterExpression": "#type in (:type_1) AND #producer_id = :producer_id",
+                "ExpressionAttributeNames": {
+                    "#type": "type",
+                    "#producer_id": "producer_id",
+                },
+            },
+            ("idx_gsi_1", ("producer_id", "type")),
+        ],
+    ],
+)
+def test_query_shape_from_query_kwargs(query_kwargs, expected):
+    assert QueryShape.from_query_kwargs(query_kwargs) == expected
+
+
+def test_unobserved_shapes_read_the_number_of_items_outstanding():
+    query_statistics = QueryStatistics()
+    assert query_statistics.selectivity(SHAPE) == 1
+    assert query_statistics.limit(SHAPE, n_items=21) == 21
+
+
+def test_limit_scales_with_selectivity():
+    query_statistics = QueryStatistics()
+    query_statistics.record(SHAPE, scanned_count=99, count=24)
+
+    assert query_statistics.selectivity(SHAPE) == 0.25
+    assert query_statistics.limit(SHAPE, n_items=21) == 84
+
+
+def test_limit_is_bounded():
+    query_statistics = QueryStatistics()
+    query_statistics.record(SHAPE, scanned_count=10_000, count=0)
+
+    assert query_statistics.limit(SHAPE, n_items=21) == ADAPTIVE_LIMIT_MAX
+    assert query_statistics.limit(SHAPE, n_items=1000) == 1000
+
+
+def test_unfiltered_shapes_are_not_recorded():
+    query_statistics = QueryStatistics()
+    query_statistics.record(UNFILTERED_SHAPE, scanned_count=100, count=100)
+
+    assert query_statistics._totals == {}
+    assert query_statistics.limit(UNFILTERED_SHAPE, n_items=21) == 21
+
+
+def test_recent_observations_outweigh_earlier_ones():
+    query_statistics = QueryStatistics()
+    query_statistics.record(SHAPE, scanned_count=100, count=0)
+    for _ in range(50):
+        query_statistics.record(SHAPE, scanned_count=100, count=100)
+
+    assert query_statistics.selectivity(SHAPE) > 0.99
+
+
+def test_oldest_shape_is_forgotten():
+    query_statistics = QueryStatistics(max_shapes=2)
+    shapes = [QueryShape(index_name=f"idx_{ix}", filters=("type",)) for ix in range(3)]
+    for shape in shapes:
+        query_statistics.record(shape, scanned_count=10, count=1)
+
+    assert list(query_statistics._totals) == shapes[1:]
+
+    query_statistics.clear()
+    assert query_statistics._totals == {}
@@ -1,14 +1,15 @@
 import pytest
 
+from nrlf.core.errors import RequestValidationError
 from nrlf.core.model import ConsumerRequestParams
 from nrlf.core.repository import (
-    _decode,
-    _encode,
+    SortKeyCondition,
     _expression_attribute_names,
     _expression_attribute_values,
     _filter_expression,
     _key_and_filter_clause,
     _key_condition_expression,
+    created_on_filter,
     custodian_filter,
     type_filter,
 )
@@ -48,13 +49,21 @@ def test_filter_attribute_names(input: dict, expected: dict):
         [
             {"alpha": 123, "bravo": ["a", "b", "c"]},
             {
-                ":alpha": {"N": 123},
+                ":alpha": {"N": "123"},
                 ":bravo_1": {"S": "a"},
                 ":bravo_2": {"S": "b"},
                 ":bravo_3": {"S": "c"},
             },
         ],
         [{"pk": "123"}, {":pk": {"S": "123"}}],
+        [
+            {"pk": "123", "sk": SortKeyCondition.between("a", "b")},
+            {":pk": {"S": "123"}, ":sk_1": {"S": "a"}, ":sk_2": {"S": "b"}},
+        ],
+        [
+            {"pk": "123", "sk": SortKeyCondition.begins_with("a")},
+            {":pk": {"S": "123"}, ":sk": {"S": "a"}},
+        ],
     ],
 )
 def test_attribute_values(input: dict, expected: dict):
@@ -99,7 +108,7 @@ def test_attribute_values(input: dict, expected: dict):
                 "ExpressionAttributeValues": {
                     ":pk": {"S": "D#0"},
                     ":sk": {"S": "D#0"},
-                    ":alpha": {"N": 123},
+                    ":alpha": {"N": "123"},
                     ":bravo_1": {"S": "a"},
                     ":bravo_2": {"S": "b"},
                     ":bravo_3": {"S": "c"},
@@ -135,6 +144,22 @@ def test_key_and_filter_clause(key: dict, filter: dict, expected: dict):
         [{"pk": "123"}, "pk = :pk"],
         [{"pk": "123", "sk": "456"}, "pk = :pk AND sk = :sk"],
         [{"pk": "123", "sk": None}, "pk = :pk"],
+        [
+            {"pk": "123", "sk": SortKeyCondition.between("a", "b")},
+            "pk = :pk AND sk BETWEEN :sk_1 AND :sk_2",
+        ],
+        [
+            {"pk": "123", "sk": SortKeyCondition.begins_with("a")},
+            "pk = :pk AND begins_with(sk, :sk)",
+        ],
+        [
+            {"pk": "123", "sk": SortKeyCondition.greater_than_or_equal("a")},
+            "pk = :pk AND sk >= :sk",
+        ],
+        [
+            {"pk": "123", "sk": SortKeyCondition.less_than_or_equal("b")},
+            "pk = :pk AND sk <= :sk",
+        ],
     ],
 )
 def test_key_condition_expression(input: dict, expected: str):
@@ -142,46 +167,6 @@ def test_key_condition_expression(input: dict, expected: str):
     assert actual == expected
 
 
-@pytest.mark.parametrize(
-    ["input", "expected"],
-    [
-        [1, {"N": 1}],
-        ["1", {"S": "1"}],
-        [True, {"B": True}],
-        [None, {"NULL": True}],
-        [{}, {"M": {}}],
-        [{"foo": {"bar": 1}}, {"M": {"foo": {"M": {"bar": {"N": 1}}}}}],
-    ],
-)
-def test_encode(input: any, expected: str):
-    actual = _encode(input)
-    assert actual == expected
-
-
-@pytest.mark.parametrize(
-    ["input", "expected"],
-    [
-        [{"NULL": True}, None],
-        [{"B": False}, False],
-        [{"B": 0}, False],
-        [{"B": True}, True],
-        [{"B": 1}, True],
-        [{"S": "Something"}, "Something"],
-        [{"N": 1.9}, 1.9],
-        [{"N": 3}, 3],
-        [{"N": "42"}, 42],
-        [{"M": {}}, {}],
-        [{"M": {"foo": {"S": "a"}, "bar": {"N": 999}}}, {"foo": "a", "bar": 999}],
-        [{"M": {"foo": {"M": {"bar": {"N": 666}}}}}, {"foo": {"bar": 666}}],
-        [{"L": []}, []],
-        [{"L": [{"N": 123}, {"S": "a"}]}, [123, "a"]],
-    ],
-)
-def test_decode(input: dict, expected: any):
-    actual = _decode(input)
-    assert actual == expected
-
-
 def test_custodian_filter():
     queryStringParameters = {
         "subject:identifier": "https://fhir.nhs.uk/Id/nhs-number|3495456481",
@@ -239,3 +224,64 @@ def test_type_filter_none():
         "http://snomed.info/sct|861421000000108",
     ]
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    ["dates", "expected"],
+    [
+        [None, None],
+        [[], None],
+        [["2023-01-15"], SortKeyCondition.begins_with("CO#2023-01-15")],
+        [["eq2023-01"], SortKeyCondition.begins_with("CO#2023-01")],
+        [["ge2023-01-15"], SortKeyCondition.greater_than_or_equal("CO#2023-01-15")],
+        [["le2023"], SortKeyCondition.less_than_or_equal("CO#2023\uffff")],
+        [
+            ["ge2023-01-15", "le2023-02"],
+            SortKeyCondition.between("CO#2023-01-15", "CO#2023-02\uffff"),
+        ],
+        [
+            ["ge2022", "ge2023-01-15", "le2023-03", "le2023-02"],
+            SortKeyCondition.between("CO#2023-01-15", "CO#2023-02\uffff"),
+        ],
+        [["ge2023-01", "le2023-01"], SortKeyCondition.begins_with("CO#2023-01")],
+        [
+            ["eq2023", "ge2023-06"],
+            SortKeyCondition.between("CO#2023-06", "CO#2023\uffff"),
+        ],
+    ],
+)
+def test_created_on_filter(dates: list, expected: SortKeyCondition):
+    request_params = ConsumerRequestParams(
+        **{
+            "subject:identifier": "https://fhir.nhs.uk/Id/nhs-number|3495456481",
+            "date": dates,
+        }
+    )
+    actual = created_on_filter(dates=request_params.date)
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "created_on", ["2023-01-01T00:00:00.000Z", "2023-01-31T23:59:59.999Z"]
+)
+def test_created_on_filter_includes_whole_days(created_on: str):
+    request_params = ConsumerRequestParams(
+        **{
+            "subject:identifier": "https://fhir.nhs.uk/Id/nhs-number|3495456481",
+            "date": ["ge2023-01-01", "le2023-01-31"],
+        }
+    )
+    condition = created_on_filter(dates=request_params.date)
+    lower, upper = condition.values
+    assert lower <= f"CO#{created_on}#Y05868#1234" <= upper
+
+
+def test_created_on_filter_empty_range():
+    request_params = ConsumerRequestParams(
+        **{
+            "subject:identifier": "https://fhir.nhs.uk/Id/nhs-number|3495456481",
+            "date": ["ge2023-02", "le2023-01"],
+        }
+    )
+    with pytest.raises(RequestValidationError):
+        created_on_filter(dates=request_params.date)
@@ -0,0 +1,136 @@
+from unittest import mock
+
+import boto3
+import moto
+import pytest
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from nrlf.core.cache import InProcessCacheBackend, RedisCacheBackend
+from nrlf.core.constants import DbPrefix
+from nrlf.core.model import DocumentPointer, PaginatedResponse, key
+from nrlf.core.repository import Repository
+from nrlf.core.search_cache import SearchCache, build_search_cache
+from nrlf.core.tests.data_factory import (
+    generate_test_document_reference,
+    generate_test_subject,
+)
+from nrlf.core.tests.stub_client import FakeClock, RedisStandIn
+from nrlf.core.transform import create_document_pointer_from_fhir_json
+
+NHS_NUMBER = "9278693472"
+TYPE = "http://snomed.info/sct|736253002"
+SEARCH = dict(nhs_number=NHS_NUMBER, pointer_types=[TYPE], custodian=None, limit=20)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture(params=["in_process", "redis"])
+def search_cache(request, clock: FakeClock) -> SearchCache:
+    if request.param == "in_process":
+        backend = InProcessCacheBackend(max_size=10, clock=clock.time)
+    else:
+        backend = RedisCacheBackend(client=RedisStandIn(clock=clock))
+    return SearchCache(backend=backend, ttl_seconds=5)
+
+
+@pytest.fixture
+def repository():
+    with moto.mock_dynamodb():
+        client = boto3.client("dynamodb")
+        client.create_table(
+            TableName=DocumentPointer.kebab(), **DOCUMENT_POINTER_TABLE_DEFINITION
+        )
+        repository = Repository(item_type=DocumentPointer, client=client)
+        for ix in range(3):
+            repository.create(
+                item=create_document_pointer_from_fhir_json(
+                    fhir_json=generate_test_document_reference(
+                        provider_doc_id=f"doc-{ix}",
+                        subject=generate_test_subject(value=NHS_NUMBER),
+                    ),
+                    api_version=1,
+                )
+            )
+        yield repository
+
+
+def _search(search_cache: SearchCache, repository: Repository, **search):
+    search = {**SEARCH, **search}
+    return search_cache.read_through(
+        **search,
+        item_type=repository.item_type,
+        read=lambda: repository.query_gsi_3_many(
+            pks=[
+                key(DbPrefix.PatientType, search["nhs_number"], pointer_type)
+                for pointer_type in search["pointer_types"]
+            ],
+            producer_id=search["custodian"],
+            limit=search["limit"],
+        ),
+    )
+
+
+def test_first_page_is_read_through_the_cache(search_cache, repository):
+    response = _search(search_cache, repository)
+    assert len(response.items) == 3
+
+    assert _search(search_cache, repository) == response
+    assert _search(search_cache, repository, pointer_types=[TYPE, TYPE]) == response
+    assert repository.metrics.calls["query"] == 1
+    assert search_cache.statistics.dict() == {
+        "hits": 2,
+        "negative_hits": 0,
+        "misses": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "search", [{"custodian": "foo"}, {"limit": 2}, {"nhs_number": "9000000009"}]
+)
+def test_each_search_is_cached_separately(search_cache, repository, search):
+    _search(search_cache, repository)
+    _search(search_cache, repository, **search)
+
+    assert repository.metrics.calls["query"] == 2
+
+
+def test_invalidate_patient(search_cache, repository):
+    _search(search_cache, repository)
+    _search(search_cache, repository, custodian="foo")
+
+    search_cache.invalidate(NHS_NUMBER)
+    _search(search_cache, repository)
+    _search(search_cache, repository, custodian="foo")
+
+    assert repository.metrics.calls["query"] == 4
+    assert search_cache.statistics.hits == 0
+
+
+def test_pages_expire(search_cache, repository, clock: FakeClock):
+    _search(search_cache, repository)
+    clock.sleep(5)
+    _search(search_cache, repository)
+
+    assert repository.metrics.calls["query"] == 2
+
+
+def test_lost_version_invalidates_pages(clock: FakeClock):
+    backend = InProcessCacheBackend(max_size=10, clock=clock.time)
+    search_cache = SearchCache(backend=backend)
+    read = mock.Mock(return_value=PaginatedResponse(items=[]))
+
+    for _ in range(2):
+        search_cache.read_through(**SEARCH, item_type=DocumentPointer, read=read)
+    backend.delete(f"search-version#{NHS_NUMBER}")
+    search_cache.read_through(**SEARCH, item_type=DocumentPointer, read=read)
+
+    assert read.call_count == 2
+
+
+def test_build_search_cache(clock: FakeClock):
+    backend = InProcessCacheBackend(max_size=10)
+    assert build_search_cache(backend=None) is None
+    assert build_search_cache(backend=backend, ttl_seconds=1).ttl_seconds == 1
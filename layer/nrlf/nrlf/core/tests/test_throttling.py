@@ -0,0 +1,231 @@
+from unittest import mock
+
+import boto3
+import moto
+import pytest
+from botocore.exceptions import ClientError, ConnectTimeoutError, ReadTimeoutError
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from nrlf.core.metrics import DynamoDbMetrics
+from nrlf.core.model import DocumentPointer
+from nrlf.core.repository import Repository
+from nrlf.core.tests.data_factory import generate_test_document_reference
+from nrlf.core.tests.stub_client import (
+    FakeClock,
+    ThrottlingStubClient,
+    throttle_storm,
+    throttling_error,
+)
+from nrlf.core.throttling import (
+    BACKOFF_MAX_SECONDS,
+    MAX_RATE,
+    RetryingDynamoDbClient,
+    RetryPolicy,
+    ThrottlingController,
+    full_jitter,
+    is_retryable,
+    is_throttle,
+)
+from nrlf.core.transform import create_document_pointer_from_fhir_json
+
+TABLE_NAME = DocumentPointer.kebab()
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def controller(clock: FakeClock) -> ThrottlingController:
+    return ThrottlingController(clock=clock.time, sleep=clock.sleep)
+
+
+def _error(code: str, **response) -> ClientError:
+    return ClientError(
+        error_response={"Error": {"Code": code}, **response}, operation_name="foo"
+    )
+
+
+def _cancelled(*codes: str) -> ClientError:
+    return _error(
+        "TransactionCanceledException",
+        CancellationReasons=[{"Code": code} for code in codes],
+    )
+
+
+@pytest.mark.parametrize(
+    ["error", "expected_throttle", "expected_retryable"],
+    [
+        [throttling_error("query"), True, True],
+        [_error("ThrottlingException"), True, True],
+        [_error("InternalServerError"), False, True],
+        [_error("ConditionalCheckFailedException"), False, False],
+        [_error("ValidationException"), False, False],
+        [_cancelled("None", "ThrottlingError"), True, True],
+        [_cancelled("ConditionalCheckFailed", "ThrottlingError"), False, False],
+        [_cancelled("None"), False, False],
+        [ConnectTimeoutError(endpoint_url="foo"), False, True],
+        [ReadTimeoutError(endpoint_url="foo"), False, True],
+        [ValueError("foo"), False, False],
+    ],
+)
+def test_is_throttle_and_is_retryable(error, expected_throttle, expected_retryable):
+    assert is_throttle(error) is expected_throttle
+    assert is_retryable(error) is expected_retryable
+
+
+@pytest.mark.parametrize("attempt", [0, 1, 5, 100])
+def test_full_jitter_is_bounded(attempt):
+    assert 0 <= full_jitter(attempt) <= BACKOFF_MAX_SECONDS
+
+
+def test_controller_aimd(controller: ThrottlingController):
+    controller.on_throttle()
+    controller.on_throttle()
+    assert controller.rate == controller.max_rate / 4
+
+    controller.on_success()
+    assert controller.rate == controller.max_rate / 4 + controller.rate_increase
+
+    for _ in range(100):
+        controller.on_throttle()
+    assert controller.rate == controller.min_rate
+
+    for _ in range(1000):
+        controller.on_success()
+    assert controller.rate == controller.max_rate
+
+
+def test_controller_paces_calls(clock: FakeClock, controller: ThrottlingController):
+    controller.rate = 10
+
+    waits = [controller.acquire() for _ in range(3)]
+
+    assert waits == [0, pytest.approx(0.1), pytest.approx(0.1)]
+    assert clock.now == pytest.approx(0.2)
+
+
+def _retrying_client(client, controller, **policy) -> RetryingDynamoDbClient:
+    return RetryingDynamoDbClient(
+        client=client,
+        metrics=DynamoDbMetrics(),
+        policy=RetryPolicy(**policy),
+        controller=controller,
+    )
+
+
+def test_retrying_client_retries_throttles(controller: ThrottlingController):
+    client = mock.Mock()
+    client.query.side_effect = [throttling_error("query")] * 2 + [{"Items": []}]
+    retrying_client = _retrying_client(client=client, controller=controller)
+
+    assert retrying_client.query(TableName=TABLE_NAME) == {"Items": []}
+
+    assert client.query.call_count == 3
+    assert retrying_client.metrics.retries == 2
+    assert retrying_client.metrics.throttles == 2
+    assert controller.rate < controller.max_rate
+    assert retrying_client.describe_table is client.describe_table
+
+
+def test_retrying_client_does_not_retry_other_errors(
+    controller: ThrottlingController,
+):
+    client = mock.Mock()
+    client.put_item.side_effect = _error("ConditionalCheckFailedException")
+    retrying_client = _retrying_client(client=client, controller=controller)
+
+    with pytest.raises(ClientError):
+        retrying_client.put_item(TableName=TABLE_NAME)
+
+    assert client.put_item.call_count == 1
+    assert retrying_client.metrics.retries == 0
+
+
+def test_retrying_client_gives_up_after_max_attempts(
+    controller: ThrottlingController,
+):
+    client = mock.Mock()
+    client.query.side_effect = throttling_error("query")
+    retrying_client = _retrying_client(
+        client=client, controller=controller, max_attempts=3
+    )
+
+    with pytest.raises(ClientError):
+        retrying_client.query(TableName=TABLE_NAME)
+
+    assert client.query.call_count == 3
+    assert retrying_client.metrics.throttles == 3
+    assert retrying_client.metrics.retries == 2
+
+
+@pytest.mark.parametrize(
+    ["policy", "started", "expected_max_seconds"],
+    [
+        [{"default_operation_timeout_seconds": 0.5}, False, 0.5],
+        [{"request_budget_seconds": 0.3}, True, 0.3],
+        [{"request_budget_seconds": 0.3}, False, 2.0],
+    ],
+)
+def test_retrying_client_gives_up_at_its_deadline(
+    clock: FakeClock, policy, started, expected_max_seconds
+):
+    controller = ThrottlingController(  # i.e. never paced
+        min_rate=MAX_RATE, clock=clock.time, sleep=clock.sleep
+    )
+    client = mock.Mock()
+    client.query.side_effect = throttling_error("query")
+    retrying_client = _retrying_client(
+        client=client, controller=controller, max_attempts=1000, **policy
+    )
+    if started:
+        retrying_client.start_request()
+
+    with pytest.raises(ClientError):
+        retrying_client.query(TableName=TABLE_NAME)
+
+    assert clock.now <= expected_max_seconds
+    assert client.query.call_count > 1
+
+
+@pytest.fixture
+def client():
+    with moto.mock_dynamodb():
+        client = boto3.client("dynamodb")
+        client.create_table(TableName=TABLE_NAME, **DOCUMENT_POINTER_TABLE_DEFINITION)
+        yield client
+
+
+def test_repository_recovers_from_throttle_storm(
+    client, clock: FakeClock, controller: ThrottlingController
+):
+    n_items = 50
+    stub_client = ThrottlingStubClient(
+        client=client,
+        clock=clock,
+        is_throttled=throttle_storm(clock=clock, start=0.05, end=0.5),
+    )
+    repository = Repository(
+        item_type=DocumentPointer, client=stub_client, throttling_controller=controller
+    )
+    document_pointers = [
+        create_document_pointer_from_fhir_json(
+            fhir_json=generate_test_document_reference(provider_doc_id=f"doc-{ix}"),
+            api_version=1,
+        )
+        for ix in range(n_items)
+    ]
+
+    rates = []
+    for document_pointer in document_pointers:
+        repository.start_request()
+        repository.create(item=document_pointer)
+        rates.append(controller.rate)
+        assert repository.read_item(document_pointer.pk.__root__) == document_pointer
+
+    assert stub_client.throttles > 0
+    assert repository.metrics.throttles == 0  # i.e. reset by the last request
+    assert min(rates) < controller.max_rate / 2
+    assert rates[-1] > min(rates)  # recovering
+    assert clock.now < 0.5 + n_items * 2 * 0.1
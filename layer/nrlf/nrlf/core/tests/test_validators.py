@@ -1,22 +1,26 @@
+from copy import deepcopy
 from unittest import mock
 
 import pytest
 
-from nrlf.core.constants import ID_SEPARATOR
+from nrlf.core.constants import ID_SEPARATOR, IMMUTABLE_FIELDS
 from nrlf.core.errors import (
     AuthenticationError,
     DocumentReferenceValidationError,
     DuplicateKeyError,
     FhirValidationError,
+    ImmutableFieldViolationError,
     InconsistentProducerId,
     InvalidTupleError,
     MalformedProducerId,
 )
 from nrlf.core.transform import make_timestamp
 from nrlf.core.validators import (
+    immutable_fields_digest,
     json_loads,
     requesting_application_is_not_authorised,
     validate_document_reference_string,
+    validate_immutable_fields,
     validate_nhs_number,
     validate_producer_id,
     validate_source,
@@ -26,6 +30,7 @@ from nrlf.core.validators import (
     validate_type_system,
 )
 from nrlf.producer.fhir.r4.model import Identifier, RequestParams
+from nrlf.producer.fhir.r4.tests.test_producer_nrlf_model import read_test_data
 
 
 @pytest.mark.parametrize(
@@ -362,3 +367,66 @@ def test_validate_producer_id(
             )
             is None
         )
+
+
+_IMMUTABLE_FIELDS = {"foo", "bar"}
+
+
+@pytest.mark.parametrize("field", _IMMUTABLE_FIELDS)
+def test_validate_immutable_fields(field):
+    a = {_field: f"a{_field}" for _field in _IMMUTABLE_FIELDS}
+    b = {field: f"b{field}"}
+    with pytest.raises(ImmutableFieldViolationError):
+        validate_immutable_fields(immutable_fields=_IMMUTABLE_FIELDS, a=a, b=b)
+
+    with pytest.raises(ImmutableFieldViolationError):
+        validate_immutable_fields(immutable_fields=_IMMUTABLE_FIELDS, a=b, b=a)
+
+
+@pytest.mark.parametrize("field", IMMUTABLE_FIELDS)
+def test_validate_all_immutable_fields(field):
+    a = {_field: f"a{_field}" for _field in IMMUTABLE_FIELDS}
+    b = deepcopy(a)
+    b[field] = f"b{field}"
+    with pytest.raises(ImmutableFieldViolationError):
+        validate_immutable_fields(a=a, b=b)
+
+    with pytest.raises(ImmutableFieldViolationError):
+        validate_immutable_fields(a=b, b=a)
+
+    assert immutable_fields_digest(a) != immutable_fields_digest(b)
+
+
+def test_immutable_fields_digest_ignores_order_and_mutable_fields():
+    document = read_test_data("nrlf")
+    document["author"] = [
+        {"id": "a", "reference": "b"},
+        {"id": "b", "reference": "a"},
+        {"reference": "c", "display": "d"},
+    ]
+    updated_document = deepcopy(document)
+    updated_document["author"] = [
+        {"reference": "a", "id": "b"},
+        {"display": "d", "reference": "c"},
+        {"id": "a", "reference": "b"},
+    ]
+    updated_document["custodian"] = {
+        "identifier": {
+            "value": document["custodian"]["identifier"]["value"],
+            "system": document["custodian"]["identifier"]["system"],
+        }
+    }
+    updated_document["content"][0]["attachment"][
+        "url"
+    ] = "https://example.org/different_doc.pdf"
+
+    validate_immutable_fields(a=document, b=updated_document)
+    assert immutable_fields_digest(document) == immutable_fields_digest(
+        updated_document
+    )
+
+
+def test_immutable_fields_digest_treats_missing_fields_as_null():
+    assert immutable_fields_digest({"foo": None}, {"foo"}) == immutable_fields_digest(
+        {}, {"foo"}
+    )
@@ -0,0 +1,228 @@
+"""
+Client-side throttling and retries of DynamoDb calls, shared by every
+Repository in the container.
+
+ThrottlingController paces calls at a rate which is increased additively on
+every success and decreased multiplicatively on every throttle (AIMD), so
+that a container backs off as a whole rather than each call retrying on its
+own. RetryingDynamoDbClient retries throttled and transient failures with
+full jitter backoff, for as long as both the timeout of the operation and the
+latency budget of the request allow.
+
+botocore's own retries are disabled (see DYNAMODB_CLIENT_CONFIG), so that the
+two don't multiply.
+"""
+import random
+import time
+from itertools import count
+from threading import Lock
+from typing import Callable, NamedTuple, Union
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+from botocore.exceptions import HTTPClientError
+
+from nrlf.core.metrics import READ_OPERATIONS, WRITE_OPERATIONS, DynamoDbMetrics
+from nrlf.core.types import DynamoDbClient
+
+THROTTLING_ERROR_CODES = frozenset(
+    (
+        "ProvisionedThroughputExceededException",
+        "ThrottlingException",
+        "RequestLimitExceeded",
+    )
+)
+TRANSIENT_ERROR_CODES = frozenset(("InternalServerError", "ServiceUnavailable"))
+TRANSACTION_CANCELED = "TransactionCanceledException"
+THROTTLING_CANCELLATION_CODES = frozenset(
+    ("ThrottlingError", "ProvisionedThroughputExceeded")
+)
+NO_CANCELLATION = "None"
+
+MAX_RATE = 1000.0  # Calls per second, i.e. not limited until throttled
+MIN_RATE = 1.0
+RATE_INCREASE = 5.0  # Calls per second added on each success
+RATE_DECREASE = 0.5  # Multiplier of the rate on each throttle
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 0.025
+BACKOFF_MAX_SECONDS = 1.0
+REQUEST_BUDGET_SECONDS = 5.0
+DEFAULT_OPERATION_TIMEOUT_SECONDS = 2.0
+OPERATION_TIMEOUT_SECONDS = {
+    "scan": 10.0,
+    "batch_get_item": 4.0,
+    "batch_write_item": 4.0,
+    "transact_write_items": 4.0,
+}
+
+DYNAMODB_CLIENT_CONFIG = Config(retries={"mode": "standard", "total_max_attempts": 1})
+
+
+def _cancellation_codes(error: ClientError) -> set[str]:
+    return {
+        reason.get("Code", NO_CANCELLATION)
+        for reason in error.response.get("CancellationReasons", [])
+    } - {NO_CANCELLATION}
+
+
+def _error_code(error: ClientError) -> Union[str, None]:
+    return error.response.get("Error", {}).get("Code")
+
+
+def is_throttle(error: Exception) -> bool:
+    if not isinstance(error, ClientError):
+        return False
+    error_code = _error_code(error)
+    if error_code == TRANSACTION_CANCELED:
+        codes = _cancellation_codes(error)
+        return bool(codes) and codes <= THROTTLING_CANCELLATION_CODES
+    return error_code in THROTTLING_ERROR_CODES
+
+
+def is_retryable(error: Exception) -> bool:
+    """Throttles, transient server errors, and connection errors or timeouts"""
+    if isinstance(error, (BotoConnectionError, HTTPClientError)):
+        return True
+    if isinstance(error, ClientError):
+        return is_throttle(error) or _error_code(error) in TRANSIENT_ERROR_CODES
+    return False
+
+
+def full_jitter(
+    attempt: int,
+    base_seconds: float = BACKOFF_BASE_SECONDS,
+    max_seconds: float = BACKOFF_MAX_SECONDS,
+) -> float:
+    return random.uniform(0, min(max_seconds, base_seconds * 2**attempt))
+
+
+class ThrottlingController:
+    """
+    Paces calls at no more than 'rate' calls per second, where the rate is
+    adjusted by AIMD. Thread safe, since calls can be fanned out over
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = MAX_RATE,
+        min_rate: float = MIN_RATE,
+        rate_increase: float = RATE_INCREASE,
+        rate_decrease: float = RATE_DECREASE,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate_increase = rate_increase
+        self.rate_decrease = rate_decrease
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = Lock()
+        self.rate = max_rate
+        self._next_call_at = 0.0
+
+    def acquire(self) -> float:
+        """Waits until the next call may be made, returning the seconds waited"""
+        with self._lock:
+            now = self.clock()
+            call_at = max(now, self._next_call_at)
+            self._next_call_at = call_at + 1 / self.rate
+        wait_seconds = call_at - now
+        if wait_seconds > 0:
+            self.sleep(wait_seconds)
+        return wait_seconds
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.rate_increase)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.rate_decrease)
+
+
+class RetryPolicy(NamedTuple):
+    max_attempts: int = MAX_ATTEMPTS
+    request_budget_seconds: float = REQUEST_BUDGET_SECONDS
+    operation_timeout_seconds: dict[str, float] = OPERATION_TIMEOUT_SECONDS
+    default_operation_timeout_seconds: float = DEFAULT_OPERATION_TIMEOUT_SECONDS
+
+    def operation_timeout(self, operation: str) -> float:
+        return self.operation_timeout_seconds.get(
+            operation, self.default_operation_timeout_seconds
+        )
+
+
+THROTTLING_CONTROLLER = ThrottlingController()
+
+
+class RetryingDynamoDbClient:
+    """
+    Wraps a DynamoDb client so that every read and write is paced by the
+    controller and retried by the policy. A call is retried until it
+    succeeds, fails with an error which can't be retried, runs out of
+    attempts, or would not be retried before its deadline: the sooner of the
+    timeout of the operation and the end of the request's latency budget
+    (see 'start_request'). The last error is then raised. Retries and
+    throttles are recorded in 'metrics'. All other attributes are those of
+    the wrapped client.
+    """
+
+    def __init__(
+        self,
+        client: DynamoDbClient,
+        metrics: DynamoDbMetrics,
+        policy: RetryPolicy = None,
+        controller: ThrottlingController = None,
+    ):
+        self.client = client
+        self.metrics = metrics
+        self.policy = RetryPolicy() if policy is None else policy
+        self.controller = THROTTLING_CONTROLLER if controller is None else controller
+        self.request_deadline: Union[float, None] = None
+
+    def start_request(self):
+        """Starts the latency budget, which is unlimited until then"""
+        self.request_deadline = (
+            self.controller.clock() + self.policy.request_budget_seconds
+        )
+
+    def _deadline(self, operation: str) -> float:
+        deadline = self.controller.clock() + self.policy.operation_timeout(operation)
+        if self.request_deadline is None:
+            return deadline
+        return min(deadline, self.request_deadline)
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+        if name not in READ_OPERATIONS | WRITE_OPERATIONS:
+            return method
+
+        def _retrying(**kwargs) -> dict:
+            deadline = self._deadline(name)
+            for attempt in count():
+                self.controller.acquire()
+                try:
+                    response = method(**kwargs)
+                except Exception as error:
+                    if not is_retryable(error):
+                        raise
+                    if is_throttle(error):
+                        self.controller.on_throttle()
+                        self.metrics.record_throttle()
+                    backoff_seconds = full_jitter(attempt)
+                    if (
+                        attempt + 1 >= self.policy.max_attempts
+                        or self.controller.clock() + backoff_seconds > deadline
+                    ):
+                        raise
+                    self.metrics.record_retry()
+                    self.controller.sleep(backoff_seconds)
+                    continue
+                self.controller.on_success()
+                return response
+
+        return _retrying
@@ -23,6 +23,12 @@ class DynamoDbClient:
     def transact_write_items(self, *args, **kwargs) -> DynamoDbResponse:
         pass
 
+    def batch_get_item(self, *args, **kwargs) -> DynamoDbResponse:
+        pass
+
+    def batch_write_item(self, *args, **kwargs) -> DynamoDbResponse:
+        pass
+
     def scan(self, *args, **kwargs) -> DynamoDbResponse:
         pass
 
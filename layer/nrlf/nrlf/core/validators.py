@@ -1,5 +1,6 @@
 import json
 from datetime import datetime as dt
+from hashlib import sha256
 from typing import Optional
 
 from nhs_number import is_valid as is_valid_nhs_number
@@ -8,6 +9,7 @@ from pydantic import ValidationError
 from nrlf.core.constants import (
     CUSTODIAN_SEPARATOR,
     ID_SEPARATOR,
+    IMMUTABLE_FIELDS,
     NHS_NUMBER_SYSTEM_URL,
     TYPE_SEPARATOR,
     VALID_SOURCES,
@@ -17,6 +19,7 @@ from nrlf.core.errors import (
     DocumentReferenceValidationError,
     DuplicateKeyError,
     FhirValidationError,
+    ImmutableFieldViolationError,
     InconsistentProducerId,
     InvalidTupleError,
     MalformedProducerId,
@@ -159,3 +162,48 @@ def split_custodian_id(custodian_id: str) -> dict:
     except ValueError:
         pass
     return custodian_id, custodian_id_suffix
+
+
+def _sort_key(key):
+    """
+    Sorts lists and dictionaries recursively to enable comparisons of sorted objects.
+    Dictionaries are sorted by key, and otherwise lists are sorted by value. Lists of
+    dictionaries are sorted by the dictionary key. Dictionaries are transformed into
+    lists of tuples, again noting that the output of this function is intended for
+    deterministic sorted comparisons.
+    """
+    if type(key) is list:
+        return sorted((_sort_key(k) for k in key), key=_sort_key)
+    elif type(key) is dict:
+        return [(k, _sort_key(key[k])) for k in sorted(key.keys())]
+    return key
+
+
+def _keys_are_not_equal(a, b):
+    return _sort_key(a) != _sort_key(b)
+
+
+def validate_immutable_fields(
+    a: dict, b: dict, immutable_fields: set = IMMUTABLE_FIELDS
+):
+    immutable_keys_in_a = immutable_fields.intersection(a.keys())
+    immutable_keys_in_b = immutable_fields.intersection(b.keys())
+    for k in immutable_keys_in_a | immutable_keys_in_b:
+        if _keys_are_not_equal(a.get(k), b.get(k)):
+            raise ImmutableFieldViolationError(
+                f"Forbidden to update immutable field '{k}'"
+            )
+
+
+def immutable_fields_digest(
+    document: dict, immutable_fields: set = IMMUTABLE_FIELDS
+) -> str:
+    """
+    A digest of the immutable fields of a document, which is equal for two
+    documents exactly when 'validate_immutable_fields' would accept them
+    """
+    canonical_fields = [
+        (k, _sort_key(document.get(k))) for k in sorted(immutable_fields)
+    ]
+    canonical_json = json.dumps(canonical_fields, separators=(",", ":"))
+    return sha256(canonical_json.encode()).hexdigest()
@@ -334,6 +334,13 @@ class RequestQueryType(BaseModel):
     __root__: Annotated[StrictStr, Field(example="http://snomed.info/sct|736253002")]
 
 
+class RequestQueryDate(BaseModel):
+    __root__: Annotated[
+        StrictStr,
+        Field(example="ge2023-01-01", regex="^(eq|ge|le)?\\d{4}(-\\d{2}(-\\d{2})?)?$"),
+    ]
+
+
 class NextPageToken(BaseModel):
     __root__: StrictStr
 
@@ -404,6 +411,7 @@ class RequestParams(BaseModel):
         Optional[RequestQuerySubject], Field(alias="subject:identifier")
     ] = None
     type: Optional[RequestQueryType] = None
+    date: Optional[List[RequestQueryDate]] = None
     next_page_token: Annotated[
         Optional[NextPageToken], Field(alias="next-page-token")
     ] = None
@@ -1,10 +1,10 @@
 import json
 import os
 
-import boto3
 from pydantic import BaseModel, Json
 
 from mi.mi_alert.steps import parse_event, read_body, send_notification
+from nrlf.core.clients import get_client
 from nrlf.core.validators import json_loads
 
 PENVS = {"dev", "int", "ref", "prod"}
@@ -19,7 +19,7 @@ class Config(BaseModel):
 CONFIG = Config(
     **{env_var: os.environ.get(env_var) for env_var in Config.__fields__.keys()}
 )
-S3_CLIENT = boto3.client("s3")
+S3_CLIENT = get_client("s3")
 
 
 def handler(event: dict, context=None):
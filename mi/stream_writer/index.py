@@ -1,7 +1,6 @@
 import json
 from dataclasses import asdict
 
-import boto3
 from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
     DynamoDBRecordEventName,
     DynamoDBStreamEvent,
@@ -19,6 +18,7 @@ from mi.stream_writer.model import (
 )
 from mi.stream_writer.psycopg2 import psycopg2
 from mi.stream_writer.utils import is_document_pointer, to_snake_case
+from nrlf.core.clients import get_client
 
 EVENT_CONFIG = {
     DynamoDBRecordEventName.INSERT: DynamoDBEventConfig(
@@ -30,9 +30,9 @@ EVENT_CONFIG = {
         action=Action.DELETED,
     ),
 }
-SECRETSMANAGER_CLIENT = boto3.client("secretsmanager")
+SECRETSMANAGER_CLIENT = get_client("secretsmanager")
 SECRETSMANAGER = SecretsManagerCache(client=SECRETSMANAGER_CLIENT)
-S3_CLIENT = boto3.client("s3")
+S3_CLIENT = get_client("s3")
 
 
 @catch_error(log_fields=["event"])
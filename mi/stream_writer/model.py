@@ -8,7 +8,12 @@ from uuid import uuid4
 
 from pydantic import BaseModel
 
-from mi.stream_writer.constants import PATH_TO_QUERIES, TYPE_SEPARATOR, DateTimeFormats
+from mi.stream_writer.constants import (
+    CUSTODIAN_SEPARATOR,
+    PATH_TO_QUERIES,
+    TYPE_SEPARATOR,
+    DateTimeFormats,
+)
 from mi.stream_writer.utils import hash_nhs_number, to_snake_case
 
 
@@ -127,13 +132,20 @@ class RecordParams:
     def from_document_pointer(
         cls,
         type: str,
-        custodian: str,
-        custodian_suffix: str,
         nhs_number: str,
         created_on: str,
+        producer_id: str = None,
+        custodian: str = None,
+        custodian_suffix: str = None,
         **_,  # <-- this will ignore all other DocumentPointer fields
     ):
-        """Constructor for RecordParams directly from DocumentPointer fields"""
+        """
+        Constructor for RecordParams directly from DocumentPointer fields.
+        Items in the compact layout don't store the custodian, which is
+        instead derived from the producer_id.
+        """
+        if custodian is None:
+            custodian, _, custodian_suffix = producer_id.partition(CUSTODIAN_SEPARATOR)
         system, value = type.split(TYPE_SEPARATOR)
         date_time = dt.strptime(created_on, DateTimeFormats.DOCUMENT_POINTER_FORMAT)
         created_date = date_time.strftime(DateTimeFormats.FACT_FORMAT)
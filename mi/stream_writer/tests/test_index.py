@@ -18,7 +18,7 @@ IMPORT_PREFIX = "mi.stream_writer.index"
 
 
 @mock.patch(f"{IMPORT_PREFIX}.insert_mi_record")
-@mock.patch(f"{IMPORT_PREFIX}.boto3")
+@mock.patch(f"{IMPORT_PREFIX}.get_client")
 @mock.patch(f"{IMPORT_PREFIX}.psycopg2")
 def test__handler_populates_success_responses(
     mock_psycopg2, boto3, mock_insert_mi_record
@@ -64,7 +64,7 @@ def test__handler_populates_success_responses(
     },
 )
 @mock.patch(f"{IMPORT_PREFIX}.insert_mi_record")
-@mock.patch(f"{IMPORT_PREFIX}.boto3")
+@mock.patch(f"{IMPORT_PREFIX}.get_client")
 @mock.patch(f"{IMPORT_PREFIX}.psycopg2")
 def test_handler_populates_responses(mock_psycopg2, boto3, mock_insert_mi_record):
     timestamp = dt.now()
@@ -100,7 +100,7 @@ def test_handler_populates_responses(mock_psycopg2, boto3, mock_insert_mi_record
     },
 )
 @mock.patch(f"{IMPORT_PREFIX}.insert_mi_record")
-@mock.patch(f"{IMPORT_PREFIX}.boto3")
+@mock.patch(f"{IMPORT_PREFIX}.get_client")
 @mock.patch(f"{IMPORT_PREFIX}.psycopg2")
 @mock.patch(f"{IMPORT_PREFIX}.send_errors_to_s3")
 def test_handler(mock_send_errors_s3, mock_psycopg2, boto3, mock_insert_mi_record):
@@ -1,5 +1,6 @@
 from dataclasses import asdict
 
+import pytest
 from hypothesis import given
 from hypothesis.strategies import builds, just, sampled_from
 
@@ -43,6 +44,20 @@ def test_record_from_document_pointer(**document_pointer):
     )
 
 
+@pytest.mark.parametrize(
+    ["producer_id", "expected_provider_name"],
+    [["Y05868", "Y05868"], ["RY26A.ABC", "RY26A-ABC"]],
+)
+def test_record_from_compact_document_pointer(producer_id, expected_provider_name):
+    record = RecordParams.from_document_pointer(
+        producer_id=producer_id,
+        nhs_number=NHS_NUMBER,
+        type=TYPE_SEPARATOR.join((SYSTEM, VALUE)),
+        created_on=CREATED_ON,
+    )
+    assert record.provider_name == expected_provider_name
+
+
 @given(record=builds(RecordParams), dimension_type=sampled_from(DIMENSION_TYPES))
 def test_record_to_dimension(record: RecordParams, dimension_type: Dimension):
     dimension = record.to_dimension(dimension_type=dimension_type)
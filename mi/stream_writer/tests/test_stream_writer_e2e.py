@@ -371,7 +371,7 @@ def test_e2e_s3_bucket_is_populated(
     event["Records"][0]["eventID"] = event_id
 
     record: dict = event["Records"][0]["dynamodb"]["NewImage"]
-    record.pop("custodian")
+    record.pop("type")
 
     responses = _invoke_stream_writer(session=session, workspace=workspace, event=event)
 
@@ -391,7 +391,7 @@ def test_e2e_s3_bucket_is_populated(
 
     assert (
         response["error"]
-        == "from_document_pointer() missing 1 required positional argument: 'custodian'"
+        == "from_document_pointer() missing 1 required positional argument: 'type'"
     )
     assert response["error_type"] == "TypeError"
     assert response["function"] == "mi.stream_writer.index._handler"
@@ -0,0 +1,8 @@
+DocumentPointerPkPrefix = "D#"
+SERVICE = "cache_invalidator"
+
+
+class Metric:
+    LAG = "CacheInvalidationLag"
+    RECORDS = "CacheInvalidationRecords"
+    KEYS = "CacheInvalidationKeys"
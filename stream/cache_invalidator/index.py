@@ -0,0 +1,91 @@
+"""
+Invalidates the shared caches of reads (see nrlf.core.cache) from the
+DocumentPointer table's stream, so that a write made by any Lambda is seen by
+every other Lambda as soon as the stream delivers it, rather than after the
+caches' TTLs. Caches which live in a container can't be reached from here,
+so this only does anything if CACHE_URL is set.
+
+If the cache backend fails then the batch is retried (by raising), since
+otherwise a stale read could be served until the TTL.
+"""
+import os
+import time
+from typing import Callable, Union
+
+from aws_lambda_powertools.metrics import Metrics, MetricUnit
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBStreamEvent,
+)
+from lambda_utils.constants import MetricsConstants
+
+from nrlf.core.cache import CacheBackend, build_cache_backend
+from nrlf.core.item_cache import ItemCache
+from nrlf.core.search_cache import SearchCache
+from stream.cache_invalidator.constants import SERVICE, Metric
+from stream.cache_invalidator.model import (
+    CacheInvalidationError,
+    Environment,
+    Invalidation,
+)
+
+CACHE_BACKEND = build_cache_backend(url=os.environ.get("CACHE_URL"))
+
+
+def invalidate(invalidation: Invalidation, cache_backend: CacheBackend):
+    cache_backend.statistics.reset()
+    ItemCache(backend=cache_backend).invalidate(*sorted(invalidation.pks))
+    SearchCache(backend=cache_backend).invalidate(*sorted(invalidation.nhs_numbers))
+    if cache_backend.statistics.errors:
+        raise CacheInvalidationError(
+            f"Failed to invalidate {len(invalidation)} cache keys "
+            f"({cache_backend.statistics.errors} errors)"
+        )
+
+
+def emit_metrics(
+    invalidation: Invalidation, lag_seconds: Union[float, None], environment: str
+):
+    """Prints the metrics of the batch in CloudWatch Embedded Metric Format"""
+    emf = Metrics(namespace=MetricsConstants.NAMESPACE, service=SERVICE)
+    emf.add_dimension(name="environment", value=environment)
+    emf.add_metric(
+        name=Metric.RECORDS, unit=MetricUnit.Count, value=invalidation.records
+    )
+    emf.add_metric(name=Metric.KEYS, unit=MetricUnit.Count, value=len(invalidation))
+    if lag_seconds is not None:
+        emf.add_metric(
+            name=Metric.LAG, unit=MetricUnit.Milliseconds, value=lag_seconds * 1000
+        )
+    emf.flush_metrics()
+
+
+def handler(
+    event,
+    context=None,
+    cache_backend: CacheBackend = None,
+    environment: Environment = None,
+    clock: Callable[[], float] = time.time,
+) -> dict:
+    if cache_backend is None:
+        cache_backend = CACHE_BACKEND
+
+    if environment is None:
+        environment = Environment.construct()
+
+    event = DynamoDBStreamEvent(event)
+    invalidation = Invalidation.from_records(event.records)
+    if cache_backend is not None:
+        invalidate(invalidation=invalidation, cache_backend=cache_backend)
+
+    lag_seconds = invalidation.lag_seconds(now=clock())
+    emit_metrics(
+        invalidation=invalidation,
+        lag_seconds=lag_seconds,
+        environment=environment.ENVIRONMENT,
+    )
+    return {
+        "records": invalidation.records,
+        "pks": len(invalidation.pks),
+        "nhs_numbers": len(invalidation.nhs_numbers),
+        "lag_seconds": lag_seconds,
+    }
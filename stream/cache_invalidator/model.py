@@ -0,0 +1,69 @@
+import os
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBRecord,
+)
+from pydantic import BaseModel
+
+from stream.cache_invalidator.constants import DocumentPointerPkPrefix
+
+
+class Environment(BaseModel):
+    ENVIRONMENT: str
+    CACHE_URL: Optional[str] = None
+
+    @classmethod
+    def construct(cls) -> "Environment":
+        return cls(**os.environ)
+
+
+class CacheInvalidationError(Exception):
+    """Raised so that the batch is retried, since the caches may now be stale"""
+
+
+def is_document_pointer(pk: str, **_other_keys):
+    return pk.startswith(DocumentPointerPkPrefix)
+
+
+@dataclass
+class Invalidation:
+    """
+    The cache keys affected by a batch of stream records: the pk of each
+    pointer (for the item cache) and the nhs_number of each patient (for the
+    search cache), taken from both the old and the new image so that e.g. a
+    pointer which moves between patients invalidates both of them
+    """
+
+    records: int = 0
+    pks: set[str] = field(default_factory=set)
+    nhs_numbers: set[str] = field(default_factory=set)
+    created_at: list[int] = field(default_factory=list)
+
+    @classmethod
+    def from_records(cls, records: Iterable[DynamoDBRecord]) -> "Invalidation":
+        invalidation = cls()
+        for record in records:
+            keys = record.dynamodb.keys
+            if not is_document_pointer(**keys):
+                continue
+            invalidation.records += 1
+            invalidation.pks.add(keys["pk"])
+            for image in (record.dynamodb.old_image, record.dynamodb.new_image):
+                if image and image.get("nhs_number"):
+                    invalidation.nhs_numbers.add(image["nhs_number"])
+            if record.dynamodb.approximate_creation_date_time is not None:
+                invalidation.created_at.append(
+                    record.dynamodb.approximate_creation_date_time
+                )
+        return invalidation
+
+    def __len__(self) -> int:
+        return len(self.pks) + len(self.nhs_numbers)
+
+    def lag_seconds(self, now: float) -> Optional[float]:
+        """The time between the oldest change and it being invalidated"""
+        if not self.created_at:
+            return None
+        return max(now - min(self.created_at), 0)
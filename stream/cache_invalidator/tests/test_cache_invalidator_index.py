@@ -0,0 +1,111 @@
+from unittest import mock
+
+import pytest
+
+from nrlf.core.cache import InProcessCacheBackend, RedisCacheBackend
+from nrlf.core.item_cache import NOT_CACHED, ItemCache
+from nrlf.core.model import DocumentPointer, PaginatedResponse
+from nrlf.core.search_cache import SearchCache
+from nrlf.core.tests.stream_events import (
+    LAST_CHANGE_AT,
+    POINTERS,
+    dynamodb_stream_events,
+)
+from nrlf.core.tests.stub_client import FakeClock, RedisStandIn
+from nrlf.core.validators import json_loads
+from stream.cache_invalidator.constants import Metric
+from stream.cache_invalidator.index import handler
+from stream.cache_invalidator.model import CacheInvalidationError, Environment
+
+UNCHANGED_PK = "D#RP7EV#unchanged"
+UNCHANGED_NHS_NUMBER = "9999999999"
+ENVIRONMENT = Environment(ENVIRONMENT="test")
+
+
+@pytest.fixture(params=["in_process", "redis"])
+def cache_backend(request):
+    clock = FakeClock()
+    if request.param == "in_process":
+        return InProcessCacheBackend(max_size=100, clock=clock.time)
+    return RedisCacheBackend(client=RedisStandIn(clock=clock))
+
+
+def _search(search_cache: SearchCache, nhs_number: str) -> list[str]:
+    reads = []
+    search_cache.read_through(
+        nhs_number=nhs_number,
+        pointer_types=[],
+        custodian=None,
+        limit=20,
+        item_type=DocumentPointer,
+        read=lambda: reads.append(nhs_number) or PaginatedResponse(items=[]),
+    )
+    return reads
+
+
+def test_handler_invalidates_caches(cache_backend):
+    item_cache = ItemCache(backend=cache_backend)
+    search_cache = SearchCache(backend=cache_backend)
+    for pk, nhs_number in [*POINTERS.items(), (UNCHANGED_PK, UNCHANGED_NHS_NUMBER)]:
+        item_cache.put(pk, {"pk": {"S": pk}})
+        _search(search_cache, nhs_number=nhs_number)
+
+    response = handler(
+        event=dynamodb_stream_events(),
+        cache_backend=cache_backend,
+        environment=ENVIRONMENT,
+        clock=lambda: LAST_CHANGE_AT + 1.5,
+    )
+
+    assert response == {
+        "records": 3,
+        "pks": 3,
+        "nhs_numbers": 3,
+        "lag_seconds": 3.5,  # since the oldest change
+    }
+    for pk, nhs_number in POINTERS.items():
+        assert item_cache.get(pk) is NOT_CACHED
+        assert _search(search_cache, nhs_number=nhs_number) == [nhs_number]
+    assert item_cache.get(UNCHANGED_PK) == {"pk": {"S": UNCHANGED_PK}}
+    assert _search(search_cache, nhs_number=UNCHANGED_NHS_NUMBER) == []
+
+
+def test_handler_deletes_items_in_one_command():
+    client = RedisStandIn(clock=FakeClock())
+
+    handler(
+        event=dynamodb_stream_events(),
+        cache_backend=RedisCacheBackend(client=client),
+        environment=ENVIRONMENT,
+    )
+
+    assert client.commands.count("DEL") == 1
+    assert client.commands.count("SET") == len(POINTERS)  # i.e. new versions
+
+
+def test_handler_raises_if_the_cache_fails():
+    client = mock.Mock()
+    client.delete.side_effect = ConnectionError("Connection refused")
+
+    with pytest.raises(CacheInvalidationError):
+        handler(
+            event=dynamodb_stream_events(),
+            cache_backend=RedisCacheBackend(client=client),
+            environment=ENVIRONMENT,
+        )
+
+
+def test_handler_without_a_cache_reports_lag(capsys):
+    with mock.patch("stream.cache_invalidator.index.CACHE_BACKEND", None):
+        response = handler(
+            event=dynamodb_stream_events(),
+            environment=ENVIRONMENT,
+            clock=lambda: LAST_CHANGE_AT,
+        )
+
+    assert response["lag_seconds"] == 2
+    (emf,) = map(json_loads, capsys.readouterr().out.splitlines())
+    assert emf[Metric.LAG] == [2000]
+    assert emf[Metric.RECORDS] == [3]
+    assert emf[Metric.KEYS] == [6]
+    assert emf["environment"] == "test"
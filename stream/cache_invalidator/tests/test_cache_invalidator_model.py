@@ -0,0 +1,45 @@
+import pytest
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBStreamEvent,
+)
+
+from nrlf.core.tests.stream_events import POINTERS, dynamodb_stream_events
+from stream.cache_invalidator.model import Invalidation, is_document_pointer
+
+
+@pytest.mark.parametrize(
+    ["pk", "expected"], [["D#RP7EV#created", True], ["V#1", False], ["P#1", False]]
+)
+def test_is_document_pointer(pk, expected):
+    assert is_document_pointer(pk=pk, sk=pk) is expected
+
+
+def test_invalidation_from_records():
+    event = DynamoDBStreamEvent(dynamodb_stream_events())
+
+    invalidation = Invalidation.from_records(event.records)
+
+    assert invalidation.records == 3  # i.e. not the version item
+    assert invalidation.pks == set(POINTERS.keys())
+    assert invalidation.nhs_numbers == set(POINTERS.values())
+    assert len(invalidation) == 6
+
+
+def test_invalidation_from_records_with_keys_only():
+    event = dynamodb_stream_events()
+    for record in event["Records"]:
+        record["dynamodb"].pop("OldImage", None)
+        record["dynamodb"].pop("NewImage", None)
+
+    invalidation = Invalidation.from_records(DynamoDBStreamEvent(event).records)
+
+    assert invalidation.pks == set(POINTERS.keys())
+    assert invalidation.nhs_numbers == set()
+
+
+@pytest.mark.parametrize(
+    ["created_at", "now", "expected"],
+    [[[], 10, None], [[5, 3, 8], 10, 7], [[12], 10, 0]],
+)
+def test_invalidation_lag_seconds(created_at, now, expected):
+    assert Invalidation(created_at=created_at).lag_seconds(now=now) == expected
@@ -0,0 +1,10 @@
+SERVICE = "patient_filter"
+
+
+class Metric:
+    LAG = "PatientFilterLag"
+    RECORDS = "PatientFilterRecords"
+    ADDED = "PatientFilterAdded"
+    PATIENTS = "PatientFilterPatients"
+    BYTES = "PatientFilterBytes"
+    ERROR_RATE = "PatientFilterErrorRate"
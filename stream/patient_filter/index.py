@@ -0,0 +1,159 @@
+"""
+Maintains the patient filter (see nrlf.core.patient_filter) in S3: rebuilds it
+from a parallel scan of the DocumentPointer table when invoked on a schedule
+(with {"rebuild": true}), and otherwise adds the patients of each batch of the
+table's stream to it.
+
+This Lambda must have a reserved concurrency of one, since it publishes the
+filter by reading and then rewriting it. This also means that the stream waits
+while the filter is rebuilt, so that any pointer written during the scan (which
+the scan may miss) is added to the rebuilt filter afterwards.
+"""
+import os
+import time
+from typing import Callable, Union
+
+from aws_lambda_powertools.metrics import Metrics, MetricUnit
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBStreamEvent,
+)
+from lambda_utils.constants import MetricsConstants
+
+from nrlf.core.clients import get_client
+from nrlf.core.model import DocumentPointer
+from nrlf.core.patient_filter import (
+    PATIENT_FILTER_KEY,
+    BloomFilter,
+    PatientFilter,
+    build_bloom_filter,
+)
+from nrlf.core.repository import Repository
+from stream.patient_filter.constants import SERVICE, Metric
+from stream.patient_filter.model import Environment, Patients
+
+REBUILD = "rebuild"
+
+REPOSITORY = Repository(
+    item_type=DocumentPointer,
+    client=get_client("dynamodb"),
+    environment_prefix=os.environ.get("PREFIX", ""),
+)
+PATIENT_FILTER = PatientFilter(
+    s3_client=get_client("s3"),
+    bucket=os.environ.get("PATIENT_FILTER_BUCKET", ""),
+    key=os.environ.get("PATIENT_FILTER_KEY", PATIENT_FILTER_KEY),
+    writable=True,
+)
+
+
+def _metrics(environment: str) -> Metrics:
+    emf = Metrics(namespace=MetricsConstants.NAMESPACE, service=SERVICE)
+    emf.add_dimension(name="environment", value=environment)
+    return emf
+
+
+def emit_rebuild_metrics(bloom_filter: BloomFilter, environment: str):
+    """Prints the size of the rebuilt filter in CloudWatch Embedded Metric Format"""
+    emf = _metrics(environment=environment)
+    emf.add_metric(
+        name=Metric.PATIENTS, unit=MetricUnit.Count, value=bloom_filter.patients
+    )
+    emf.add_metric(
+        name=Metric.BYTES, unit=MetricUnit.Bytes, value=len(bloom_filter.bits)
+    )
+    emf.add_metric(
+        name=Metric.ERROR_RATE,
+        unit=MetricUnit.Percent,
+        value=bloom_filter.error_rate() * 100,
+    )
+    emf.flush_metrics()
+
+
+def emit_update_metrics(
+    patients: Patients, added: int, lag_seconds: Union[float, None], environment: str
+):
+    """Prints the metrics of the batch in CloudWatch Embedded Metric Format"""
+    emf = _metrics(environment=environment)
+    emf.add_metric(name=Metric.RECORDS, unit=MetricUnit.Count, value=patients.records)
+    emf.add_metric(name=Metric.ADDED, unit=MetricUnit.Count, value=added)
+    if lag_seconds is not None:
+        emf.add_metric(
+            name=Metric.LAG, unit=MetricUnit.Milliseconds, value=lag_seconds * 1000
+        )
+    emf.flush_metrics()
+
+
+def rebuild(
+    repository: Repository,
+    patient_filter: PatientFilter,
+    environment: Environment,
+    clock: Callable[[], float],
+) -> dict:
+    repository.start_request()
+    bloom_filter = build_bloom_filter(
+        repository=repository,
+        error_rate=environment.PATIENT_FILTER_ERROR_RATE,
+        max_bytes=environment.PATIENT_FILTER_MAX_BYTES,
+        total_segments=environment.SCAN_TOTAL_SEGMENTS,
+        clock=clock,
+    )
+    patient_filter.publish(bloom_filter)
+    emit_rebuild_metrics(bloom_filter=bloom_filter, environment=environment.ENVIRONMENT)
+    return {
+        "patients": bloom_filter.patients,
+        "bytes": len(bloom_filter.bits),
+        "error_rate": bloom_filter.error_rate(),
+    }
+
+
+def update(
+    event: dict,
+    patient_filter: PatientFilter,
+    environment: Environment,
+    clock: Callable[[], float],
+) -> dict:
+    patients = Patients.from_records(DynamoDBStreamEvent(event).records)
+    added = 0
+    if patients.nhs_numbers:
+        added = patient_filter.add(patients.nhs_numbers)
+
+    lag_seconds = patients.lag_seconds(now=clock())
+    emit_update_metrics(
+        patients=patients,
+        added=added,
+        lag_seconds=lag_seconds,
+        environment=environment.ENVIRONMENT,
+    )
+    return {"records": patients.records, "added": added, "lag_seconds": lag_seconds}
+
+
+def handler(
+    event,
+    context=None,
+    repository: Repository = None,
+    patient_filter: PatientFilter = None,
+    environment: Environment = None,
+    clock: Callable[[], float] = time.time,
+) -> dict:
+    if repository is None:
+        repository = REPOSITORY
+
+    if patient_filter is None:
+        patient_filter = PATIENT_FILTER
+
+    if environment is None:
+        environment = Environment.construct()
+
+    if event.get(REBUILD):
+        return rebuild(
+            repository=repository,
+            patient_filter=patient_filter,
+            environment=environment,
+            clock=clock,
+        )
+    return update(
+        event=event,
+        patient_filter=patient_filter,
+        environment=environment,
+        clock=clock,
+    )
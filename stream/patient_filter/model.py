@@ -0,0 +1,64 @@
+import os
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBRecord,
+)
+from pydantic import BaseModel
+
+from nrlf.core.patient_filter import (
+    PATIENT_FILTER_ERROR_RATE,
+    PATIENT_FILTER_KEY,
+    PATIENT_FILTER_MAX_BYTES,
+)
+from nrlf.core.pointer_counts import POINTER_KEY_PREFIX
+from nrlf.core.repository import SCAN_TOTAL_SEGMENTS
+
+
+class Environment(BaseModel):
+    ENVIRONMENT: str
+    PREFIX: str = ""
+    PATIENT_FILTER_BUCKET: str
+    PATIENT_FILTER_KEY: str = PATIENT_FILTER_KEY
+    PATIENT_FILTER_ERROR_RATE: float = PATIENT_FILTER_ERROR_RATE
+    PATIENT_FILTER_MAX_BYTES: int = PATIENT_FILTER_MAX_BYTES
+    SCAN_TOTAL_SEGMENTS: int = SCAN_TOTAL_SEGMENTS
+
+    @classmethod
+    def construct(cls) -> "Environment":
+        return cls(**os.environ)
+
+
+@dataclass
+class Patients:
+    """
+    The patients of the pointers in the new images of a batch of stream
+    records. Patients are never removed, since a Bloom filter can't forget
+    them, and so they stay in the filter until it is next rebuilt.
+    """
+
+    records: int = 0
+    nhs_numbers: set[str] = field(default_factory=set)
+    created_at: list[int] = field(default_factory=list)
+
+    @classmethod
+    def from_records(cls, records: Iterable[DynamoDBRecord]) -> "Patients":
+        patients = cls()
+        for record in records:
+            if not record.dynamodb.keys["pk"].startswith(POINTER_KEY_PREFIX):
+                continue
+            patients.records += 1
+            if record.dynamodb.new_image:
+                patients.nhs_numbers.add(record.dynamodb.new_image["nhs_number"])
+            if record.dynamodb.approximate_creation_date_time is not None:
+                patients.created_at.append(
+                    record.dynamodb.approximate_creation_date_time
+                )
+        return patients
+
+    def lag_seconds(self, now: float) -> Optional[float]:
+        """The time between the oldest change and it being filtered"""
+        if not self.created_at:
+            return None
+        return max(now - min(self.created_at), 0)
@@ -0,0 +1,4 @@
+from build_scripts.lambda_build import build
+
+if __name__ == "__main__":
+    build(__file__)
@@ -0,0 +1,119 @@
+import boto3
+import moto
+import pytest
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from nrlf.core.model import DocumentPointer
+from nrlf.core.patient_filter import BloomFilter, PatientFilter
+from nrlf.core.repository import Repository
+from nrlf.core.tests.stream_events import (
+    CREATED_NHS_NUMBER,
+    DELETED_NHS_NUMBER,
+    LAST_CHANGE_AT,
+    UPDATED_NHS_NUMBER,
+    dynamodb_stream_events,
+)
+from nrlf.core.tests.test_pointer_counts import NHS_NUMBER, _create_pointers
+from nrlf.core.validators import json_loads
+from stream.patient_filter.constants import Metric
+from stream.patient_filter.index import handler
+from stream.patient_filter.model import Environment
+
+BUCKET = "patient-filter"
+ENVIRONMENT = Environment(
+    ENVIRONMENT="test", PATIENT_FILTER_BUCKET=BUCKET, SCAN_TOTAL_SEGMENTS=1
+)
+
+
+@pytest.fixture
+def aws():
+    with moto.mock_dynamodb(), moto.mock_s3():
+        client = boto3.client("dynamodb")
+        client.create_table(
+            TableName=DocumentPointer.kebab(), **DOCUMENT_POINTER_TABLE_DEFINITION
+        )
+        s3_client = boto3.client("s3", region_name="eu-west-2")
+        s3_client.create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        yield (
+            Repository(item_type=DocumentPointer, client=client),
+            PatientFilter(s3_client=s3_client, bucket=BUCKET, writable=True),
+        )
+
+
+def _published(patient_filter: PatientFilter) -> BloomFilter:
+    reader = PatientFilter(s3_client=patient_filter.s3_client, bucket=BUCKET)
+    reader.refresh()
+    return reader.bloom_filter
+
+
+def test_handler_rebuilds_filter(aws, capsys):
+    repository, patient_filter = aws
+    _create_pointers(repository.dynamodb, (NHS_NUMBER, "1"), (NHS_NUMBER, "2"))
+
+    response = handler(
+        event={"rebuild": True},
+        repository=repository,
+        patient_filter=patient_filter,
+        environment=ENVIRONMENT,
+    )
+
+    bloom_filter = _published(patient_filter)
+    assert response == {
+        "patients": 1,
+        "bytes": len(bloom_filter.bits),
+        "error_rate": bloom_filter.error_rate(),
+    }
+    assert NHS_NUMBER in bloom_filter
+    assert DELETED_NHS_NUMBER not in bloom_filter
+
+    (emf,) = map(json_loads, capsys.readouterr().out.splitlines())
+    assert emf[Metric.PATIENTS] == [1]
+    assert emf[Metric.BYTES] == [len(bloom_filter.bits)]
+
+
+def test_handler_adds_patients(aws, capsys):
+    repository, patient_filter = aws
+    handler(
+        event={"rebuild": True},
+        repository=repository,
+        patient_filter=patient_filter,
+        environment=ENVIRONMENT,
+    )
+    capsys.readouterr()
+
+    response = handler(
+        event=dynamodb_stream_events(),
+        repository=repository,
+        patient_filter=patient_filter,
+        environment=ENVIRONMENT,
+        clock=lambda: LAST_CHANGE_AT + 1,
+    )
+
+    assert response == {"records": 3, "added": 2, "lag_seconds": 3}
+    bloom_filter = _published(patient_filter)
+    assert CREATED_NHS_NUMBER in bloom_filter
+    assert UPDATED_NHS_NUMBER in bloom_filter
+    assert DELETED_NHS_NUMBER not in bloom_filter
+
+    (emf,) = map(json_loads, capsys.readouterr().out.splitlines())
+    assert emf[Metric.RECORDS] == [3]
+    assert emf[Metric.ADDED] == [2]
+    assert emf[Metric.LAG] == [3000]
+
+
+def test_handler_adds_nothing_before_the_first_rebuild(aws, capsys):
+    repository, patient_filter = aws
+
+    response = handler(
+        event=dynamodb_stream_events(),
+        repository=repository,
+        patient_filter=patient_filter,
+        environment=ENVIRONMENT,
+        clock=lambda: LAST_CHANGE_AT + 1,
+    )
+
+    assert response["added"] == 0
+    assert _published(patient_filter) is None
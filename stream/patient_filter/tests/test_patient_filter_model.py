@@ -0,0 +1,23 @@
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBStreamEvent,
+)
+
+from nrlf.core.tests.stream_events import (
+    CREATED_NHS_NUMBER,
+    UPDATED_NHS_NUMBER,
+    dynamodb_stream_events,
+)
+from stream.patient_filter.model import Patients
+
+
+def test_patients_from_records():
+    event = DynamoDBStreamEvent(dynamodb_stream_events())
+
+    patients = Patients.from_records(event.records)
+
+    assert patients.records == 3  # i.e. not the version item
+    assert patients.nhs_numbers == {  # i.e. not the pointer which was deleted
+        CREATED_NHS_NUMBER,
+        UPDATED_NHS_NUMBER,
+    }
+    assert patients.lag_seconds(now=1700000010) == 10
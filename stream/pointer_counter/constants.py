@@ -0,0 +1,7 @@
+SERVICE = "pointer_counter"
+
+
+class Metric:
+    LAG = "PointerCountLag"
+    RECORDS = "PointerCountRecords"
+    COUNTS = "PointerCountUpdates"
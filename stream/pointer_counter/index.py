@@ -0,0 +1,72 @@
+"""
+Keeps the materialised pointer counts (see nrlf.core.pointer_counts) up to
+date from the DocumentPointer table's stream, by adding the net change of
+each batch to each count.
+
+The stream delivers each record at least once, so each batch is added once
+per batch id (see PointerCountRepository.add), which is the same when the
+batch is retried. Any drift (e.g. if a batch is split) is corrected by the
+reconciliation job (cron/reconcile_pointer_counts).
+"""
+import os
+import time
+from typing import Callable, Union
+
+from aws_lambda_powertools.metrics import Metrics, MetricUnit
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBStreamEvent,
+)
+from lambda_utils.constants import MetricsConstants
+
+from nrlf.core.clients import get_client
+from nrlf.core.pointer_counts import PointerCountRepository
+from stream.pointer_counter.constants import SERVICE, Metric
+from stream.pointer_counter.model import CountChanges, Environment
+
+REPOSITORY = PointerCountRepository(
+    client=get_client("dynamodb"), environment_prefix=os.environ.get("PREFIX", "")
+)
+
+
+def emit_metrics(
+    changes: CountChanges, lag_seconds: Union[float, None], environment: str
+):
+    """Prints the metrics of the batch in CloudWatch Embedded Metric Format"""
+    emf = Metrics(namespace=MetricsConstants.NAMESPACE, service=SERVICE)
+    emf.add_dimension(name="environment", value=environment)
+    emf.add_metric(name=Metric.RECORDS, unit=MetricUnit.Count, value=changes.records)
+    emf.add_metric(name=Metric.COUNTS, unit=MetricUnit.Count, value=len(changes.deltas))
+    if lag_seconds is not None:
+        emf.add_metric(
+            name=Metric.LAG, unit=MetricUnit.Milliseconds, value=lag_seconds * 1000
+        )
+    emf.flush_metrics()
+
+
+def handler(
+    event,
+    context=None,
+    repository: PointerCountRepository = None,
+    environment: Environment = None,
+    clock: Callable[[], float] = time.time,
+) -> dict:
+    if repository is None:
+        repository = REPOSITORY
+
+    if environment is None:
+        environment = Environment.construct()
+
+    event = DynamoDBStreamEvent(event)
+    changes = CountChanges.from_records(event.records)
+    repository.start_request()
+    repository.add(changes.deltas, batch_id=changes.batch_id)
+
+    lag_seconds = changes.lag_seconds(now=clock())
+    emit_metrics(
+        changes=changes, lag_seconds=lag_seconds, environment=environment.ENVIRONMENT
+    )
+    return {
+        "records": changes.records,
+        "counts": len(changes.deltas),
+        "lag_seconds": lag_seconds,
+    }
@@ -0,0 +1,73 @@
+import hashlib
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBRecord,
+)
+from pydantic import BaseModel
+
+from nrlf.core.pointer_counts import POINTER_KEY_PREFIX, count_keys
+
+
+class Environment(BaseModel):
+    ENVIRONMENT: str
+    PREFIX: str = ""
+
+    @classmethod
+    def construct(cls) -> "Environment":
+        return cls(**os.environ)
+
+
+@dataclass
+class CountChanges:
+    """
+    The change to each pointer count made by a batch of stream records: each
+    pointer in an old image is uncounted and each in a new image is counted,
+    so that a modification which doesn't move a pointer changes nothing
+    """
+
+    records: int = 0
+    deltas: Counter = field(default_factory=Counter)
+    created_at: list[int] = field(default_factory=list)
+    event_ids: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_records(cls, records: Iterable[DynamoDBRecord]) -> "CountChanges":
+        changes = cls()
+        for record in records:
+            if not record.dynamodb.keys["pk"].startswith(POINTER_KEY_PREFIX):
+                continue
+            changes.records += 1
+            changes.event_ids.append(record.event_id)
+            if record.dynamodb.old_image:
+                old_image = record.dynamodb.old_image
+                changes.deltas.subtract(
+                    count_keys(old_image["nhs_number"], old_image["type"])
+                )
+            if record.dynamodb.new_image:
+                new_image = record.dynamodb.new_image
+                changes.deltas.update(
+                    count_keys(new_image["nhs_number"], new_image["type"])
+                )
+            if record.dynamodb.approximate_creation_date_time is not None:
+                changes.created_at.append(
+                    record.dynamodb.approximate_creation_date_time
+                )
+        changes.deltas = Counter(
+            {pk: delta for pk, delta in changes.deltas.items() if delta}
+        )
+        return changes
+
+    @property
+    def batch_id(self) -> str:
+        """Identifies the batch by its records, so that it is the same when retried"""
+        return hashlib.sha256("\n".join(self.event_ids).encode()).hexdigest()
+
+    def lag_seconds(self, now: float) -> Optional[float]:
+        """The time between the oldest change and it being counted"""
+        if not self.created_at:
+            return None
+        return max(now - min(self.created_at), 0)
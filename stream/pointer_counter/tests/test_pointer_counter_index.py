@@ -0,0 +1,87 @@
+import boto3
+import moto
+import pytest
+
+from feature_tests.common.constants import DOCUMENT_POINTER_TABLE_DEFINITION
+from nrlf.core.model import DocumentPointer
+from nrlf.core.pointer_counts import (
+    PointerCountRepository,
+    patient_count_key,
+    patient_type_count_key,
+)
+from nrlf.core.tests.stream_events import (
+    CREATED_NHS_NUMBER,
+    DELETED_NHS_NUMBER,
+    LAST_CHANGE_AT,
+    POINTER_TYPE,
+    UPDATED_NHS_NUMBER,
+    dynamodb_stream_events,
+)
+from nrlf.core.validators import json_loads
+from stream.pointer_counter.constants import Metric
+from stream.pointer_counter.index import handler
+from stream.pointer_counter.model import Environment
+
+ENVIRONMENT = Environment(ENVIRONMENT="test")
+
+
+@pytest.fixture
+def repository():
+    with moto.mock_dynamodb():
+        client = boto3.client("dynamodb")
+        client.create_table(
+            TableName=DocumentPointer.kebab(), **DOCUMENT_POINTER_TABLE_DEFINITION
+        )
+        yield PointerCountRepository(client=client)
+
+
+def test_handler_updates_counts(repository: PointerCountRepository, capsys):
+    repository.add({patient_count_key(DELETED_NHS_NUMBER): 2}, batch_id="seed")
+
+    response = handler(
+        event=dynamodb_stream_events(),
+        repository=repository,
+        environment=ENVIRONMENT,
+        clock=lambda: LAST_CHANGE_AT + 1,
+    )
+
+    assert response == {"records": 3, "counts": 4, "lag_seconds": 3}
+    assert repository.read_counts(
+        [
+            patient_count_key(CREATED_NHS_NUMBER),
+            patient_type_count_key(CREATED_NHS_NUMBER, POINTER_TYPE),
+            patient_count_key(UPDATED_NHS_NUMBER),
+            patient_count_key(DELETED_NHS_NUMBER),
+        ]
+    ) == {
+        patient_count_key(CREATED_NHS_NUMBER): 1,
+        patient_type_count_key(CREATED_NHS_NUMBER, POINTER_TYPE): 1,
+        patient_count_key(UPDATED_NHS_NUMBER): 0,
+        patient_count_key(DELETED_NHS_NUMBER): 1,
+    }
+    (emf,) = map(json_loads, capsys.readouterr().out.splitlines())
+    assert emf[Metric.LAG] == [3000]
+    assert emf[Metric.RECORDS] == [3]
+    assert emf[Metric.COUNTS] == [4]
+
+
+def test_handler_counts_a_retried_batch_once(repository: PointerCountRepository):
+    for _ in range(2):
+        handler(
+            event=dynamodb_stream_events(),
+            repository=repository,
+            environment=ENVIRONMENT,
+        )
+
+    assert repository.count(CREATED_NHS_NUMBER, pointer_types=[POINTER_TYPE]) == 1
+
+
+def test_handler_counts_another_batch(repository: PointerCountRepository):
+    event = dynamodb_stream_events()
+    handler(event=event, repository=repository, environment=ENVIRONMENT)
+    for record in event["Records"]:
+        record["eventID"] += "-next"
+
+    handler(event=event, repository=repository, environment=ENVIRONMENT)
+
+    assert repository.count(CREATED_NHS_NUMBER, pointer_types=[POINTER_TYPE]) == 2
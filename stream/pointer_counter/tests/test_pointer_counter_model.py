@@ -0,0 +1,55 @@
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBStreamEvent,
+)
+
+from nrlf.core.pointer_counts import patient_count_key, patient_type_count_key
+from nrlf.core.tests.stream_events import (
+    CREATED_NHS_NUMBER,
+    DELETED_NHS_NUMBER,
+    POINTER_TYPE,
+    dynamodb_stream_events,
+)
+from stream.pointer_counter.model import CountChanges
+
+
+def test_count_changes_from_records():
+    event = DynamoDBStreamEvent(dynamodb_stream_events())
+
+    changes = CountChanges.from_records(event.records)
+
+    assert changes.records == 3  # i.e. not the version item
+    assert changes.deltas == {  # i.e. nothing for the pointer which was modified
+        patient_count_key(CREATED_NHS_NUMBER): 1,
+        patient_type_count_key(CREATED_NHS_NUMBER, POINTER_TYPE): 1,
+        patient_count_key(DELETED_NHS_NUMBER): -1,
+        patient_type_count_key(DELETED_NHS_NUMBER, POINTER_TYPE): -1,
+    }
+    assert changes.lag_seconds(now=1700000010) == 10
+    assert changes.event_ids == ["event-1", "event-2", "event-3"]
+
+
+def test_count_changes_batch_id():
+    def _batch_id(event: dict) -> str:
+        return CountChanges.from_records(DynamoDBStreamEvent(event).records).batch_id
+
+    event = dynamodb_stream_events()
+    batch_id = _batch_id(event)
+    (first, *others) = event["Records"]
+    first["eventID"] = "event-0"
+
+    assert _batch_id(dynamodb_stream_events()) == batch_id  # i.e. when retried
+    assert _batch_id(event) != batch_id
+    assert _batch_id({"Records": others}) != batch_id
+
+
+def test_count_changes_from_a_pointer_which_moved():
+    event = dynamodb_stream_events()
+    (_, modify, *_) = event["Records"]
+    modify["dynamodb"]["NewImage"]["type"] = {"S": "http://snomed.info/sct|1"}
+
+    changes = CountChanges.from_records(
+        DynamoDBStreamEvent({"Records": [modify]}).records
+    )
+
+    assert sum(changes.deltas.values()) == 0
+    assert len(changes.deltas) == 2  # i.e. the patient's total is unchanged
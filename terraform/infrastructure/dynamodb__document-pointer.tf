@@ -41,6 +41,26 @@ resource "aws_dynamodb_table" "document-pointer" {
     type = "S"
   }
 
+  attribute {
+    name = "pk_3"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk_3"
+    type = "S"
+  }
+
+  attribute {
+    name = "pk_4"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk_4"
+    type = "S"
+  }
+
   global_secondary_index {
     name            = "idx_gsi_1"
     hash_key        = "pk_1"
@@ -55,6 +75,20 @@ resource "aws_dynamodb_table" "document-pointer" {
     projection_type = "ALL"
   }
 
+  global_secondary_index {
+    name            = "idx_gsi_3"
+    hash_key        = "pk_3"
+    range_key       = "sk_3"
+    projection_type = "ALL"
+  }
+
+  global_secondary_index {
+    name            = "idx_gsi_4"
+    hash_key        = "pk_4"
+    range_key       = "sk_4"
+    projection_type = "ALL"
+  }
+
   server_side_encryption {
     enabled     = true
     kms_key_arn = aws_kms_key.document-pointer.arn
@@ -63,6 +97,12 @@ resource "aws_dynamodb_table" "document-pointer" {
   point_in_time_recovery {
     enabled = true
   }
+
+  # Expires the markers of the batches added to the pointer counts
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
 }
 
 # ------------------------------------------------------------------------------
@@ -91,6 +131,8 @@ resource "aws_iam_policy" "document-pointer__dynamodb-read" {
           "dynamodb:Query",
           "dynamodb:Scan",
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
+          "dynamodb:DescribeTable",
         ],
         Resource = [
           "${aws_dynamodb_table.document-pointer.arn}*"
@@ -37,9 +37,13 @@ module "consumer__countDocumentReference" {
     PREFIX                      = "${local.prefix}--"
     ENVIRONMENT                 = local.environment
     SPLUNK_INDEX                = module.firehose__processor.splunk.index
+    COUNT_FROM_POINTER_COUNTS   = var.count_from_pointer_counts
+    PATIENT_FILTER_BUCKET       = var.patient_filter_enabled ? aws_s3_bucket.patient-filter.id : ""
+    PATIENT_FILTER_TTL_SECONDS  = var.patient_filter_ttl_seconds
   }
   additional_policies = [
     aws_iam_policy.document-pointer__dynamodb-read.arn,
+    aws_iam_policy.patient-filter__s3-read.arn,
     aws_iam_policy.document-pointer__kms-read-write.arn
   ]
   firehose_subscriptions = [
@@ -58,13 +62,17 @@ module "consumer__searchDocumentReference" {
   api_gateway_source_arn = ["arn:aws:execute-api:${local.region}:${var.assume_account}:${module.consumer__gateway.api_gateway_id}/*/GET/DocumentReference"]
   kms_key_id             = module.kms__cloudwatch.kms_arn
   environment_variables = {
-    DOCUMENT_POINTER_TABLE_NAME = aws_dynamodb_table.document-pointer.name
-    PREFIX                      = "${local.prefix}--"
-    ENVIRONMENT                 = local.environment
-    SPLUNK_INDEX                = module.firehose__processor.splunk.index
+    DOCUMENT_POINTER_TABLE_NAME  = aws_dynamodb_table.document-pointer.name
+    PREFIX                       = "${local.prefix}--"
+    ENVIRONMENT                  = local.environment
+    SPLUNK_INDEX                 = module.firehose__processor.splunk.index
+    PATIENT_FILTER_BUCKET        = var.patient_filter_enabled ? aws_s3_bucket.patient-filter.id : ""
+    PATIENT_FILTER_TTL_SECONDS   = var.patient_filter_ttl_seconds
+    SEARCH_BY_PATIENT_TYPE_INDEX = var.search_by_patient_type_index
   }
   additional_policies = [
     aws_iam_policy.document-pointer__dynamodb-read.arn,
+    aws_iam_policy.patient-filter__s3-read.arn,
     aws_iam_policy.document-pointer__kms-read-write.arn
   ]
   firehose_subscriptions = [
@@ -83,13 +91,17 @@ module "consumer__searchPostDocumentReference" {
   api_gateway_source_arn = ["arn:aws:execute-api:${local.region}:${var.assume_account}:${module.consumer__gateway.api_gateway_id}/*/POST/DocumentReference/_search"]
   kms_key_id             = module.kms__cloudwatch.kms_arn
   environment_variables = {
-    DOCUMENT_POINTER_TABLE_NAME = aws_dynamodb_table.document-pointer.name
-    PREFIX                      = "${local.prefix}--"
-    ENVIRONMENT                 = local.environment
-    SPLUNK_INDEX                = module.firehose__processor.splunk.index
+    DOCUMENT_POINTER_TABLE_NAME  = aws_dynamodb_table.document-pointer.name
+    PREFIX                       = "${local.prefix}--"
+    ENVIRONMENT                  = local.environment
+    SPLUNK_INDEX                 = module.firehose__processor.splunk.index
+    PATIENT_FILTER_BUCKET        = var.patient_filter_enabled ? aws_s3_bucket.patient-filter.id : ""
+    PATIENT_FILTER_TTL_SECONDS   = var.patient_filter_ttl_seconds
+    SEARCH_BY_PATIENT_TYPE_INDEX = var.search_by_patient_type_index
   }
   additional_policies = [
     aws_iam_policy.document-pointer__dynamodb-read.arn,
+    aws_iam_policy.patient-filter__s3-read.arn,
     aws_iam_policy.document-pointer__kms-read-write.arn
   ]
   firehose_subscriptions = [
@@ -185,10 +197,11 @@ module "producer__searchDocumentReference" {
   api_gateway_source_arn = ["arn:aws:execute-api:${local.region}:${var.assume_account}:${module.producer__gateway.api_gateway_id}/*/GET/DocumentReference"]
   kms_key_id             = module.kms__cloudwatch.kms_arn
   environment_variables = {
-    DOCUMENT_POINTER_TABLE_NAME = aws_dynamodb_table.document-pointer.name
-    PREFIX                      = "${local.prefix}--"
-    ENVIRONMENT                 = local.environment
-    SPLUNK_INDEX                = module.firehose__processor.splunk.index
+    DOCUMENT_POINTER_TABLE_NAME          = aws_dynamodb_table.document-pointer.name
+    PREFIX                               = "${local.prefix}--"
+    ENVIRONMENT                          = local.environment
+    SPLUNK_INDEX                         = module.firehose__processor.splunk.index
+    SEARCH_BY_ORGANISATION_PATIENT_INDEX = var.search_by_organisation_patient_index
   }
   additional_policies = [
     aws_iam_policy.document-pointer__dynamodb-read.arn,
@@ -210,10 +223,11 @@ module "producer__searchPostDocumentReference" {
   api_gateway_source_arn = ["arn:aws:execute-api:${local.region}:${var.assume_account}:${module.producer__gateway.api_gateway_id}/*/POST/DocumentReference/_search"]
   kms_key_id             = module.kms__cloudwatch.kms_arn
   environment_variables = {
-    DOCUMENT_POINTER_TABLE_NAME = aws_dynamodb_table.document-pointer.name
-    PREFIX                      = "${local.prefix}--"
-    ENVIRONMENT                 = local.environment
-    SPLUNK_INDEX                = module.firehose__processor.splunk.index
+    DOCUMENT_POINTER_TABLE_NAME          = aws_dynamodb_table.document-pointer.name
+    PREFIX                               = "${local.prefix}--"
+    ENVIRONMENT                          = local.environment
+    SPLUNK_INDEX                         = module.firehose__processor.splunk.index
+    SEARCH_BY_ORGANISATION_PATIENT_INDEX = var.search_by_organisation_patient_index
   }
   additional_policies = [
     aws_iam_policy.document-pointer__dynamodb-read.arn,
@@ -5,9 +5,11 @@ resource "aws_lambda_function" "lambda_function" {
   role             = aws_iam_role.lambda_role.arn
   filename         = "${path.module}/../../../../${var.parent_path}/${var.name}/dist/${var.name}.zip"
   source_code_hash = filebase64sha256("${path.module}/../../../../${var.parent_path}/${var.name}/dist/${var.name}.zip")
-  timeout          = local.lambda_timeout
+  timeout          = coalesce(var.timeout, local.lambda_timeout)
   memory_size      = 512
 
+  reserved_concurrent_executions = var.reserved_concurrent_executions
+
   environment {
     variables = merge(var.environment_variables, { "SOURCE" : "${var.prefix}--${replace(var.parent_path, "/", "--")}--${var.name}" })
   }
@@ -29,3 +29,11 @@ variable "firehose_subscriptions" {
 variable "vpc" {
   default = {}
 }
+
+variable "timeout" {
+  default = null
+}
+
+variable "reserved_concurrent_executions" {
+  default = -1
+}
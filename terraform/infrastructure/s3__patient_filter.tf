@@ -0,0 +1,68 @@
+resource "aws_s3_bucket" "patient-filter" {
+  bucket        = "${local.prefix}--patient-filter"
+  force_destroy = true
+
+  tags = {
+    Name        = "patient filter"
+    Environment = "${local.prefix}"
+  }
+}
+
+resource "aws_s3_bucket_server_side_encryption_configuration" "patient-filter" {
+  bucket = aws_s3_bucket.patient-filter.bucket
+
+  rule {
+    apply_server_side_encryption_by_default {
+      sse_algorithm = "AES256"
+    }
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "patient-filter" {
+  bucket = aws_s3_bucket.patient-filter.id
+
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+resource "aws_iam_policy" "patient-filter__s3-read" {
+  name        = "${local.prefix}--patient-filter--s3-read"
+  description = "Read the patient filter S3 bucket"
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "s3:GetObject",
+          "s3:ListBucket",
+        ]
+        Effect = "Allow"
+        Resource = [
+          aws_s3_bucket.patient-filter.arn,
+          "${aws_s3_bucket.patient-filter.arn}/*"
+        ]
+      },
+    ]
+  })
+}
+
+resource "aws_iam_policy" "patient-filter__s3-write" {
+  name        = "${local.prefix}--patient-filter--s3-write"
+  description = "Write to the patient filter S3 bucket"
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "s3:PutObject",
+        ]
+        Effect = "Allow"
+        Resource = [
+          "${aws_s3_bucket.patient-filter.arn}/*"
+        ]
+      },
+    ]
+  })
+}
@@ -0,0 +1,61 @@
+# ------------------------------------------------------------------------------
+# Invalidates the shared read caches from the Document Pointer stream
+# ------------------------------------------------------------------------------
+
+module "stream__cache_invalidator" {
+  source      = "./modules/lambda"
+  parent_path = "stream"
+  name        = "cache_invalidator"
+  region      = local.region
+  prefix      = local.prefix
+  layers      = [module.lambda-utils.layer_arn, module.nrlf.layer_arn, module.third_party.layer_arn]
+  kms_key_id  = module.kms__cloudwatch.kms_arn
+  environment_variables = {
+    ENVIRONMENT = local.environment
+    CACHE_URL   = var.cache_url
+  }
+  additional_policies = [
+    aws_iam_policy.document-pointer__stream-read.arn,
+    aws_iam_policy.document-pointer__kms-read-write.arn
+  ]
+  handler = "stream.cache_invalidator.index.handler"
+}
+
+resource "aws_iam_policy" "document-pointer__stream-read" {
+  name        = "${local.prefix}--document-pointer--stream-read"
+  description = "Read from the document-pointer table stream"
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ],
+        Resource = [
+          aws_dynamodb_table.document-pointer.stream_arn
+        ]
+      }
+    ]
+  })
+}
+
+resource "aws_lambda_event_source_mapping" "document-pointer__cache-invalidator" {
+  event_source_arn                   = aws_dynamodb_table.document-pointer.stream_arn
+  function_name                      = module.stream__cache_invalidator.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 0
+  bisect_batch_on_function_error     = true
+  maximum_retry_attempts             = 10
+
+  # Only pointers, since nothing else is cached
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ dynamodb = { Keys = { pk = { S = [{ prefix = "D#" }] } } } })
+    }
+  }
+}
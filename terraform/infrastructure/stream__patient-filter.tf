@@ -0,0 +1,69 @@
+# ------------------------------------------------------------------------------
+# Maintains the patient filter: from the Document Pointer stream, and rebuilt
+# from a scan of the table on a schedule. The reserved concurrency of one means
+# that the stream waits while the filter is rebuilt (see index.py).
+# ------------------------------------------------------------------------------
+
+module "stream__patient_filter" {
+  source      = "./modules/lambda"
+  parent_path = "stream"
+  name        = "patient_filter"
+  region      = local.region
+  prefix      = local.prefix
+  layers      = [module.lambda-utils.layer_arn, module.nrlf.layer_arn, module.third_party.layer_arn]
+  kms_key_id  = module.kms__cloudwatch.kms_arn
+  environment_variables = {
+    PREFIX                    = "${local.prefix}--"
+    ENVIRONMENT               = local.environment
+    PATIENT_FILTER_BUCKET     = aws_s3_bucket.patient-filter.id
+    PATIENT_FILTER_ERROR_RATE = var.patient_filter_error_rate
+    PATIENT_FILTER_MAX_BYTES  = var.patient_filter_max_bytes
+  }
+  additional_policies = [
+    aws_iam_policy.document-pointer__stream-read.arn,
+    aws_iam_policy.document-pointer__dynamodb-read.arn,
+    aws_iam_policy.document-pointer__kms-read-write.arn,
+    aws_iam_policy.patient-filter__s3-read.arn,
+    aws_iam_policy.patient-filter__s3-write.arn
+  ]
+  handler                        = "stream.patient_filter.index.handler"
+  timeout                        = 900
+  reserved_concurrent_executions = 1
+}
+
+resource "aws_lambda_event_source_mapping" "document-pointer__patient-filter" {
+  event_source_arn                   = aws_dynamodb_table.document-pointer.stream_arn
+  function_name                      = module.stream__patient_filter.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 10
+
+  # Only pointers, since the filter is of the patients with pointers
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ dynamodb = { Keys = { pk = { S = [{ prefix = "D#" }] } } } })
+    }
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "rebuild-patient-filter" {
+  name                = "${local.prefix}--rebuild-patient-filter"
+  description         = "Rule to fire to rebuild the patient filter"
+  schedule_expression = "cron(0 3 ? * * *)" # 3am, every day
+}
+
+resource "aws_cloudwatch_event_target" "rebuild-patient-filter" {
+  target_id = "${local.prefix}--rebuild-patient-filter"
+  rule      = aws_cloudwatch_event_rule.rebuild-patient-filter.name
+  arn       = module.stream__patient_filter.arn
+  input     = jsonencode({ rebuild = true })
+}
+
+resource "aws_lambda_permission" "rebuild-patient-filter" {
+  statement_id  = "AllowExecutionFromCloudWatch"
+  action        = "lambda:InvokeFunction"
+  function_name = module.stream__patient_filter.arn
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.rebuild-patient-filter.arn
+}
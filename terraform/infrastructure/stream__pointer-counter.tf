@@ -0,0 +1,86 @@
+# ------------------------------------------------------------------------------
+# Maintains the pointer counts from the Document Pointer stream
+# ------------------------------------------------------------------------------
+
+module "stream__pointer_counter" {
+  source      = "./modules/lambda"
+  parent_path = "stream"
+  name        = "pointer_counter"
+  region      = local.region
+  prefix      = local.prefix
+  layers      = [module.lambda-utils.layer_arn, module.nrlf.layer_arn, module.third_party.layer_arn]
+  kms_key_id  = module.kms__cloudwatch.kms_arn
+  environment_variables = {
+    PREFIX      = "${local.prefix}--"
+    ENVIRONMENT = local.environment
+  }
+  additional_policies = [
+    aws_iam_policy.document-pointer__stream-read.arn,
+    aws_iam_policy.document-pointer__dynamodb-read.arn,
+    aws_iam_policy.document-pointer__dynamodb-write.arn,
+    aws_iam_policy.document-pointer__kms-read-write.arn
+  ]
+  handler = "stream.pointer_counter.index.handler"
+}
+
+resource "aws_lambda_event_source_mapping" "document-pointer__pointer-counter" {
+  event_source_arn                   = aws_dynamodb_table.document-pointer.stream_arn
+  function_name                      = module.stream__pointer_counter.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 10
+
+  # Only pointers, so that writing the counts (and batch markers) doesn't invoke
+  # this again
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ dynamodb = { Keys = { pk = { S = [{ prefix = "D#" }] } } } })
+    }
+  }
+}
+
+# ------------------------------------------------------------------------------
+# Rebuilds the pointer counts from a scan of the Document Pointer table
+# ------------------------------------------------------------------------------
+
+module "cron__reconcile_pointer_counts" {
+  source      = "./modules/lambda"
+  parent_path = "cron"
+  name        = "reconcile_pointer_counts"
+  region      = local.region
+  prefix      = local.prefix
+  layers      = [module.lambda-utils.layer_arn, module.nrlf.layer_arn, module.third_party.layer_arn]
+  kms_key_id  = module.kms__cloudwatch.kms_arn
+  environment_variables = {
+    PREFIX      = "${local.prefix}--"
+    ENVIRONMENT = local.environment
+  }
+  additional_policies = [
+    aws_iam_policy.document-pointer__dynamodb-read.arn,
+    aws_iam_policy.document-pointer__dynamodb-write.arn,
+    aws_iam_policy.document-pointer__kms-read-write.arn
+  ]
+  handler = "cron.reconcile_pointer_counts.index.handler"
+  timeout = 900
+}
+
+resource "aws_cloudwatch_event_rule" "reconcile-pointer-counts" {
+  name                = "${local.prefix}--reconcile-pointer-counts"
+  description         = "Rule to fire to reconcile the pointer counts"
+  schedule_expression = "cron(0 4 ? * * *)" # 4am, every day
+}
+
+resource "aws_cloudwatch_event_target" "reconcile-pointer-counts" {
+  target_id = "${local.prefix}--reconcile-pointer-counts"
+  rule      = aws_cloudwatch_event_rule.reconcile-pointer-counts.name
+  arn       = module.cron__reconcile_pointer_counts.arn
+}
+
+resource "aws_lambda_permission" "reconcile-pointer-counts" {
+  statement_id  = "AllowExecutionFromCloudWatch"
+  action        = "lambda:InvokeFunction"
+  function_name = module.cron__reconcile_pointer_counts.arn
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.reconcile-pointer-counts.arn
+}
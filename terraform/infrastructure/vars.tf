@@ -27,3 +27,50 @@ variable "deletion_protection" {
   type    = bool
   default = false
 }
+
+# Url of the Redis-protocol server which holds the shared read caches (if any)
+variable "cache_url" {
+  type      = string
+  default   = ""
+  sensitive = true
+}
+
+# Whether _count reads the pointer counts, which must have been reconciled first
+variable "count_from_pointer_counts" {
+  type    = bool
+  default = false
+}
+
+# Whether consumer searches read idx_gsi_3, which must have been backfilled first
+variable "search_by_patient_type_index" {
+  type    = bool
+  default = false
+}
+
+# Whether producer searches by subject read idx_gsi_4, which must have been backfilled first
+variable "search_by_organisation_patient_index" {
+  type    = bool
+  default = false
+}
+
+# Whether searches and counts read the patient filter, which must have been built first
+variable "patient_filter_enabled" {
+  type    = bool
+  default = false
+}
+
+variable "patient_filter_ttl_seconds" {
+  type    = number
+  default = 60
+}
+
+# The patient filter's false positive rate, unless that needs more than its max bytes
+variable "patient_filter_error_rate" {
+  type    = number
+  default = 0.01
+}
+
+variable "patient_filter_max_bytes" {
+  type    = number
+  default = 33554432
+}